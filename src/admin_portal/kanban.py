@@ -0,0 +1,140 @@
+"""
+Paginated kanban boards (leads, clients, cases).
+
+A board renders only the first page of each column; the rest is fetched by
+HTMX as the user scrolls (see admin_portal/fragments/kanban_cards.html).
+Columns are paginated with a keyset cursor on (order_field, id), so deep
+pages cost the same as the first one, and every card is loaded with an
+.only() projection of the fields it displays. Column totals come from a
+single aggregate query.
+"""
+import base64
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Q
+
+from apps.clients.models import Client
+from apps.intake.models import Lead
+from apps.legal_cases.models import LegalCase
+
+
+@dataclass(frozen=True)
+class Column:
+    key: str
+    filter: Q
+    empty_label: str = ''
+
+
+@dataclass(frozen=True)
+class Board:
+    name: str
+    model: type
+    columns: Tuple[Column, ...]
+    order_field: str
+    fields: Tuple[str, ...]
+    card_template: str
+    select_related: Tuple[str, ...] = ()
+
+    def column(self, key: str) -> Optional[Column]:
+        return next((column for column in self.columns if column.key == key), None)
+
+    def queryset(self, base=None):
+        qs = base if base is not None else self.model.objects.all()
+        if self.select_related:
+            qs = qs.select_related(*self.select_related)
+        return qs.only(*self.fields).order_by(f'-{self.order_field}', '-id')
+
+    def counts(self, base=None) -> Dict[str, int]:
+        """Cards per column, in one query."""
+        qs = base if base is not None else self.model.objects.all()
+        return qs.aggregate(**{column.key: Count('pk', filter=column.filter) for column in self.columns})
+
+    def page(self, column: Column, base=None, cursor: str = '', page_size: int = None) -> Tuple[List, str]:
+        """
+        One page of a column, newest first.
+
+        Returns:
+            (cards, next_cursor): next_cursor is '' on the last page
+        """
+        page_size = page_size or page_size_setting()
+        qs = self.queryset(base).filter(column.filter)
+        position = self.decode_cursor(cursor)
+        if position:
+            value, pk = position
+            qs = qs.filter(
+                Q(**{f'{self.order_field}__lt': value})
+                | Q(**{self.order_field: value, 'id__lt': pk})
+            )
+        cards = list(qs[:page_size + 1])
+        if len(cards) <= page_size:
+            return cards, ''
+        cards = cards[:page_size]
+        return cards, self.encode_cursor(cards[-1])
+
+    def encode_cursor(self, obj) -> str:
+        value = getattr(obj, self.order_field)
+        raw = f'{value.isoformat()}|{obj.pk}'
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor: str):
+        """(order value, id) of the last card shown, or None for the first page / a bad cursor."""
+        if not cursor:
+            return None
+        try:
+            value, pk = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+            field = self.model._meta.get_field(self.order_field)
+            return field.to_python(value), int(pk)
+        except (ValueError, ValidationError):
+            return None
+
+
+def page_size_setting() -> int:
+    return getattr(settings, 'ADMIN_KANBAN_PAGE_SIZE', 25)
+
+
+LEADS = Board(
+    name='leads',
+    model=Lead,
+    columns=(
+        Column('new', Q(is_qualified=False, external_id__isnull=True), 'Nenhum lead novo'),
+        Column('qualified', Q(is_qualified=True, external_id__isnull=True), 'Nenhum lead qualificado'),
+        Column('converted', Q(external_id__isnull=False), 'Nenhum lead convertido'),
+    ),
+    order_field='created_at',
+    fields=('id', 'full_name', 'case_type', 'score', 'viability_status', 'created_at'),
+    card_template='admin_portal/fragments/lead_card.html',
+)
+
+CLIENTS = Board(
+    name='clients',
+    model=Client,
+    columns=(
+        Column('prospects', Q(status='PROSPECT'), 'Nenhum cliente em negociação.'),
+        Column('onboarding', Q(status='ONBOARDING')),
+        Column('active', Q(status='ACTIVE')),
+        Column('archived', Q(status='ARCHIVED')),
+    ),
+    order_field='created_at',
+    fields=('id', 'full_name', 'client_type', 'status', 'phone', 'email', 'created_at'),
+    card_template='admin_portal/fragments/client_card.html',
+)
+
+CASES = Board(
+    name='cases',
+    model=LegalCase,
+    columns=(
+        Column('analysis', Q(status='ANALYSIS'), 'Nenhum caso em análise'),
+        Column('active', Q(status='ACTIVE'), 'Nenhum caso ativo'),
+        Column('suspended', Q(status='SUSPENDED'), 'Nenhum caso suspenso'),
+        Column('archived', Q(status='ARCHIVED'), 'Nenhum caso arquivado'),
+    ),
+    order_field='entry_date',
+    fields=('id', 'title', 'area', 'status', 'entry_date', 'last_update', 'client__full_name'),
+    card_template='admin_portal/fragments/case_card.html',
+    select_related=('client',),
+)
+
+BOARDS = {board.name: board for board in (LEADS, CLIENTS, CASES)}
@@ -0,0 +1,66 @@
+import time
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import QuerySet
+from django.test import RequestFactory
+from apps.intake.models import Lead
+from admin_portal import kanban
+from admin_portal.views import leads_kanban
+from core.security.fields import decryption_cache, decrypt_many
+
+
+class Command(BaseCommand):
+    help = 'Compare decrypt calls of the leads kanban with eager vs lazy decryption (runs in a rolled-back transaction)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leads', type=int, default=5000, help='Number of synthetic leads to create')
+
+    def handle(self, *args, **options):
+        total = options['leads']
+
+        with transaction.atomic():
+            self.stdout.write(f'Creating {total} synthetic leads...')
+            Lead.objects.bulk_create(
+                [
+                    Lead(
+                        full_name=f'Benchmark Lead {i}',
+                        contact_info=f'(19) 9{i:04d}-{i % 10000:04d}',
+                        case_type='OTHER',
+                        is_qualified=(i % 3 == 0),
+                    )
+                    for i in range(total)
+                ],
+                batch_size=500,
+            )
+            # The kanban is paginated: only the first page of each column is rendered
+            rendered_ids = [card.pk for column in kanban.LEADS.columns for card in kanban.LEADS.page(column)[0]]
+            rendered_rows = len(rendered_ids)
+
+            # Eager baseline: every rendered row decrypts contact_info once
+            decryption_cache.clear()
+            decryption_cache.reset_stats()
+            started = time.perf_counter()
+            decrypt_many(QuerySet(Lead).filter(pk__in=rendered_ids).values_list('contact_info', flat=True))
+            eager_seconds = time.perf_counter() - started
+            eager_decrypts = decryption_cache.misses
+
+            # Lazy: render the real kanban view (same rows) and count actual decrypts
+            decryption_cache.clear()
+            decryption_cache.reset_stats()
+            request = RequestFactory().get('/portal-admin/leads/')
+            request.user = User(username='benchmark', is_superuser=True)
+            started = time.perf_counter()
+            response = leads_kanban(request)
+            render_seconds = time.perf_counter() - started
+            lazy_decrypts = decryption_cache.misses
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'Kanban rows rendered:       {rendered_rows} (HTTP {response.status_code})')
+        self.stdout.write(f'Eager decrypts (before):    {eager_decrypts} ({eager_seconds * 1000:.1f} ms)')
+        self.stdout.write(f'Lazy decrypts (now):        {lazy_decrypts}')
+        self.stdout.write(f'Kanban render time (lazy):  {render_seconds * 1000:.1f} ms')
+        self.stdout.write(self.style.SUCCESS(
+            f'Saved {eager_decrypts - lazy_decrypts} decrypt calls per render'
+        ))
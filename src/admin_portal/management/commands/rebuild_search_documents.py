@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.search.engine import SEARCHABLE_TYPES
+from core.search.fields import rebuild_search_documents
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the search_document column of clients, leads, cases and articles. '
+        'Needed after writes that bypass save() (QuerySet.update, bulk_update).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', choices=sorted(SEARCHABLE_TYPES), action='append', help='Only this entity type (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        names = options['type'] or list(SEARCHABLE_TYPES)
+        for name in names:
+            model = SEARCHABLE_TYPES[name].model
+            changed = rebuild_search_documents(model, batch_size=options['batch_size'])
+            self.stdout.write(f'{model._meta.label}: {changed} documents updated')
+        self.stdout.write(self.style.SUCCESS('Search documents up to date'))
@@ -0,0 +1,130 @@
+from cryptography.fernet import InvalidToken
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.db.models import Value
+from admin_portal.models import EncryptionRotationCheckpoint
+from core.security.fields import (
+    DecryptionError,
+    EncryptedValue,
+    decryption_cache,
+    get_fernet,
+    get_primary_fernet,
+    is_token,
+    key_fingerprint,
+)
+
+# Encrypted columns re-encrypted by this command
+ROTATION_TARGETS = {
+    'clients.Client': ['cpf_cnpj', 'phone'],
+    'intake.Lead': ['contact_info'],
+    'whatsapp.OutboundMessage': ['to_number', 'body'],
+    'whatsapp.InboundEvent': ['payload'],
+    'whatsapp.Conversation': ['phone'],
+    'whatsapp.ConversationMessage': ['body'],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-encrypt PII columns with the current ENCRYPTION_KEY. Tokens from '
+        'ENCRYPTION_KEYS_PREVIOUS and legacy plaintext are rewritten in keyset-paginated '
+        'batches; progress is checkpointed so an interrupted run resumes where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--model', choices=sorted(ROTATION_TARGETS), help='Rotate a single model only')
+        parser.add_argument('--restart', action='store_true', help='Ignore saved checkpoints and start over')
+        parser.add_argument('--dry-run', action='store_true', help='Count pending rows without writing')
+
+    def handle(self, *args, **options):
+        labels = [options['model']] if options['model'] else list(ROTATION_TARGETS)
+        fingerprint = key_fingerprint()
+        self.primary = get_primary_fernet()
+        self.fernet = get_fernet()
+
+        self.stdout.write(f'Rotating to key {fingerprint}...')
+        for label in labels:
+            self.rotate_model(label, ROTATION_TARGETS[label], fingerprint, options)
+
+    def rotate_model(self, label, fields, fingerprint, options):
+        Model = apps.get_model(label)
+        dry_run = options['dry_run']
+        checkpoint, _ = EncryptionRotationCheckpoint.objects.get_or_create(
+            model_label=label, key_fingerprint=fingerprint
+        )
+        if options['restart']:
+            checkpoint.last_pk = checkpoint.rotated = checkpoint.unreadable = 0
+            checkpoint.completed = False
+        if checkpoint.completed:
+            self.stdout.write(f'{label}: already rotated ({checkpoint.rotated} values), use --restart to run again')
+            return
+        if checkpoint.last_pk:
+            self.stdout.write(f'{label}: resuming after pk {checkpoint.last_pk}')
+
+        last_pk = checkpoint.last_pk
+        while True:
+            batch = list(
+                Model.objects.filter(pk__gt=last_pk).order_by('pk').only(*fields)[:options['batch_size']]
+            )
+            if not batch:
+                break
+
+            pending = {field: [] for field in fields}
+            unreadable = 0
+            for obj in batch:
+                for field in fields:
+                    raw = obj.__dict__.get(field)
+                    if raw is None:
+                        continue
+                    token = raw.ciphertext if isinstance(raw, EncryptedValue) else raw
+                    try:
+                        new_token = self.rotate_token(token)
+                    except DecryptionError:
+                        unreadable += 1
+                        self.stderr.write(f'{label} pk={obj.pk}: {field} is unreadable with the configured keys')
+                        continue
+                    if new_token is not None:
+                        # Write the token as-is, bypassing EncryptedField.get_prep_value
+                        setattr(obj, field, Value(new_token, output_field=models.CharField()))
+                        pending[field].append(obj)
+
+            last_pk = batch[-1].pk
+            rotated = sum(len(objs) for objs in pending.values())
+            with transaction.atomic():
+                if not dry_run:
+                    for field, objs in pending.items():
+                        if objs:
+                            Model.objects.bulk_update(objs, [field])
+                    checkpoint.last_pk = last_pk
+                checkpoint.rotated += rotated
+                checkpoint.unreadable += unreadable
+                if not dry_run:
+                    checkpoint.save()
+
+            decryption_cache.clear()
+            self.stdout.write(f'{label}: up to pk {last_pk}, {checkpoint.rotated} rotated, {checkpoint.unreadable} unreadable')
+
+        if not dry_run:
+            checkpoint.completed = True
+            checkpoint.save()
+        verb = 'would rotate' if dry_run else 'rotated'
+        self.stdout.write(self.style.SUCCESS(
+            f'{label}: {verb} {checkpoint.rotated} values ({checkpoint.unreadable} unreadable)'
+        ))
+
+    def rotate_token(self, token: str):
+        """New token under the current key, or None if it already uses it."""
+        if not is_token(token):
+            # Legacy plaintext written before encryption was enabled
+            return self.primary.encrypt(token.encode()).decode()
+        try:
+            self.primary.decrypt(token.encode())
+            return None
+        except InvalidToken:
+            pass
+        try:
+            return self.fernet.rotate(token.encode()).decode()
+        except InvalidToken:
+            raise DecryptionError(token)
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_portal', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EncryptionRotationCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=100)),
+                ('key_fingerprint', models.CharField(max_length=16)),
+                ('last_pk', models.BigIntegerField(default=0)),
+                ('rotated', models.IntegerField(default=0)),
+                ('unreadable', models.IntegerField(default=0)),
+                ('completed', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Checkpoint de Rotação de Chave',
+                'verbose_name_plural': 'Checkpoints de Rotação de Chave',
+                'unique_together': {('model_label', 'key_fingerprint')},
+            },
+        ),
+    ]
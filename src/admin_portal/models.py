@@ -19,3 +19,25 @@ class SystemSettings(models.Model):
 
     def __str__(self):
         return f"Configurações - {self.office_name}"
+
+
+class EncryptionRotationCheckpoint(models.Model):
+    """
+    Progress of `manage.py rotate_encryption_keys` per model, so an
+    interrupted run resumes after the last committed primary key.
+    """
+    model_label = models.CharField(max_length=100)
+    key_fingerprint = models.CharField(max_length=16)
+    last_pk = models.BigIntegerField(default=0)
+    rotated = models.IntegerField(default=0)
+    unreadable = models.IntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Checkpoint de Rotação de Chave"
+        verbose_name_plural = "Checkpoints de Rotação de Chave"
+        unique_together = ['model_label', 'key_fingerprint']
+
+    def __str__(self):
+        return f"{self.model_label} @ {self.key_fingerprint} (pk > {self.last_pk})"
@@ -1,8 +1,11 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from in_brief.models import Article, Category
 from apps.intake.models import Lead
+from apps.clients.models import Client as ClientModel
+from apps.legal_cases.models import LegalCase
+from admin_portal import kanban
 from admin_portal.models import SystemSettings
 
 class AdminPortalTests(TestCase):
@@ -47,3 +50,83 @@ class AdminPortalTests(TestCase):
         response = self.client.get(reverse('admin_portal:settings_general'))
         self.assertEqual(response.status_code, 200)
         self.assertIn('settings', response.context)
+
+
+class KanbanPaginationTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser(username='admin', password='password', email='admin@test.com')
+        self.client.login(username='admin', password='password')
+        owner = ClientModel.objects.create(full_name='Cliente', cpf_cnpj='123.456.789-00', phone='19999990000')
+        LegalCase.objects.bulk_create([
+            LegalCase(client=owner, title=f'Caso {i}', area='CIVIL', status='ACTIVE' if i % 2 else 'ANALYSIS')
+            for i in range(7)
+        ])
+        Lead.objects.bulk_create([
+            Lead(full_name=f'Lead {i}', contact_info='x@test.com', case_type='OTHER') for i in range(5)
+        ])
+
+    @override_settings(ADMIN_KANBAN_PAGE_SIZE=2)
+    def test_cases_board_renders_first_page_with_grouped_counts(self):
+        response = self.client.get(reverse('admin_portal:cases_kanban'))
+        self.assertEqual(response.status_code, 200)
+        columns = response.context['columns']
+        self.assertEqual((columns['analysis']['count'], columns['active']['count'], columns['archived']['count']), (4, 3, 0))
+        self.assertEqual(len(columns['analysis']['cards']), 2)
+        self.assertTrue(columns['analysis']['next_cursor'])
+        self.assertEqual(columns['archived']['next_cursor'], '')
+        self.assertContains(response, 'Cliente')
+        self.assertContains(response, 'hx-trigger="revealed, click"')
+
+    @override_settings(ADMIN_KANBAN_PAGE_SIZE=2)
+    def test_query_count_does_not_grow_with_rows(self):
+        # 1 aggregate + 1 page per column, client names joined (no N+1)
+        board = kanban.CASES
+        with self.assertNumQueries(5):
+            board.counts()
+            for col in board.columns:
+                cards, _ = board.page(col)
+                [card.client.full_name for card in cards]
+
+    def test_cursor_walks_every_card_once(self):
+        board, column = kanban.LEADS, kanban.LEADS.column('new')
+        seen, cursor = [], ''
+        while True:
+            cards, cursor = board.page(column, cursor=cursor, page_size=2)
+            seen += [card.id for card in cards]
+            if not cursor:
+                break
+        self.assertEqual(seen, list(Lead.objects.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+    def test_leads_board(self):
+        response = self.client.get(reverse('admin_portal:leads_kanban'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['columns']['new']['count'], 5)
+        self.assertContains(response, 'Nenhum lead convertido')
+
+    @override_settings(ADMIN_KANBAN_PAGE_SIZE=2)
+    def test_load_more_fragment(self):
+        first = self.client.get(reverse('admin_portal:cases_kanban')).context['columns']['analysis']
+        url = reverse('admin_portal:kanban_column', args=['cases', 'analysis'])
+
+        response = self.client.get(url, {'cursor': first['next_cursor']})
+
+        self.assertEqual(response.status_code, 200)
+        titles = [card.title for card in response.context['page']['cards']]
+        self.assertEqual(len(titles), 2)
+        self.assertFalse(set(titles) & {card.title for card in first['cards']})
+        self.assertEqual(self.client.get(reverse('admin_portal:kanban_column', args=['cases', 'nope'])).status_code, 404)
+
+    def test_clients_board_keeps_search(self):
+        response = self.client.get(reverse('admin_portal:clients_list'), {'q': 'Cli'})
+        self.assertEqual(response.context['columns']['active']['count'], 1)
+        self.assertEqual(response.context['filters'], 'q=Cli')
+        response = self.client.get(reverse('admin_portal:clients_list'), {'q': 'ninguém'})
+        self.assertEqual(response.context['columns']['active']['count'], 0)
+
+    def test_clients_board_searches_e_mail(self):
+        owner = ClientModel.objects.get(full_name='Cliente')
+        owner.email = 'maria.souza@gmail.com'
+        owner.save()
+        for query in ('maria.souza@gmail.com', 'souza@gmail'):
+            response = self.client.get(reverse('admin_portal:clients_list'), {'q': query})
+            self.assertEqual(response.context['columns']['active']['count'], 1, query)
@@ -6,6 +6,7 @@ app_name = 'admin_portal'
 urlpatterns = [
     path('', views.dashboard, name='dashboard'),
     path('leads/', views.leads_kanban, name='leads_kanban'),
+    path('kanban/<str:board>/<str:column>/', views.kanban_column, name='kanban_column'),
     path('leads/<int:lead_id>/', views.lead_detail, name='lead_detail'),
     path('leads/<int:lead_id>/convert/', views.convert_lead, name='convert_lead'),
     
@@ -26,11 +27,17 @@ urlpatterns = [
     # Finance
     path('finance/', views.finance_list, name='finance_list'),
     path('finance/create/', views.finance_create, name='finance_create'),
+    path('finance/projection/', views.finance_projection, name='finance_projection'),
     path('finance/<int:item_id>/pay/', views.finance_pay, name='finance_pay'),
+    path('finance/settle/', views.finance_bulk_settle, name='finance_bulk_settle'),
+    path('finance/import/', views.finance_import, name='finance_import'),
+    path('export/<str:dataset>/', views.export_dataset, name='export_dataset'),
     
     # Settings
     path('settings/', views.settings_general, name='settings_general'),
     path('cases/<int:case_id>/generate-doc/', views.generate_document_action, name='generate_document'),
+    path('jobs/<int:job_id>/', views.job_detail, name='job_detail'),
+    path('jobs/<int:job_id>/download/', views.job_download, name='job_download'),
 
     # Articles (In Brief)
     path('articles/', views.article_list, name='article_list'),
@@ -1,110 +1,104 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.utils.text import slugify
-from django.http import HttpResponse
+from django.http import HttpResponse, Http404
+from django.views.decorators.http import require_POST
+from urllib.parse import urlencode
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Count, Q, Sum
+from django.db.models import Count
 from django.utils import timezone
-from datetime import timedelta
 from apps.intake.models import Lead
+from apps.intake.scoring import score_many
 from apps.clients.models import Client
 from apps.legal_cases.models import LegalCase
 from .models import SystemSettings
+from . import kanban
+from core.search import engine as search_engine
+from core.security.roles import has_role
+from apps.analytics.services.dashboard_metrics import get_dashboard_metrics
 from in_brief.models import Article, Category
 from django.contrib import messages
+from decimal import Decimal, InvalidOperation
 from .forms import ArticleForm
+import math
 import os
 
 def is_manager(user):
-    return user.is_superuser or user.groups.filter(name='Manager').exists()
+    return user.is_superuser or has_role(user, 'Manager')
 
 @login_required
 @user_passes_test(is_manager)
 def dashboard(request):
     """Dashboard principal com métricas."""
-    today = timezone.now().date()
-    week_ago = today - timedelta(days=7)
-    month_ago = today - timedelta(days=30)
-    
-    # Métricas de Leads
-    leads_today = Lead.objects.filter(created_at__date=today).count()
-    leads_week = Lead.objects.filter(created_at__date__gte=week_ago).count()
-    leads_month = Lead.objects.filter(created_at__date__gte=month_ago).count()
-    leads_qualified = Lead.objects.filter(is_qualified=True).count()
-    
-    # Casos por área
-    cases_by_area = LegalCase.objects.values('area').annotate(count=Count('id'))
-    
-    # Casos ativos
-    active_cases = LegalCase.objects.filter(status='ACTIVE').count()
-    
-    # Total de clientes
-    total_clients = Client.objects.count()
-    
-    # Métricas Financeiras
-    finance_total_pending = AccountPayable.objects.filter(status='PENDING').aggregate(Sum('amount'))['amount__sum'] or 0
-    finance_receivable_pending = AccountReceivable.objects.filter(status='PENDING').aggregate(Sum('amount'))['amount__sum'] or 0
-    finance_late_count = AccountPayable.objects.filter(status='PENDING', due_date__lt=today).count()
+    context = get_dashboard_metrics()
+    return render(request, 'admin_portal/dashboard.html', context)
+
+def _kanban_page(board, column, base=None, cursor=''):
+    cards, next_cursor = board.page(column, base, cursor)
+    return {'column': column, 'cards': cards, 'next_cursor': next_cursor, 'is_next': bool(cursor)}
+
+def _kanban_context(board, base=None, filters=''):
+    """First page of every column plus the per-column totals."""
+    counts = board.counts(base)
+    columns = {}
+    for column in board.columns:
+        columns[column.key] = _kanban_page(board, column, base)
+        columns[column.key]['count'] = counts[column.key]
+    return {'board': board, 'columns': columns, 'filters': filters}
+
+def _filtered_clients(request):
+    """Clients matching the board's search form, and the query string to keep it on the next pages."""
+    search_query = request.GET.get('q', '')
+    client_type = request.GET.get('type', '')
     
-    # Contingência de Risco
-    total_contingency = LegalCase.objects.aggregate(Sum('contingency_value'))['contingency_value__sum'] or 0
+    clients = Client.objects.all()
     
-    # Métricas de Conteúdo (In Brief)
-    total_articles = Article.objects.count()
-    published_articles = Article.objects.filter(is_published=True).count()
-    categories_count = Category.objects.count()
+    # Busca por nome, email (índice de busca textual)
+    if search_query:
+        clients = search_engine.filter_queryset(clients, search_query)
     
-    context = {
-        'leads_today': leads_today,
-        'leads_week': leads_week,
-        'leads_month': leads_month,
-        'leads_qualified': leads_qualified,
-        'cases_by_area': cases_by_area,
-        'active_cases': active_cases,
-        'total_clients': total_clients,
-        'finance_total_pending': finance_total_pending,
-        'finance_receivable_pending': finance_receivable_pending,
-        'finance_late_count': finance_late_count,
-        'total_contingency': total_contingency,
-        'total_articles': total_articles,
-        'published_articles': published_articles,
-        'categories_count': categories_count,
-        'leads_by_source': Lead.objects.values('source').annotate(count=Count('id')),
-        'leads_by_location': Lead.objects.values('location').annotate(count=Count('id')),
-    }
+    # Filtro por tipo
+    if client_type:
+        clients = clients.filter(client_type=client_type)
     
-    return render(request, 'admin_portal/dashboard.html', context)
+    filters = urlencode({k: v for k, v in (('q', search_query), ('type', client_type)) if v})
+    return clients, search_query, filters
 
 @login_required
 def leads_kanban(request):
     """Kanban board de leads."""
     # Organizar leads por status (simulado com is_qualified)
-    new_leads = Lead.objects.filter(is_qualified=False, external_id__isnull=True).order_by('-created_at')
-    qualified_leads = Lead.objects.filter(is_qualified=True, external_id__isnull=True).order_by('-created_at')
-    converted_leads = Lead.objects.filter(external_id__isnull=False).order_by('-created_at')
+    context = _kanban_context(kanban.LEADS)
+    
+    return render(request, 'admin_portal/leads_kanban.html', context)
+
+@login_required
+def kanban_column(request, board, column):
+    """Próxima página de uma coluna do kanban (fragmento HTMX)."""
+    board = kanban.BOARDS.get(board)
+    column = board.column(column) if board else None
+    if column is None:
+        raise Http404("Coluna desconhecida")
+    
+    base, filters = None, ''
+    if board is kanban.CLIENTS:
+        base, _, filters = _filtered_clients(request)
     
     context = {
-        'new_leads': new_leads,
-        'qualified_leads': qualified_leads,
-        'converted_leads': converted_leads,
+        'board': board,
+        'page': _kanban_page(board, column, base, request.GET.get('cursor', '')),
+        'filters': filters,
     }
-    
-    return render(request, 'admin_portal/leads_kanban.html', context)
+    return render(request, 'admin_portal/fragments/kanban_cards.html', context)
 
 @login_required
 def lead_detail(request, lead_id):
     """Detalhes de um lead específico com cálculo de score se for 0."""
     lead = get_object_or_404(Lead, id=lead_id)
     
-    # Simulação de cálculo de score se ainda estiver zerado
+    # Leads ainda sem score (importados, criados pelo admin) são pontuados pelo ClaimScore
     if lead.score == 0:
-        score = 50  # Base
-        if lead.case_type in ['LIPEDEMA', 'HEALTH']: score += 20
-        if lead.case_type == 'SUPER': score += 15
-        if lead.location and 'Campinas' in lead.location: score += 10
-        
-        lead.score = min(score, 100)
-        lead.save()
+        score_many([lead])
 
     context = {
         'lead': lead,
@@ -140,35 +134,11 @@ def convert_lead(request, lead_id):
 @login_required
 def clients_list(request):
     """Lista de clientes com busca."""
-    search_query = request.GET.get('search', '')
-    client_type = request.GET.get('type', '')
-    
-    clients = Client.objects.all()
-    
-    # Busca por nome, email
-    if search_query:
-        clients = clients.filter(
-            Q(full_name__icontains=search_query) |
-            Q(email__icontains=search_query)
-        )
-    
-    # Filtro por tipo
-    if client_type:
-        clients = clients.filter(client_type=client_type)
+    clients, search_query, filters = _filtered_clients(request)
     
     # Kanban Logic
-    prospects = clients.filter(status='PROSPECT').order_by('-created_at')
-    onboarding = clients.filter(status='ONBOARDING').order_by('-created_at')
-    active = clients.filter(status='ACTIVE').order_by('-created_at')
-    archived = clients.filter(status='ARCHIVED').order_by('-created_at')
-    
-    context = {
-        'prospects': prospects,
-        'onboarding': onboarding,
-        'active': active,
-        'archived': archived,
-        'search_query': search_query,
-    }
+    context = _kanban_context(kanban.CLIENTS, clients, filters)
+    context['search_query'] = search_query
     
     return render(request, 'admin_portal/clients_kanban.html', context)
 
@@ -221,17 +191,7 @@ def client_edit(request, client_id):
 @login_required
 def cases_kanban(request):
     """Kanban board de casos por status."""
-    analysis_cases = LegalCase.objects.filter(status='ANALYSIS').order_by('-entry_date')
-    active_cases = LegalCase.objects.filter(status='ACTIVE').order_by('-entry_date')
-    suspended_cases = LegalCase.objects.filter(status='SUSPENDED').order_by('-entry_date')
-    archived_cases = LegalCase.objects.filter(status='ARCHIVED').order_by('-entry_date')
-    
-    context = {
-        'analysis_cases': analysis_cases,
-        'active_cases': active_cases,
-        'suspended_cases': suspended_cases,
-        'archived_cases': archived_cases,
-    }
+    context = _kanban_context(kanban.CASES)
     
     return render(request, 'admin_portal/cases_kanban.html', context)
 
@@ -306,47 +266,107 @@ def case_edit(request, case_id):
     
     return render(request, 'admin_portal/case_form.html', {'case': case, 'clients': clients})
 
-from apps.finance.models import AccountPayable, AccountReceivable
+from apps.finance.models import AccountPayable, AccountReceivable, RecurringPayable
+from apps.finance.services.bulk import settle as settle_entries
+from apps.finance.services.projection import GRANULARITIES, get_cash_flow_projection
+from apps.finance.services.recurring import materialize as materialize_recurring
+from apps.finance.services.statements import StatementError, import_statement
+from apps.finance.services.ledger import LEDGERS, LedgerFilters, get_page as get_ledger_page, get_totals as get_ledger_totals
 
 @login_required
 @user_passes_test(is_manager)
 def finance_list(request):
-    """Lista de finanças (Pagar/Receber) com filtros."""
+    """Lista de finanças (Pagar/Receber) com filtros, paginação e totais."""
     tab = request.GET.get('tab', 'payable')
-    status_filter = request.GET.get('status', '')
-    category_filter = request.GET.get('category', '')
+    ledger = LEDGERS['receivable' if tab == 'receivable' else 'payable']
+    filters = LedgerFilters.from_query(request.GET)
+    page = get_ledger_page(
+        ledger, filters,
+        after=request.GET.get('after', ''),
+        before=request.GET.get('before', ''),
+    )
     
-    if tab == 'receivable':
-        items = AccountReceivable.objects.all()
-        status_choices = AccountReceivable.STATUS_CHOICES
-        category_choices = AccountReceivable.CATEGORY_CHOICES
-    else:
-        items = AccountPayable.objects.all()
-        status_choices = AccountPayable.STATUS_CHOICES
-        category_choices = AccountPayable.CATEGORY_CHOICES
-    
-    if status_filter:
-        items = items.filter(status=status_filter)
-    if category_filter:
-        items = items.filter(category=category_filter)
-        
-    items = items.order_by('due_date')
+    # Keeps tab and filters on the pagination links
+    query = urlencode({k: v for k, v in {
+        'tab': tab,
+        'status': filters.status,
+        'category': filters.category,
+        'date_from': filters.date_from.isoformat() if filters.date_from else '',
+        'date_to': filters.date_to.isoformat() if filters.date_to else '',
+    }.items() if v})
     
     context = {
-        'items': items,
+        'items': page.items,
+        'page': page,
+        'totals': get_ledger_totals(ledger, filters),
         'tab': tab,
-        'status_filter': status_filter,
-        'category_filter': category_filter,
-        'STATUS_CHOICES': status_choices,
-        'CATEGORY_CHOICES': category_choices,
+        'status_filter': filters.status,
+        'category_filter': filters.category,
+        'date_from': filters.date_from,
+        'date_to': filters.date_to,
+        'query': query,
+        'STATUS_CHOICES': ledger.model.STATUS_CHOICES,
+        'CATEGORY_CHOICES': ledger.model.CATEGORY_CHOICES,
     }
     
     return render(request, 'admin_portal/finance_list.html', context)
 
+@login_required
+@user_passes_test(is_manager)
+def finance_projection(request):
+    """Projeção de fluxo de caixa (semanal/mensal) com cenários."""
+    granularity = request.GET.get('granularity', 'month')
+    if granularity not in GRANULARITIES:
+        granularity = 'month'
+    try:
+        periods = max(1, min(int(request.GET.get('periods', 12)), 52))
+    except ValueError:
+        periods = 12
+    try:
+        opening_balance = Decimal(request.GET['opening']) if request.GET.get('opening') else None
+    except InvalidOperation:
+        opening_balance = None
+    if opening_balance is not None and not (opening_balance.is_finite() and math.isfinite(opening_balance)):
+        # 'Infinity', 'NaN' or too large to project: use the configured balance
+        opening_balance = None
+    
+    projection = get_cash_flow_projection(granularity, periods, opening_balance)
+    scenario = request.GET.get('scenario', 'base')
+    if scenario not in projection['scenarios']:
+        scenario = 'base'
+    
+    context = {
+        'projection': projection,
+        'scenario': scenario,
+        'selected': projection['scenarios'][scenario],
+        'granularity': granularity,
+        'periods': periods,
+        'opening_balance': projection['opening_balance'],
+    }
+    
+    return render(request, 'admin_portal/finance_projection.html', context)
+
 @login_required
 def finance_create(request):
-    """Criar nova conta a pagar."""
+    """Criar nova conta a pagar (ou uma despesa recorrente)."""
     if request.method == 'POST':
+        frequency = request.POST.get('frequency', '')
+        if frequency in dict(RecurringPayable.FREQUENCY_CHOICES):
+            recurrence = RecurringPayable.objects.create(
+                description=request.POST.get('description'),
+                supplier=request.POST.get('supplier', ''),
+                amount=request.POST.get('amount'),
+                start_date=request.POST.get('due_date'),
+                end_date=request.POST.get('end_date') or None,
+                frequency=frequency,
+                category=request.POST.get('category', 'OTHER'),
+                notes=request.POST.get('notes', ''),
+            )
+            recurrence.refresh_from_db()  # dates as date objects
+            created = materialize_recurring(recurrences=[recurrence])
+            messages.success(request, f"Despesa recorrente criada: {created} conta(s) gerada(s).")
+            return redirect('admin_portal:finance_list')
+        
         item = AccountPayable.objects.create(
             description=request.POST.get('description'),
             supplier=request.POST.get('supplier', ''),
@@ -360,6 +380,7 @@ def finance_create(request):
     
     context = {
         'CATEGORY_CHOICES': AccountPayable.CATEGORY_CHOICES,
+        'FREQUENCY_CHOICES': RecurringPayable.FREQUENCY_CHOICES,
     }
     
     return render(request, 'admin_portal/finance_form.html', context)
@@ -386,6 +407,60 @@ def finance_pay(request, item_id):
     
     return redirect(f"{reverse('admin_portal:finance_list')}?tab={tab}")
 
+@login_required
+@user_passes_test(is_manager)
+@require_POST
+def finance_bulk_settle(request):
+    """Baixa em lote das contas selecionadas (um único UPDATE)."""
+    tab = 'receivable' if request.POST.get('tab') == 'receivable' else 'payable'
+    ids = [int(pk) for pk in request.POST.getlist('ids') if pk.isdigit()]
+    count = settle_entries(LEDGERS[tab], ids)
+    if count:
+        messages.success(request, f"{count} conta(s) baixada(s).")
+    else:
+        messages.warning(request, "Nenhuma conta pendente selecionada.")
+    return redirect(f"{reverse('admin_portal:finance_list')}?{request.POST.get('query') or f'tab={tab}'}")
+
+@login_required
+@user_passes_test(is_manager)
+def finance_import(request):
+    """Importar extrato bancário (CSV/OFX) e conciliar com as contas pendentes."""
+    result, error = None, ''
+    if request.method == 'POST':
+        upload = request.FILES.get('statement')
+        if not upload:
+            error = "Selecione um arquivo CSV ou OFX."
+        else:
+            try:
+                result = import_statement(upload.file, upload.name, dry_run=request.POST.get('dry_run') == 'on')
+            except StatementError as e:
+                error = str(e)
+    
+    context = {
+        'result': result,
+        'error': error,
+        'dry_run': request.POST.get('dry_run') == 'on',
+    }
+    
+    return render(request, 'admin_portal/finance_import.html', context)
+
+# ============ EXPORT VIEWS ============
+
+from apps.analytics import export as data_export
+
+@login_required
+@user_passes_test(data_export.can_export)
+def export_dataset(request, dataset):
+    """Exporta leads, clientes, casos ou finanças em CSV/XLSX (streaming)."""
+    if dataset not in data_export.DATASETS:
+        raise Http404("Exportação desconhecida")
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in data_export.FORMATS or (fmt == 'xlsx' and not data_export.xlsx_available()):
+        return HttpResponse("Formato indisponível.", status=400)
+    # PII is only decrypted when explicitly requested by someone allowed to see it
+    include_sensitive = request.GET.get('sensitive') == '1' and data_export.can_export_sensitive(request.user)
+    return data_export.export_response(data_export.DATASETS[dataset], fmt, include_sensitive, request.GET)
+
 # ============ SETTINGS VIEWS ============
 
 @login_required
@@ -416,24 +491,41 @@ def settings_general(request):
     return render(request, 'admin_portal/settings_general.html', context)
 
 from apps.legal_cases.services.document_service import DocumentAutomationService
+from apps.legal_cases.tasks import generate_document
+from apps.jobs.models import Job
+from apps.jobs.api.router import can_view_job
 from django.http import FileResponse
 
 @login_required
 def generate_document_action(request, case_id):
-    """Gera um documento .docx para o caso."""
+    """Enfileira a geração do documento .docx do caso e acompanha a tarefa."""
     case = get_object_or_404(LegalCase, id=case_id)
-    service = DocumentAutomationService()
-    
-    try:
-        output_path = service.generate_base_document(case)
-        return FileResponse(
-            open(output_path, 'rb'), 
-            as_attachment=True, 
-            filename=os.path.basename(output_path)
-        )
-    except Exception as e:
-        messages.error(request, f"Erro ao gerar documento: {e}")
-        return redirect('admin_portal:case_detail', case_id=case_id)
+    job = generate_document.enqueue_with(
+        args=[case.id],
+        unique_key=f'generate_document:{case.id}',
+        created_by=request.user,
+    )
+    return redirect('admin_portal:job_detail', job_id=job.id)
+
+@login_required
+def job_detail(request, job_id):
+    """Andamento de uma tarefa em segundo plano (atualizado via HTMX até terminar)."""
+    job = get_object_or_404(Job, id=job_id)
+    if not can_view_job(request.user, job):
+        raise Http404
+    template = 'admin_portal/fragments/job_status.html' if request.headers.get('HX-Request') else 'admin_portal/job_detail.html'
+    return render(request, template, {'job': job})
+
+@login_required
+def job_download(request, job_id):
+    """Arquivo gerado por uma tarefa concluída (ex.: petição base)."""
+    job = get_object_or_404(Job, id=job_id, status='SUCCEEDED')
+    if not can_view_job(request.user, job) or not isinstance(job.result, dict) or not job.result.get('filename'):
+        raise Http404
+    path = os.path.join(DocumentAutomationService.OUTPUT_DIR, os.path.basename(job.result['filename']))
+    if not os.path.exists(path):
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=os.path.basename(path))
 
 @login_required
 def generate_portal_access(request, case_id):
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import DailyMetric
+
+@admin.register(DailyMetric)
+class DailyMetricAdmin(admin.ModelAdmin):
+    list_display = ('date', 'metric', 'dimension', 'key', 'count', 'amount', 'updated_at')
+    list_filter = ('metric', 'dimension')
+    date_hierarchy = 'date'
+    readonly_fields = ('updated_at',)
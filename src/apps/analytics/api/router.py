@@ -0,0 +1,88 @@
+"""
+Django Ninja API for dashboard metrics (consumed by the HTMX widgets).
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Optional
+
+from django.utils import timezone
+from ninja import Router
+
+from apps.analytics.services import rollups
+from apps.analytics.services.dashboard_metrics import SECTIONS, get_dashboard_metrics
+from core.security.roles import has_role
+
+router = Router()
+
+
+def _is_manager(user) -> bool:
+    return user.is_authenticated and (user.is_superuser or has_role(user, 'Manager'))
+
+
+@router.get("/dashboard/metrics/", response={200: dict, 400: dict, 403: dict})
+def dashboard_metrics(request, section: Optional[str] = None):
+    """
+    Dashboard numbers, served from the short-lived metrics cache.
+    
+    Args:
+        section: Optional subset ('leads', 'cases', 'finance', 'content')
+    """
+    if not _is_manager(request.user):
+        return 403, {"detail": "Acesso restrito"}
+    if section and section not in SECTIONS:
+        return 400, {"detail": f"Seção desconhecida: {section}"}
+    
+    metrics = get_dashboard_metrics()
+    keys = SECTIONS[section] if section else [k for keys in SECTIONS.values() for k in keys]
+    data = {
+        key: float(metrics[key]) if isinstance(metrics[key], Decimal) else metrics[key]
+        for key in keys
+    }
+    data['generated_at'] = metrics['generated_at']
+    return data
+
+
+@router.get("/rollups/{metric}/", response={200: dict, 400: dict, 403: dict})
+def rollup_series(
+    request,
+    metric: str,
+    dimension: str = '',
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    group: str = 'day',
+):
+    """
+    Time series read from the DailyMetric rollups (no scan of the source tables).
+    
+    Args:
+        metric: 'leads', 'leads_qualified', 'cases_opened', 'payables' or 'receivables'
+        dimension: Breakdown (e.g. 'source'); empty for the totals
+        start/end: Date range for group='day' (default: last 30 days)
+        group: 'day' or 'month' (last 12 months)
+    """
+    if not _is_manager(request.user):
+        return 403, {"detail": "Acesso restrito"}
+    rollup = rollups.ROLLUPS_BY_METRIC.get(metric)
+    if rollup is None:
+        return 400, {"detail": f"Métrica desconhecida: {metric}"}
+    if dimension and dimension not in rollup.dimensions:
+        return 400, {"detail": f"Dimensão desconhecida: {dimension}"}
+    if group not in ('day', 'month'):
+        return 400, {"detail": f"Agrupamento desconhecido: {group}"}
+    
+    if group == 'month':
+        rows = rollups.monthly(metric, dimension=dimension)
+        period = 'month'
+    else:
+        end = end or timezone.localdate()
+        start = start or end - timedelta(days=29)
+        rows = rollups.series(metric, start, end, dimension=dimension)
+        period = 'date'
+    return {
+        "metric": metric,
+        "dimension": dimension,
+        "points": [
+            {"period": row[period].isoformat(), "key": row['key'], "count": row['count'], "amount": float(row['amount'])}
+            for row in rows
+        ],
+    }
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class AnalyticsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.analytics"
+    verbose_name = "Analytics"
+
+    def ready(self):
+        """Import signals when app is ready."""
+        import apps.analytics.signals
@@ -0,0 +1,257 @@
+"""
+Streaming CSV/XLSX export of leads, clients, cases and finance entries.
+
+Rows are read with values_list (only the exported columns) through
+QuerySet.iterator(chunk_size), so the full dataset is never held in memory:
+
+- CSV is produced chunk by chunk straight into a StreamingHttpResponse;
+- XLSX uses openpyxl's write-only workbook, which flushes rows to a
+  temporary file as they are appended; the file is then streamed back.
+
+Encrypted columns (EncryptedField) are exported only for users allowed to
+see them (can_export_sensitive) and only when asked for. They are read
+through a plain QuerySet (so values_list leaves the tokens encrypted) and
+decrypted one chunk at a time with decrypt_many, which decrypts repeated
+tokens once; otherwise they are not even selected.
+"""
+import csv
+import tempfile
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from apps.clients.models import Client
+from apps.finance.models import AccountPayable, AccountReceivable
+from apps.finance.services.ledger import LedgerFilters
+from apps.intake.models import Lead
+from apps.legal_cases.models import LegalCase
+from core.security.fields import EncryptedField, decrypt_many
+from core.security.roles import has_role
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # Optional: XLSX export is unavailable without openpyxl
+    Workbook = None
+
+DEFAULT_CHUNK_SIZE = 2000
+FORMATS = ('csv', 'xlsx')
+
+
+@dataclass(frozen=True)
+class Column:
+    path: str  # values_list lookup, e.g. 'client__full_name'
+    header: str
+
+
+@dataclass(frozen=True)
+class Dataset:
+    name: str
+    label: str
+    model: type
+    columns: Tuple[Column, ...]
+    ordering: Tuple[str, ...] = ('pk',)
+    filter: Optional[Callable] = None  # (queryset, request.GET) -> queryset
+
+    def field(self, column: Column):
+        """Model field behind a column (following relations)."""
+        model, parts = self.model, column.path.split('__')
+        for part in parts[:-1]:
+            model = model._meta.get_field(part).related_model
+        return model._meta.get_field(parts[-1])
+
+    def is_sensitive(self, column: Column) -> bool:
+        return isinstance(self.field(column), EncryptedField)
+
+    def selected_columns(self, include_sensitive: bool) -> List[Column]:
+        return [column for column in self.columns if include_sensitive or not self.is_sensitive(column)]
+
+    def queryset(self, params=None):
+        # A plain QuerySet, not EncryptedQuerySet: values_list yields the raw
+        # tokens so each chunk is decrypted in one decrypt_many pass
+        queryset = QuerySet(self.model).order_by(*self.ordering)
+        if self.filter and params is not None:
+            queryset = self.filter(queryset, params)
+        return queryset
+
+
+def _ledger_filter(queryset, params):
+    return LedgerFilters.from_query(params).apply(queryset)
+
+
+DATASETS = {
+    dataset.name: dataset for dataset in (
+        Dataset('leads', 'Leads', Lead, (
+            Column('id', 'ID'),
+            Column('full_name', 'Nome'),
+            Column('contact_info', 'WhatsApp/Email'),
+            Column('case_type', 'Tipo de Caso'),
+            Column('score', 'ClaimScore'),
+            Column('viability_status', 'Viabilidade'),
+            Column('is_qualified', 'Qualificado'),
+            Column('source', 'Fonte'),
+            Column('location', 'Localização'),
+            Column('created_at', 'Criado em'),
+        )),
+        Dataset('clients', 'Clientes', Client, (
+            Column('id', 'ID'),
+            Column('full_name', 'Nome Completo'),
+            Column('client_type', 'Tipo'),
+            Column('status', 'Status'),
+            Column('cpf_cnpj', 'CPF/CNPJ'),
+            Column('phone', 'Telefone/WhatsApp'),
+            Column('email', 'E-mail'),
+            Column('created_at', 'Criado em'),
+        )),
+        Dataset('cases', 'Casos', LegalCase, (
+            Column('id', 'ID'),
+            Column('title', 'Título'),
+            Column('client__full_name', 'Cliente'),
+            Column('area', 'Área'),
+            Column('status', 'Status'),
+            Column('process_number', 'Número do Processo'),
+            Column('risk_level', 'Risco'),
+            Column('contingency_value', 'Valor da Causa'),
+            Column('entry_date', 'Data de Entrada'),
+        )),
+        Dataset('payables', 'Contas a Pagar', AccountPayable, (
+            Column('id', 'ID'),
+            Column('description', 'Descrição'),
+            Column('supplier', 'Fornecedor'),
+            Column('category', 'Categoria'),
+            Column('amount', 'Valor (R$)'),
+            Column('due_date', 'Vencimento'),
+            Column('status', 'Status'),
+        ), ordering=('due_date', 'id'), filter=_ledger_filter),
+        Dataset('receivables', 'Contas a Receber', AccountReceivable, (
+            Column('id', 'ID'),
+            Column('description', 'Descrição'),
+            Column('client_name', 'Cliente'),
+            Column('legal_case__title', 'Caso'),
+            Column('category', 'Categoria'),
+            Column('amount', 'Valor (R$)'),
+            Column('due_date', 'Vencimento'),
+            Column('received_date', 'Recebido em'),
+            Column('status', 'Status'),
+        ), ordering=('due_date', 'id'), filter=_ledger_filter),
+    )
+}
+
+
+# ============ PERMISSIONS ============
+
+def can_export(user) -> bool:
+    return user.is_authenticated and (user.is_superuser or has_role(user, 'Manager', 'Secretary'))
+
+
+def can_export_sensitive(user) -> bool:
+    """Only managers get decrypted PII (CPF/CNPJ, phones, contacts) in exports."""
+    return user.is_authenticated and (user.is_superuser or has_role(user, 'Manager'))
+
+
+# ============ ROWS ============
+
+def _formatter(field) -> Callable:
+    choices = dict(field.flatchoices) if field.choices else None
+    if choices:
+        return lambda value: choices.get(value, value)
+    if field.get_internal_type() == 'BooleanField':
+        return lambda value: 'Sim' if value else 'Não'
+    if field.get_internal_type() == 'DateTimeField':
+        # Local wall time, naive (XLSX cells cannot hold a timezone)
+        return lambda value: timezone.localtime(value).replace(tzinfo=None, microsecond=0) if value else None
+    return lambda value: value
+
+
+def iter_chunks(dataset: Dataset, include_sensitive: bool = False, params=None,
+                chunk_size: Optional[int] = None) -> Iterator[List[list]]:
+    """Exported rows, `chunk_size` at a time (encrypted columns decrypted per chunk)."""
+    chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    columns = dataset.selected_columns(include_sensitive)
+    formatters = [_formatter(dataset.field(column)) for column in columns]
+    encrypted = [index for index, column in enumerate(columns) if dataset.is_sensitive(column)]
+
+    rows = dataset.queryset(params).values_list(*(column.path for column in columns)).iterator(chunk_size=chunk_size)
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield _format_chunk(chunk, formatters, encrypted)
+            chunk = []
+    if chunk:
+        yield _format_chunk(chunk, formatters, encrypted)
+
+
+def _format_chunk(chunk: Sequence[tuple], formatters: List[Callable], encrypted: List[int]) -> List[list]:
+    rows = [list(row) for row in chunk]
+    for index in encrypted:
+        for row, plaintext in zip(rows, decrypt_many([row[index] for row in rows])):
+            row[index] = plaintext
+    return [[format_value(value) for format_value, value in zip(formatters, row)] for row in rows]
+
+
+def headers(dataset: Dataset, include_sensitive: bool = False) -> List[str]:
+    return [column.header for column in dataset.selected_columns(include_sensitive)]
+
+
+# ============ RESPONSES ============
+
+class _Echo:
+    """File-like object whose write() returns the line, for csv.writer in a generator."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, (date, Decimal)):
+        return str(value)
+    return '' if value is None else value
+
+
+def stream_csv(dataset: Dataset, include_sensitive: bool = False, params=None) -> Iterator[str]:
+    # BOM + ';' so Excel (pt-BR) opens it with accents and columns right
+    writer = csv.writer(_Echo(), delimiter=';')
+    yield '\ufeff' + writer.writerow(headers(dataset, include_sensitive))
+    for chunk in iter_chunks(dataset, include_sensitive, params):
+        yield ''.join(writer.writerow([_csv_cell(value) for value in row]) for row in chunk)
+
+
+def write_xlsx(dataset: Dataset, output, include_sensitive: bool = False, params=None) -> None:
+    """Write the dataset to `output` (a binary file) with a write-only workbook."""
+    if Workbook is None:
+        raise RuntimeError("XLSX export requires openpyxl")
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=dataset.label[:31])
+    sheet.append(headers(dataset, include_sensitive))
+    for chunk in iter_chunks(dataset, include_sensitive, params):
+        for row in chunk:
+            sheet.append(row)
+    workbook.save(output)
+
+
+def export_response(dataset: Dataset, fmt: str = 'csv', include_sensitive: bool = False, params=None):
+    """StreamingHttpResponse (CSV) or FileResponse over a temporary file (XLSX)."""
+    filename = f"{dataset.name}_{timezone.localdate():%Y%m%d}.{fmt}"
+    if fmt == 'xlsx':
+        output = tempfile.TemporaryFile()
+        write_xlsx(dataset, output, include_sensitive, params)
+        output.seek(0)
+        return FileResponse(
+            output, as_attachment=True, filename=filename,
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+    response = StreamingHttpResponse(stream_csv(dataset, include_sensitive, params), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def xlsx_available() -> bool:
+    return Workbook is not None
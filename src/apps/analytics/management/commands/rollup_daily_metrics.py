@@ -0,0 +1,39 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.analytics.services.rollups import ROLLUPS, ROLLUPS_BY_METRIC, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the DailyMetric rollups from the source tables. Run nightly: signals keep '
+        'touched days current, this also catches bulk writes that bypass them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Rebuild the last N days (default: 7)')
+        parser.add_argument('--since', type=date.fromisoformat, help='Rebuild from this date (YYYY-MM-DD)')
+        parser.add_argument('--all', action='store_true', help='Rebuild the whole history')
+        parser.add_argument('--metric', action='append', choices=sorted(ROLLUPS_BY_METRIC), help='Only this metric (repeatable)')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        today = timezone.localdate()
+        selected = [ROLLUPS_BY_METRIC[m] for m in options['metric']] if options['metric'] else ROLLUPS
+
+        for rollup in selected:
+            first, last = rollup.bounds()
+            if options['all']:
+                start = first or today
+            elif options['since']:
+                start = options['since']
+            else:
+                start = today - timedelta(days=options['days'] - 1)
+            # Due dates can be in the future: cover them too
+            end = max(today, last or today)
+            rows = rebuild(rollup, start, end)
+            self.stdout.write(f'{rollup.metric}: {rows} rows for {start} .. {end}')
+        self.stdout.write(self.style.SUCCESS('Rollups up to date'))
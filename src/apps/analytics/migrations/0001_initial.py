@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('metric', models.CharField(max_length=50, verbose_name='Métrica')),
+                ('dimension', models.CharField(blank=True, max_length=50, verbose_name='Dimensão')),
+                ('key', models.CharField(blank=True, max_length=255, verbose_name='Valor da Dimensão')),
+                ('count', models.IntegerField(default=0, verbose_name='Quantidade')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Valor (R$)')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Métrica Diária',
+                'verbose_name_plural': 'Métricas Diárias',
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['metric', 'dimension', 'date'], name='daily_metric_series_idx')],
+                'constraints': [models.UniqueConstraint(fields=('metric', 'dimension', 'key', 'date'), name='daily_metric_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import models
+
+
+class DailyMetric(models.Model):
+    """
+    Pre-aggregated daily fact row.
+
+    One row per (date, metric, dimension, key): e.g. ('2026-01-10', 'leads',
+    'source', 'Google') holds how many leads came from Google that day. The
+    total of a metric is stored with an empty dimension and key.
+    Maintained by apps.analytics.services.rollups.
+    """
+    date = models.DateField("Data")
+    metric = models.CharField("Métrica", max_length=50)
+    dimension = models.CharField("Dimensão", max_length=50, blank=True)
+    key = models.CharField("Valor da Dimensão", max_length=255, blank=True)
+
+    count = models.IntegerField("Quantidade", default=0)
+    amount = models.DecimalField("Valor (R$)", max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Métrica Diária"
+        verbose_name_plural = "Métricas Diárias"
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'dimension', 'key', 'date'], name='daily_metric_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['metric', 'dimension', 'date'], name='daily_metric_series_idx'),
+        ]
+
+    def __str__(self):
+        label = f"{self.dimension}={self.key}" if self.dimension else "total"
+        return f"{self.date} {self.metric} [{label}]: {self.count}"
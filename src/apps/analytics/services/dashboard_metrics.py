@@ -0,0 +1,106 @@
+"""
+Dashboard metrics service.
+
+Computes every number of the admin dashboard with one aggregate query per
+table (conditional aggregation with Count/Sum(filter=Q(...))) and caches
+the bundle for DASHBOARD_METRICS_TTL seconds. Writes to the underlying
+models drop the cache (see apps.analytics.signals).
+"""
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.clients.models import Client
+from apps.finance.models import AccountPayable, AccountReceivable
+from apps.intake.models import Lead
+from apps.legal_cases.models import LegalCase
+from in_brief.models import Article, Category
+
+CACHE_KEY = 'analytics:dashboard_metrics'
+
+SECTIONS = {
+    'leads': ('leads_today', 'leads_week', 'leads_month', 'leads_qualified', 'leads_by_source', 'leads_by_location'),
+    'cases': ('active_cases', 'cases_by_area', 'total_contingency', 'total_clients'),
+    'finance': ('finance_total_pending', 'finance_receivable_pending', 'finance_late_count'),
+    'content': ('total_articles', 'published_articles', 'categories_count'),
+}
+
+
+def get_dashboard_metrics() -> Dict:
+    """Cached metrics bundle (same keys as the dashboard template context)."""
+    metrics = cache.get(CACHE_KEY)
+    if metrics is None:
+        metrics = compute_dashboard_metrics()
+        cache.set(CACHE_KEY, metrics, timeout=getattr(settings, 'DASHBOARD_METRICS_TTL', 60))
+    return metrics
+
+
+def invalidate_dashboard_metrics() -> None:
+    cache.delete(CACHE_KEY)
+
+
+def compute_dashboard_metrics() -> Dict:
+    today = timezone.now().date()
+    week_ago = today - timedelta(days=7)
+    month_ago = today - timedelta(days=30)
+    metrics = {}
+
+    # Leads: counters in one pass
+    metrics.update(Lead.objects.aggregate(
+        leads_today=Count('id', filter=Q(created_at__date=today)),
+        leads_week=Count('id', filter=Q(created_at__date__gte=week_ago)),
+        leads_month=Count('id', filter=Q(created_at__date__gte=month_ago)),
+        leads_qualified=Count('id', filter=Q(is_qualified=True)),
+    ))
+
+    # Leads by source and by location from a single GROUP BY
+    by_source, by_location = {}, {}
+    for row in Lead.objects.order_by().values('source', 'location').annotate(count=Count('id')):
+        by_source[row['source']] = by_source.get(row['source'], 0) + row['count']
+        by_location[row['location']] = by_location.get(row['location'], 0) + row['count']
+    metrics['leads_by_source'] = [{'source': k, 'count': v} for k, v in by_source.items()]
+    metrics['leads_by_location'] = [{'location': k, 'count': v} for k, v in by_location.items()]
+
+    # Cases: per-area breakdown carries the totals too
+    area_labels = dict(LegalCase.AREA_CHOICES)
+    cases_by_area = list(
+        LegalCase.objects.order_by('area').values('area').annotate(
+            count=Count('id'),
+            active=Count('id', filter=Q(status='ACTIVE')),
+            contingency=Sum('contingency_value'),
+        )
+    )
+    metrics['cases_by_area'] = [
+        {'area': row['area'], 'label': area_labels.get(row['area'], row['area']), 'count': row['count']}
+        for row in cases_by_area
+    ]
+    metrics['active_cases'] = sum(row['active'] for row in cases_by_area)
+    metrics['total_contingency'] = sum((row['contingency'] or Decimal('0') for row in cases_by_area), Decimal('0'))
+
+    metrics['total_clients'] = Client.objects.count()
+
+    # Finance
+    payables = AccountPayable.objects.aggregate(
+        pending=Sum('amount', filter=Q(status='PENDING')),
+        late=Count('id', filter=Q(status='PENDING', due_date__lt=today)),
+    )
+    metrics['finance_total_pending'] = payables['pending'] or 0
+    metrics['finance_late_count'] = payables['late']
+    metrics['finance_receivable_pending'] = AccountReceivable.objects.aggregate(
+        pending=Sum('amount', filter=Q(status='PENDING'))
+    )['pending'] or 0
+
+    # Content (In Brief)
+    metrics.update(Article.objects.aggregate(
+        total_articles=Count('id'),
+        published_articles=Count('id', filter=Q(is_published=True)),
+    ))
+    metrics['categories_count'] = Category.objects.count()
+
+    metrics['generated_at'] = timezone.now().isoformat()
+    return metrics
@@ -0,0 +1,177 @@
+"""
+Daily rollups of leads, cases and finance into DailyMetric.
+
+Each Rollup describes one metric: the source model, the date it is bucketed
+by, the dimensions it is broken down by and an optional amount to sum.
+A bucket is always rebuilt from the source rows (delete + upsert), so
+recomputing is idempotent, and two rebuilds of the same day running at once
+both succeed (the last one wins):
+
+- post_save/post_delete mark the affected (metric, day) buckets dirty and
+  rebuild them once, on commit (see apps.analytics.signals);
+- `manage.py rollup_daily_metrics` rebuilds whole ranges nightly, catching
+  writes that bypass signals (bulk_create, queryset.update).
+"""
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from apps.analytics.models import DailyMetric
+from apps.finance.models import AccountPayable, AccountReceivable
+from apps.intake.models import Lead
+from apps.legal_cases.models import LegalCase
+
+logger = logging.getLogger(__name__)
+
+
+def to_day(value) -> Optional[date]:
+    """Bucket of a date/datetime value (datetimes in the local timezone)."""
+    if isinstance(value, datetime):
+        return timezone.localdate(value)
+    return value
+
+
+@dataclass(frozen=True)
+class Rollup:
+    metric: str
+    model: type
+    date_field: str
+    dimensions: Tuple[str, ...] = ()
+    amount_field: Optional[str] = None
+    filter: Optional[Q] = None
+
+    def bucket_date(self, instance) -> Optional[date]:
+        return to_day(instance.__dict__.get(self.date_field))
+
+    def bounds(self) -> Tuple[Optional[date], Optional[date]]:
+        """First and last bucket with source rows."""
+        result = self.model.objects.aggregate(first=Min(self.date_field), last=Max(self.date_field))
+        return to_day(result['first']), to_day(result['last'])
+
+    def queryset(self, start: date, end: date):
+        """Source rows between start and end, annotated with their local `day`."""
+        field = self.model._meta.get_field(self.date_field)
+        # TruncDate converts datetimes to TIME_ZONE, so buckets follow the office's calendar
+        day = TruncDate(self.date_field) if field.get_internal_type() == 'DateTimeField' else F(self.date_field)
+        qs = self.model.objects.order_by().annotate(day=day).filter(day__gte=start, day__lte=end)
+        if self.filter is not None:
+            qs = qs.filter(self.filter)
+        return qs
+
+
+ROLLUPS = [
+    Rollup('leads', Lead, 'created_at', dimensions=('source', 'location', 'case_type')),
+    Rollup('leads_qualified', Lead, 'created_at', filter=Q(is_qualified=True)),
+    Rollup('cases_opened', LegalCase, 'entry_date', dimensions=('area', 'status'), amount_field='contingency_value'),
+    Rollup('payables', AccountPayable, 'due_date', dimensions=('status', 'category'), amount_field='amount'),
+    Rollup('receivables', AccountReceivable, 'due_date', dimensions=('status', 'category'), amount_field='amount'),
+]
+ROLLUPS_BY_METRIC = {rollup.metric: rollup for rollup in ROLLUPS}
+
+
+def rollups_for(model) -> List[Rollup]:
+    return [rollup for rollup in ROLLUPS if rollup.model is model]
+
+
+def rebuild(rollup: Rollup, start: date, end: date) -> int:
+    """Recompute the buckets of one metric between start and end (inclusive)."""
+    aggregates = {'count': Count('pk')}
+    if rollup.amount_field:
+        aggregates['amount'] = Sum(rollup.amount_field)
+
+    rows = []
+    for dimension in ('',) + rollup.dimensions:
+        group_by = ['day'] + ([dimension] if dimension else [])
+        for row in rollup.queryset(start, end).values(*group_by).annotate(**aggregates):
+            rows.append(DailyMetric(
+                date=row['day'],
+                metric=rollup.metric,
+                dimension=dimension,
+                key=(row[dimension] or '') if dimension else '',
+                count=row['count'],
+                amount=row.get('amount') or Decimal('0'),
+            ))
+
+    with transaction.atomic():
+        DailyMetric.objects.filter(metric=rollup.metric, date__gte=start, date__lte=end).delete()
+        # A concurrent rebuild may have inserted the same buckets since the DELETE
+        DailyMetric.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['metric', 'dimension', 'key', 'date'],
+            update_fields=['count', 'amount'],
+        )
+    return len(rows)
+
+
+def rebuild_all(start: date, end: date, metrics: Iterable[str] = None) -> Dict[str, int]:
+    selected = [ROLLUPS_BY_METRIC[m] for m in metrics] if metrics else ROLLUPS
+    return {rollup.metric: rebuild(rollup, start, end) for rollup in selected}
+
+
+# Buckets touched in the current transaction, rebuilt once it commits
+_dirty = threading.local()
+
+
+def mark_dirty(rollup: Rollup, day: Optional[date]) -> None:
+    """
+    Schedule a rebuild of (metric, day) after the current transaction commits.
+
+    Each call registers a flush, but the first one to run rebuilds every
+    pending bucket and the rest find nothing to do. Buckets left over by a
+    rolled back transaction are simply rebuilt with the next flush.
+    """
+    if day is None:
+        return
+    if getattr(_dirty, 'buckets', None) is None:
+        _dirty.buckets = set()
+    _dirty.buckets.add((rollup.metric, day))
+    transaction.on_commit(flush_dirty)
+
+
+def flush_dirty() -> None:
+    """
+    Rebuild the pending buckets. Runs after the user's transaction has
+    committed, so failures are only logged (the nightly rebuild fixes them).
+    """
+    pending = getattr(_dirty, 'buckets', None)
+    if not pending:
+        return
+    _dirty.buckets = set()
+    for metric, day in sorted(pending):
+        try:
+            rebuild(ROLLUPS_BY_METRIC[metric], day, day)
+        except Exception:
+            logger.exception(f"Rollup of {metric} on {day} failed")
+
+
+def series(metric: str, start: date, end: date, dimension: str = '') -> List[Dict]:
+    """Daily values of a metric (one row per day and key)."""
+    return list(
+        DailyMetric.objects.filter(metric=metric, dimension=dimension, date__gte=start, date__lte=end)
+        .order_by('date', 'key')
+        .values('date', 'key', 'count', 'amount')
+    )
+
+
+def monthly(metric: str, months: int = 12, dimension: str = '') -> List[Dict]:
+    """Monthly totals for month-over-month comparisons, oldest first."""
+    today = timezone.localdate()
+    first_month = today.year * 12 + today.month - 1 - (months - 1)
+    start = date(first_month // 12, first_month % 12 + 1, 1)
+    return list(
+        DailyMetric.objects.filter(metric=metric, dimension=dimension, date__gte=start)
+        .annotate(month=TruncMonth('date'))
+        .values('month', 'key')
+        .annotate(count=Sum('count'), amount=Sum('amount'))
+        .order_by('month', 'key')
+    )
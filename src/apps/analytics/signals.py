@@ -0,0 +1,67 @@
+"""
+Cache invalidation for the dashboard metrics and incremental daily rollups.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from apps.analytics.services import rollups
+from apps.analytics.services.dashboard_metrics import invalidate_dashboard_metrics
+from apps.clients.models import Client
+from apps.finance.models import AccountPayable, AccountReceivable
+from apps.finance.signals import entries_bulk_changed
+from apps.intake.models import Lead
+from apps.intake.signals import leads_bulk_changed
+from apps.legal_cases.models import LegalCase
+from in_brief.models import Article, Category
+
+METRIC_MODELS = (Lead, LegalCase, Client, AccountPayable, AccountReceivable, Article, Category)
+ROLLUP_MODELS = {rollup.model for rollup in rollups.ROLLUPS}
+
+
+def drop_dashboard_metrics(sender, **kwargs):
+    invalidate_dashboard_metrics()
+
+
+def remember_rollup_days(sender, instance, using=None, update_fields=None, **kwargs):
+    # Bucket dates as stored, so moving a row (e.g. a new due_date) also rebuilds the day it left.
+    # Read here rather than on every load, and only when the save can move the row.
+    if instance._state.adding or instance.pk is None or hasattr(instance, '_rollup_days'):
+        return
+    date_fields = {rollup.date_field for rollup in rollups.rollups_for(sender)}
+    if update_fields is not None and date_fields.isdisjoint(update_fields):
+        return
+    stored = sender._base_manager.using(using).only(*date_fields).filter(pk=instance.pk).first()
+    if stored is not None:
+        instance._rollup_days = {r.metric: r.bucket_date(stored) for r in rollups.rollups_for(sender)}
+
+
+def mark_rollups_dirty(sender, instance, update_fields=None, **kwargs):
+    previous = getattr(instance, '_rollup_days', {})
+    days = {rollup.metric: rollup.bucket_date(instance) for rollup in rollups.rollups_for(sender)}
+    for rollup in rollups.rollups_for(sender):
+        rollups.mark_dirty(rollup, days[rollup.metric])
+        if previous.get(rollup.metric) not in (None, days[rollup.metric]):
+            rollups.mark_dirty(rollup, previous[rollup.metric])
+    # The row now holds these dates, so later saves of this instance need no read
+    # (unless some were not written or not loaded)
+    if update_fields is None and None not in days.values():
+        instance._rollup_days = days
+
+
+def mark_bulk_rollups_dirty(sender, days, **kwargs):
+    invalidate_dashboard_metrics()
+    for rollup in rollups.rollups_for(sender):
+        for day in days:
+            rollups.mark_dirty(rollup, day)
+
+
+for model in METRIC_MODELS:
+    post_save.connect(drop_dashboard_metrics, sender=model, dispatch_uid=f'dashboard_metrics_save_{model.__name__}')
+    post_delete.connect(drop_dashboard_metrics, sender=model, dispatch_uid=f'dashboard_metrics_delete_{model.__name__}')
+
+for model in ROLLUP_MODELS:
+    pre_save.connect(remember_rollup_days, sender=model, dispatch_uid=f'rollups_presave_{model.__name__}')
+    post_save.connect(mark_rollups_dirty, sender=model, dispatch_uid=f'rollups_save_{model.__name__}')
+    post_delete.connect(mark_rollups_dirty, sender=model, dispatch_uid=f'rollups_delete_{model.__name__}')
+
+entries_bulk_changed.connect(mark_bulk_rollups_dirty, dispatch_uid='rollups_finance_bulk')
+leads_bulk_changed.connect(mark_bulk_rollups_dirty, dispatch_uid='rollups_leads_bulk')
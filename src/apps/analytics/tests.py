@@ -0,0 +1,339 @@
+"""
+Tests for the analytics app (dashboard metrics, daily rollups, exports).
+"""
+import unittest
+import unittest.mock
+from datetime import timedelta
+from io import BytesIO, StringIO
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.analytics import export
+from apps.analytics.models import DailyMetric
+from apps.analytics.services import rollups
+from apps.analytics.services.dashboard_metrics import get_dashboard_metrics
+from apps.clients.models import Client
+from apps.finance.models import AccountPayable, AccountReceivable
+from apps.intake.models import Lead
+from apps.intake.scoring import ClaimScoreEngine, ScoreResult, score_many
+from apps.legal_cases.models import LegalCase
+from core.security.fields import EncryptedValue
+
+
+class DashboardMetricsTestCase(TestCase):
+    """Tests for the aggregated dashboard metrics service."""
+    
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        today = timezone.now().date()
+        Lead.objects.create(full_name="A", case_type="OTHER", contact_info="a@x.com", source="Google", location="Campinas", is_qualified=True)
+        Lead.objects.create(full_name="B", case_type="OTHER", contact_info="b@x.com", source="Google", location="Sumaré")
+        old = Lead.objects.create(full_name="C", case_type="OTHER", contact_info="c@x.com", source="Instagram", location="Campinas")
+        Lead.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=10))
+        
+        client = Client.objects.create(full_name="Cliente")
+        LegalCase.objects.create(client=client, title="1", area='HEALTH', status='ACTIVE', contingency_value=Decimal('1000.50'))
+        LegalCase.objects.create(client=client, title="2", area='HEALTH', status='ANALYSIS', contingency_value=Decimal('200'))
+        LegalCase.objects.create(client=client, title="3", area='CIVIL', status='ACTIVE')
+        
+        AccountPayable.objects.create(description="Aluguel", amount=Decimal('300'), due_date=today - timedelta(days=1))
+        AccountPayable.objects.create(description="Software", amount=Decimal('50'), due_date=today + timedelta(days=5))
+        AccountPayable.objects.create(description="Pago", amount=Decimal('999'), due_date=today, status='PAID')
+        AccountReceivable.objects.create(description="Honorários", amount=Decimal('5000'), due_date=today)
+    
+    def test_metrics_values(self):
+        """Test that the aggregated numbers match the old per-metric queries."""
+        metrics = get_dashboard_metrics()
+        
+        self.assertEqual(
+            (metrics['leads_today'], metrics['leads_week'], metrics['leads_month'], metrics['leads_qualified']),
+            (2, 2, 3, 1)
+        )
+        self.assertEqual(
+            sorted((r['source'], r['count']) for r in metrics['leads_by_source']),
+            [('Google', 2), ('Instagram', 1)]
+        )
+        self.assertEqual(
+            sorted((r['location'], r['count']) for r in metrics['leads_by_location']),
+            [('Campinas', 2), ('Sumaré', 1)]
+        )
+        self.assertEqual(
+            [(r['area'], r['label'], r['count']) for r in metrics['cases_by_area']],
+            [('CIVIL', 'Direito Cível', 1), ('HEALTH', 'Saúde (Lipedema)', 2)]
+        )
+        self.assertEqual(metrics['active_cases'], 2)
+        self.assertEqual(metrics['total_contingency'], Decimal('1200.50'))
+        self.assertEqual(metrics['total_clients'], 1)
+        self.assertEqual(metrics['finance_total_pending'], Decimal('350'))
+        self.assertEqual(metrics['finance_late_count'], 1)
+        self.assertEqual(metrics['finance_receivable_pending'], Decimal('5000'))
+        self.assertEqual((metrics['total_articles'], metrics['published_articles'], metrics['categories_count']), (0, 0, 0))
+    
+    def test_one_query_per_table_then_cached(self):
+        """Test the query budget and that repeated loads hit the cache."""
+        with self.assertNumQueries(8):
+            get_dashboard_metrics()
+        with self.assertNumQueries(0):
+            get_dashboard_metrics()
+    
+    def test_writes_invalidate_cache(self):
+        """Test that saving a tracked model drops the cached bundle."""
+        self.assertEqual(get_dashboard_metrics()['leads_today'], 2)
+        Lead.objects.create(full_name="D", case_type="OTHER", contact_info="d@x.com")
+        self.assertEqual(get_dashboard_metrics()['leads_today'], 3)
+        
+        AccountPayable.objects.filter(status='PENDING').first().delete()
+        self.assertLess(get_dashboard_metrics()['finance_total_pending'], Decimal('350'))
+
+
+class DailyRollupTestCase(TestCase):
+    """Tests for the DailyMetric rollups."""
+    
+    def setUp(self):
+        self.today = timezone.localdate()
+    
+    def metric(self, metric, day, dimension='', key=''):
+        row = DailyMetric.objects.filter(metric=metric, date=day, dimension=dimension, key=key).first()
+        return (row.count, row.amount) if row else (0, Decimal('0'))
+    
+    def test_rebuild_groups_by_day_and_dimension(self):
+        """Test totals and per-dimension rows, with datetimes bucketed in local time."""
+        Lead.objects.create(full_name="A", case_type="OTHER", contact_info="a@x.com", source="Google", is_qualified=True)
+        Lead.objects.create(full_name="B", case_type="OTHER", contact_info="b@x.com", source="Google")
+        old = Lead.objects.create(full_name="C", case_type="OTHER", contact_info="c@x.com", source="Instagram")
+        Lead.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=3))
+        AccountPayable.objects.create(description="Aluguel", amount=Decimal('300'), due_date=self.today, category='OFFICE')
+        AccountPayable.objects.create(description="Luz", amount=Decimal('50.5'), due_date=self.today, category='SOFTWARE')
+        
+        rollups.rebuild_all(self.today - timedelta(days=7), self.today)
+        
+        self.assertEqual(self.metric('leads', self.today)[0], 2)
+        self.assertEqual(self.metric('leads', self.today, 'source', 'Google')[0], 2)
+        self.assertEqual(self.metric('leads', self.today - timedelta(days=3), 'source', 'Instagram')[0], 1)
+        self.assertEqual(self.metric('leads_qualified', self.today)[0], 1)
+        self.assertEqual(self.metric('payables', self.today), (2, Decimal('350.50')))
+        self.assertEqual(self.metric('payables', self.today, 'category', 'OFFICE'), (1, Decimal('300')))
+        
+        # Rebuilding is idempotent
+        count = DailyMetric.objects.count()
+        rollups.rebuild_all(self.today - timedelta(days=7), self.today)
+        self.assertEqual(DailyMetric.objects.count(), count)
+    
+    def test_signals_rebuild_touched_days_on_commit(self):
+        """Test that saves, moves and deletes update the affected buckets once committed."""
+        tomorrow = self.today + timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            bill = AccountPayable.objects.create(description="Aluguel", amount=Decimal('300'), due_date=self.today)
+            AccountPayable.objects.create(description="Luz", amount=Decimal('50'), due_date=self.today)
+        self.assertEqual(self.metric('payables', self.today), (2, Decimal('350')))
+        
+        bill = AccountPayable.objects.get(pk=bill.pk)
+        bill.due_date = tomorrow
+        with self.captureOnCommitCallbacks(execute=True):
+            bill.save()
+        self.assertEqual(self.metric('payables', self.today), (1, Decimal('50')))
+        self.assertEqual(self.metric('payables', tomorrow), (1, Decimal('300')))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            bill.delete()
+        self.assertEqual(self.metric('payables', tomorrow), (0, Decimal('0')))
+    
+    def test_loading_rows_skips_the_rollup_snapshot(self):
+        """Test that the stored dates are only read on saves that can move the row."""
+        bill = AccountPayable.objects.create(description="Aluguel", amount=Decimal('300'), due_date=self.today)
+        with self.assertNumQueries(1):
+            loaded = list(AccountPayable.objects.all())
+        self.assertFalse(hasattr(loaded[0], '_rollup_days'))
+        
+        with self.assertNumQueries(1):  # the UPDATE, no read of due_date
+            loaded[0].save(update_fields=['description'])
+        with self.assertNumQueries(1):  # the instance remembers the dates it was created with
+            bill.save()
+    
+    def test_rescoring_rebuilds_qualified_leads(self):
+        """Test that score_many (bulk_update, no post_save) still updates the rollups."""
+        with self.captureOnCommitCallbacks(execute=True):
+            lead = Lead.objects.create(full_name="A", case_type="OTHER", contact_info="a@x.com")
+        self.assertEqual(self.metric('leads_qualified', self.today)[0], 0)
+
+        with unittest.mock.patch.object(ClaimScoreEngine, 'evaluate', return_value=ScoreResult(90, {}, [], [])):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(score_many(Lead.objects.filter(id=lead.id)), 1)
+
+        self.assertEqual(self.metric('leads_qualified', self.today)[0], 1)
+
+    def test_nothing_written_before_commit(self):
+        """Test that rollups are not rebuilt inside the writing transaction."""
+        with self.captureOnCommitCallbacks(execute=False):
+            Lead.objects.create(full_name="A", case_type="OTHER", contact_info="a@x.com")
+        self.assertFalse(DailyMetric.objects.exists())
+    
+    def test_backfill_command_and_monthly(self):
+        """Test the nightly command and the month-over-month query."""
+        client = Client.objects.create(full_name="Cliente")
+        LegalCase.objects.create(client=client, title="1", area='HEALTH', contingency_value=Decimal('1000'))
+        LegalCase.objects.create(client=client, title="2", area='CIVIL', contingency_value=Decimal('500'))
+        
+        out = StringIO()
+        call_command('rollup_daily_metrics', '--all', stdout=out)
+        
+        self.assertIn('cases_opened', out.getvalue())
+        self.assertEqual(self.metric('cases_opened', self.today), (2, Decimal('1500')))
+        self.assertEqual(self.metric('cases_opened', self.today, 'area', 'HEALTH'), (1, Decimal('1000')))
+        months = rollups.monthly('cases_opened', months=2)
+        self.assertEqual([(m['month'], m['count']) for m in months], [(self.today.replace(day=1), 2)])
+
+    def test_monthly_returns_exactly_n_months(self):
+        """Test that months=12 starts 11 whole months back, whatever the month lengths."""
+        first = self.today.replace(day=1)
+        for back in (11, 12):
+            index = first.year * 12 + first.month - 1 - back
+            DailyMetric.objects.create(metric='leads', date=first.replace(year=index // 12, month=index % 12 + 1), count=1)
+        DailyMetric.objects.create(metric='leads', date=self.today, count=1)
+
+        months = rollups.monthly('leads', months=12)
+
+        self.assertEqual(len(months), 2)
+        self.assertEqual(months[-1]['month'], first)
+
+    def test_rebuild_overwrites_concurrent_rows(self):
+        """Test that buckets inserted by a concurrent rebuild are updated, not duplicated."""
+        Lead.objects.create(full_name="A", case_type="OTHER", contact_info="a@x.com")
+        DailyMetric.objects.create(metric='leads', date=self.today, count=7)
+
+        with unittest.mock.patch('django.db.models.query.QuerySet.delete', return_value=(0, {})):
+            rollups.rebuild(rollups.ROLLUPS_BY_METRIC['leads'], self.today, self.today)
+
+        self.assertEqual(self.metric('leads', self.today)[0], 1)
+
+    def test_failed_rollup_does_not_break_the_commit(self):
+        """Test that a rollup error after commit is logged, not raised to the request."""
+        with unittest.mock.patch.object(rollups, 'rebuild', side_effect=RuntimeError("boom")):
+            with self.assertLogs('apps.analytics.services.rollups', 'ERROR'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    Lead.objects.create(full_name="A", case_type="OTHER", contact_info="a@x.com")
+        self.assertTrue(Lead.objects.exists())
+
+
+class ExportTestCase(TestCase):
+    """Tests for apps.analytics.export (streaming CSV/XLSX)."""
+    
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client_record = Client.objects.create(full_name="Maria Souza", cpf_cnpj="123.456.789-09", phone="(19) 99999-0000", email="maria@x.com")
+        Client.objects.create(full_name="Empresa X", client_type='PJ', cpf_cnpj="12.345.678/0001-90", phone="1933334444")
+        self.manager = User.objects.create_user('gestora', password='x')
+        self.manager.groups.add(Group.objects.create(name='Manager'))
+        self.secretary = User.objects.create_user('secretaria', password='x')
+        self.secretary.groups.add(Group.objects.create(name='Secretary'))
+    
+    def read_csv(self, response):
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+    
+    def test_chunks(self):
+        dataset = export.DATASETS['clients']
+        chunks = list(export.iter_chunks(dataset, chunk_size=1))
+        self.assertEqual([len(chunk) for chunk in chunks], [1, 1])
+        self.assertEqual(chunks[0][0][:4], [self.client_record.id, "Maria Souza", "Pessoa Física", "Ativo / Recorrente"])
+        
+        # Encrypted columns are left out unless requested, and decrypted per chunk when they are
+        self.assertNotIn('CPF/CNPJ', export.headers(dataset))
+        with unittest.mock.patch.object(export, 'decrypt_many', wraps=export.decrypt_many) as decrypt_many:
+            rows = [row for chunk in export.iter_chunks(dataset, include_sensitive=True) for row in chunk]
+        self.assertEqual([row[4] for row in rows], ["123.456.789-09", "12.345.678/0001-90"])
+        # One pass per encrypted column, over the stored tokens (not values already decrypted row by row)
+        self.assertEqual(decrypt_many.call_count, 2)  # cpf_cnpj, phone
+        for call in decrypt_many.call_args_list:
+            self.assertTrue(all(isinstance(value, EncryptedValue) for value in call.args[0] if value is not None))
+    
+    def test_csv_sensitive_columns_need_permission(self):
+        url = reverse('admin_portal:export_dataset', args=['clients'])
+        
+        self.client.force_login(self.manager)
+        response = self.client.get(url, {'sensitive': '1'})
+        self.assertIn('attachment; filename="clients_', response['Content-Disposition'])
+        lines = self.read_csv(response)
+        self.assertEqual(lines[0], 'ID;Nome Completo;Tipo;Status;CPF/CNPJ;Telefone/WhatsApp;E-mail;Criado em')
+        self.assertIn(';123.456.789-09;(19) 99999-0000;maria@x.com;', lines[1])
+        
+        self.client.force_login(self.secretary)
+        lines = self.read_csv(self.client.get(url, {'sensitive': '1'}))
+        self.assertEqual(lines[0], 'ID;Nome Completo;Tipo;Status;E-mail;Criado em')
+        self.assertNotIn('123.456.789-09', '\n'.join(lines))
+    
+    def test_ledger_export_uses_filters(self):
+        today = timezone.localdate()
+        AccountPayable.objects.create(description="Aluguel", amount=Decimal('1500.00'), due_date=today, category='OFFICE')
+        AccountPayable.objects.create(description="Licença", amount=Decimal('99.90'), due_date=today, category='SOFTWARE')
+        self.client.force_login(self.manager)
+        
+        lines = self.read_csv(self.client.get(reverse('admin_portal:export_dataset', args=['payables']), {'category': 'SOFTWARE'}))
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].endswith(f';Licença;;Software/Sistemas;99.90;{today.isoformat()};Pendente'))
+    
+    def test_export_access(self):
+        url = reverse('admin_portal:export_dataset', args=['leads'])
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.secretary)
+        self.assertEqual(self.client.get(reverse('admin_portal:export_dataset', args=['nope'])).status_code, 404)
+        self.assertEqual(self.client.get(url, {'format': 'pdf'}).status_code, 400)
+    
+    @unittest.skipUnless(export.xlsx_available(), "openpyxl not installed")
+    def test_xlsx(self):
+        from openpyxl import load_workbook
+        
+        self.client.force_login(self.manager)
+        response = self.client.get(reverse('admin_portal:export_dataset', args=['clients']), {'format': 'xlsx'})
+        sheet = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        rows = list(sheet.values)
+        self.assertEqual(rows[0][:2], ('ID', 'Nome Completo'))
+        self.assertEqual(len(rows), 3)
+
+
+@pytest.mark.django_db
+class TestDashboardMetricsAPI:
+    """Tests for the dashboard metrics JSON endpoint."""
+    
+    def test_requires_manager(self, client):
+        response = client.get('/api/analytics/dashboard/metrics/')
+        assert response.status_code == 403
+    
+    def test_returns_section(self, client):
+        cache.clear()
+        user = User.objects.create_superuser('boss', 'boss@x.com', 'x')
+        client.force_login(user)
+        AccountPayable.objects.create(description="Aluguel", amount=Decimal('300.25'), due_date=timezone.now().date())
+        
+        response = client.get('/api/analytics/dashboard/metrics/?section=finance')
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data['finance_total_pending'] == 300.25
+        assert 'leads_today' not in data
+        
+        assert client.get('/api/analytics/dashboard/metrics/?section=nope').status_code == 400
+
+    def test_rollup_series(self, client):
+        user = User.objects.create_superuser('boss', 'boss@x.com', 'x')
+        client.force_login(user)
+        Lead.objects.create(full_name="A", case_type="OTHER", contact_info="a@x.com", source="Google")
+        today = timezone.localdate()
+        rollups.rebuild_all(today, today)
+        
+        response = client.get('/api/analytics/rollups/leads/?dimension=source')
+        
+        assert response.status_code == 200
+        assert response.json()['points'] == [{'period': today.isoformat(), 'key': 'Google', 'count': 1, 'amount': 0.0}]
+        assert client.get('/api/analytics/rollups/leads/?dimension=area').status_code == 400
+        assert client.get('/api/analytics/rollups/nope/').status_code == 400
@@ -1,11 +1,13 @@
 from django.contrib import admin
+from core.security.admin import BlindIndexSearchMixin
 from .models import Client
 
 @admin.register(Client)
-class ClientAdmin(admin.ModelAdmin):
+class ClientAdmin(BlindIndexSearchMixin, admin.ModelAdmin):
     list_display = ('full_name', 'client_type', 'email', 'created_at')
     list_filter = ('client_type', 'created_at')
     search_fields = ('full_name', 'email')
+    blind_search_fields = ('cpf_cnpj', 'phone')
     readonly_fields = ('created_at', 'updated_at')
     
     fieldsets = (
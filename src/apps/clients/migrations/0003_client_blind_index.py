@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:56
+
+import core.security.fields
+from django.db import migrations
+
+
+def backfill_blind_indexes(apps, schema_editor):
+    Client = apps.get_model('clients', 'Client')
+    seen = {}
+    for client in Client.objects.all().iterator(chunk_size=500):
+        # BlindIndexField.pre_save recomputes both digests from the decrypted values
+        client.save(update_fields=['cpf_cnpj_bidx', 'phone_bidx'])
+        if client.cpf_cnpj_bidx:
+            if client.cpf_cnpj_bidx in seen:
+                raise RuntimeError(
+                    f"Duplicate CPF/CNPJ on clients {seen[client.cpf_cnpj_bidx]} and {client.pk}; "
+                    f"merge them before applying this migration."
+                )
+            seen[client.cpf_cnpj_bidx] = client.pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_client_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='cpf_cnpj_bidx',
+            field=core.security.fields.BlindIndexField(blank=True, editable=False, max_length=64, normalizer='document', null=True, source='cpf_cnpj'),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='phone_bidx',
+            field=core.security.fields.BlindIndexField(blank=True, db_index=True, editable=False, max_length=64, normalizer='phone', null=True, source='phone'),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='cpf_cnpj',
+            field=core.security.fields.EncryptedField(help_text='Stored encrypted', max_length=255, verbose_name='CPF/CNPJ'),
+        ),
+        migrations.RunPython(backfill_blind_indexes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='client',
+            name='cpf_cnpj_bidx',
+            field=core.security.fields.BlindIndexField(blank=True, editable=False, max_length=64, normalizer='document', null=True, source='cpf_cnpj', unique=True),
+        ),
+    ]
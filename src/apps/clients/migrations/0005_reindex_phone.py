@@ -0,0 +1,19 @@
+from django.db import migrations
+
+from core.security.fields import rebuild_blind_indexes
+
+
+def reindex_phones(apps, schema_editor):
+    """Recompute the phone digests: e-mails stored as 'phone' collided on their digits."""
+    rebuild_blind_indexes(apps.get_model('clients', 'Client'), 'phone_bidx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_search_document'),
+    ]
+
+    operations = [
+        migrations.RunPython(reindex_phones, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+from core.search.fields import rebuild_search_documents
+
+
+def rebuild(apps, schema_editor):
+    """Documents now also index e-mail addresses word by word."""
+    rebuild_search_documents(apps.get_model('clients', 'Client'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0005_reindex_phone'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild, migrations.RunPython.noop),
+    ]
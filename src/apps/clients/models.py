@@ -1,5 +1,6 @@
 from django.db import models
-from core.security.fields import EncryptedField
+from core.security.fields import EncryptedField, EncryptedQuerySet, BlindIndexField
+from core.search.fields import SearchDocumentField
 
 class Client(models.Model):
     """
@@ -24,12 +25,21 @@ class Client(models.Model):
     status = models.CharField("Status", max_length=20, choices=STATUS_CHOICES, default='ACTIVE')
     
     # PII - Personally Identifiable Information (Encrypted)
-    cpf_cnpj = EncryptedField("CPF/CNPJ", max_length=255, unique=True, help_text="Stored encrypted")
+    cpf_cnpj = EncryptedField("CPF/CNPJ", max_length=255, help_text="Stored encrypted")
     phone = EncryptedField("Telefone/WhatsApp", max_length=255, help_text="Stored encrypted")
+    
+    # Blind indexes (HMAC of normalized PII) for equality search and uniqueness
+    cpf_cnpj_bidx = BlindIndexField(source='cpf_cnpj', normalizer='document', unique=True)
+    phone_bidx = BlindIndexField(source='phone', normalizer='phone')
     email = models.EmailField("E-mail", blank=True)
     
+    # Full-text search (plaintext fields only, never the encrypted ones)
+    search_document = SearchDocumentField(sources=('full_name', 'email'))
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = EncryptedQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.full_name} ({self.get_client_type_display()})"
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import AccountPayable
+from .models import AccountPayable, RecurringPayable
+from .services.recurring import materialize
 
 @admin.register(AccountPayable)
 class AccountPayableAdmin(admin.ModelAdmin):
@@ -12,3 +13,17 @@ class AccountPayableAdmin(admin.ModelAdmin):
         return obj.is_late
     is_late.boolean = True
     is_late.short_description = "Atrasado?"
+
+
+@admin.register(RecurringPayable)
+class RecurringPayableAdmin(admin.ModelAdmin):
+    list_display = ('description', 'amount', 'frequency', 'start_date', 'end_date', 'generated_until', 'is_active')
+    list_filter = ('frequency', 'category', 'is_active')
+    search_fields = ('description', 'supplier')
+    readonly_fields = ('generated_until',)
+    actions = ['generate_payables']
+    
+    @admin.action(description="Gerar contas futuras")
+    def generate_payables(self, request, queryset):
+        created = materialize(recurrences=queryset.filter(is_active=True))
+        self.message_user(request, f"{created} conta(s) gerada(s).")
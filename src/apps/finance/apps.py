@@ -4,3 +4,7 @@ class FinanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.finance'
     verbose_name = 'Financeiro'
+
+    def ready(self):
+        """Import signals when app is ready."""
+        import apps.finance.signals
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.finance.services.recurring import DEFAULT_HORIZON_DAYS, materialize
+
+
+class Command(BaseCommand):
+    help = 'Materialize the AccountPayable rows of active recurring expenses. Run daily.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            default=getattr(settings, 'FINANCE_RECURRING_HORIZON_DAYS', DEFAULT_HORIZON_DAYS),
+            help='Generate bills due in the next N days (default: FINANCE_RECURRING_HORIZON_DAYS)',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days must not be negative')
+        until = timezone.localdate() + timedelta(days=options['days'])
+        created = materialize(until)
+        self.stdout.write(self.style.SUCCESS(f'{created} payables generated up to {until}'))
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_accountreceivable'),
+        ('legal_cases', '0003_search_document'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accountpayable',
+            index=models.Index(fields=['status', 'category', 'due_date'], name='payable_status_cat_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accountpayable',
+            index=models.Index(fields=['due_date', 'id'], name='payable_due_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accountreceivable',
+            index=models.Index(fields=['status', 'category', 'due_date'], name='receivable_status_cat_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accountreceivable',
+            index=models.Index(fields=['due_date', 'id'], name='receivable_due_id_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_ledger_indexes'),
+        ('legal_cases', '0003_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringPayable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.CharField(max_length=255, verbose_name='Descrição')),
+                ('supplier', models.CharField(blank=True, max_length=255, verbose_name='Fornecedor')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valor (R$)')),
+                ('category', models.CharField(choices=[('OFFICE', 'Escritório'), ('SOFTWARE', 'Software/Sistemas'), ('MARKETING', 'Marketing'), ('LEGAL_FEES', 'Custas Processuais'), ('TAXES', 'Impostos'), ('OTHER', 'Outros')], default='OTHER', max_length=20, verbose_name='Categoria')),
+                ('notes', models.TextField(blank=True, verbose_name='Observações')),
+                ('frequency', models.CharField(choices=[('WEEKLY', 'Semanal'), ('MONTHLY', 'Mensal'), ('YEARLY', 'Anual')], default='MONTHLY', max_length=10, verbose_name='Frequência')),
+                ('start_date', models.DateField(verbose_name='Primeiro Vencimento')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='Último Vencimento')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Ativa')),
+                ('generated_until', models.DateField(blank=True, editable=False, null=True, verbose_name='Gerada até')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Despesa Recorrente',
+                'verbose_name_plural': 'Despesas Recorrentes',
+                'ordering': ['description'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='accountreceivable',
+            index=models.Index(fields=['amount', 'due_date'], name='receivable_amount_due_idx'),
+        ),
+        migrations.AddField(
+            model_name='accountpayable',
+            name='recurrence',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payables', to='finance.recurringpayable'),
+        ),
+        migrations.AddIndex(
+            model_name='accountpayable',
+            index=models.Index(fields=['amount', 'due_date'], name='payable_amount_due_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='accountpayable',
+            constraint=models.UniqueConstraint(fields=('recurrence', 'due_date'), name='payable_recurrence_due_uniq'),
+        ),
+    ]
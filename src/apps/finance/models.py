@@ -34,6 +34,15 @@ class AccountPayable(models.Model):
     notes = models.TextField("Observações", blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # [NEW] Set on the rows materialized from a recurring expense
+    recurrence = models.ForeignKey(
+        'finance.RecurringPayable',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='payables'
+    )
+    
     @property
     def is_late(self):
         return self.status == 'PENDING' and self.due_date < timezone.now().date()
@@ -45,6 +54,51 @@ class AccountPayable(models.Model):
         verbose_name = "Conta a Pagar"
         verbose_name_plural = "Contas a Pagar"
         ordering = ['due_date']
+        indexes = [
+            # Ledger: filters + keyset pagination on (due_date, id)
+            models.Index(fields=['status', 'category', 'due_date'], name='payable_status_cat_due_idx'),
+            models.Index(fields=['due_date', 'id'], name='payable_due_id_idx'),
+            # Bank statement import: match on amount within a due date window
+            models.Index(fields=['amount', 'due_date'], name='payable_amount_due_idx'),
+        ]
+        constraints = [
+            # One row per occurrence, so concurrent generators cannot duplicate a bill
+            models.UniqueConstraint(fields=['recurrence', 'due_date'], name='payable_recurrence_due_uniq'),
+        ]
+
+class RecurringPayable(models.Model):
+    """
+    Finance Module: Recurring expense (aluguel, licenças, impostos mensais).
+    Future AccountPayable rows are materialized by apps.finance.services.recurring.
+    """
+    
+    FREQUENCY_CHOICES = [
+        ('WEEKLY', 'Semanal'),
+        ('MONTHLY', 'Mensal'),
+        ('YEARLY', 'Anual'),
+    ]
+    
+    description = models.CharField("Descrição", max_length=255)
+    supplier = models.CharField("Fornecedor", max_length=255, blank=True)
+    amount = models.DecimalField("Valor (R$)", max_digits=10, decimal_places=2)
+    category = models.CharField("Categoria", max_length=20, choices=AccountPayable.CATEGORY_CHOICES, default='OTHER')
+    notes = models.TextField("Observações", blank=True)
+    
+    frequency = models.CharField("Frequência", max_length=10, choices=FREQUENCY_CHOICES, default='MONTHLY')
+    start_date = models.DateField("Primeiro Vencimento")
+    end_date = models.DateField("Último Vencimento", null=True, blank=True)
+    is_active = models.BooleanField("Ativa", default=True)
+    generated_until = models.DateField("Gerada até", null=True, blank=True, editable=False)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.description} ({self.get_frequency_display()}) - R$ {self.amount}"
+
+    class Meta:
+        verbose_name = "Despesa Recorrente"
+        verbose_name_plural = "Despesas Recorrentes"
+        ordering = ['description']
 
 class AccountReceivable(models.Model):
     """
@@ -84,6 +138,10 @@ class AccountReceivable(models.Model):
     notes = models.TextField("Observações", blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    @property
+    def is_late(self):
+        return self.status == 'PENDING' and self.due_date < timezone.now().date()
+    
     def __str__(self):
         return f"{self.description} - R$ {self.amount}"
 
@@ -91,3 +149,8 @@ class AccountReceivable(models.Model):
         verbose_name = "Conta a Receber"
         verbose_name_plural = "Contas a Receber"
         ordering = ['due_date']
+        indexes = [
+            models.Index(fields=['status', 'category', 'due_date'], name='receivable_status_cat_due_idx'),
+            models.Index(fields=['due_date', 'id'], name='receivable_due_id_idx'),
+            models.Index(fields=['amount', 'due_date'], name='receivable_amount_due_idx'),
+        ]
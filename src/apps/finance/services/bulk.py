@@ -0,0 +1,38 @@
+"""
+Bulk settlement of ledger entries (baixa em lote).
+
+One UPDATE marks every selected pending entry as paid/received, instead of
+loading and saving each row. Model signals do not fire for it, so
+`entries_bulk_changed` is sent afterwards for the caches and rollups.
+"""
+from datetime import date
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.finance.services.ledger import Ledger
+from apps.finance.signals import entries_bulk_changed
+
+
+def settle(ledger: Ledger, ids: Iterable[int], on: Optional[date] = None) -> int:
+    """
+    Mark the pending entries in `ids` as settled on `on` (default: today).
+
+    Entries already paid, received or cancelled are left untouched.
+    Returns the number of entries settled.
+    """
+    ids = list(ids)
+    if not ids:
+        return 0
+    values = {'status': ledger.settled_status}
+    if ledger.settled_date_field:
+        values[ledger.settled_date_field] = on or timezone.localdate()
+
+    with transaction.atomic():
+        pending = ledger.model.objects.filter(pk__in=ids, status='PENDING')
+        days = set(pending.order_by().values_list('due_date', flat=True).distinct())
+        count = pending.update(**values)
+    if count:
+        entries_bulk_changed.send(sender=ledger.model, days=days)
+    return count
@@ -0,0 +1,183 @@
+"""
+Finance ledger (contas a pagar / a receber) for the admin portal.
+
+Pages are cut with a keyset cursor on (due_date, id), so page 500 costs the
+same as page 1, and the totals shown above the table are computed for the
+whole filtered ledger in a single aggregate query, independent of the page.
+Both rely on the composite indexes declared on the finance models.
+"""
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.finance.models import AccountPayable, AccountReceivable
+
+DEFAULT_PAGE_SIZE = 50
+
+
+@dataclass(frozen=True)
+class Ledger:
+    name: str
+    model: type
+    settled_status: str
+    settled_date_field: Optional[str] = None  # stamped with the settlement date, if the model has one
+    select_related: Tuple[str, ...] = ()
+
+
+LEDGERS = {
+    'payable': Ledger('payable', AccountPayable, settled_status='PAID'),
+    'receivable': Ledger(
+        'receivable', AccountReceivable, settled_status='RECEIVED',
+        settled_date_field='received_date', select_related=('legal_case__client',),
+    ),
+}
+
+
+@dataclass(frozen=True)
+class LedgerFilters:
+    status: str = ''
+    category: str = ''
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+    @classmethod
+    def from_query(cls, params) -> 'LedgerFilters':
+        """Filters from request.GET; malformed dates are ignored."""
+        return cls(
+            status=params.get('status', ''),
+            category=params.get('category', ''),
+            date_from=_parse_date(params.get('date_from')),
+            date_to=_parse_date(params.get('date_to')),
+        )
+
+    def apply(self, queryset):
+        if self.status:
+            queryset = queryset.filter(status=self.status)
+        if self.category:
+            queryset = queryset.filter(category=self.category)
+        if self.date_from:
+            queryset = queryset.filter(due_date__gte=self.date_from)
+        if self.date_to:
+            queryset = queryset.filter(due_date__lte=self.date_to)
+        return queryset
+
+
+@dataclass
+class LedgerPage:
+    items: List
+    next_cursor: str = ''
+    prev_cursor: str = ''
+
+
+def _parse_date(value) -> Optional[date]:
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def encode_cursor(item) -> str:
+    return f'{item.due_date.isoformat()}.{item.pk}'
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[date, int]]:
+    try:
+        due_date, pk = cursor.rsplit('.', 1)
+        return date.fromisoformat(due_date), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def get_page(ledger: Ledger, filters: LedgerFilters, after: str = '', before: str = '',
+             page_size: int = None) -> LedgerPage:
+    """
+    One page of the ledger ordered by (due_date, id).
+
+    Args:
+        after: Cursor of the last row of the previous page (next page)
+        before: Cursor of the first row of the following page (previous page)
+    """
+    page_size = page_size or getattr(settings, 'FINANCE_LEDGER_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    queryset = filters.apply(ledger.model.objects.all())
+    if ledger.select_related:
+        queryset = queryset.select_related(*ledger.select_related)
+
+    position = decode_cursor(after) if after else None
+    backwards = position is None and decode_cursor(before) is not None
+    if position:
+        due_date, pk = position
+        queryset = queryset.filter(Q(due_date__gt=due_date) | Q(due_date=due_date, id__gt=pk))
+    elif backwards:
+        due_date, pk = decode_cursor(before)
+        queryset = queryset.filter(Q(due_date__lt=due_date) | Q(due_date=due_date, id__lt=pk))
+
+    ordering = ('-due_date', '-id') if backwards else ('due_date', 'id')
+    items = list(queryset.order_by(*ordering)[:page_size + 1])
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    if backwards:
+        items.reverse()
+
+    # Going back we came from a later page; going forward, from an earlier one if a cursor was given
+    has_next = True if backwards else has_more
+    has_prev = has_more if backwards else bool(position)
+    page = LedgerPage(items=items)
+    if items:
+        page.next_cursor = encode_cursor(items[-1]) if has_next else ''
+        page.prev_cursor = encode_cursor(items[0]) if has_prev else ''
+    return page
+
+
+def get_totals(ledger: Ledger, filters: LedgerFilters) -> Dict:
+    """
+    Sums for the whole filtered ledger, in one query.
+
+    Returns:
+        total/count, by_status and by_category (code -> {'label', 'total',
+        'count'}), overdue_total/overdue_count (pending and past due) and
+        pending_total.
+    """
+    model = ledger.model
+    today = timezone.localdate()
+    overdue = Q(status='PENDING', due_date__lt=today)
+
+    aggregates = {
+        'total': Sum('amount'),
+        'count': Count('id'),
+        'pending_total': Sum('amount', filter=Q(status='PENDING')),
+        'overdue_total': Sum('amount', filter=overdue),
+        'overdue_count': Count('id', filter=overdue),
+    }
+    for code, _ in model.STATUS_CHOICES:
+        aggregates[f'status_{code}_total'] = Sum('amount', filter=Q(status=code))
+        aggregates[f'status_{code}_count'] = Count('id', filter=Q(status=code))
+    for code, _ in model.CATEGORY_CHOICES:
+        aggregates[f'category_{code}_total'] = Sum('amount', filter=Q(category=code))
+        aggregates[f'category_{code}_count'] = Count('id', filter=Q(category=code))
+
+    row = filters.apply(model.objects.order_by()).aggregate(**aggregates)
+
+    def group(prefix, choices):
+        return {
+            code: {
+                'label': label,
+                'total': row[f'{prefix}_{code}_total'] or Decimal('0'),
+                'count': row[f'{prefix}_{code}_count'],
+            }
+            for code, label in choices
+        }
+
+    return {
+        'total': row['total'] or Decimal('0'),
+        'count': row['count'],
+        'pending_total': row['pending_total'] or Decimal('0'),
+        'overdue_total': row['overdue_total'] or Decimal('0'),
+        'overdue_count': row['overdue_count'],
+        'by_status': group('status', model.STATUS_CHOICES),
+        'by_category': group('category', model.CATEGORY_CHOICES),
+    }
@@ -0,0 +1,235 @@
+"""
+Cash-flow projection over payables, receivables and case contingencies.
+
+Pending entries are first summed per due date by the database (one GROUP BY
+per source), then bucketed into weeks or months. With NumPy installed the
+bucketing, scenario weighting and running balances are array operations;
+without it the same math runs in plain Python, so NumPy stays optional.
+
+Case contingencies have no due date: an open case (ANALYSIS/ACTIVE) is
+expected to pay its success fee CASHFLOW_CASE_DURATION_DAYS after entry,
+weighted by the probability of success implied by its risk level.
+
+Results are cached under the ledger version (see bump_ledger_version), so
+the projection is recomputed only after a finance entry or case changes.
+"""
+import bisect
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.finance.models import AccountPayable, AccountReceivable
+from apps.legal_cases.models import LegalCase
+
+try:
+    import numpy as np
+except ImportError:  # Optional: pure-Python fallback below
+    np = None
+
+VERSION_KEY = 'finance:ledger_version'
+CACHE_TIMEOUT = 60 * 60 * 24
+
+GRANULARITIES = ('week', 'month')
+OPEN_CASE_STATUSES = ('ANALYSIS', 'ACTIVE')
+
+# Probability of success by LegalCase.risk_level ("Provável/Possível/Remoto Êxito")
+DEFAULT_SUCCESS_PROBABILITY = {'LOW': 0.7, 'MEDIUM': 0.4, 'HIGH': 0.1}
+
+
+@dataclass(frozen=True)
+class Scenario:
+    label: str
+    receivable_rate: float = 1.0  # share of pending receivables actually collected
+    overdue_receivable_rate: float = 1.0  # same, for receivables already past due
+    payable_rate: float = 1.0
+    success_multiplier: float = 1.0  # applied to the success probabilities (capped at 1)
+
+
+SCENARIOS = {
+    'base': Scenario('Base', overdue_receivable_rate=0.8),
+    'pessimistic': Scenario('Pessimista', receivable_rate=0.85, overdue_receivable_rate=0.5, payable_rate=1.05, success_multiplier=0.5),
+    'optimistic': Scenario('Otimista', overdue_receivable_rate=0.95, success_multiplier=1.25),
+}
+
+
+# ============ LEDGER VERSION ============
+
+def get_ledger_version() -> int:
+    cache.add(VERSION_KEY, 1, timeout=None)
+    return cache.get(VERSION_KEY) or 1
+
+
+def bump_ledger_version() -> None:
+    """Invalidate every cached projection (called on finance/case writes)."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, timeout=None)
+
+
+# ============ BUCKETS ============
+
+def bucket_starts(start: date, granularity: str, periods: int) -> List[date]:
+    """First day of each bucket: ISO weeks (Monday) or calendar months."""
+    if granularity == 'week':
+        first = start - timedelta(days=start.weekday())
+        return [first + timedelta(weeks=i) for i in range(periods)]
+    starts, current = [], start.replace(day=1)
+    for _ in range(periods):
+        starts.append(current)
+        current = (current + timedelta(days=32)).replace(day=1)
+    return starts
+
+
+def bucket_end(starts: List[date], granularity: str) -> date:
+    """Last day covered by the buckets."""
+    return bucket_starts(starts[-1], granularity, 2)[1] - timedelta(days=1)
+
+
+def _bucket_sums(days: List[date], amounts: List[float], starts: List[date]) -> List[float]:
+    """Sum `amounts` into the bucket each day falls in (days before the first bucket go to it)."""
+    if np is not None:
+        edges = np.array([d.toordinal() for d in starts])
+        index = np.searchsorted(edges, np.array([d.toordinal() for d in days], dtype=np.int64), side='right') - 1
+        index = np.clip(index, 0, len(starts) - 1)
+        return np.bincount(index, weights=np.array(amounts, dtype=float), minlength=len(starts)).tolist()
+    sums = [0.0] * len(starts)
+    for day, amount in zip(days, amounts):
+        sums[max(bisect.bisect_right(starts, day) - 1, 0)] += amount
+    return sums
+
+
+def _cumulative(values: List[float], opening: float) -> List[float]:
+    if np is not None:
+        return (opening + np.cumsum(np.array(values, dtype=float))).tolist()
+    balances, running = [], opening
+    for value in values:
+        running += value
+        balances.append(running)
+    return balances
+
+
+# ============ SOURCES ============
+
+def _pending_by_day(model, today: date, end: date):
+    """(day, amount) lists of pending entries due up to `end`, split into overdue and upcoming."""
+    rows = (
+        model.objects.filter(status='PENDING', due_date__lte=end)
+        .order_by()
+        .values('due_date')
+        .annotate(total=Sum('amount'))
+    )
+    overdue, upcoming = ([], []), ([], [])
+    for row in rows:
+        target = overdue if row['due_date'] < today else upcoming
+        target[0].append(max(row['due_date'], today))
+        target[1].append(float(row['total']))
+    return overdue, upcoming
+
+
+def _contingencies_by_day(today: date, end: date):
+    """(day, amount, risk) of expected success fees of open cases, before probability weighting."""
+    duration = timedelta(days=getattr(settings, 'CASHFLOW_CASE_DURATION_DAYS', 365))
+    fee_rate = float(getattr(settings, 'CASHFLOW_SUCCESS_FEE_RATE', 0.2))
+    rows = (
+        LegalCase.objects.filter(status__in=OPEN_CASE_STATUSES, contingency_value__gt=0, entry_date__lte=end - duration)
+        .order_by()
+        .values('entry_date', 'risk_level')
+        .annotate(total=Sum('contingency_value'))
+    )
+    days, amounts, risks = [], [], []
+    for row in rows:
+        days.append(max(row['entry_date'] + duration, today))
+        amounts.append(float(row['total']) * fee_rate)
+        risks.append(row['risk_level'])
+    return days, amounts, risks
+
+
+# ============ PROJECTION ============
+
+def project_cash_flow(granularity: str = 'month', periods: int = 12, opening_balance: Decimal = Decimal('0'),
+                      today: Optional[date] = None) -> Dict:
+    """
+    Projected inflows, outflows and running balance per bucket, for every scenario.
+
+    Returns:
+        {'buckets': [start dates], 'granularity', 'periods', 'opening_balance',
+         'scenarios': {name: {'label', 'rows': [{'start', 'inflow', 'contingency',
+         'outflow', 'net', 'balance'}], 'ending_balance', 'lowest_balance'}}}
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    today = today or timezone.localdate()
+    starts = bucket_starts(today, granularity, periods)
+    end = bucket_end(starts, granularity)
+
+    # [overdue, upcoming] sums per bucket
+    receivables = [_bucket_sums(*part, starts) for part in _pending_by_day(AccountReceivable, today, end)]
+    payables = [_bucket_sums(*part, starts) for part in _pending_by_day(AccountPayable, today, end)]
+    case_days, case_amounts, case_risks = _contingencies_by_day(today, end)
+    probabilities = getattr(settings, 'CASHFLOW_SUCCESS_PROBABILITY', DEFAULT_SUCCESS_PROBABILITY)
+
+    opening = float(opening_balance)
+    scenarios = {}
+    for name, scenario in SCENARIOS.items():
+        weights = [min(probabilities.get(risk, 0) * scenario.success_multiplier, 1.0) for risk in case_risks]
+        contingency = _bucket_sums(case_days, [a * w for a, w in zip(case_amounts, weights)], starts)
+        inflow = _combine(receivables[0], scenario.overdue_receivable_rate, receivables[1], scenario.receivable_rate)
+        outflow = _combine(payables[0], scenario.payable_rate, payables[1], scenario.payable_rate)
+        net = [i + c - o for i, c, o in zip(inflow, contingency, outflow)]
+        balances = _cumulative(net, opening)
+        scenarios[name] = {
+            'label': scenario.label,
+            'rows': [
+                {
+                    'start': start,
+                    'inflow': _money(i), 'contingency': _money(c), 'outflow': _money(o),
+                    'net': _money(n), 'balance': _money(b),
+                }
+                for start, i, c, o, n, b in zip(starts, inflow, contingency, outflow, net, balances)
+            ],
+            'ending_balance': _money(balances[-1]) if balances else _money(opening),
+            'lowest_balance': _money(min(balances)) if balances else _money(opening),
+        }
+
+    return {
+        'buckets': starts,
+        'granularity': granularity,
+        'periods': periods,
+        'opening_balance': _money(opening),
+        'scenarios': scenarios,
+    }
+
+
+def get_cash_flow_projection(granularity: str = 'month', periods: int = 12,
+                             opening_balance: Optional[Decimal] = None) -> Dict:
+    """
+    project_cash_flow, cached until the ledger version changes (or the day turns).
+
+    opening_balance defaults to settings.CASHFLOW_OPENING_BALANCE.
+    """
+    if opening_balance is None:
+        opening_balance = Decimal(str(getattr(settings, 'CASHFLOW_OPENING_BALANCE', 0) or 0))
+    today = timezone.localdate()
+    key = f'cashflow:v{get_ledger_version()}:{today.isoformat()}:{granularity}:{periods}:{opening_balance}'
+    projection = cache.get(key)
+    if projection is None:
+        projection = project_cash_flow(granularity, periods, opening_balance, today=today)
+        cache.set(key, projection, timeout=CACHE_TIMEOUT)
+    return projection
+
+
+def _combine(first: List[float], first_rate: float, second: List[float], second_rate: float) -> List[float]:
+    if np is not None:
+        return (np.array(first) * first_rate + np.array(second) * second_rate).tolist()
+    return [a * first_rate + b * second_rate for a, b in zip(first, second)]
+
+
+def _money(value: float) -> Decimal:
+    return Decimal(str(round(value, 2))).quantize(Decimal('0.01'))
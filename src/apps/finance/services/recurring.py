@@ -0,0 +1,84 @@
+"""
+Recurring expenses: materializes future AccountPayable rows.
+
+Each RecurringPayable remembers how far it was generated (`generated_until`),
+so a run only creates the occurrences that are new within the horizon, all
+of them in one bulk_create. The unique (recurrence, due_date) constraint
+makes overlapping runs harmless: duplicates are ignored by the database.
+"""
+import calendar
+from datetime import date, timedelta
+from typing import Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.finance.models import AccountPayable, RecurringPayable
+from apps.finance.signals import entries_bulk_changed
+
+DEFAULT_HORIZON_DAYS = 90
+
+
+def _add_months(start: date, months: int) -> date:
+    """Same day `months` later, clamped to the month's last day (31/01 -> 28/02)."""
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+
+def occurrences(recurrence: RecurringPayable, until: date) -> Iterator[date]:
+    """Due dates of `recurrence` after `generated_until`, up to `until` (and its end_date)."""
+    last = min(until, recurrence.end_date) if recurrence.end_date else until
+    step = 0
+    while True:
+        if recurrence.frequency == 'WEEKLY':
+            due_date = recurrence.start_date + timedelta(weeks=step)
+        elif recurrence.frequency == 'YEARLY':
+            due_date = _add_months(recurrence.start_date, 12 * step)
+        else:
+            due_date = _add_months(recurrence.start_date, step)
+        if due_date > last:
+            return
+        if recurrence.generated_until is None or due_date > recurrence.generated_until:
+            yield due_date
+        step += 1
+
+
+def materialize(until: Optional[date] = None, recurrences: Optional[Iterable[RecurringPayable]] = None) -> int:
+    """
+    Create the AccountPayable rows due up to `until` for active recurrences.
+
+    `until` defaults to today + FINANCE_RECURRING_HORIZON_DAYS; `recurrences`
+    defaults to every active one. Returns the number of occurrences generated
+    (a concurrent run may already have inserted some of them).
+    """
+    if until is None:
+        horizon = getattr(settings, 'FINANCE_RECURRING_HORIZON_DAYS', DEFAULT_HORIZON_DAYS)
+        until = timezone.localdate() + timedelta(days=horizon)
+    if recurrences is None:
+        recurrences = RecurringPayable.objects.filter(is_active=True)
+
+    rows, advanced = [], []
+    for recurrence in recurrences:
+        for due_date in occurrences(recurrence, until):
+            rows.append(AccountPayable(
+                recurrence=recurrence,
+                description=recurrence.description,
+                supplier=recurrence.supplier,
+                amount=recurrence.amount,
+                category=recurrence.category,
+                notes=recurrence.notes,
+                due_date=due_date,
+                status='PENDING',
+            ))
+        if recurrence.generated_until is None or recurrence.generated_until < until:
+            recurrence.generated_until = until
+            advanced.append(recurrence)
+
+    with transaction.atomic():
+        AccountPayable.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+        RecurringPayable.objects.bulk_update(advanced, ['generated_until'], batch_size=500)
+    if rows:
+        entries_bulk_changed.send(sender=AccountPayable, days={row.due_date for row in rows})
+    return len(rows)
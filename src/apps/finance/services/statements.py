@@ -0,0 +1,260 @@
+"""
+Bank statement import (CSV or OFX) with reconciliation against the ledger.
+
+The file is read as a stream, one line at a time, and transactions are
+reconciled in batches: per batch, one query per ledger fetches the pending
+entries whose amount is in the batch and whose due date falls in the batch's
+date window (served by the (amount, due_date) indexes), and one bulk_update
+settles the matches. Memory stays bounded by the batch size, whatever the
+size of the statement.
+
+Credits are matched against receivables and debits against payables: same
+amount, due date within FINANCE_IMPORT_DATE_TOLERANCE_DAYS of the posting
+date, closest date first. Each entry settles at most one transaction.
+"""
+import csv
+import io
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from apps.finance.services.ledger import LEDGERS, Ledger
+from apps.finance.signals import entries_bulk_changed
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_TOLERANCE_DAYS = 3
+MAX_REPORTED = 50  # unmatched/invalid lines kept for display
+
+CSV_COLUMNS = {
+    'date': ('date', 'data', 'data lancamento', 'data lançamento'),
+    'amount': ('amount', 'valor', 'valor (r$)'),
+    'description': ('description', 'descricao', 'descrição', 'historico', 'histórico', 'memo'),
+    'reference': ('reference', 'id', 'documento', 'fitid'),
+}
+
+_OFX_TAG = re.compile(r'<(/?)([A-Z0-9.]+)>([^<]*)', re.IGNORECASE)
+
+
+class StatementError(ValueError):
+    """The file is not a statement we can read (missing columns, unknown format)."""
+
+
+@dataclass(frozen=True)
+class Transaction:
+    posted: date
+    amount: Decimal  # negative for debits
+    description: str = ''
+    reference: str = ''
+    line: int = 0
+
+
+@dataclass
+class ImportResult:
+    total: int = 0
+    matched: int = 0
+    settled_receivable: int = 0
+    settled_payable: int = 0
+    unmatched: List[Transaction] = field(default_factory=list)
+    unmatched_count: int = 0
+    errors: List[str] = field(default_factory=list)
+    error_count: int = 0
+
+    def add_unmatched(self, tx: Transaction) -> None:
+        self.unmatched_count += 1
+        if len(self.unmatched) < MAX_REPORTED:
+            self.unmatched.append(tx)
+
+    def add_error(self, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED:
+            self.errors.append(message)
+
+
+# ============ PARSING ============
+
+def parse_amount(value: str) -> Decimal:
+    """'1.234,56', '-1234.56', '1,234.56' or 'R$ 10,00' -> Decimal (the last separator is the decimal one)."""
+    text = value.replace('R$', '').replace(' ', '').strip()
+    if ',' in text and text.rfind(',') > text.rfind('.'):
+        text = text.replace('.', '').replace(',', '.')
+    else:
+        text = text.replace(',', '')
+    return Decimal(text)
+
+
+def parse_date(value: str) -> date:
+    """ISO (2026-01-31), Brazilian (31/01/2026) or OFX (20260131[120000[-3:BRT]])."""
+    text = value.strip()
+    if '/' in text:
+        return datetime.strptime(text, '%d/%m/%Y').date()
+    if '-' in text[:8]:
+        return date.fromisoformat(text[:10])
+    return datetime.strptime(text[:8], '%Y%m%d').date()
+
+
+def parse_csv(lines: Iterable[str], result: ImportResult) -> Iterator[Transaction]:
+    """Transactions of a CSV with a header row (comma or semicolon separated)."""
+    lines = iter(lines)
+    header = next(lines, '')
+    dialect = csv.excel if header.count(',') > header.count(';') else _Semicolon
+    names = [name.strip().lower() for name in next(csv.reader([header], dialect))]
+    columns = {}
+    for key, aliases in CSV_COLUMNS.items():
+        columns[key] = next((names.index(alias) for alias in aliases if alias in names), None)
+    if columns['date'] is None or columns['amount'] is None:
+        raise StatementError("O CSV precisa das colunas 'data' e 'valor'.")
+
+    for number, row in enumerate(csv.reader(lines, dialect), start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            yield Transaction(
+                posted=parse_date(row[columns['date']]),
+                amount=parse_amount(row[columns['amount']]),
+                description=_cell(row, columns['description']),
+                reference=_cell(row, columns['reference']),
+                line=number,
+            )
+        except (IndexError, ValueError, InvalidOperation):
+            result.add_error(f"Linha {number}: não foi possível ler data/valor.")
+
+
+def parse_ofx(lines: Iterable[str], result: ImportResult) -> Iterator[Transaction]:
+    """<STMTTRN> blocks of an OFX file (SGML 1.x or XML 2.x), tag by tag."""
+    current, start = None, 0
+    for number, line in enumerate(lines, start=1):
+        for closing, tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if not closing:
+                    current, start = {}, number
+                    continue
+                try:
+                    yield Transaction(
+                        posted=parse_date(current.get('DTPOSTED', '')),
+                        amount=parse_amount(current.get('TRNAMT', '')),
+                        description=current.get('MEMO') or current.get('NAME', ''),
+                        reference=current.get('FITID', ''),
+                        line=start,
+                    )
+                except (ValueError, InvalidOperation):
+                    result.add_error(f"Linha {start}: transação OFX sem data/valor válidos.")
+                current = None
+            elif current is not None and not closing and value.strip():
+                current[tag] = value.strip()
+
+
+def read_statement(stream, filename: str, result: ImportResult, encoding: str = 'utf-8-sig') -> Iterator[Transaction]:
+    """Transactions of a binary file-like object, by extension (.ofx, otherwise CSV)."""
+    text = io.TextIOWrapper(stream, encoding=encoding, errors='replace', newline='')
+    if filename.lower().endswith('.ofx'):
+        return parse_ofx(text, result)
+    return parse_csv(text, result)
+
+
+# ============ RECONCILIATION ============
+
+def _match(ledger: Ledger, transactions: List[Transaction], tolerance: timedelta) -> Dict[int, tuple]:
+    """Pending entry id -> (transaction, due_date), for one batch (a single, locking query)."""
+    amounts = {tx.amount.copy_abs() for tx in transactions}
+    low = min(tx.posted for tx in transactions) - tolerance
+    high = max(tx.posted for tx in transactions) + tolerance
+    candidates = defaultdict(list)
+    for pk, amount, due_date in (
+        ledger.model.objects.select_for_update()
+        .filter(status='PENDING', amount__in=amounts, due_date__range=(low, high))
+        .order_by('due_date', 'id')
+        .values_list('id', 'amount', 'due_date')
+    ):
+        candidates[amount].append((pk, due_date))
+
+    matches = {}
+    for tx in transactions:
+        options = [
+            (abs((due_date - tx.posted).days), due_date, pk)
+            for pk, due_date in candidates.get(tx.amount.copy_abs(), ())
+            if pk not in matches and abs(due_date - tx.posted) <= tolerance
+        ]
+        if options:
+            _, due_date, pk = min(options)
+            matches[pk] = (tx, due_date)
+    return matches
+
+
+def _settle_matches(ledger: Ledger, matches: Dict[int, tuple]) -> None:
+    """Settle the matched entries with one bulk_update, dated by their transaction."""
+    entries, fields = [], ['status']
+    for pk, (tx, due_date) in matches.items():
+        entry = ledger.model(pk=pk, due_date=due_date, status=ledger.settled_status)
+        if ledger.settled_date_field:
+            setattr(entry, ledger.settled_date_field, tx.posted)
+        entries.append(entry)
+    if ledger.settled_date_field:
+        fields.append(ledger.settled_date_field)
+    ledger.model.objects.bulk_update(entries, fields)
+    entries_bulk_changed.send(sender=ledger.model, days={entry.due_date for entry in entries})
+
+
+def reconcile_batch(transactions: List[Transaction], result: ImportResult, tolerance: timedelta,
+                    dry_run: bool = False) -> None:
+    by_ledger = {
+        'receivable': [tx for tx in transactions if tx.amount > 0],
+        'payable': [tx for tx in transactions if tx.amount < 0],
+    }
+    matched = set()
+    with transaction.atomic():
+        for name, batch in by_ledger.items():
+            if not batch:
+                continue
+            matches = _match(LEDGERS[name], batch, tolerance)
+            if matches and not dry_run:
+                _settle_matches(LEDGERS[name], matches)
+            setattr(result, f'settled_{name}', getattr(result, f'settled_{name}') + len(matches))
+            matched.update(id(tx) for tx, _ in matches.values())
+
+    result.total += len(transactions)
+    result.matched += len(matched)
+    for tx in transactions:
+        if id(tx) not in matched:
+            result.add_unmatched(tx)
+
+
+def import_statement(stream, filename: str, dry_run: bool = False, batch_size: Optional[int] = None,
+                     tolerance_days: Optional[int] = None) -> ImportResult:
+    """
+    Read a statement and settle the pending entries it pays.
+
+    With dry_run the matches are only counted. Raises StatementError if the
+    file cannot be read as a statement.
+    """
+    batch_size = batch_size or getattr(settings, 'FINANCE_IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    if tolerance_days is None:
+        tolerance_days = getattr(settings, 'FINANCE_IMPORT_DATE_TOLERANCE_DAYS', DEFAULT_TOLERANCE_DAYS)
+    tolerance = timedelta(days=tolerance_days)
+
+    result = ImportResult()
+    batch = []
+    for tx in read_statement(stream, filename, result):
+        if not tx.amount:
+            continue
+        batch.append(tx)
+        if len(batch) >= batch_size:
+            reconcile_batch(batch, result, tolerance, dry_run)
+            batch = []
+    if batch:
+        reconcile_batch(batch, result, tolerance, dry_run)
+    return result
+
+
+class _Semicolon(csv.excel):
+    delimiter = ';'
+
+
+def _cell(row: List[str], index: Optional[int]) -> str:
+    return row[index].strip() if index is not None and index < len(row) else ''
@@ -0,0 +1,28 @@
+"""
+Ledger version bump on finance and case writes (invalidates cash-flow projections).
+
+Bulk writes (queryset.update, bulk_create, bulk_update) send no model
+signals, so apps.finance.services send `entries_bulk_changed` after them,
+with the model as sender and the due dates touched as `days`.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal
+
+from apps.finance.models import AccountPayable, AccountReceivable
+from apps.finance.services.projection import bump_ledger_version
+from apps.legal_cases.models import LegalCase
+
+LEDGER_MODELS = (AccountPayable, AccountReceivable, LegalCase)
+
+entries_bulk_changed = Signal()
+
+
+def ledger_changed(sender, **kwargs):
+    bump_ledger_version()
+
+
+for model in LEDGER_MODELS:
+    post_save.connect(ledger_changed, sender=model, dispatch_uid=f'ledger_version_save_{model.__name__}')
+    post_delete.connect(ledger_changed, sender=model, dispatch_uid=f'ledger_version_delete_{model.__name__}')
+
+entries_bulk_changed.connect(ledger_changed, dispatch_uid='ledger_version_bulk')
@@ -0,0 +1,309 @@
+"""
+Tests for the finance ledger (keyset pagination and totals), the cash-flow
+projection and the bulk operations (settle, recurring, statement import).
+"""
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.analytics.models import DailyMetric
+from apps.finance.models import AccountPayable, AccountReceivable, RecurringPayable
+from apps.finance.services.bulk import settle
+from apps.clients.models import Client
+from apps.finance.services.ledger import LEDGERS, LedgerFilters, get_page, get_totals
+from apps.finance.services.projection import bucket_starts, get_cash_flow_projection, project_cash_flow
+from apps.finance.services.recurring import materialize, occurrences
+from apps.finance.services.statements import StatementError, import_statement, parse_amount
+from apps.legal_cases.models import LegalCase
+
+
+class LedgerTestCase(TestCase):
+    """Tests for apps.finance.services.ledger."""
+    
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.ledger = LEDGERS['payable']
+        # Two bills per day, so ties on due_date are broken by id
+        for offset in range(-3, 4):
+            for category in ('OFFICE', 'SOFTWARE'):
+                AccountPayable.objects.create(
+                    description=f"{category} {offset}", amount=Decimal('10.50'),
+                    due_date=self.today + timedelta(days=offset), category=category,
+                )
+        AccountPayable.objects.filter(due_date=self.today - timedelta(days=3)).update(status='PAID')
+    
+    def test_pages_forward_and_back(self):
+        expected = list(AccountPayable.objects.order_by('due_date', 'id').values_list('id', flat=True))
+        
+        pages, page = [], get_page(self.ledger, LedgerFilters(), page_size=4)
+        pages.append(page)
+        while page.next_cursor:
+            page = get_page(self.ledger, LedgerFilters(), after=page.next_cursor, page_size=4)
+            pages.append(page)
+        self.assertEqual([item.id for p in pages for item in p.items], expected)
+        self.assertEqual(pages[0].prev_cursor, '')
+        self.assertEqual(len(pages[-1].items), 2)
+        
+        back = get_page(self.ledger, LedgerFilters(), before=pages[-1].prev_cursor, page_size=4)
+        self.assertEqual([item.id for item in back.items], [item.id for item in pages[-2].items])
+        self.assertTrue(back.next_cursor)
+        first = get_page(self.ledger, LedgerFilters(), before=pages[1].prev_cursor, page_size=4)
+        self.assertEqual(first.prev_cursor, '')
+    
+    def test_filters(self):
+        filters = LedgerFilters(category='OFFICE', date_from=self.today, date_to=self.today + timedelta(days=1))
+        page = get_page(self.ledger, filters)
+        self.assertEqual([item.description for item in page.items], ['OFFICE 0', 'OFFICE 1'])
+        self.assertEqual(LedgerFilters.from_query({'date_from': 'ontem'}).date_from, None)
+    
+    def test_totals_in_one_query(self):
+        with self.assertNumQueries(1):
+            totals = get_totals(self.ledger, LedgerFilters())
+        self.assertEqual(totals['count'], 14)
+        self.assertEqual(totals['total'], Decimal('147.00'))
+        self.assertEqual(totals['by_status']['PAID'], {'label': 'Pago', 'total': Decimal('21.00'), 'count': 2})
+        self.assertEqual(totals['by_category']['OFFICE']['count'], 7)
+        self.assertEqual(totals['by_category']['TAXES']['total'], Decimal('0'))
+        # Days -2 and -1 are pending and past due; day -3 was paid
+        self.assertEqual((totals['overdue_count'], totals['overdue_total']), (4, Decimal('42.00')))
+        self.assertEqual(totals['pending_total'], Decimal('126.00'))
+        
+        totals = get_totals(self.ledger, LedgerFilters(status='PENDING', category='SOFTWARE'))
+        self.assertEqual((totals['count'], totals['overdue_count']), (6, 2))
+    
+    def test_finance_list_view(self):
+        self.client.force_login(User.objects.create_superuser('boss', 'boss@x.com', 'x'))
+        AccountReceivable.objects.create(description="Honorários", amount=Decimal('5000'), due_date=self.today - timedelta(days=1))
+        
+        response = self.client.get(reverse('admin_portal:finance_list'), {'tab': 'receivable'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['totals']['overdue_total'], Decimal('5000'))
+        self.assertContains(response, 'ATRASADO')
+        
+        with self.settings(FINANCE_LEDGER_PAGE_SIZE=5):
+            response = self.client.get(reverse('admin_portal:finance_list'), {'category': 'OFFICE'})
+        self.assertEqual(len(response.context['items']), 5)
+        self.assertEqual(response.context['totals']['count'], 7)
+        self.assertContains(response, f"?tab=payable&amp;category=OFFICE&after={response.context['page'].next_cursor}")
+
+
+class CashFlowProjectionTestCase(TestCase):
+    """Tests for apps.finance.services.projection."""
+    
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.today = date(2026, 3, 18)  # Wednesday
+        AccountReceivable.objects.create(description="Atrasado", amount=Decimal('100'), due_date=date(2026, 2, 10))
+        AccountReceivable.objects.create(description="Março", amount=Decimal('300'), due_date=date(2026, 3, 25))
+        AccountReceivable.objects.create(description="Recebido", amount=Decimal('999'), due_date=date(2026, 3, 20), status='RECEIVED')
+        AccountPayable.objects.create(description="Aluguel", amount=Decimal('200'), due_date=date(2026, 4, 5), category='OFFICE')
+        AccountPayable.objects.create(description="Fora do horizonte", amount=Decimal('50'), due_date=date(2027, 1, 5))
+    
+    def test_bucket_starts(self):
+        self.assertEqual(bucket_starts(self.today, 'week', 3), [date(2026, 3, 16), date(2026, 3, 23), date(2026, 3, 30)])
+        self.assertEqual(bucket_starts(date(2026, 12, 31), 'month', 2), [date(2026, 12, 1), date(2027, 1, 1)])
+    
+    def test_monthly_projection(self):
+        projection = project_cash_flow('month', 3, Decimal('1000'), today=self.today)
+        base = projection['scenarios']['base']
+        self.assertEqual(projection['buckets'], [date(2026, 3, 1), date(2026, 4, 1), date(2026, 5, 1)])
+        # Overdue receivables land in the first bucket, at the scenario's collection rate
+        self.assertEqual(base['rows'][0]['inflow'], Decimal('380.00'))
+        self.assertEqual(base['rows'][1]['outflow'], Decimal('200.00'))
+        self.assertEqual([row['balance'] for row in base['rows']], [Decimal('1380.00'), Decimal('1180.00'), Decimal('1180.00')])
+        self.assertEqual((base['ending_balance'], base['lowest_balance']), (Decimal('1180.00'), Decimal('1180.00')))
+        
+        pessimistic = projection['scenarios']['pessimistic']
+        self.assertEqual(pessimistic['rows'][0]['inflow'], Decimal('305.00'))
+        self.assertEqual(pessimistic['rows'][1]['outflow'], Decimal('210.00'))
+    
+    def test_weekly_projection(self):
+        rows = project_cash_flow('week', 4, today=self.today)['scenarios']['optimistic']['rows']
+        self.assertEqual([row['inflow'] for row in rows], [Decimal('95.00'), Decimal('300.00'), Decimal('0.00'), Decimal('0.00')])
+        self.assertEqual(rows[2]['outflow'], Decimal('200.00'))
+        self.assertEqual([row['balance'] for row in rows][2:], [Decimal('195.00'), Decimal('195.00')])
+    
+    def test_contingencies_weighted_by_risk(self):
+        client = Client.objects.create(full_name="Cliente Êxito")
+        for risk in ('LOW', 'HIGH'):
+            LegalCase.objects.create(client=client, title=f"Caso {risk}", area='CIVIL', status='ACTIVE',
+                                     risk_level=risk, contingency_value=Decimal('10000'))
+        LegalCase.objects.create(client=client, title="Arquivado", area='CIVIL', status='ARCHIVED',
+                                 contingency_value=Decimal('10000'))
+        LegalCase.objects.update(entry_date=date(2025, 4, 10))
+        
+        with self.settings(CASHFLOW_SUCCESS_FEE_RATE=0.2, CASHFLOW_CASE_DURATION_DAYS=365):
+            projection = project_cash_flow('month', 2, today=self.today)
+        # Fees expected on 2026-04-10: 2000 * 0.7 + 2000 * 0.1
+        self.assertEqual(projection['scenarios']['base']['rows'][1]['contingency'], Decimal('1600.00'))
+        self.assertEqual(projection['scenarios']['pessimistic']['rows'][1]['contingency'], Decimal('800.00'))
+        self.assertEqual(projection['scenarios']['optimistic']['rows'][1]['contingency'], Decimal('2000.00'))
+    
+    def test_cached_until_ledger_changes(self):
+        first = get_cash_flow_projection('month', 6, Decimal('0'))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cash_flow_projection('month', 6, Decimal('0')), first)
+        
+        AccountPayable.objects.create(description="Nova", amount=Decimal('40'), due_date=timezone.localdate())
+        updated = get_cash_flow_projection('month', 6, Decimal('0'))
+        self.assertEqual(
+            updated['scenarios']['base']['ending_balance'],
+            first['scenarios']['base']['ending_balance'] - Decimal('40'),
+        )
+    
+    def test_projection_view(self):
+        self.client.force_login(User.objects.create_superuser('boss', 'boss@x.com', 'x'))
+        response = self.client.get(reverse('admin_portal:finance_projection'),
+                                   {'granularity': 'week', 'periods': '100', 'opening': '500', 'scenario': 'optimistic'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['periods'], 52)
+        self.assertEqual(response.context['opening_balance'], Decimal('500.00'))
+        self.assertEqual(response.context['selected']['label'], 'Otimista')
+        self.assertContains(response, 'Fluxo de Caixa Projetado')
+
+    @override_settings(CASHFLOW_OPENING_BALANCE='250')
+    def test_projection_view_ignores_non_finite_opening(self):
+        self.client.force_login(User.objects.create_superuser('boss', 'boss@x.com', 'x'))
+        for opening in ('Infinity', '-inf', 'NaN', 'sNaN', '1e400'):
+            response = self.client.get(reverse('admin_portal:finance_projection'), {'opening': opening})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['opening_balance'], Decimal('250.00'))
+
+
+class BulkOperationsTestCase(TestCase):
+    """Tests for apps.finance.services.bulk, recurring and statements."""
+    
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.today = timezone.localdate()
+    
+    def test_settle_in_one_update(self):
+        bills = [
+            AccountPayable.objects.create(description=f"Conta {i}", amount=Decimal('10'), due_date=self.today)
+            for i in range(3)
+        ]
+        AccountPayable.objects.filter(pk=bills[2].pk).update(status='CANCELLED')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            # SELECT of the touched days + UPDATE (inside a savepoint)
+            with self.assertNumQueries(4):
+                count = settle(LEDGERS['payable'], [bill.pk for bill in bills])
+        self.assertEqual(count, 2)
+        self.assertEqual(AccountPayable.objects.filter(status='PAID').count(), 2)
+        self.assertEqual(AccountPayable.objects.get(pk=bills[2].pk).status, 'CANCELLED')
+        # Bulk writes still refresh the rollups
+        self.assertEqual(DailyMetric.objects.get(metric='payables', dimension='status', key='PAID').count, 2)
+        
+        receivable = AccountReceivable.objects.create(description="Honorários", amount=Decimal('500'), due_date=self.today)
+        settle(LEDGERS['receivable'], [receivable.pk], on=date(2026, 1, 2))
+        receivable.refresh_from_db()
+        self.assertEqual((receivable.status, receivable.received_date), ('RECEIVED', date(2026, 1, 2)))
+    
+    def test_occurrences(self):
+        monthly = RecurringPayable(description="Aluguel", amount=Decimal('1000'), start_date=date(2026, 1, 31))
+        self.assertEqual(
+            list(occurrences(monthly, date(2026, 4, 30))),
+            [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30)],
+        )
+        weekly = RecurringPayable(frequency='WEEKLY', amount=Decimal('1'), start_date=date(2026, 1, 1),
+                                  end_date=date(2026, 1, 20), generated_until=date(2026, 1, 8))
+        self.assertEqual(list(occurrences(weekly, date(2026, 12, 31))), [date(2026, 1, 15)])
+    
+    def test_materialize_is_incremental(self):
+        recurrence = RecurringPayable.objects.create(
+            description="Licença", amount=Decimal('99.90'), category='SOFTWARE', start_date=date(2026, 1, 10),
+        )
+        RecurringPayable.objects.create(description="Inativa", amount=Decimal('1'), start_date=date(2026, 1, 1), is_active=False)
+        
+        self.assertEqual(materialize(until=date(2026, 3, 31)), 3)
+        self.assertEqual(materialize(until=date(2026, 3, 31)), 0)
+        self.assertEqual(materialize(until=date(2026, 5, 31)), 2)
+        bills = AccountPayable.objects.filter(recurrence=recurrence).order_by('due_date')
+        self.assertEqual([bill.due_date.month for bill in bills], [1, 2, 3, 4, 5])
+        self.assertEqual({(bill.category, bill.amount) for bill in bills}, {('SOFTWARE', Decimal('99.90'))})
+        
+        # A stale generator (generated_until not yet advanced) cannot duplicate bills
+        RecurringPayable.objects.filter(pk=recurrence.pk).update(generated_until=None)
+        materialize(until=date(2026, 5, 31))
+        self.assertEqual(AccountPayable.objects.filter(recurrence=recurrence).count(), 5)
+    
+    def test_parse_amount(self):
+        self.assertEqual(parse_amount('1.234,56'), Decimal('1234.56'))
+        self.assertEqual(parse_amount('-1,234.56'), Decimal('-1234.56'))
+        self.assertEqual(parse_amount('R$ 10,00'), Decimal('10.00'))
+    
+    def test_import_csv(self):
+        fee = AccountReceivable.objects.create(description="Honorários", amount=Decimal('1500'), due_date=date(2026, 2, 10))
+        rent = AccountPayable.objects.create(description="Aluguel", amount=Decimal('800'), due_date=date(2026, 2, 5))
+        twin = AccountPayable.objects.create(description="Aluguel (2)", amount=Decimal('800'), due_date=date(2026, 3, 5))
+        far = AccountPayable.objects.create(description="Fora da janela", amount=Decimal('45'), due_date=date(2026, 1, 1))
+        statement = (
+            "data;descrição;valor\n"
+            "12/02/2026;TED Cliente;1.500,00\n"
+            "06/02/2026;Aluguel fev;-800,00\n"
+            "06/02/2026;Aluguel repetido;-800,00\n"
+            "20/02/2026;Tarifa;-45,00\n"
+            "xx/02/2026;Linha quebrada;-1,00\n"
+        ).encode('utf-8')
+        
+        result = import_statement(io.BytesIO(statement), 'extrato.csv', batch_size=2)
+        self.assertEqual((result.total, result.matched), (4, 2))
+        self.assertEqual((result.settled_receivable, result.settled_payable), (1, 1))
+        self.assertEqual([tx.description for tx in result.unmatched], ['Aluguel repetido', 'Tarifa'])
+        self.assertEqual(result.error_count, 1)
+        
+        fee.refresh_from_db()
+        self.assertEqual((fee.status, fee.received_date), ('RECEIVED', date(2026, 2, 12)))
+        self.assertEqual(
+            dict(AccountPayable.objects.filter(pk__in=[rent.pk, twin.pk, far.pk]).values_list('description', 'status')),
+            {'Aluguel': 'PAID', 'Aluguel (2)': 'PENDING', 'Fora da janela': 'PENDING'},
+        )
+        
+        with self.assertRaises(StatementError):
+            import_statement(io.BytesIO(b"foo,bar\n1,2\n"), 'extrato.csv')
+    
+    def test_import_ofx_dry_run(self):
+        AccountReceivable.objects.create(description="Honorários", amount=Decimal('250.50'), due_date=date(2026, 3, 2))
+        statement = (
+            "OFXHEADER:100\nDATA:OFXSGML\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n"
+            "<STMTTRN>\n<TRNTYPE>CREDIT\n<DTPOSTED>20260303120000[-3:BRT]\n<TRNAMT>250.50\n"
+            "<FITID>0001\n<MEMO>PIX RECEBIDO\n</STMTTRN>\n"
+            "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260304<TRNAMT>-12.00<FITID>0002<MEMO>TARIFA</STMTTRN>\n"
+            "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+        ).encode('latin-1')
+        
+        result = import_statement(io.BytesIO(statement), 'EXTRATO.OFX', dry_run=True)
+        self.assertEqual((result.total, result.matched, result.unmatched_count), (2, 1, 1))
+        self.assertEqual(result.unmatched[0].reference, '0002')
+        self.assertFalse(AccountReceivable.objects.exclude(status='PENDING').exists())
+    
+    def test_views(self):
+        self.client.force_login(User.objects.create_superuser('boss', 'boss@x.com', 'x'))
+        bill = AccountPayable.objects.create(description="Conta", amount=Decimal('10'), due_date=self.today)
+        
+        response = self.client.post(reverse('admin_portal:finance_bulk_settle'), {
+            'tab': 'payable', 'ids': [bill.pk, 'x'], 'query': 'tab=payable&category=OTHER',
+        })
+        self.assertRedirects(response, f"{reverse('admin_portal:finance_list')}?tab=payable&category=OTHER")
+        self.assertEqual(AccountPayable.objects.get(pk=bill.pk).status, 'PAID')
+        
+        response = self.client.post(reverse('admin_portal:finance_create'), {
+            'description': "Aluguel", 'amount': '1000', 'due_date': self.today.isoformat(),
+            'category': 'OFFICE', 'frequency': 'MONTHLY',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(AccountPayable.objects.filter(recurrence__description="Aluguel", due_date=self.today).exists())
+        
+        upload = SimpleUploadedFile('extrato.csv', b"date,amount\n2026-01-05,-1000\n", content_type='text/csv')
+        response = self.client.post(reverse('admin_portal:finance_import'), {'statement': upload, 'dry_run': 'on'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].total, 1)
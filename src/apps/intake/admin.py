@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib import messages
+from core.security.admin import BlindIndexSearchMixin
 from .models import Lead, TriageSession
 
 def resend_whatsapp_notification(modeladmin, request, queryset):
@@ -16,15 +17,16 @@ def resend_whatsapp_notification(modeladmin, request, queryset):
         except Exception as e:
             messages.error(request, f"Erro ao enviar para {lead.full_name}: {e}")
     
-    messages.success(request, f"{sent_count} notificação(ões) enviada(s) com sucesso!")
+    messages.success(request, f"{sent_count} notificação(ões) enfileirada(s) para envio!")
 
 resend_whatsapp_notification.short_description = "📱 Reenviar notificação WhatsApp"
 
 @admin.register(Lead)
-class LeadAdmin(admin.ModelAdmin):
+class LeadAdmin(BlindIndexSearchMixin, admin.ModelAdmin):
     list_display = ('full_name', 'case_type', 'score', 'is_qualified', 'created_at')
     list_filter = ('case_type', 'is_qualified', 'created_at')
-    search_fields = ('full_name', 'contact_info')
+    search_fields = ('full_name',)
+    blind_search_fields = ('contact_info',)
     readonly_fields = ('created_at', 'score')
     actions = [resend_whatsapp_notification]
     
@@ -3,6 +3,7 @@ from django.shortcuts import render
 from django.http import HttpResponse
 from django_htmx.http import trigger_client_event
 from ..models import Lead, TriageSession
+from ..services.flow import complete_triage, step_template
 import uuid
 
 router = Router()
@@ -26,7 +27,7 @@ class ContactFormSchema(Schema):
 @router.post("/submit-contact/")
 def submit_contact_form(request, data: ContactFormSchema):
     """Handle direct contact form submission from Contact Page."""
-    from apps.intake.scoring import calculate_claim_score
+    from apps.intake.scoring import apply_score, engine
     
     # Map subject to case_type
     subject_map = {
@@ -39,7 +40,7 @@ def submit_contact_form(request, data: ContactFormSchema):
     }
     case_type = subject_map.get(data.subject, 'OTHER')
     
-    lead = Lead.objects.create(
+    lead = Lead(
         full_name=data.name,
         contact_info=data.contact,
         case_type=case_type,
@@ -47,8 +48,8 @@ def submit_contact_form(request, data: ContactFormSchema):
         source="Página de Contato"
     )
     
-    # Simple scoring or default
-    lead.score = calculate_claim_score(lead, {'message': data.message})
+    # Scored before the INSERT, so the lead is written once
+    apply_score(lead, engine.score(lead, {'message': data.message}))
     lead.save()
     
     if lead.is_qualified or case_type == 'INTERNSHIP': # Internships are always interesting to review
@@ -77,12 +78,7 @@ def intake_step_1(request, data: Step1Schema):
     )
     
     # Conditional response based on case type
-    if data.case_type == 'LIPEDEMA':
-        template = 'intake/step_lipedema.html'
-    elif data.case_type == 'SUPER':
-        template = 'intake/step_super.html'
-    else:
-        template = 'intake/step_generic.html'
+    template = step_template(data.case_type)
         
     response = render(request, template, {'name': data.name, 'session_id': session_id})
     return response
@@ -99,28 +95,6 @@ def intake_step_2(request, data: Step2Schema):
     })
     session.save()
     
-    # Create Lead
-    lead = Lead.objects.create(
-        full_name=session.temp_data['name'],
-        case_type=session.temp_data['case_type'],
-        contact_info=data.contact or 'Não informado',
-        triage_data=session.temp_data
-    )
-    
-    # [ENHANCED] ClaimScore™ Algorithm
-    from apps.intake.scoring import calculate_claim_score
-    lead.score = calculate_claim_score(lead, session.temp_data)
-    lead.is_qualified = lead.score > 60
-    lead.save()
-    
-    # [NEW] Enviar notificação WhatsApp se qualificado
-    if lead.is_qualified:
-        try:
-            from apps.whatsapp.services.notification import WhatsAppNotificationService
-            notification_service = WhatsAppNotificationService(provider='mock')
-            notification_service.send_lead_notification(lead)
-        except Exception as e:
-            # Log error but don't break the user flow
-            print(f"Erro ao enviar notificação WhatsApp: {e}")
+    lead = complete_triage(session.temp_data, data.contact)
     
     return render(request, 'intake/step_final.html', {'lead': lead})
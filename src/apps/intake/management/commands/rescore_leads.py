@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.intake.models import Lead
+from apps.intake.scoring import score_many
+
+
+class Command(BaseCommand):
+    help = 'Recompute the ClaimScore (score, qualification, viability) of existing leads. Run after changing the scoring rules.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--case-type', choices=[code for code, _ in Lead.CASE_TYPES], action='append', help='Only this case type (repeatable)')
+        parser.add_argument('--unscored', action='store_true', help='Only leads still at score 0')
+        parser.add_argument('--analysis', action='store_true', help='Also rewrite the LeadAnalysis of each lead')
+        parser.add_argument('--batch-size', type=int, default=500, help='Leads written per query')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        leads = Lead.objects.order_by('pk').only(
+            'pk', 'case_type', 'triage_data', 'contact_info', 'location', 'score', 'is_qualified', 'viability_status', 'created_at',
+        )
+        if options['case_type']:
+            leads = leads.filter(case_type__in=options['case_type'])
+        if options['unscored']:
+            leads = leads.filter(score=0)
+
+        total = leads.count()
+        updated = score_many(
+            leads.iterator(chunk_size=options['batch_size']),
+            batch_size=options['batch_size'],
+            analysis=options['analysis'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'{total} leads scored, {updated} updated'))
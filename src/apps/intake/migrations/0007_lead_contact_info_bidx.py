@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:56
+
+import core.security.fields
+from django.db import migrations
+
+
+def backfill_blind_index(apps, schema_editor):
+    Lead = apps.get_model('intake', 'Lead')
+    for lead in Lead.objects.all().iterator(chunk_size=500):
+        # BlindIndexField.pre_save recomputes the digest from the decrypted value
+        lead.save(update_fields=['contact_info_bidx'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intake', '0006_alter_lead_case_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='contact_info_bidx',
+            field=core.security.fields.BlindIndexField(blank=True, db_index=True, editable=False, max_length=64, normalizer='contact', null=True, source='contact_info'),
+        ),
+        migrations.RunPython(backfill_blind_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:21
+
+import core.search.fields
+from django.db import migrations
+
+from core.search.operations import search_index_operations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intake', '0007_lead_contact_info_bidx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='search_document',
+            field=core.search.fields.SearchDocumentField(sources=('full_name', 'source', 'location')),
+        ),
+        *search_index_operations('intake', 'Lead', 'intake_lead'),
+    ]
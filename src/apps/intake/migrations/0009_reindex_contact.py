@@ -0,0 +1,19 @@
+from django.db import migrations
+
+from core.security.fields import rebuild_blind_indexes
+
+
+def reindex_contacts(apps, schema_editor):
+    """Recompute the contact digests: text with letters is no longer indexed as a phone."""
+    rebuild_blind_indexes(apps.get_model('intake', 'Lead'), 'contact_info_bidx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intake', '0008_search_document'),
+    ]
+
+    operations = [
+        migrations.RunPython(reindex_contacts, migrations.RunPython.noop),
+    ]
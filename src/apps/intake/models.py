@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils import timezone
-from core.security.fields import EncryptedField
+from core.security.fields import EncryptedField, EncryptedQuerySet, BlindIndexField
+from core.search.fields import SearchDocumentField
 
 class Lead(models.Model):
     CASE_TYPES = [
@@ -14,6 +15,7 @@ class Lead(models.Model):
 
     full_name = models.CharField("Nome do Lead", max_length=255)
     contact_info = EncryptedField("WhatsApp/Email", max_length=255, help_text="Dados sensíveis criptografados")
+    contact_info_bidx = BlindIndexField(source='contact_info', normalizer='contact')
     case_type = models.CharField("Tipo de Caso", max_length=20, choices=CASE_TYPES)
     
     # Store triage as JSON for flexibility
@@ -44,7 +46,12 @@ class Lead(models.Model):
         help_text="ID do caso no sistema Legal Ops"
     )
     
+    # Full-text search (contact_info is encrypted and stays out of it)
+    search_document = SearchDocumentField(sources=('full_name', 'source', 'location'))
+    
     created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = EncryptedQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.full_name} - {self.get_case_type_display()} ({self.score})"
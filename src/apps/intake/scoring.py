@@ -1,128 +1,353 @@
 """
 Enhanced Lead Scoring Algorithm - ClaimScore™
 
-Predictive qualification system for legal leads.
+Predictive qualification system for legal leads, shared by every channel
+(intake wizard, WhatsApp, contact form, admin portal) and by batch
+rescoring. Points come from the declarative RULES table, one rule per
+component of the breakdown:
+
+    Keywords    distinct keywords found in the triage answers, N points each (capped)
+    FirstMatch  points of the first tier whose condition holds
+    Lookup      points for a value of the lead (case type, phone region)
+
+A lead is read once into LeadFeatures (answers lowercased and without
+accents; only the values are searched, never the JSON keys) and every rule
+works on those, with keyword lists compiled to a single regular expression
+at import. `score_many` scores any number of leads in one pass and saves the
+changed ones with bulk_update (sending `leads_bulk_changed`, so rollups and
+the dashboard cache follow); `manage.py rescore_leads` runs it over the
+history after a rule change.
 """
-from apps.intake.models import Lead
-from typing import Dict
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.utils import timezone
+
+from apps.intake.models import Lead, LeadAnalysis
+from apps.intake.signals import leads_bulk_changed
+from core.security.fields import normalize_contact
+
+BASE_SCORE = 50
+QUALIFIED_ABOVE = 60  # score > 60 = qualified
+VIABILITY_THRESHOLDS = (('HIGH', 70), ('MEDIUM', 50))  # first min score reached, else LOW
+
+
+def _normalize(value) -> str:
+    """Lowercase text without accents ('Emergência' -> 'emergencia'); booleans as 'sim'/'nao'."""
+    if isinstance(value, bool):
+        return 'sim' if value else 'nao'
+    text = unicodedata.normalize('NFKD', str(value).strip().lower())
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def _compile(words: Iterable[str], whole_words: bool = False) -> re.Pattern:
+    # Longest first, so a keyword is never shadowed by one of its prefixes
+    alternatives = '|'.join(re.escape(_normalize(word)) for word in sorted(words, key=len, reverse=True))
+    return re.compile(rf'\b(?:{alternatives})\b' if whole_words else f'(?:{alternatives})')
+
+
+def _answers(triage_data) -> Iterable[Tuple[str, object]]:
+    """(key, scalar value) pairs of the triage answers, nested lists/dicts included."""
+    stack = [('', triage_data)]
+    while stack:
+        key, value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.items())
+        elif isinstance(value, (list, tuple)):
+            stack.extend((key, item) for item in value)
+        elif value is not None:
+            yield key, value
+
+
+def _region(contact: str) -> str:
+    """DDD of a Brazilian phone contact ('19' for Campinas), '' for e-mails and foreign numbers."""
+    phone = normalize_contact(contact or '')
+    if phone.startswith('+55') and len(phone) >= 13:
+        return phone[3:5]
+    return ''
+
+
+@dataclass(frozen=True)
+class LeadFeatures:
+    """What the rules read from a lead, normalized once."""
+    case_type: str
+    answers: Dict[str, str]  # top-level answers
+    text: str  # every answer, one per line
+    region: str
+
+    @classmethod
+    def from_lead(cls, lead: Lead, triage_data: Optional[Dict] = None) -> 'LeadFeatures':
+        triage_data = lead.triage_data if triage_data is None else triage_data
+        triage_data = triage_data if isinstance(triage_data, dict) else {}
+        answers = {
+            key: _normalize(value) for key, value in triage_data.items()
+            if not isinstance(value, (dict, list, tuple)) and value is not None
+        }
+        region = _region(lead.contact_info)
+        if not region and 'campinas' in _normalize(lead.location or ''):
+            region = '19'
+        return cls(
+            case_type=lead.case_type or '',
+            answers=answers,
+            text='\n'.join(_normalize(value) for _, value in _answers(triage_data)),
+            region=region,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Conditions and rules
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Answer:
+    """One of `keys` was answered with one of `values`."""
+    keys: Tuple[str, ...]
+    values: Tuple[str, ...] = ('sim',)
+
+    def __call__(self, features: LeadFeatures) -> bool:
+        return any(features.answers.get(key) in self.values for key in self.keys)
 
 
-def calculate_claim_score(lead: Lead, triage_data: Dict) -> int:
+@dataclass(frozen=True)
+class Words:
+    """The answer to `key` contains one of `words` (whole words)."""
+    key: str
+    words: Tuple[str, ...]
+    pattern: re.Pattern = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'pattern', _compile(self.words, whole_words=True))
+
+    def __call__(self, features: LeadFeatures) -> bool:
+        return bool(self.pattern.search(features.answers.get(self.key, '')))
+
+
+@dataclass(frozen=True)
+class Tier:
+    points: int
+    label: str
+    when: Callable[[LeadFeatures], bool]
+
+
+Evaluation = Tuple[int, Optional[str]]  # (points, reason shown in the analysis or None)
+
+
+@dataclass(frozen=True)
+class Keywords:
+    component: str
+    keywords: Tuple[str, ...]
+    points: int
+    cap: int
+    label: str
+    missing: str = ''  # reason listed as a weak point when nothing matches
+    pattern: re.Pattern = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'pattern', _compile(self.keywords))
+
+    def evaluate(self, features: LeadFeatures) -> Evaluation:
+        found = sorted(set(self.pattern.findall(features.text)))
+        if not found:
+            return 0, None
+        return min(len(found) * self.points, self.cap), f"{self.label}: {', '.join(found)}"
+
+
+@dataclass(frozen=True)
+class FirstMatch:
+    component: str
+    tiers: Tuple[Tier, ...]
+    missing: str = ''
+
+    def evaluate(self, features: LeadFeatures) -> Evaluation:
+        for tier in self.tiers:
+            if tier.when(features):
+                return tier.points, tier.label
+        return 0, None
+
+
+@dataclass(frozen=True)
+class Lookup:
+    component: str
+    attribute: str  # LeadFeatures attribute
+    table: Dict[str, Tuple[int, str]]  # value -> (points, label)
+    default: int
+    missing: str = ''
+
+    def evaluate(self, features: LeadFeatures) -> Evaluation:
+        return self.table.get(getattr(features, self.attribute), (self.default, None))
+
+
+RULES = (
+    # 1. Urgency Analysis (30 points)
+    Keywords(
+        'urgency', ('urgente', 'imediato', 'prazo', 'vencendo', 'emergência', 'rápido'),
+        points=10, cap=30, label="Indícios de urgência",
+    ),
+    # 2. Documentation Readiness (20 points)
+    FirstMatch('documentation', (
+        Tier(20, "Possui negativa do plano", Answer(('has_denial_letter', 'negativa'))),
+        Tier(15, "Possui laudo médico", Answer(('has_medical_report', 'tem_laudo'))),
+        Tier(10, "Possui provas documentais", Answer(('has_evidence',))),
+    ), missing="Sem documentação informada"),
+    # 3. Case Complexity (inverse scoring - simpler = higher)
+    Lookup('complexity', 'case_type', {
+        'LIPEDEMA': (15, "Nicho de Alto Valor: Lipedema"),  # Well-defined legal precedent
+        'SUPER': (10, "Demanda Recorrente: Superendividamento"),  # More complex, case-by-case
+        'CULTURAL': (12, "Terceiro Setor: Lei Rouanet"),  # Moderate complexity
+    }, default=5),
+    # 4. Financial Viability (15 points)
+    FirstMatch('financial', (
+        Tier(5, "Desempregado (honorários de êxito)", Words('employment_status', ('desempregado',))),
+        Tier(15, "Renda formal (CLT)", Words('employment_status', ('empregado', 'clt'))),
+        Tier(10, "Renda autônoma", Words('employment_status', ('autonomo', 'mei'))),
+    )),
+    # 5. Geographic Proximity (15 points) - DDD 19 = Campinas region (easier logistics)
+    Lookup('geographic', 'region', {
+        '19': (15, "Região de Campinas"),
+        '11': (10, "Estado de São Paulo"),
+        '13': (10, "Estado de São Paulo"),
+        '15': (10, "Estado de São Paulo"),
+    }, default=5, missing="Fora da região de atendimento"),  # Remote but still viable
+    # 6. Bonus: Referral or returning client
+    FirstMatch('bonus', (
+        Tier(10, "Indicação de cliente", Answer(('referral_source',), ('client',))),
+    )),
+)
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ScoreResult:
+    score: int
+    breakdown: Dict[str, int]  # component -> points
+    positive: List[str]
+    negative: List[str]
+
+    @property
+    def is_qualified(self) -> bool:
+        return self.score > QUALIFIED_ABOVE
+
+    @property
+    def viability(self) -> str:
+        for status, minimum in VIABILITY_THRESHOLDS:
+            if self.score >= minimum:
+                return status
+        return 'LOW'
+
+
+class ClaimScoreEngine:
+    """Scores leads with a rule table (default: RULES)."""
+
+    def __init__(self, rules=RULES, base: int = BASE_SCORE):
+        self.rules = tuple(rules)
+        self.base = base
+
+    def evaluate(self, features: LeadFeatures) -> ScoreResult:
+        breakdown, positive, negative = {}, [], []
+        for rule in self.rules:
+            points, reason = rule.evaluate(features)
+            breakdown[rule.component] = points
+            if reason:
+                positive.append(reason)
+            elif rule.missing:
+                negative.append(rule.missing)
+        score = max(0, min(self.base + sum(breakdown.values()), 100))
+        return ScoreResult(score, breakdown, positive, negative)
+
+    def score(self, lead: Lead, triage_data: Optional[Dict] = None) -> ScoreResult:
+        return self.evaluate(LeadFeatures.from_lead(lead, triage_data))
+
+    def score_many(self, leads: Iterable[Lead], batch_size: int = 500, analysis: bool = False) -> int:
+        """
+        Score leads and save those whose score, qualification or viability changed.
+
+        `leads` may be a list or a QuerySet iterator: rows are written every
+        `batch_size` leads with one bulk_update (and, with analysis=True, one
+        LeadAnalysis upsert). Returns the number of leads updated.
+        """
+        updated, stale, analyses = 0, [], []
+        for lead in leads:
+            result = self.score(lead)
+            if apply_score(lead, result):
+                stale.append(lead)
+            if analysis:
+                analyses.append(build_analysis(lead, result))
+            if len(stale) >= batch_size or len(analyses) >= batch_size:
+                updated += _write(stale, analyses, batch_size)
+                stale, analyses = [], []
+        return updated + _write(stale, analyses, batch_size)
+
+
+def apply_score(lead: Lead, result: ScoreResult) -> bool:
+    """Set score, qualification and viability on the lead (not saved). Returns True if any changed."""
+    viability = lead.viability_status if lead.viability_status == 'REJECTED' else result.viability
+    changed = (lead.score, lead.is_qualified, lead.viability_status) != (result.score, result.is_qualified, viability)
+    lead.score, lead.is_qualified, lead.viability_status = result.score, result.is_qualified, viability
+    return changed
+
+
+def build_analysis(lead: Lead, result: ScoreResult) -> LeadAnalysis:
+    return LeadAnalysis(
+        lead=lead,
+        summary=f"Lead classificado com score {result.score}. Análise Inicial Automática",
+        positive_points=result.positive,
+        negative_points=result.negative,
+        recommended_action="Agendar Triagem Humana" if result.score >= BASE_SCORE else "Monitorar",
+    )
+
+
+SCORE_FIELDS = ['score', 'is_qualified', 'viability_status']
+
+
+def _write(leads: List[Lead], analyses: List[LeadAnalysis], batch_size: int) -> int:
+    if leads:
+        Lead.objects.bulk_update(leads, SCORE_FIELDS, batch_size=batch_size)
+        leads_bulk_changed.send(sender=Lead, days={timezone.localdate(lead.created_at) for lead in leads})
+    if analyses:
+        LeadAnalysis.objects.bulk_create(
+            analyses,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['lead'],
+            update_fields=['summary', 'positive_points', 'negative_points', 'recommended_action'],
+        )
+    return len(leads)
+
+
+engine = ClaimScoreEngine()
+
+
+def calculate_claim_score(lead: Lead, triage_data: Optional[Dict] = None) -> int:
     """
     ClaimScore™ - Predictive lead qualification algorithm.
-    
-    Factors (weighted):
-    - Urgency indicators (30 points)
-    - Documentation readiness (20 points)
-    - Case complexity (20 points)
-    - Financial viability (15 points)
-    - Geographic proximity (15 points)
-    
+
     Args:
         lead: Lead instance
-        triage_data: Dictionary with triage responses
-    
+        triage_data: Triage responses (default: lead.triage_data)
+
     Returns:
         Score 0-100 (>60 = qualified)
     """
-    score = 50  # Base score
-    
-    # 1. Urgency Analysis (30 points)
-    urgency_keywords = ['urgente', 'imediato', 'prazo', 'vencendo', 'emergência', 'rápido']
-    urgency_count = sum(1 for kw in urgency_keywords if kw in str(triage_data).lower())
-    score += min(urgency_count * 10, 30)
-    
-    # 2. Documentation Readiness (20 points)
-    if triage_data.get('has_denial_letter') == 'sim':
-        score += 20
-    elif triage_data.get('has_medical_report') == 'sim':
-        score += 15
-    elif triage_data.get('has_evidence') == 'sim':
-        score += 10
-    
-    # 3. Case Complexity (inverse scoring - simpler = higher)
-    complexity_map = {
-        'LIPEDEMA': 15,  # Well-defined legal precedent
-        'SUPER': 10,     # More complex, case-by-case
-        'CULTURAL': 12,  # Moderate complexity
-        'OTHER': 5       # Unknown complexity
-    }
-    score += complexity_map.get(lead.case_type, 5)
-    
-    # 4. Financial Viability (15 points)
-    employment_status = str(triage_data.get('employment_status', '')).lower()
-    if 'empregado' in employment_status or 'clt' in employment_status:
-        score += 15
-    elif 'autonomo' in employment_status or 'mei' in employment_status:
-        score += 10
-    elif 'desempregado' in employment_status:
-        score += 5  # Still viable with contingency fee
-    
-    # 5. Geographic Proximity (15 points)
-    # DDD 19 = Campinas region (easier logistics)
-    contact = lead.contact_info
-    if '19' in contact or '(19)' in contact:
-        score += 15
-    elif any(ddd in contact for ddd in ['11', '13', '15']):  # SP state
-        score += 10
-    else:
-        score += 5  # Remote but still viable
-    
-    # 6. Bonus: Referral or returning client
-    if triage_data.get('referral_source') == 'client':
-        score += 10  # Bonus for referrals
-    
-    return min(score, 100)  # Cap at 100
+    return engine.score(lead, triage_data).score
 
 
-def get_score_breakdown(lead: Lead, triage_data: Dict) -> Dict:
+def score_many(leads: Iterable[Lead], batch_size: int = 500, analysis: bool = False) -> int:
+    return engine.score_many(leads, batch_size=batch_size, analysis=analysis)
+
+
+def get_score_breakdown(lead: Lead, triage_data: Optional[Dict] = None) -> Dict:
     """
     Get detailed breakdown of score calculation.
-    
+
     Useful for transparency and debugging.
     """
-    breakdown = {
-        'base_score': 50,
-        'urgency_points': 0,
-        'documentation_points': 0,
-        'complexity_points': 0,
-        'financial_points': 0,
-        'geographic_points': 0,
-        'bonus_points': 0,
-        'total': 0
-    }
-    
-    # Calculate each component
-    urgency_keywords = ['urgente', 'imediato', 'prazo', 'vencendo', 'emergência']
-    urgency_count = sum(1 for kw in urgency_keywords if kw in str(triage_data).lower())
-    breakdown['urgency_points'] = min(urgency_count * 10, 30)
-    
-    if triage_data.get('has_denial_letter') == 'sim':
-        breakdown['documentation_points'] = 20
-    elif triage_data.get('has_medical_report') == 'sim':
-        breakdown['documentation_points'] = 15
-    
-    complexity_map = {'LIPEDEMA': 15, 'SUPER': 10, 'CULTURAL': 12, 'OTHER': 5}
-    breakdown['complexity_points'] = complexity_map.get(lead.case_type, 5)
-    
-    employment = str(triage_data.get('employment_status', '')).lower()
-    if 'empregado' in employment or 'clt' in employment:
-        breakdown['financial_points'] = 15
-    elif 'autonomo' in employment:
-        breakdown['financial_points'] = 10
-    
-    contact = lead.contact_info
-    if '19' in contact:
-        breakdown['geographic_points'] = 15
-    elif any(ddd in contact for ddd in ['11', '13', '15']):
-        breakdown['geographic_points'] = 10
-    
-    if triage_data.get('referral_source') == 'client':
-        breakdown['bonus_points'] = 10
-    
-    breakdown['total'] = min(
-        sum(breakdown.values()) - breakdown['total'],  # Exclude total from sum
-        100
-    )
-    
+    result = engine.score(lead, triage_data)
+    breakdown = {'base_score': engine.base}
+    breakdown.update({f'{component}_points': points for component, points in result.breakdown.items()})
+    breakdown['total'] = result.score
     return breakdown
@@ -0,0 +1,68 @@
+"""
+Intake triage flow shared by every channel (HTMX wizard, WhatsApp).
+
+Step 1 asks the name and the case type; step 2 asks the case type's
+question (QUESTIONS) and a contact; `complete_triage` then scores the
+answers with ClaimScore and creates the Lead.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from django.conf import settings
+
+from apps.intake.models import Lead
+from apps.intake.scoring import apply_score, engine
+
+
+@dataclass(frozen=True)
+class Question:
+    key: str  # triage_data key
+    text: str
+    choices: Tuple[Tuple[str, str], ...] = ()  # (value, label); empty for free text
+
+
+QUESTIONS = {
+    'LIPEDEMA': Question('negativa', 'O plano de saúde negou o tratamento?', (
+        ('sim', 'Sim, já tenho negativa'),
+        ('nao', 'Não, ainda não pedi'),
+    )),
+    'SUPER': Question('urgencia', 'Suas dívidas comprometem o sustento básico?', (
+        ('urgente', 'Sim, é urgente/crítico'),
+        ('moderado', 'Ainda sob controle, mas preocupante'),
+    )),
+}
+DEFAULT_QUESTION = Question('description', 'Resuma brevemente seu caso:')
+
+STEP_TEMPLATES = {
+    'LIPEDEMA': 'intake/step_lipedema.html',
+    'SUPER': 'intake/step_super.html',
+}
+
+
+def question_for(case_type: str) -> Question:
+    return QUESTIONS.get(case_type, DEFAULT_QUESTION)
+
+
+def step_template(case_type: str) -> str:
+    return STEP_TEMPLATES.get(case_type, 'intake/step_generic.html')
+
+
+def complete_triage(triage_data: dict, contact: Optional[str], source: Optional[str] = None) -> Lead:
+    """Score the answers, create the Lead (one INSERT) and queue the alert if it qualifies."""
+    lead = Lead(
+        full_name=triage_data['name'],
+        case_type=triage_data['case_type'],
+        contact_info=contact or 'Não informado',
+        triage_data=triage_data,
+    )
+    if source:
+        lead.source = source
+    # [ENHANCED] ClaimScore™ Algorithm (score, qualification and viability)
+    apply_score(lead, engine.score(lead, triage_data))
+    lead.save()
+
+    # Notificação WhatsApp se qualificado (enfileirada; o envio é feito pelo run_whatsapp_sender)
+    if lead.is_qualified:
+        from apps.whatsapp.services.notification import WhatsAppNotificationService
+        WhatsAppNotificationService(provider=getattr(settings, 'WHATSAPP_PROVIDER', 'mock')).send_lead_notification(lead)
+    return lead
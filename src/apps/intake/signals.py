@@ -0,0 +1,11 @@
+"""
+Signals sent by intake bulk writes.
+
+Rescoring (apps.intake.scoring.score_many) saves leads with bulk_update,
+which sends no model signals, so it sends `leads_bulk_changed` afterwards
+with Lead as sender and the local `created_at` days of the leads touched
+as `days` (apps.analytics rebuilds those rollup buckets).
+"""
+from django.dispatch import Signal
+
+leads_bulk_changed = Signal()
@@ -148,3 +148,68 @@ class TestIntakeFlow:
         assert lead.score > 60
         assert result is True
         assert Lead.objects.count() == 1
+
+
+class ClaimScoreTestCase(TestCase):
+    """Testes do motor ClaimScore (regras, lote e recálculo)."""
+
+    def test_breakdown_reads_answers_not_keys(self):
+        """Testa que só os valores da triagem são pesquisados, sem acentos."""
+        from apps.intake.scoring import get_score_breakdown
+
+        lead = Lead(full_name="Ana", case_type='LIPEDEMA', contact_info='(19) 98888-7777')
+        breakdown = get_score_breakdown(lead, {
+            'prazo_final': 'não sei',  # key only: no urgency
+            'description': 'EMERGENCIA, preciso de algo rápido',
+            'negativa': 'sim',
+            'employment_status': 'Desempregado',
+        })
+
+        self.assertEqual(breakdown['urgency_points'], 20)
+        self.assertEqual(breakdown['documentation_points'], 20)
+        self.assertEqual(breakdown['complexity_points'], 15)
+        self.assertEqual(breakdown['financial_points'], 5)
+        self.assertEqual(breakdown['geographic_points'], 15)
+        self.assertEqual(breakdown['total'], 100)
+
+    def test_region_comes_from_the_ddd(self):
+        """Testa que a região vem do DDD do telefone, não de qualquer '19' no contato."""
+        from apps.intake.scoring import calculate_claim_score
+
+        remote = Lead(case_type='OTHER', contact_info='+55 (21) 91919-1919')
+        campinas = Lead(case_type='OTHER', contact_info='ana@example.com', location='Campinas/SP')
+
+        self.assertEqual(calculate_claim_score(remote, {}), 60)
+        self.assertEqual(calculate_claim_score(campinas, {}), 70)
+
+    def test_rescore_command_updates_in_bulk(self):
+        """Testa o recálculo em lote com bulk_update e a análise gravada."""
+        from io import StringIO
+        from django.core.management import call_command
+        from apps.intake.models import LeadAnalysis
+
+        qualified = Lead.objects.create(
+            full_name="Bia", case_type='SUPER', contact_info='19977776666',
+            triage_data={'urgencia': 'urgente'},
+        )
+        remote = Lead.objects.create(full_name="Caio", case_type='OTHER', contact_info='caio@example.com', score=90)
+        rejected = Lead.objects.create(
+            full_name="Duda", case_type='OTHER', contact_info='21977776666', viability_status='REJECTED',
+        )
+
+        out = StringIO()
+        with self.assertNumQueries(4):  # count, select, bulk_update, analysis upsert
+            call_command('rescore_leads', '--analysis', stdout=out)
+
+        self.assertIn('3 leads scored, 3 updated', out.getvalue())
+        qualified.refresh_from_db()
+        self.assertEqual((qualified.score, qualified.is_qualified, qualified.viability_status), (85, True, 'HIGH'))
+        remote.refresh_from_db()
+        self.assertEqual((remote.score, remote.is_qualified, remote.viability_status), (60, False, 'MEDIUM'))
+        rejected.refresh_from_db()
+        self.assertEqual(rejected.viability_status, 'REJECTED')
+        self.assertIn("Fora da região de atendimento", LeadAnalysis.objects.get(lead=remote).negative_points)
+
+        out = StringIO()
+        call_command('rescore_leads', stdout=out)
+        self.assertIn('3 leads scored, 0 updated', out.getvalue())
@@ -0,0 +1,28 @@
+from django.contrib import admin
+from .models import MatterLink, ReconciliationRun, SyncJob, SyncOutboxEntry
+
+@admin.register(SyncJob)
+class SyncJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'provider', 'status', 'total', 'synced', 'failed', 'created_at', 'finished_at')
+    list_filter = ('provider', 'status')
+    readonly_fields = ('created_at', 'finished_at')
+
+@admin.register(SyncOutboxEntry)
+class SyncOutboxEntryAdmin(admin.ModelAdmin):
+    list_display = ('lead', 'provider', 'status', 'attempts', 'next_attempt_at', 'updated_at')
+    list_filter = ('provider', 'status')
+    raw_id_fields = ('lead', 'job')
+    readonly_fields = ('created_at', 'updated_at', 'locked_at')
+
+@admin.register(MatterLink)
+class MatterLinkAdmin(admin.ModelAdmin):
+    list_display = ('provider', 'external_id', 'legal_case', 'conflict', 'remote_updated_at', 'reconciled_at')
+    list_filter = ('provider', 'conflict')
+    search_fields = ('external_id',)
+    raw_id_fields = ('lead', 'legal_case')
+
+@admin.register(ReconciliationRun)
+class ReconciliationRunAdmin(admin.ModelAdmin):
+    list_display = ('id', 'provider', 'status', 'since', 'fetched', 'created', 'updated', 'pushed', 'started_at')
+    list_filter = ('provider', 'status')
+    readonly_fields = ('started_at', 'finished_at')
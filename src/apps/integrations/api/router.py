@@ -2,11 +2,16 @@
 Django Ninja API endpoints for Legal Ops synchronization.
 """
 from ninja import Router
+from django.conf import settings
 from django.http import HttpResponse
 from typing import Optional
 
 from apps.intake.models import Lead
+from apps.integrations.base.circuit_breaker import provider_health
+from apps.integrations.base.http import session_stats
+from apps.integrations.base.outbox import enqueue_qualified_leads
 from apps.integrations.base.sync_service import LegalOpsSyncService
+from apps.integrations.models import SyncJob
 
 router = Router()
 
@@ -53,54 +58,85 @@ def health_check(request, provider: Optional[str] = None):
     """
     Check connection to Legal Ops provider.
     
+    The result is cached for LEGAL_OPS_HEALTH_TTL seconds and no live call
+    is made while the provider's circuit breaker is open.
+    
     Args:
         provider: Optional provider to check ('clio', 'jestor')
         
     Returns:
         JSON with health status
     """
-    sync_service = LegalOpsSyncService(provider_name=provider)
-    is_healthy = sync_service.health_check()
+    provider_name = provider or getattr(settings, 'LEGAL_OPS_PROVIDER', 'clio')
+    health = provider_health(provider_name)
     
     return {
-        "provider": sync_service.provider_name,
-        "healthy": is_healthy,
-        "status": "connected" if is_healthy else "disconnected"
+        "provider": provider_name,
+        "healthy": health['healthy'],
+        "status": "connected" if health['healthy'] else "disconnected",
+        "circuit": health['circuit'],
+        "retry_after": health['retry_after'],
+        "http": session_stats(provider_name)
     }
 
 
 @router.post("/sync/auto-sync-qualified/")
-def auto_sync_qualified_leads(request):
+def auto_sync_qualified_leads(request, provider: Optional[str] = None):
     """
-    Automatically sync all qualified leads that haven't been synced yet.
+    Queue all qualified leads that haven't been synced yet.
+    
+    The sync itself runs in `manage.py run_sync_worker`; poll
+    /sync/jobs/{job_id}/ for progress.
     
     Returns:
-        JSON with sync summary
+        JSON with the job id and number of queued leads
     """
-    sync_service = LegalOpsSyncService()
-    
-    # Find qualified leads without external_id
-    unsynced_leads = Lead.objects.filter(
-        is_qualified=True,
-        external_id__isnull=True
-    )
+    job = enqueue_qualified_leads(provider_name=provider)
     
-    results = {
-        "total": unsynced_leads.count(),
-        "synced": 0,
-        "failed": 0,
-        "errors": []
+    return {
+        "job_id": job.id,
+        "provider": job.provider,
+        "total": job.total,
+        "status": job.status,
+        "status_url": f"/api/integrations/sync/jobs/{job.id}/"
     }
+
+
+@router.get("/sync/jobs/{job_id}/", response={200: dict, 404: dict})
+def sync_job_status(request, job_id: int):
+    """
+    Progress of a queued sync job.
     
-    for lead in unsynced_leads:
-        result = sync_service.sync_lead_to_matter(lead)
-        if result.success:
-            results["synced"] += 1
-        else:
-            results["failed"] += 1
-            results["errors"].append({
-                "lead_id": lead.id,
-                "error": result.error_message
-            })
+    Args:
+        job_id: ID returned by /sync/auto-sync-qualified/
+        
+    Returns:
+        JSON with counters and the latest errors
+    """
+    job = SyncJob.objects.filter(id=job_id).first()
+    if job is None:
+        return 404, {"error": "Job not found"}
     
-    return results
+    errors = job.entries.exclude(last_error='').order_by('-updated_at').values(
+        'lead_id', 'status', 'attempts', 'last_error'
+    )[:20]
+    
+    return {
+        "job_id": job.id,
+        "provider": job.provider,
+        "status": job.status,
+        "total": job.total,
+        "synced": job.synced,
+        "failed": job.failed,
+        "pending": job.total - job.processed,
+        "progress": round(job.processed / job.total * 100) if job.total else 100,
+        "errors": [
+            {
+                "lead_id": e['lead_id'],
+                "status": e['status'],
+                "attempts": e['attempts'],
+                "error": e['last_error']
+            }
+            for e in errors
+        ]
+    }
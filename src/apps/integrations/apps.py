@@ -5,6 +5,7 @@ class IntegrationsConfig(AppConfig):
     name = 'apps.integrations'
 
     def ready(self):
+        from . import checks  # registers the system checks
         from .base.providers import ProviderFactory
         from .providers.native import NativeProvider
         
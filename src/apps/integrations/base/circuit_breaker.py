@@ -0,0 +1,131 @@
+"""
+Per-provider circuit breaker and cached health status.
+
+State lives in the cache backend so every gunicorn/worker process sees the
+same circuit (with the default LocMemCache it is per process; set REDIS_URL
+to share it):
+
+    CLOSED     calls go through; consecutive failures are counted
+    OPEN       calls fail fast for LEGAL_OPS_BREAKER_RECOVERY_SECONDS
+    HALF_OPEN  a single probe call is let through; success closes the
+               circuit, failure opens it again
+"""
+import logging
+import time
+from typing import Dict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.integrations.base.providers import ProviderFactory
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit open for {name}, retry in {retry_after:.0f}s")
+
+
+class CircuitBreaker:
+    """
+    Args:
+        name: Provider name (cache key namespace)
+        failure_threshold: Consecutive failures that open the circuit
+        recovery_timeout: Seconds the circuit stays open before a probe
+    """
+
+    def __init__(self, name: str, failure_threshold: int = None, recovery_timeout: float = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or getattr(settings, 'LEGAL_OPS_BREAKER_FAILURE_THRESHOLD', 5)
+        self.recovery_timeout = recovery_timeout or getattr(settings, 'LEGAL_OPS_BREAKER_RECOVERY_SECONDS', 60)
+        prefix = f'legal_ops:breaker:{name}'
+        self.failures_key = f'{prefix}:failures'
+        self.opened_key = f'{prefix}:opened_at'
+        self.probe_key = f'{prefix}:probe'
+
+    @property
+    def state(self) -> str:
+        opened_at = cache.get(self.opened_key)
+        if opened_at is None:
+            return CLOSED
+        if time.time() - opened_at < self.recovery_timeout:
+            return OPEN
+        return HALF_OPEN
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe is allowed (0 when closed)."""
+        opened_at = cache.get(self.opened_key)
+        if opened_at is None:
+            return 0
+        return max(self.recovery_timeout - (time.time() - opened_at), 0)
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN:
+            # cache.add is atomic: exactly one caller wins the probe
+            return cache.add(self.probe_key, 1, timeout=self.recovery_timeout)
+        return False
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless the call may proceed."""
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, self.retry_after() or self.recovery_timeout)
+
+    def record_success(self) -> None:
+        if cache.get(self.opened_key) is not None:
+            logger.info(f"Circuit for {self.name} closed")
+        cache.delete_many([self.failures_key, self.opened_key, self.probe_key])
+
+    def record_failure(self) -> None:
+        if cache.get(self.probe_key) is not None:
+            # Failed probe: open again for a full recovery period
+            self._open()
+            return
+        cache.add(self.failures_key, 0, timeout=self.recovery_timeout * 2)
+        try:
+            failures = cache.incr(self.failures_key)
+        except ValueError:  # expired between add and incr
+            failures = 1
+            cache.set(self.failures_key, failures, timeout=self.recovery_timeout * 2)
+        if failures >= self.failure_threshold and self.state == CLOSED:
+            self._open()
+
+    def reset(self) -> None:
+        cache.delete_many([self.failures_key, self.opened_key, self.probe_key])
+
+    def _open(self) -> None:
+        logger.warning(f"Circuit for {self.name} opened for {self.recovery_timeout}s")
+        cache.set(self.opened_key, time.time(), timeout=None)
+        cache.delete_many([self.failures_key, self.probe_key])
+
+
+def provider_health(provider_name: str) -> Dict:
+    """
+    Health of a provider, cached for LEGAL_OPS_HEALTH_TTL seconds.
+
+    While the circuit is open the provider is reported down without a call.
+    """
+    breaker = CircuitBreaker(provider_name)
+    state = breaker.state
+    key = f'legal_ops:health:{provider_name}'
+    healthy = cache.get(key)
+    if state == OPEN:
+        healthy = False
+    elif healthy is None:
+        try:
+            healthy = bool(ProviderFactory.get_provider(provider_name).health_check())
+        except Exception:
+            logger.exception(f"Health check of {provider_name} failed")
+            healthy = False
+        cache.set(key, healthy, timeout=getattr(settings, 'LEGAL_OPS_HEALTH_TTL', 30))
+        state = breaker.state
+    return {'healthy': healthy, 'circuit': state, 'retry_after': round(breaker.retry_after())}
@@ -0,0 +1,136 @@
+"""
+Pooled HTTP sessions for Legal Ops providers.
+
+Each provider gets one `requests.Session` per process, so bulk syncs reuse
+keep-alive connections instead of paying a TCP+TLS handshake per call.
+Transient failures (429/5xx) are retried by urllib3, honoring Retry-After;
+what is still failing after that feeds the provider's circuit breaker.
+"""
+import os
+import threading
+from typing import Dict
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from apps.integrations.base.circuit_breaker import CircuitBreaker
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# The server rejected these before doing any work, so even POST is safe to resend
+NOT_PROCESSED_STATUSES = frozenset({429, 503})
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_pid = os.getpid()
+_lock = threading.Lock()
+
+
+class ProviderRetry(Retry):
+    """
+    Retry idempotent methods on any RETRY_STATUSES, and every method on
+    429/503. A POST that hit a 500 may have created the matter, so it is
+    left to the outbox (which knows the lead) to decide.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if self.total and status_code in NOT_PROCESSED_STATUSES:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class BreakerSession(requests.Session):
+    """
+    Session that fails fast with CircuitOpenError while the provider's
+    circuit is open. Connection errors, timeouts, 429 and 5xx count as
+    failures; any other response closes the circuit.
+    """
+
+    def __init__(self, breaker: CircuitBreaker):
+        super().__init__()
+        self.breaker = breaker
+
+    def request(self, *args, **kwargs):
+        self.breaker.before_call()
+        try:
+            response = super().request(*args, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            self.breaker.record_failure()
+            raise
+        if response.status_code in RETRY_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+
+def build_retry() -> ProviderRetry:
+    return ProviderRetry(
+        total=getattr(settings, 'LEGAL_OPS_HTTP_MAX_RETRIES', 3),
+        backoff_factor=getattr(settings, 'LEGAL_OPS_HTTP_BACKOFF_FACTOR', 0.5),
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {'PATCH'},
+        respect_retry_after_header=True,
+        raise_on_status=False,  # Hand the last response to the provider's status checks
+    )
+
+
+def get_session(name: str) -> requests.Session:
+    """
+    Shared session for a provider in this process.
+
+    Sessions are dropped after a fork so children never share sockets
+    with the parent.
+    """
+    global _sessions_pid
+    with _lock:
+        if _sessions_pid != os.getpid():
+            _sessions.clear()
+            _sessions_pid = os.getpid()
+        session = _sessions.get(name)
+        if session is None:
+            pool_size = getattr(settings, 'LEGAL_OPS_HTTP_POOL_SIZE', 10)
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=pool_size,
+                max_retries=build_retry(),
+            )
+            session = BreakerSession(CircuitBreaker(name))
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[name] = session
+        return session
+
+
+def close_sessions() -> None:
+    """Close every pooled session (used on worker shutdown and in tests)."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def session_stats(name: str) -> Dict:
+    """
+    Connection reuse metrics of a provider session.
+
+    `requests` counts every HTTP request (retries included) and
+    `connections` every new TCP connection, so a reuse_rate close to 1.0
+    means keep-alive is working.
+    """
+    session = _sessions.get(name)
+    requests_made = connections = 0
+    if session is not None:
+        for adapter in {id(a): a for a in session.adapters.values()}.values():
+            manager = adapter.poolmanager
+            for key in manager.pools.keys():
+                pool = manager.pools.get(key)
+                if pool is not None:
+                    requests_made += pool.num_requests
+                    connections += pool.num_connections
+    return {
+        'requests': requests_made,
+        'connections': connections,
+        'reuse_rate': round(1 - connections / requests_made, 3) if requests_made else None,
+    }
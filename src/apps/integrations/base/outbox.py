@@ -0,0 +1,321 @@
+"""
+Outbox processing for Legal Ops synchronization.
+
+`enqueue_qualified_leads` records pending syncs in SyncOutboxEntry and
+returns immediately; `SyncWorker` (run by `manage.py run_sync_worker`)
+claims due entries and pushes them with bounded concurrency, per-provider
+rate limits and exponential backoff.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.intake.models import Lead
+from apps.integrations.base.circuit_breaker import OPEN, CircuitBreaker
+from apps.integrations.base.providers import LegalOpsProvider, SyncResult
+from apps.integrations.base.sync_service import LegalOpsSyncService
+from apps.integrations.models import SyncJob, SyncOutboxEntry
+from apps.jobs.worker import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+IN_FLIGHT = ['PENDING', 'PROCESSING']
+ENQUEUE_BATCH_SIZE = 500
+
+
+def enqueue_qualified_leads(provider_name: str = None) -> SyncJob:
+    """
+    Queue every qualified lead that has no external_id yet.
+
+    Leads already queued for the same provider are skipped.
+
+    Returns:
+        SyncJob tracking the progress of the queued entries
+    """
+    provider_name = provider_name or getattr(settings, 'LEGAL_OPS_PROVIDER', 'clio')
+    in_flight = SyncOutboxEntry.objects.filter(provider=provider_name, status__in=IN_FLIGHT)
+    lead_ids = (
+        Lead.objects.filter(is_qualified=True, external_id__isnull=True)
+        .exclude(id__in=in_flight.values('lead_id'))
+        .values_list('id', flat=True)
+    )
+
+    now = timezone.now()
+    max_attempts = getattr(settings, 'LEGAL_OPS_SYNC_MAX_ATTEMPTS', 5)
+    with transaction.atomic():
+        job = SyncJob.objects.create(provider=provider_name)
+        batch = []
+        for lead_id in lead_ids.iterator(chunk_size=2000):
+            batch.append(SyncOutboxEntry(
+                job=job,
+                lead_id=lead_id,
+                provider=provider_name,
+                max_attempts=max_attempts,
+                next_attempt_at=now,
+            ))
+            if len(batch) >= ENQUEUE_BATCH_SIZE:
+                SyncOutboxEntry.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        if batch:
+            SyncOutboxEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        job.total = job.entries.count()
+        if job.total == 0:
+            job.status = 'DONE'
+            job.finished_at = now
+        job.save(update_fields=['total', 'status', 'finished_at'])
+
+    logger.info(f"SyncJob {job.id}: {job.total} leads queued for {provider_name}")
+    return job
+
+
+class RateLimiter:
+    """
+    Token bucket shared by the threads of one worker process.
+
+    Args:
+        rate: Requests per second
+        burst: Requests allowed at once before throttling
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SyncWorker:
+    """
+    Processes due SyncOutboxEntry rows.
+
+    Entries are claimed with SELECT ... FOR UPDATE SKIP LOCKED where the
+    database supports it, so several worker processes can run side by side.
+    Entries stuck in PROCESSING (crashed worker) are reclaimed after
+    LEGAL_OPS_SYNC_LOCK_TIMEOUT seconds, counting the interrupted attempt
+    (failed once max_attempts is used up).
+    """
+
+    def __init__(self, concurrency: int = None, batch_size: int = 50):
+        self.concurrency = concurrency or getattr(settings, 'LEGAL_OPS_SYNC_CONCURRENCY', 4)
+        self.batch_size = batch_size
+        self.lock_timeout = getattr(settings, 'LEGAL_OPS_SYNC_LOCK_TIMEOUT', 600)
+        self._services: Dict[str, LegalOpsSyncService] = {}
+        self._limiters: Dict[str, Optional[RateLimiter]] = {}
+        self._lock = threading.Lock()
+
+    def run(self, once: bool = False, poll_interval: float = 5) -> int:
+        """Process entries until stopped (or until the queue is empty when once=True)."""
+        total = 0
+        while True:
+            processed = self.run_once()
+            total += processed
+            if not processed:
+                if once:
+                    return total
+                time.sleep(poll_interval)
+
+    def run_once(self) -> int:
+        """Claim and process one batch. Returns the number of entries processed."""
+        entries = self.claim()
+        if not entries:
+            return 0
+        by_provider: Dict[str, List[SyncOutboxEntry]] = {}
+        for entry in entries:
+            by_provider.setdefault(entry.provider, []).append(entry)
+
+        single = []
+        for provider_name, group in by_provider.items():
+            if self._has_batch_create(provider_name):
+                self.process_batch(provider_name, group)
+            else:
+                single.extend(group)
+
+        if self.concurrency <= 1:
+            for entry in single:
+                self.process(entry)
+        elif single:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                list(pool.map(self._process_in_thread, single))
+        return len(entries)
+
+    def claim(self) -> List[SyncOutboxEntry]:
+        now = timezone.now()
+        stale = now - timedelta(seconds=self.lock_timeout)
+        with transaction.atomic():
+            self._reclaim(stale, now)
+            due = SyncOutboxEntry.objects.filter(status='PENDING', next_attempt_at__lte=now).order_by('next_attempt_at')
+            if connection.features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            entries = list(due[:self.batch_size])
+            SyncOutboxEntry.objects.filter(id__in=[e.id for e in entries]).update(
+                status='PROCESSING', locked_at=now
+            )
+            SyncJob.objects.filter(
+                id__in={e.job_id for e in entries if e.job_id}, status='PENDING'
+            ).update(status='RUNNING')
+        return entries
+
+    def _reclaim(self, stale, now) -> None:
+        """Requeue entries a dead worker left PROCESSING; the interrupted run used up an attempt."""
+        stuck = SyncOutboxEntry.objects.filter(status='PROCESSING', locked_at__lt=stale)
+        exhausted = stuck.filter(attempts__gte=F('max_attempts') - 1)
+        if connection.features.has_select_for_update_skip_locked:
+            exhausted = exhausted.select_for_update(skip_locked=True)
+        exhausted = list(exhausted.values_list('id', 'job_id', 'lead_id'))
+        if exhausted:
+            SyncOutboxEntry.objects.filter(id__in=[entry_id for entry_id, _, _ in exhausted]).update(
+                status='FAILED', locked_at=None, attempts=F('attempts') + 1, updated_at=now,
+                last_error='Worker stopped while syncing the lead (lock timeout)',
+            )
+            for _, job_id, lead_id in exhausted:
+                logger.error(f"Sync of lead {lead_id} gave up: worker stopped on the last attempt")
+                if job_id:
+                    self._count(job_id, 'failed', now)
+        stuck.update(status='PENDING', locked_at=None, attempts=F('attempts') + 1, updated_at=now)
+
+    def process(self, entry: SyncOutboxEntry) -> SyncResult:
+        lead = Lead.objects.filter(id=entry.lead_id).first()
+        if lead is None or not lead.is_qualified:
+            # Nothing a retry could fix
+            result = SyncResult(success=False, error_message="Lead not found or not qualified")
+            self._finish(entry, result, retry=False)
+            return result
+
+        breaker = CircuitBreaker(entry.provider)
+        if breaker.state == OPEN:
+            # Provider down: wait for the probe window without burning an attempt
+            self._defer(entry, breaker.retry_after())
+            return SyncResult(success=False, error_message=f"Circuit open for {entry.provider}")
+
+        limiter = self._limiter(entry.provider)
+        if limiter:
+            limiter.acquire()
+
+        try:
+            result = self._service(entry.provider).sync_lead_to_matter(lead)
+        except Exception as e:
+            logger.exception(f"Error syncing lead {lead.id} to {entry.provider}")
+            result = SyncResult(success=False, error_message=str(e))
+
+        self._finish(entry, result, retry=True)
+        return result
+
+    def process_batch(self, provider_name: str, entries: List[SyncOutboxEntry]) -> None:
+        """Sync a group of entries with one provider.create_matters call."""
+        leads = Lead.objects.in_bulk([e.lead_id for e in entries])
+        ready = []
+        for entry in entries:
+            lead = leads.get(entry.lead_id)
+            if lead is None or not lead.is_qualified:
+                result = SyncResult(success=False, error_message="Lead not found or not qualified")
+                self._finish(entry, result, retry=False)
+            else:
+                ready.append((entry, lead))
+        if not ready:
+            return
+
+        try:
+            results = self._service(provider_name).sync_leads_to_matters([lead for _, lead in ready])
+        except Exception as e:
+            logger.exception(f"Error batch-syncing {len(ready)} leads to {provider_name}")
+            results = [SyncResult(success=False, error_message=str(e))] * len(ready)
+
+        for (entry, _), result in zip(ready, results):
+            self._finish(entry, result, retry=True)
+
+    def _process_in_thread(self, entry: SyncOutboxEntry) -> SyncResult:
+        try:
+            return self.process(entry)
+        finally:
+            # Worker threads open their own DB connections
+            connection.close()
+
+    def _defer(self, entry: SyncOutboxEntry, seconds: float) -> None:
+        entry.status = 'PENDING'
+        entry.locked_at = None
+        entry.next_attempt_at = timezone.now() + timedelta(seconds=seconds)
+        entry.save(update_fields=['status', 'locked_at', 'next_attempt_at', 'updated_at'])
+
+    def _finish(self, entry: SyncOutboxEntry, result: SyncResult, retry: bool) -> None:
+        now = timezone.now()
+        entry.attempts += 1
+        entry.locked_at = None
+
+        if result.success:
+            entry.status = 'SUCCESS'
+            entry.external_id = result.external_id or ''
+            entry.last_error = ''
+            counter = 'synced'
+        elif retry and entry.attempts < entry.max_attempts:
+            entry.status = 'PENDING'
+            entry.next_attempt_at = now + backoff_delay(
+                entry.attempts, getattr(settings, 'LEGAL_OPS_SYNC_BACKOFF_SECONDS', 30)
+            )
+            entry.last_error = result.error_message or ''
+            counter = None
+            logger.warning(
+                f"Sync of lead {entry.lead_id} failed (attempt {entry.attempts}/{entry.max_attempts}), "
+                f"retrying at {entry.next_attempt_at:%H:%M:%S}: {entry.last_error}"
+            )
+        else:
+            entry.status = 'FAILED'
+            entry.last_error = result.error_message or ''
+            counter = 'failed'
+            logger.error(f"Sync of lead {entry.lead_id} gave up after {entry.attempts} attempts: {entry.last_error}")
+
+        entry.save(update_fields=[
+            'status', 'attempts', 'locked_at', 'next_attempt_at', 'external_id', 'last_error', 'updated_at'
+        ])
+
+        if counter and entry.job_id:
+            self._count(entry.job_id, counter, now)
+
+    def _count(self, job_id: int, counter: str, now) -> None:
+        """Add a synced/failed entry to its SyncJob, closing the job once every entry is done."""
+        SyncJob.objects.filter(id=job_id).update(**{counter: F(counter) + 1})
+        SyncJob.objects.filter(
+            id=job_id, total__lte=F('synced') + F('failed')
+        ).exclude(status='DONE').update(status='DONE', finished_at=now)
+
+    def _service(self, provider_name: str) -> LegalOpsSyncService:
+        with self._lock:
+            if provider_name not in self._services:
+                self._services[provider_name] = LegalOpsSyncService(provider_name=provider_name)
+            return self._services[provider_name]
+
+    def _has_batch_create(self, provider_name: str) -> bool:
+        # Remote providers keep the per-entry path (rate limited, one thread each);
+        # only providers with their own create_matters are batched
+        provider = self._service(provider_name).provider
+        return (
+            isinstance(provider, LegalOpsProvider)
+            and type(provider).create_matters is not LegalOpsProvider.create_matters
+        )
+
+    def _limiter(self, provider_name: str) -> Optional[RateLimiter]:
+        with self._lock:
+            if provider_name not in self._limiters:
+                rate = getattr(settings, 'LEGAL_OPS_RATE_LIMITS', {}).get(provider_name)
+                self._limiters[provider_name] = RateLimiter(rate) if rate else None
+            return self._limiters[provider_name]
@@ -5,9 +5,12 @@ Provides abstract classes that all Legal Ops providers must implement,
 ensuring consistent behavior across Clio, Jestor, and custom solutions.
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, Optional, List
 from dataclasses import dataclass
 
+DEFAULT_PAGE_SIZE = 200
+
 
 @dataclass
 class MatterData:
@@ -37,6 +40,9 @@ class LegalOpsProvider(ABC):
     All providers (Clio, Jestor, etc.) must implement these methods.
     """
     
+    # True when matters live in this database (nothing to reconcile)
+    is_local = False
+    
     @abstractmethod
     def create_matter(self, matter_data: MatterData) -> SyncResult:
         """
@@ -50,6 +56,31 @@ class LegalOpsProvider(ABC):
         """
         pass
     
+    def create_matters(self, matters: List[MatterData], max_workers: int = 4) -> List[SyncResult]:
+        """
+        Create several matters at once.
+        
+        The default fans create_matter out over a thread pool, which suits
+        remote APIs; providers with a native batch operation should override it.
+        
+        Args:
+            matters: Standardized matter information
+            max_workers: Concurrent create_matter calls
+            
+        Returns:
+            One SyncResult per matter, in the same order
+        """
+        if len(matters) <= 1 or max_workers <= 1:
+            return [self._create_matter_safely(m) for m in matters]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(matters))) as pool:
+            return list(pool.map(self._create_matter_safely, matters))
+    
+    def _create_matter_safely(self, matter_data: MatterData) -> SyncResult:
+        try:
+            return self.create_matter(matter_data)
+        except Exception as e:
+            return SyncResult(success=False, error_message=str(e))
+    
     @abstractmethod
     def update_matter(self, external_id: str, updates: Dict) -> SyncResult:
         """
@@ -90,6 +121,43 @@ class LegalOpsProvider(ABC):
         """
         pass
     
+    def iter_matters(self, filters: Optional[Dict] = None, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict]:
+        """
+        Stream matters page by page, in constant memory.
+        
+        Providers should override this to follow their own cursor/pagination;
+        the default falls back to the materialized list_matters().
+        
+        Args:
+            filters: Optional filtering criteria; 'updated_since' (ISO 8601)
+                     limits the stream to matters changed since then
+            page_size: Matters fetched per round trip
+            
+        Yields:
+            Matter dictionaries
+        """
+        yield from self.list_matters(filters)
+    
+    def normalize_matter(self, matter: Dict) -> Dict:
+        """
+        Map a provider matter to local LegalCase terms.
+        
+        Returns:
+            Dict with id, updated_at (ISO 8601), title, status (LegalCase
+            STATUS_CHOICES) and client_name
+        """
+        return {
+            'id': str(matter['id']),
+            'updated_at': matter.get('updated_at'),
+            'title': matter.get('title', ''),
+            'status': matter.get('status', ''),
+            'client_name': matter.get('client_name'),
+        }
+    
+    def denormalize_matter(self, fields: Dict) -> Dict:
+        """Inverse of normalize_matter, for update_matter payloads."""
+        return {'title': fields['title'], 'status': fields['status']}
+    
     @abstractmethod
     def health_check(self) -> bool:
         """
@@ -0,0 +1,249 @@
+"""
+Incremental two-way reconciliation between external matters and LegalCase.
+
+Each run pulls only matters changed since the previous run's high-water
+mark, then compares content hashes against the hash both sides agreed on
+last time (MatterLink.base_hash), a three-way merge:
+
+    remote changed, local not  -> apply to LegalCase (updated)
+    local changed, remote not  -> push with update_matter (pushed)
+    both changed differently   -> flag the link, touch nothing (conflict)
+    no link yet                -> create the local mirror (created)
+"""
+import hashlib
+import json
+import logging
+from itertools import islice
+from typing import Dict, Iterator, List
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.clients.models import Client
+from apps.intake.models import Lead
+from apps.integrations.base.providers import ProviderFactory
+from apps.integrations.models import MatterLink, ReconciliationRun
+from apps.legal_cases.models import LegalCase
+from core.security.fields import blind_index
+
+logger = logging.getLogger(__name__)
+
+# LegalCase fields kept in sync with the provider
+MATTER_FIELDS = ('title', 'status')
+
+
+def content_hash(fields: Dict) -> str:
+    """Stable hash of the synced fields, comparable across both sides."""
+    payload = json.dumps([fields.get(name) or '' for name in MATTER_FIELDS])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def case_fields(case: LegalCase) -> Dict:
+    return {name: getattr(case, name) for name in MATTER_FIELDS}
+
+
+def _batches(iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Reconciler:
+    """
+    Reconciles one remote provider with the local LegalCase table.
+
+    Args:
+        provider_name: Registered provider (must not be a local one)
+        batch_size: Remote matters diffed and written per transaction
+    """
+
+    def __init__(self, provider_name: str, batch_size: int = 500):
+        self.provider_name = provider_name
+        self.provider = ProviderFactory.get_provider(provider_name)
+        if self.provider.is_local:
+            raise ValueError(f"Provider '{provider_name}' stores matters locally; nothing to reconcile")
+        self.batch_size = batch_size
+
+    def last_high_water_mark(self):
+        last = (
+            ReconciliationRun.objects.filter(provider=self.provider_name, status='DONE')
+            .exclude(high_water_mark=None)
+            .order_by('-high_water_mark')
+            .first()
+        )
+        return last.high_water_mark if last else None
+
+    def run(self, full: bool = False) -> ReconciliationRun:
+        since = None if full else self.last_high_water_mark()
+        run = ReconciliationRun.objects.create(provider=self.provider_name, since=since)
+        self.run_obj = run
+        self.touched = set()
+        high_water_mark = since
+
+        try:
+            filters = {'updated_since': since.isoformat()} if since else None
+            matters = (self.provider.normalize_matter(m) for m in self.provider.iter_matters(filters, self.batch_size))
+            for batch in _batches(matters, self.batch_size):
+                self.pull_batch(batch)
+                for matter in batch:
+                    updated_at = parse_datetime(matter['updated_at'] or '')
+                    if updated_at and (high_water_mark is None or updated_at > high_water_mark):
+                        high_water_mark = updated_at
+            self.push_local_changes()
+        except Exception as e:
+            logger.exception(f"Reconciliation {run.id} with {self.provider_name} failed")
+            run.status = 'FAILED'
+            run.error = str(e)
+        else:
+            run.status = 'DONE'
+            run.high_water_mark = high_water_mark
+        run.finished_at = timezone.now()
+        run.save()
+
+        logger.info(
+            f"Reconciliation {run.id} ({self.provider_name}): {run.fetched} fetched, {run.created} created, "
+            f"{run.updated} updated, {run.pushed} pushed, {len(run.conflicts)} conflicts"
+        )
+        return run
+
+    def pull_batch(self, matters: List[Dict]) -> None:
+        """Diff one page of remote matters and apply it in a single transaction."""
+        run = self.run_obj
+        ids = [m['id'] for m in matters]
+        links = {
+            link.external_id: link
+            for link in MatterLink.objects.filter(provider=self.provider_name, external_id__in=ids)
+            .select_related('legal_case')
+        }
+        leads = {lead.external_id: lead for lead in Lead.objects.filter(external_id__in=ids)}
+
+        # bulk_update skips auto_now and SearchDocumentField.pre_save:
+        # stamp both sides and recompute the document explicitly
+        now = timezone.now()
+        search_document = LegalCase._meta.get_field('search_document')
+        new_matters, cases_to_update, links_to_update = [], [], []
+        for matter in matters:
+            run.fetched += 1
+            remote_hash = content_hash(matter)
+            link = links.get(matter['id'])
+            if link is None:
+                new_matters.append((matter, remote_hash))
+                continue
+
+            local_hash = content_hash(case_fields(link.legal_case))
+            link.remote_hash = remote_hash
+            link.remote_updated_at = parse_datetime(matter['updated_at'] or '')
+            links_to_update.append(link)
+            if remote_hash == link.base_hash and local_hash != remote_hash:
+                # Only the local side changed: left for push_local_changes, so
+                # reconciled_at stays older than the local edit
+                run.unchanged += 1
+                continue
+
+            self.touched.add(matter['id'])
+            link.reconciled_at = now
+            if remote_hash == local_hash:
+                # Same content on both sides (also clears a resolved conflict)
+                link.base_hash, link.conflict = remote_hash, False
+                run.unchanged += 1
+            elif local_hash == link.base_hash and not link.conflict:
+                for name in MATTER_FIELDS:
+                    setattr(link.legal_case, name, matter[name])
+                link.legal_case.last_update = now
+                link.legal_case.search_document = search_document.compute(link.legal_case)
+                cases_to_update.append(link.legal_case)
+                link.base_hash = remote_hash
+                run.updated += 1
+            else:
+                link.conflict = True
+                run.conflicts.append({'external_id': link.external_id, 'legal_case': link.legal_case_id})
+
+        with transaction.atomic():
+            if new_matters:
+                self._create_mirrors(new_matters, leads)
+            LegalCase.objects.bulk_update(cases_to_update, list(MATTER_FIELDS) + ['last_update', 'search_document'])
+            MatterLink.objects.bulk_update(
+                links_to_update, ['base_hash', 'remote_hash', 'conflict', 'remote_updated_at', 'reconciled_at']
+            )
+
+    def _create_mirrors(self, new_matters, leads: Dict[str, Lead]) -> None:
+        """Create LegalCase (and Client when needed) for matters seen for the first time."""
+        clients = self._resolve_clients([(m, leads.get(m['id'])) for m, _ in new_matters])
+        now = timezone.now()
+        cases = LegalCase.objects.bulk_create([
+            LegalCase(client=client, title=matter['title'], status=matter['status'] or 'ANALYSIS', area='OTHER')
+            for (matter, _), client in zip(new_matters, clients)
+        ])
+        MatterLink.objects.bulk_create([
+            MatterLink(
+                provider=self.provider_name,
+                external_id=matter['id'],
+                lead=leads.get(matter['id']),
+                legal_case=case,
+                base_hash=remote_hash,
+                remote_hash=remote_hash,
+                remote_updated_at=parse_datetime(matter['updated_at'] or ''),
+                reconciled_at=now,
+            )
+            for (matter, remote_hash), case in zip(new_matters, cases)
+        ])
+        self.run_obj.created += len(cases)
+
+    def _resolve_clients(self, pairs) -> List[Client]:
+        """One query for existing clients (lead phone, then name); bulk insert the rest."""
+        names, digests = [], []
+        for matter, lead in pairs:
+            digests.append(blind_index(lead.contact_info, 'phone') if lead else None)
+            names.append(
+                (lead.full_name if lead else None) or matter['client_name'] or f"Cliente {self.provider_name} {matter['id']}"
+            )
+
+        by_phone, by_name = {}, {}
+        for client in Client.objects.filter(
+            Q(phone_bidx__in=[d for d in digests if d]) | Q(full_name__in=set(names))
+        ).order_by('id'):
+            if client.phone_bidx:
+                by_phone.setdefault(client.phone_bidx, client)
+            by_name.setdefault(client.full_name, client)
+
+        resolved, new_clients = [], []
+        for (matter, lead), digest, name in zip(pairs, digests, names):
+            client = (by_phone.get(digest) if digest else None) or by_name.get(name)
+            if client is None:
+                client = Client(full_name=name, phone=lead.contact_info if lead else '')
+                new_clients.append(client)
+                by_name[name] = client
+                if digest:
+                    by_phone[digest] = client
+            resolved.append(client)
+        Client.objects.bulk_create(new_clients)
+        return resolved
+
+    def push_local_changes(self) -> None:
+        """Send local edits of linked cases the pull did not already settle."""
+        run = self.run_obj
+        changed = (
+            MatterLink.objects.filter(provider=self.provider_name, conflict=False)
+            .filter(legal_case__last_update__gt=F('reconciled_at'))
+            .exclude(external_id__in=self.touched)
+            .select_related('legal_case')
+            .order_by('id')
+        )
+        pushed = []
+        for link in changed.iterator(chunk_size=self.batch_size):
+            fields = case_fields(link.legal_case)
+            local_hash = content_hash(fields)
+            if local_hash == link.base_hash:
+                continue
+            result = self.provider.update_matter(link.external_id, self.provider.denormalize_matter(fields))
+            if result.success:
+                link.base_hash = link.remote_hash = local_hash
+                link.reconciled_at = timezone.now()
+                pushed.append(link)
+            else:
+                logger.warning(f"Push of {link.external_id} to {self.provider_name} failed: {result.error_message}")
+        for batch in _batches(pushed, self.batch_size):
+            MatterLink.objects.bulk_update(batch, ['base_hash', 'remote_hash', 'reconciled_at'])
+        run.pushed = len(pushed)
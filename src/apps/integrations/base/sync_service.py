@@ -4,10 +4,11 @@ Sync service for Legal Ops integrations.
 Orchestrates synchronization between Django models and external Legal Ops systems.
 """
 import logging
-from typing import Optional
+from typing import List, Optional
 from django.conf import settings
 
 from apps.intake.models import Lead
+from apps.integrations.base.circuit_breaker import OPEN, CircuitBreaker
 from apps.integrations.base.providers import (
     ProviderFactory, 
     MatterData, 
@@ -62,18 +63,16 @@ class LegalOpsSyncService:
                 external_id=lead.external_id
             )
         
-        # Prepare matter data
-        matter_data = MatterData(
-            client_name=lead.full_name,
-            case_type=lead.case_type,
-            description=f"Lead from website - {lead.get_case_type_display()}",
-            contact_info=lead.contact_info,
-            score=lead.score,
-            triage_data=lead.triage_data
-        )
+        breaker = CircuitBreaker(self.provider_name)
+        if breaker.state == OPEN:
+            # Fail fast instead of blocking on a provider known to be down
+            return SyncResult(
+                success=False,
+                error_message=f"{self.provider_name} unavailable (circuit open, retry in {breaker.retry_after():.0f}s)"
+            )
         
         # Create matter in external system
-        result = self.provider.create_matter(matter_data)
+        result = self.provider.create_matter(self._matter_data(lead))
         
         if result.success:
             # Save external ID to lead
@@ -90,6 +89,54 @@ class LegalOpsSyncService:
         
         return result
     
+    def sync_leads_to_matters(self, leads: List[Lead]) -> List[SyncResult]:
+        """
+        Sync several leads with one provider.create_matters call.
+        
+        Args:
+            leads: Lead instances to sync
+            
+        Returns:
+            One SyncResult per lead, in the same order
+        """
+        results = [None] * len(leads)
+        pending = []
+        for i, lead in enumerate(leads):
+            if not lead.is_qualified:
+                results[i] = SyncResult(success=False, error_message="Lead not qualified")
+            elif lead.external_id:
+                results[i] = SyncResult(success=True, external_id=lead.external_id)
+            else:
+                pending.append(i)
+        
+        if pending:
+            created = self.provider.create_matters(
+                [self._matter_data(leads[i]) for i in pending],
+                max_workers=getattr(settings, 'LEGAL_OPS_SYNC_CONCURRENCY', 4)
+            )
+            synced = []
+            for i, result in zip(pending, created):
+                results[i] = result
+                if result.success:
+                    leads[i].external_id = result.external_id
+                    synced.append(leads[i])
+                else:
+                    logger.error(f"Failed to sync lead {leads[i].id}: {result.error_message}")
+            Lead.objects.bulk_update(synced, ['external_id'])
+            logger.info(f"{len(synced)}/{len(pending)} leads synced to {self.provider_name}")
+        
+        return results
+    
+    def _matter_data(self, lead: Lead) -> MatterData:
+        return MatterData(
+            client_name=lead.full_name,
+            case_type=lead.case_type,
+            description=f"Lead from website - {lead.get_case_type_display()}",
+            contact_info=lead.contact_info,
+            score=lead.score,
+            triage_data=lead.triage_data
+        )
+    
     def update_matter_from_lead(self, lead: Lead, updates: dict) -> SyncResult:
         """
         Update an existing matter with new data.
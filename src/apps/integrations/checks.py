@@ -0,0 +1,24 @@
+"""
+System checks for the integrations app.
+"""
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+@checks.register(checks.Tags.caches)
+def shared_cache_check(app_configs=None, **kwargs):
+    """Outside DEBUG the default cache must be shared by every process (REDIS_URL)."""
+    if settings.DEBUG or not isinstance(caches['default'], LocMemCache):
+        return []
+    return [checks.Warning(
+        "REDIS_URL is not set: the default cache is per-process memory.",
+        hint=(
+            "Set REDIS_URL in production. Circuit breakers, role invalidation and the "
+            "cash-flow projection cache (invalidated by ledger version) only work "
+            "across gunicorn workers with a shared cache."
+        ),
+        obj='CACHES',
+        id='integrations.W001',
+    )]
@@ -4,12 +4,13 @@ Clio Legal Ops Provider.
 Implements integration with Clio Grow + Clio Manage via REST API.
 Documentation: https://app.clio.com/api/v4/documentation
 """
-import requests
 import logging
-from typing import Dict, Optional, List
+from typing import Dict, Iterator, Optional, List
 from django.conf import settings
 
+from apps.integrations.base.http import get_session
 from apps.integrations.base.providers import (
+    DEFAULT_PAGE_SIZE,
     LegalOpsProvider, 
     MatterData, 
     SyncResult,
@@ -18,6 +19,24 @@ from apps.integrations.base.providers import (
 
 logger = logging.getLogger(__name__)
 
+CLIO_MAX_PAGE_SIZE = 200
+
+# Clio only returns id/etag unless fields are requested
+CLIO_MATTER_FIELDS = 'id,etag,description,status,updated_at,client{name}'
+
+# Clio matter status <-> LegalCase.status
+CLIO_STATUS_MAP = {
+    'Open': 'ACTIVE',
+    'Pending': 'ANALYSIS',
+    'Closed': 'ARCHIVED',
+}
+LOCAL_STATUS_MAP = {
+    'ACTIVE': 'Open',
+    'ANALYSIS': 'Pending',
+    'SUSPENDED': 'Pending',
+    'ARCHIVED': 'Closed',
+}
+
 
 class ClioProvider(LegalOpsProvider):
     """
@@ -42,14 +61,18 @@ class ClioProvider(LegalOpsProvider):
         
         if not self.access_token:
             logger.warning("Clio access token not configured")
-    
-    def _headers(self) -> Dict:
-        """Generate request headers."""
-        return {
+        
+        # Pooled keep-alive session shared by every ClioProvider in this process
+        self.session = get_session('clio')
+        self.headers = {
             'Authorization': f'Bearer {self.access_token}',
             'Content-Type': 'application/json'
         }
     
+    def _headers(self) -> Dict:
+        """Request headers (built once per provider)."""
+        return self.headers
+    
     def create_matter(self, matter_data: MatterData) -> SyncResult:
         """Create a new matter in Clio."""
         try:
@@ -85,7 +108,7 @@ class ClioProvider(LegalOpsProvider):
                 }
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.api_url}/matters.json",
                 headers=self._headers(),
                 json=payload,
@@ -120,7 +143,7 @@ class ClioProvider(LegalOpsProvider):
     def update_matter(self, external_id: str, updates: Dict) -> SyncResult:
         """Update an existing Clio matter."""
         try:
-            response = requests.patch(
+            response = self.session.patch(
                 f"{self.api_url}/matters/{external_id}.json",
                 headers=self._headers(),
                 json={"data": updates},
@@ -142,7 +165,7 @@ class ClioProvider(LegalOpsProvider):
     def get_matter(self, external_id: str) -> Optional[Dict]:
         """Retrieve a matter from Clio."""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.api_url}/matters/{external_id}.json",
                 headers=self._headers(),
                 timeout=10
@@ -159,30 +182,56 @@ class ClioProvider(LegalOpsProvider):
             return None
     
     def list_matters(self, filters: Optional[Dict] = None) -> List[Dict]:
-        """List matters from Clio."""
+        """List matters from Clio (every page; prefer iter_matters for large sets)."""
         try:
-            params = filters or {}
-            response = requests.get(
-                f"{self.api_url}/matters.json",
-                headers=self._headers(),
-                params=params,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                return response.json()['data']
-            else:
-                logger.error(f"Failed to list matters: {response.status_code}")
-                return []
-                
+            return list(self.iter_matters(filters))
         except Exception as e:
             logger.exception("Error listing Clio matters")
             return []
     
+    def iter_matters(self, filters: Optional[Dict] = None, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict]:
+        """
+        Stream matters from Clio following meta.paging.next.
+        
+        Raises requests.HTTPError on a failed page, so callers never mistake
+        a partial listing for a complete one.
+        """
+        url = f"{self.api_url}/matters.json"
+        params = {
+            'fields': CLIO_MATTER_FIELDS,
+            **(filters or {}),
+            'limit': min(page_size, CLIO_MAX_PAGE_SIZE),
+            'order': 'id(asc)',
+        }
+        while url:
+            response = self.session.get(url, headers=self._headers(), params=params, timeout=10)
+            response.raise_for_status()
+            body = response.json()
+            yield from body['data']
+            # The next link already carries the cursor and the original params
+            url = body.get('meta', {}).get('paging', {}).get('next')
+            params = None
+    
+    def normalize_matter(self, matter: Dict) -> Dict:
+        """Clio's description is the case title (see create_matter)."""
+        return {
+            'id': str(matter['id']),
+            'updated_at': matter.get('updated_at'),
+            'title': matter.get('description') or '',
+            'status': CLIO_STATUS_MAP.get(matter.get('status'), 'ANALYSIS'),
+            'client_name': (matter.get('client') or {}).get('name'),
+        }
+    
+    def denormalize_matter(self, fields: Dict) -> Dict:
+        return {
+            'description': fields['title'],
+            'status': LOCAL_STATUS_MAP.get(fields['status'], 'Pending'),
+        }
+    
     def health_check(self) -> bool:
         """Verify Clio API connection."""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.api_url}/users/who_am_i.json",
                 headers=self._headers(),
                 timeout=5
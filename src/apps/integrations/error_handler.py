@@ -7,7 +7,7 @@ Sends alerts to developer and Dra. Alessandra via WhatsApp and Email.
 Mission 1: Error Modal & Proactive Notification System
 """
 import logging
-import traceback
+import threading
 import uuid
 from datetime import datetime
 from typing import Optional, Dict, Any
@@ -15,9 +15,23 @@ from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from apps.whatsapp.services.notification import WhatsAppNotificationService
+from apps.integrations.error_notifier import ErrorNotifier
 
 logger = logging.getLogger(__name__)
 
+_notifier = None
+_notifier_lock = threading.Lock()
+
+
+def get_notifier() -> ErrorNotifier:
+    """Process-wide background notifier."""
+    global _notifier
+    if _notifier is None:
+        with _notifier_lock:
+            if _notifier is None:
+                _notifier = ErrorNotifier(ErrorHandler())
+    return _notifier
+
 
 class ErrorHandler:
     """
@@ -36,7 +50,10 @@ class ErrorHandler:
         extra_context: Optional[Dict] = None
     ) -> str:
         """
-        Capture error with full context and send notifications.
+        Capture error with full context and queue notifications.
+        
+        Only cheap request metadata is collected here; formatting, dedup
+        and sending happen on the background notifier thread.
         
         Args:
             exception: The raised exception
@@ -59,9 +76,9 @@ class ErrorHandler:
             f"Path: {metadata['path']} | User: {metadata['user']}"
         )
         
-        # Send notifications (only if enabled)
+        # Queue notifications (only if enabled)
         if getattr(settings, 'ERROR_NOTIFICATIONS_ENABLED', True):
-            self._send_notifications(metadata)
+            get_notifier().submit(exception, metadata)
         
         return error_id
     
@@ -75,7 +92,6 @@ class ErrorHandler:
         metadata = {
             'error_type': exception.__class__.__name__,
             'error_message': str(exception),
-            'traceback': traceback.format_exc(),
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'path': 'N/A',
             'method': 'N/A',
@@ -132,6 +148,26 @@ class ErrorHandler:
         except Exception as e:
             logger.error(f"Failed to send email notification: {e}")
     
+    def _send_digest(self, metadata: Dict[str, Any], occurrences: int, window: int) -> None:
+        """Send one summary for the repeats of an error within a window."""
+        minutes = max(window // 60, 1)
+        metadata = {**metadata, 'occurrences': occurrences, 'window_minutes': minutes}
+        try:
+            self.whatsapp_service.send_error_digest(
+                error_type=metadata['error_type'],
+                path=metadata['path'],
+                occurrences=occurrences,
+                minutes=minutes
+            )
+        except Exception as e:
+            logger.error(f"Failed to send WhatsApp digest: {e}")
+        
+        try:
+            self._send_email_notification(metadata)
+            logger.info(f"Email digest sent for error {metadata['error_id']} ({occurrences} occurrences)")
+        except Exception as e:
+            logger.error(f"Failed to send email digest: {e}")
+    
     def _send_email_notification(self, metadata: Dict[str, Any]) -> None:
         """Send detailed email notification to developer."""
         # Render HTML email template
@@ -140,12 +176,17 @@ class ErrorHandler:
             {'metadata': metadata}
         )
         
+        occurrences = (
+            f"\nOcorrências: {metadata['occurrences']} em {metadata['window_minutes']} min"
+            if metadata.get('occurrences') else ''
+        )
+        
         # Plain text fallback
         text_content = f"""
 ALERTA DE SISTEMA: ERRO CRÍTICO
 
 ID do Erro: {metadata['error_id']}
-Tipo: {metadata['error_type']}
+Tipo: {metadata['error_type']}{occurrences}
 Mensagem: {metadata['error_message']}
 Timestamp: {metadata['timestamp']}
 
@@ -174,7 +215,11 @@ Este alerta foi gerado automaticamente pelo Portal Dra. Alessandra.
         
         # Send email
         email = EmailMultiAlternatives(
-            subject=f"[ALERTA] Erro de Sistema - {metadata['error_id']}",
+            subject=(
+                f"[RESUMO] {metadata['occurrences']} ocorrências de {metadata['error_type']} - {metadata['error_id']}"
+                if metadata.get('occurrences') else
+                f"[ALERTA] Erro de Sistema - {metadata['error_id']}"
+            ),
             body=text_content,
             from_email=settings.DEFAULT_FROM_EMAIL,
             to=recipients
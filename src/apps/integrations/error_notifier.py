@@ -0,0 +1,148 @@
+"""
+Background error notifier.
+
+ErrorHandler.capture_error only drops the exception into a bounded queue;
+a daemon thread per process does the expensive part (traceback formatting,
+email rendering, SMTP, WhatsApp).
+
+Errors are grouped by fingerprint (exception type + innermost frames).
+The first occurrence in a window is alerted right away; repeats within
+ERROR_NOTIFICATION_WINDOW seconds are only counted and reported in a
+single digest ("42 ocorrências em 5 min") when the window closes. The
+owner of a window and the counters live in the cache, so with a shared
+cache (REDIS_URL) a storm across gunicorn workers still yields one alert
+plus one digest.
+"""
+import hashlib
+import logging
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+from typing import Any, Dict
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_FRAMES = 3
+
+
+def fingerprint(exception: BaseException) -> str:
+    """Hash of the exception type and its innermost frames (file, function)."""
+    frames = traceback.extract_tb(exception.__traceback__)[-FINGERPRINT_FRAMES:]
+    parts = [f"{type(exception).__module__}.{type(exception).__qualname__}"]
+    parts += [f"{os.path.basename(frame.filename)}:{frame.name}" for frame in frames]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:16]
+
+
+class ErrorNotifier:
+    """
+    Queue + worker thread that deduplicates and sends error alerts.
+
+    Args:
+        handler: ErrorHandler used for the actual WhatsApp/email sends
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.window = getattr(settings, 'ERROR_NOTIFICATION_WINDOW', 300)
+        self.max_alerts = getattr(settings, 'ERROR_NOTIFICATION_MAX_PER_WINDOW', 20)
+        self.queue = queue.Queue(maxsize=getattr(settings, 'ERROR_NOTIFICATION_QUEUE_SIZE', 1000))
+        self.instance = uuid.uuid4().hex
+        self.owned: Dict[str, Dict[str, Any]] = {}  # fingerprint -> {'metadata', 'deadline'}
+        self.sent_at = []  # timestamps of immediate alerts, for the global rate limit
+        self.dropped = 0
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def submit(self, exception: BaseException, metadata: Dict[str, Any]) -> None:
+        """Hand an error to the worker thread. Never blocks the request."""
+        self._ensure_thread()
+        try:
+            self.queue.put_nowait((exception, metadata))
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_thread(self) -> None:
+        # Threads do not survive fork: start one per process, on first use
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='error-notifier', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                event = self.queue.get(timeout=1)
+            except queue.Empty:
+                event = None
+            try:
+                if event:
+                    self.process(*event)
+                self.flush_due()
+            except Exception:
+                logger.exception("Error notifier failed")
+
+    def process(self, exception: BaseException, metadata: Dict[str, Any]) -> None:
+        """Alert on the first occurrence of a fingerprint, count the rest."""
+        fp = fingerprint(exception)
+        metadata.setdefault('traceback', ''.join(traceback.format_exception(exception)))
+        metadata['fingerprint'] = fp
+        count_key = f'errors:{fp}:count'
+
+        if cache.add(f'errors:{fp}:owner', self.instance, timeout=self.window):
+            # First occurrence in this window, across processes
+            self.owned[fp] = {'metadata': metadata, 'deadline': time.monotonic() + self.window}
+            cache.set(count_key, 0, timeout=self.window * 2)
+            if self._within_rate_limit():
+                self.handler._send_notifications(metadata)
+                return
+        self._count(count_key)
+
+    def flush_due(self, force: bool = False) -> None:
+        """Send digests for windows that have closed (all of them when force=True)."""
+        now = time.monotonic()
+        for fp, group in list(self.owned.items()):
+            if not force and group['deadline'] > now:
+                continue
+            del self.owned[fp]
+            count_key = f'errors:{fp}:count'
+            repeats = cache.get(count_key) or 0
+            cache.delete_many([count_key, f'errors:{fp}:owner'])
+            if repeats:
+                self.handler._send_digest(group['metadata'], repeats, self.window)
+
+        if self.dropped:
+            logger.error(f"Error notifier queue full: {self.dropped} errors were not notified")
+            self.dropped = 0
+
+    def drain(self) -> None:
+        """Process everything queued so far on the calling thread (tests, shutdown)."""
+        while True:
+            try:
+                self.process(*self.queue.get_nowait())
+            except queue.Empty:
+                return
+
+    def _count(self, count_key: str) -> None:
+        cache.add(count_key, 0, timeout=self.window * 2)
+        try:
+            cache.incr(count_key)
+        except ValueError:
+            cache.set(count_key, 1, timeout=self.window * 2)
+
+    def _within_rate_limit(self) -> bool:
+        now = time.monotonic()
+        self.sent_at = [t for t in self.sent_at if now - t < self.window]
+        if len(self.sent_at) >= self.max_alerts:
+            return False
+        self.sent_at.append(now)
+        return True
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.integrations.base.reconciliation import Reconciler
+
+
+class Command(BaseCommand):
+    help = 'Pull matters changed since the last run, diff them with LegalCase and apply/push only what changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--provider', default=None, help='Provider to reconcile (default: LEGAL_OPS_PROVIDER)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Matters diffed per transaction')
+        parser.add_argument('--full', action='store_true', help='Ignore the high-water mark and scan every matter')
+
+    def handle(self, *args, **options):
+        provider = options['provider'] or getattr(settings, 'LEGAL_OPS_PROVIDER', 'clio')
+        try:
+            reconciler = Reconciler(provider, batch_size=options['batch_size'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        run = reconciler.run(full=options['full'])
+        since = run.since.isoformat() if run.since else 'the beginning'
+        self.stdout.write(f'{provider}: {run.fetched} matters changed since {since}')
+        self.stdout.write(
+            f'  created {run.created}, updated {run.updated}, pushed {run.pushed}, '
+            f'unchanged {run.unchanged}, conflicts {len(run.conflicts)}'
+        )
+        for conflict in run.conflicts:
+            self.stdout.write(self.style.WARNING(
+                f"  conflict: {conflict['external_id']} <-> LegalCase {conflict['legal_case']}"
+            ))
+        if run.status != 'DONE':
+            raise CommandError(f'Reconciliation failed: {run.error}')
+        self.stdout.write(self.style.SUCCESS(f'Next run starts at {run.high_water_mark}'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from apps.integrations.base.http import close_sessions, session_stats
+from apps.integrations.base.outbox import SyncWorker
+
+
+class Command(BaseCommand):
+    help = 'Process the Legal Ops sync outbox (retries with backoff, per-provider rate limits)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help='Parallel syncs (default: LEGAL_OPS_SYNC_CONCURRENCY)')
+        parser.add_argument('--batch-size', type=int, default=50, help='Entries claimed per round')
+        parser.add_argument('--poll-interval', type=float, default=5, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once no entries are due')
+
+    def handle(self, *args, **options):
+        worker = SyncWorker(concurrency=options['concurrency'], batch_size=options['batch_size'])
+        self.stdout.write(f'Sync worker started (concurrency={worker.concurrency})')
+        try:
+            processed = worker.run(once=options['once'], poll_interval=options['poll_interval'])
+        finally:
+            for provider in worker._services:
+                stats = session_stats(provider)
+                if stats['requests']:
+                    self.stdout.write(
+                        f"{provider}: {stats['requests']} HTTP requests over "
+                        f"{stats['connections']} connections (reuse {stats['reuse_rate']:.0%})"
+                    )
+            close_sessions()
+        self.stdout.write(self.style.SUCCESS(f'{processed} outbox entries processed'))
@@ -1,6 +1,7 @@
 import logging
 from django.conf import settings
 from apps.integrations.error_handler import ErrorHandler
+from core.security.roles import get_roles
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +14,8 @@ class TechnicalSupportMiddleware:
         # Add basic dev status to request
         request.is_daniel = False
         if request.user.is_authenticated:
-            if request.user.username == 'daniel' or request.user.groups.filter(name='Technical_Support').exists():
+            roles = get_roles(request.user)
+            if request.user.username == 'daniel' or 'Technical_Support' in roles:
                 request.is_daniel = True
         
         response = self.get_response(request)
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('intake', '0007_lead_contact_info_bidx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=50, verbose_name='Provedor')),
+                ('status', models.CharField(choices=[('PENDING', 'Na Fila'), ('RUNNING', 'Em Execução'), ('DONE', 'Concluído')], default='PENDING', max_length=20, verbose_name='Status')),
+                ('total', models.IntegerField(default=0, verbose_name='Total')),
+                ('synced', models.IntegerField(default=0, verbose_name='Sincronizados')),
+                ('failed', models.IntegerField(default=0, verbose_name='Falhas')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Job de Sincronização',
+                'verbose_name_plural': 'Jobs de Sincronização',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SyncOutboxEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=50, verbose_name='Provedor')),
+                ('status', models.CharField(choices=[('PENDING', 'Pendente'), ('PROCESSING', 'Processando'), ('SUCCESS', 'Sincronizado'), ('FAILED', 'Falhou')], default='PENDING', max_length=20, verbose_name='Status')),
+                ('attempts', models.IntegerField(default=0, verbose_name='Tentativas')),
+                ('max_attempts', models.IntegerField(default=5, verbose_name='Máximo de Tentativas')),
+                ('next_attempt_at', models.DateTimeField(verbose_name='Próxima Tentativa')),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('external_id', models.CharField(blank=True, max_length=255, verbose_name='ID Externo')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='entries', to='integrations.syncjob')),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_entries', to='intake.lead')),
+            ],
+            options={
+                'verbose_name': 'Fila de Sincronização',
+                'verbose_name_plural': 'Fila de Sincronização',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='sync_outbox_due_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING', 'PROCESSING'])), fields=('lead', 'provider'), name='sync_outbox_unique_in_flight')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intake', '0007_lead_contact_info_bidx'),
+        ('integrations', '0001_initial'),
+        ('legal_cases', '0002_legalcase_contingency_value_legalcase_risk_level_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=50, verbose_name='Provedor')),
+                ('status', models.CharField(choices=[('RUNNING', 'Em Execução'), ('DONE', 'Concluído'), ('FAILED', 'Falhou')], default='RUNNING', max_length=20, verbose_name='Status')),
+                ('since', models.DateTimeField(blank=True, null=True, verbose_name='Alterações Desde')),
+                ('high_water_mark', models.DateTimeField(blank=True, null=True, verbose_name="Marca d'Água")),
+                ('fetched', models.IntegerField(default=0, verbose_name='Recebidos')),
+                ('created', models.IntegerField(default=0, verbose_name='Criados')),
+                ('updated', models.IntegerField(default=0, verbose_name='Atualizados')),
+                ('pushed', models.IntegerField(default=0, verbose_name='Enviados')),
+                ('unchanged', models.IntegerField(default=0, verbose_name='Sem Alteração')),
+                ('conflicts', models.JSONField(blank=True, default=list, verbose_name='Conflitos')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Reconciliação',
+                'verbose_name_plural': 'Reconciliações',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MatterLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=50, verbose_name='Provedor')),
+                ('external_id', models.CharField(max_length=255, verbose_name='ID Externo')),
+                ('base_hash', models.CharField(max_length=64, verbose_name='Hash Sincronizado')),
+                ('remote_hash', models.CharField(max_length=64, verbose_name='Hash Remoto')),
+                ('conflict', models.BooleanField(default=False, verbose_name='Em Conflito')),
+                ('remote_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('reconciled_at', models.DateTimeField(auto_now=True)),
+                ('lead', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='matter_links', to='intake.lead')),
+                ('legal_case', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matter_links', to='legal_cases.legalcase')),
+            ],
+            options={
+                'verbose_name': 'Vínculo de Caso Externo',
+                'verbose_name_plural': 'Vínculos de Casos Externos',
+                'constraints': [models.UniqueConstraint(fields=('provider', 'external_id'), name='matter_link_unique_external')],
+            },
+        ),
+    ]
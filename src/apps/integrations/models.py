@@ -0,0 +1,155 @@
+"""
+Models for Legal Ops synchronization.
+
+Sync requests are written to a durable outbox and processed by the
+`run_sync_worker` management command, outside the HTTP request cycle.
+"""
+from django.db import models
+from django.db.models import Q
+
+
+class SyncJob(models.Model):
+    """
+    A group of outbox entries enqueued together (e.g. one auto-sync call).
+
+    Exposes progress counters for polling.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Na Fila'),
+        ('RUNNING', 'Em Execução'),
+        ('DONE', 'Concluído'),
+    ]
+
+    provider = models.CharField("Provedor", max_length=50)
+    status = models.CharField("Status", max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    total = models.IntegerField("Total", default=0)
+    synced = models.IntegerField("Sincronizados", default=0)
+    failed = models.IntegerField("Falhas", default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Job de Sincronização"
+        verbose_name_plural = "Jobs de Sincronização"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"SyncJob #{self.id} ({self.provider}) {self.synced + self.failed}/{self.total}"
+
+    @property
+    def processed(self) -> int:
+        return self.synced + self.failed
+
+
+class SyncOutboxEntry(models.Model):
+    """
+    One lead waiting to be pushed to a Legal Ops provider.
+
+    Failed attempts are retried with exponential backoff until
+    max_attempts, then the entry is marked FAILED.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pendente'),
+        ('PROCESSING', 'Processando'),
+        ('SUCCESS', 'Sincronizado'),
+        ('FAILED', 'Falhou'),
+    ]
+
+    job = models.ForeignKey(SyncJob, on_delete=models.SET_NULL, null=True, blank=True, related_name='entries')
+    lead = models.ForeignKey('intake.Lead', on_delete=models.CASCADE, related_name='sync_entries')
+    provider = models.CharField("Provedor", max_length=50)
+    status = models.CharField("Status", max_length=20, choices=STATUS_CHOICES, default='PENDING')
+
+    attempts = models.IntegerField("Tentativas", default=0)
+    max_attempts = models.IntegerField("Máximo de Tentativas", default=5)
+    next_attempt_at = models.DateTimeField("Próxima Tentativa")
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    external_id = models.CharField("ID Externo", max_length=255, blank=True)
+    last_error = models.TextField("Último Erro", blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Fila de Sincronização"
+        verbose_name_plural = "Fila de Sincronização"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='sync_outbox_due_idx'),
+        ]
+        constraints = [
+            # A lead is queued at most once per provider while in flight
+            models.UniqueConstraint(
+                fields=['lead', 'provider'],
+                condition=Q(status__in=['PENDING', 'PROCESSING']),
+                name='sync_outbox_unique_in_flight',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Lead {self.lead_id} -> {self.provider} [{self.status}]"
+
+
+class MatterLink(models.Model):
+    """
+    Links an external matter to its local LegalCase mirror.
+
+    base_hash is the content hash both sides agreed on at the last
+    reconciliation; comparing each side against it tells which one changed.
+    """
+    provider = models.CharField("Provedor", max_length=50)
+    external_id = models.CharField("ID Externo", max_length=255)
+    lead = models.ForeignKey('intake.Lead', on_delete=models.SET_NULL, null=True, blank=True, related_name='matter_links')
+    legal_case = models.ForeignKey('legal_cases.LegalCase', on_delete=models.CASCADE, related_name='matter_links')
+
+    base_hash = models.CharField("Hash Sincronizado", max_length=64)
+    remote_hash = models.CharField("Hash Remoto", max_length=64)
+    conflict = models.BooleanField("Em Conflito", default=False)
+    remote_updated_at = models.DateTimeField(null=True, blank=True)
+    reconciled_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Vínculo de Caso Externo"
+        verbose_name_plural = "Vínculos de Casos Externos"
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'external_id'], name='matter_link_unique_external'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider}:{self.external_id} -> LegalCase {self.legal_case_id}"
+
+
+class ReconciliationRun(models.Model):
+    """
+    One incremental reconciliation with a provider and its report.
+
+    high_water_mark of the last DONE run is the `updated_since` of the next.
+    """
+    STATUS_CHOICES = [
+        ('RUNNING', 'Em Execução'),
+        ('DONE', 'Concluído'),
+        ('FAILED', 'Falhou'),
+    ]
+
+    provider = models.CharField("Provedor", max_length=50)
+    status = models.CharField("Status", max_length=20, choices=STATUS_CHOICES, default='RUNNING')
+    since = models.DateTimeField("Alterações Desde", null=True, blank=True)
+    high_water_mark = models.DateTimeField("Marca d'Água", null=True, blank=True)
+
+    fetched = models.IntegerField("Recebidos", default=0)
+    created = models.IntegerField("Criados", default=0)
+    updated = models.IntegerField("Atualizados", default=0)
+    pushed = models.IntegerField("Enviados", default=0)
+    unchanged = models.IntegerField("Sem Alteração", default=0)
+    conflicts = models.JSONField("Conflitos", default=list, blank=True)
+    error = models.TextField("Erro", blank=True)
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Reconciliação"
+        verbose_name_plural = "Reconciliações"
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"Reconciliação #{self.id} ({self.provider}) {self.status}"
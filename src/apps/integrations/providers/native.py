@@ -1,42 +1,99 @@
-from typing import Dict, Optional, List
-from ..base.providers import LegalOpsProvider, MatterData, SyncResult
+from typing import Dict, Iterator, Optional, List
+from django.db import transaction
+from django.db.models import Q
+from ..base.providers import DEFAULT_PAGE_SIZE, LegalOpsProvider, MatterData, SyncResult
 from apps.legal_cases.models import LegalCase
 from apps.clients.models import Client
+from core.security.fields import blind_index
+
+# Map case_type to AREA_CHOICES if possible, else OTHER
+AREA_MAP = {
+    'CIVIL': 'CIVIL',
+    'BUSINESS': 'BUSINESS',
+    'HEALTH': 'HEALTH',
+    'THIRD_SECTOR': 'THIRD_SECTOR'
+}
 
 class NativeProvider(LegalOpsProvider):
     """
     Native Django ORM implementation of LegalOpsProvider.
     """
+    is_local = True
+
     def create_matter(self, matter_data: MatterData) -> SyncResult:
         try:
-            client, _ = Client.objects.get_or_create(
-                full_name=matter_data.client_name,
-                defaults={'phone': matter_data.contact_info}
-            )
-            
-            # Map case_type to AREA_CHOICES if possible, else OTHER
-            area_map = {
-                'CIVIL': 'CIVIL',
-                'BUSINESS': 'BUSINESS',
-                'HEALTH': 'HEALTH',
-                'THIRD_SECTOR': 'THIRD_SECTOR'
-            }
-            area = area_map.get(matter_data.case_type, 'OTHER')
-
-            case = LegalCase.objects.create(
-                client=client,
-                title=f"Caso: {matter_data.case_type}",
-                description=matter_data.description,
-                area=area,
-                status='ANALYSIS'
-            )
+            # Dedup by phone via blind index, then by name
+            client = Client.objects.filter(phone__blind=matter_data.contact_info).first()
+            if client is None:
+                client, _ = Client.objects.get_or_create(
+                    full_name=matter_data.client_name,
+                    defaults={'phone': matter_data.contact_info}
+                )
+
+            case = self._build_case(matter_data, client)
+            case.save()
             return SyncResult(success=True, external_id=str(case.id))
         except Exception as e:
             return SyncResult(success=False, error_message=str(e))
 
+    def create_matters(self, matters: List[MatterData], max_workers: int = 4) -> List[SyncResult]:
+        """
+        Batch version of create_matter: one query resolves existing clients
+        (same phone, then same name), then new clients and cases are inserted
+        with bulk_create in a single transaction. All-or-nothing.
+        """
+        if not matters:
+            return []
+        # None for e-mail contacts: those only dedupe by name
+        digests = [blind_index(m.contact_info, 'phone') for m in matters]
+        names = {m.client_name for m in matters}
+        by_phone, by_name = {}, {}
+        for client in Client.objects.filter(
+            Q(phone_bidx__in=[d for d in digests if d]) | Q(full_name__in=names)
+        ).order_by('id'):
+            if client.phone_bidx:
+                by_phone.setdefault(client.phone_bidx, client)
+            by_name.setdefault(client.full_name, client)
+
+        clients, new_clients = [], []
+        for matter, digest in zip(matters, digests):
+            client = by_phone.get(digest) if digest else None
+            client = client or by_name.get(matter.client_name)
+            if client is None:
+                # Later matters in the batch reuse it, as sequential calls would
+                client = Client(full_name=matter.client_name, phone=matter.contact_info)
+                new_clients.append(client)
+                if digest:
+                    by_phone[digest] = client
+                by_name[matter.client_name] = client
+            clients.append(client)
+
+        try:
+            with transaction.atomic():
+                Client.objects.bulk_create(new_clients)
+                cases = LegalCase.objects.bulk_create([
+                    self._build_case(matter, client) for matter, client in zip(matters, clients)
+                ])
+        except Exception as e:
+            return [SyncResult(success=False, error_message=str(e)) for _ in matters]
+        return [SyncResult(success=True, external_id=str(case.id)) for case in cases]
+
+    def _build_case(self, matter_data: MatterData, client: Client) -> LegalCase:
+        return LegalCase(
+            client=client,
+            title=f"Caso: {matter_data.case_type}",
+            description=matter_data.description,
+            area=AREA_MAP.get(matter_data.case_type, 'OTHER'),
+            status='ANALYSIS'
+        )
+
     def update_matter(self, external_id: str, updates: Dict) -> SyncResult:
         try:
-            LegalCase.objects.filter(id=external_id).update(**updates)
+            # Saved, not QuerySet.update(), so search_document follows the new title
+            case = LegalCase.objects.get(id=external_id)
+            for name, value in updates.items():
+                setattr(case, name, value)
+            case.save(update_fields=[*updates, 'search_document', 'last_update'])
             return SyncResult(success=True, external_id=external_id)
         except Exception as e:
             return SyncResult(success=False, error_message=str(e))
@@ -53,10 +110,26 @@ class NativeProvider(LegalOpsProvider):
             return None
 
     def list_matters(self, filters: Optional[Dict] = None) -> List[Dict]:
-        qs = LegalCase.objects.all()
-        if filters:
-            qs = qs.filter(**filters)
-        return [{'id': str(c.id), 'title': c.title} for c in qs]
+        return list(self.iter_matters(filters))
+
+    def iter_matters(self, filters: Optional[Dict] = None, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict]:
+        # Keyset pagination on id: each page is a short indexed query, no
+        # long-lived cursor or transaction held while the caller works
+        filters = dict(filters or {})
+        updated_since = filters.pop('updated_since', None)
+        qs = LegalCase.objects.filter(**filters).order_by('id')
+        if updated_since:
+            qs = qs.filter(last_update__gte=updated_since)
+        last_id = 0
+        while True:
+            page = list(qs.filter(id__gt=last_id).values('id', 'title', 'status', 'last_update')[:page_size])
+            for row in page:
+                row['id'] = str(row['id'])
+                row['updated_at'] = row['last_update'].isoformat()
+                yield row
+            if len(page) < page_size:
+                return
+            last_id = int(page[-1]['id'])
 
     def health_check(self) -> bool:
         return True
@@ -1,14 +1,32 @@
 """
 Tests for Legal Ops integrations.
 """
+import threading
 import pytest
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import Mock, patch
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
 
+from apps.clients.models import Client
 from apps.intake.models import Lead
-from apps.integrations.base.providers import MatterData, SyncResult
+from apps.integrations.base.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, provider_health
+)
+from apps.integrations.base.http import close_sessions, get_session, session_stats
+from apps.integrations.base.outbox import SyncWorker, enqueue_qualified_leads
+from apps.integrations.base.providers import LegalOpsProvider, MatterData, ProviderFactory, SyncResult
+from apps.integrations.base.reconciliation import Reconciler
+from apps.integrations.checks import shared_cache_check
 from apps.integrations.base.sync_service import LegalOpsSyncService
 from apps.integrations.clio.client import ClioProvider
+from apps.integrations.error_handler import ErrorHandler
+from apps.integrations.error_notifier import ErrorNotifier, fingerprint
+from apps.integrations.models import MatterLink, SyncOutboxEntry
+from apps.integrations.providers.native import NativeProvider
+from apps.legal_cases.models import LegalCase
 
 
 class ClioProviderTestCase(TestCase):
@@ -20,9 +38,11 @@ class ClioProviderTestCase(TestCase):
             access_token='test_token'
         )
     
-    @patch('apps.integrations.clio.client.requests.post')
-    def test_create_matter_success(self, mock_post):
+    @patch('apps.integrations.clio.client.get_session')
+    def test_create_matter_success(self, mock_get_session):
         """Test successful matter creation in Clio."""
+        self.provider = ClioProvider(access_token='test_token')
+        mock_post = mock_get_session.return_value.post
         # Mock API response
         mock_post.return_value = Mock(
             status_code=201,
@@ -49,9 +69,11 @@ class ClioProviderTestCase(TestCase):
         self.assertEqual(result.external_id, '12345')
         mock_post.assert_called_once()
     
-    @patch('apps.integrations.clio.client.requests.post')
-    def test_create_matter_failure(self, mock_post):
+    @patch('apps.integrations.clio.client.get_session')
+    def test_create_matter_failure(self, mock_get_session):
         """Test failed matter creation."""
+        self.provider = ClioProvider(access_token='test_token')
+        mock_post = mock_get_session.return_value.post
         mock_post.return_value = Mock(
             status_code=400,
             text='Bad Request'
@@ -70,6 +92,25 @@ class ClioProviderTestCase(TestCase):
         
         self.assertFalse(result.success)
         self.assertIn('400', result.error_message)
+    
+    @patch('apps.integrations.clio.client.get_session')
+    def test_iter_matters_follows_pagination(self, mock_get_session):
+        """Test that iter_matters walks every page via meta.paging.next."""
+        self.provider = ClioProvider(api_url='https://test.clio.com/api/v4', access_token='test_token')
+        mock_get = mock_get_session.return_value.get
+        mock_get.side_effect = [
+            Mock(json=lambda: {'data': [{'id': 1}, {'id': 2}], 'meta': {'paging': {'next': 'https://test.clio.com/next'}}}),
+            Mock(json=lambda: {'data': [{'id': 3}], 'meta': {'paging': {}}}),
+        ]
+        
+        matters = self.provider.iter_matters(page_size=2)
+        
+        self.assertEqual(next(matters), {'id': 1})
+        self.assertEqual(mock_get.call_count, 1)  # lazily fetched
+        self.assertEqual([m['id'] for m in matters], [2, 3])
+        self.assertEqual(mock_get.call_args_list[0].kwargs['params']['limit'], 2)
+        self.assertEqual(mock_get.call_args_list[1].args[0], 'https://test.clio.com/next')
+        self.assertIsNone(mock_get.call_args_list[1].kwargs['params'])
 
 
 class SyncServiceTestCase(TestCase):
@@ -137,6 +178,588 @@ class SyncServiceTestCase(TestCase):
         mock_get_provider.return_value.create_matter.assert_not_called()
 
 
+class NativeProviderTestCase(TestCase):
+    """Tests for the native ORM provider."""
+    
+    def setUp(self):
+        client = Client.objects.create(full_name="Native Client")
+        for i in range(5):
+            LegalCase.objects.create(client=client, title=f"Caso {i}", area='CIVIL', status='ACTIVE' if i % 2 else 'ANALYSIS')
+        self.provider = NativeProvider()
+    
+    def test_iter_matters_keyset_pages(self):
+        """Test that iter_matters pages by id without loading everything."""
+        with self.assertNumQueries(3):  # 2 + 2 + 1
+            titles = [m['title'] for m in self.provider.iter_matters(page_size=2)]
+        self.assertEqual(titles, [f"Caso {i}" for i in range(5)])
+    
+    def test_iter_matters_filters(self):
+        """Test that filters are applied before paginating."""
+        matters = list(self.provider.iter_matters({'status': 'ACTIVE'}, page_size=1))
+        self.assertEqual([m['title'] for m in matters], ["Caso 1", "Caso 3"])
+        self.assertEqual(self.provider.list_matters({'status': 'ACTIVE'}), matters)
+
+    def test_update_matter_refreshes_search_document(self):
+        """Test that a renamed case is found by its new title."""
+        case = LegalCase.objects.get(title="Caso 0")
+        result = self.provider.update_matter(str(case.id), {'title': 'Revisional Bancária'})
+        self.assertTrue(result.success)
+        self.assertEqual(list(LegalCase.objects.filter(search_document__contains='revisional')), [case])
+        self.assertFalse(self.provider.update_matter('999999', {'title': 'x'}).success)
+    
+    def test_create_matter_e_mails_sharing_digits(self):
+        """Test that two e-mails with the same digits are different clients."""
+        maria = self.provider.create_matter(MatterData("Maria", "CIVIL", "a", "maria1990@gmail.com", 80, {}))
+        joao = self.provider.create_matter(MatterData("João", "CIVIL", "b", "joao1990@hotmail.com", 80, {}))
+
+        self.assertNotEqual(
+            LegalCase.objects.get(id=maria.external_id).client,
+            LegalCase.objects.get(id=joao.external_id).client,
+        )
+
+    def test_create_matters_bulk(self):
+        """Test that create_matters resolves clients once and bulk inserts."""
+        existing = Client.objects.create(full_name="Existing", phone="(19) 99999-0001")
+        matters = [
+            MatterData("Someone", "CIVIL", "a", "19999990001", 80, {}),  # same phone
+            MatterData("New A", "HEALTH", "b", "(11) 98888-0000", 80, {}),
+            MatterData("New B", "OTHER", "c", "(11) 98888-0000", 80, {}),  # phone created in this batch
+            MatterData("Native Client", "OTHER", "d", "(11) 97777-0000", 80, {}),  # same name
+        ]
+        
+        with self.assertNumQueries(5):  # lookup, savepoint, 2 inserts, release
+            results = self.provider.create_matters(matters)
+        
+        self.assertTrue(all(r.success for r in results))
+        cases = [LegalCase.objects.get(id=r.external_id) for r in results]
+        self.assertEqual(cases[0].client, existing)
+        self.assertEqual(cases[1].client, cases[2].client)
+        self.assertEqual(cases[1].client.full_name, "New A")
+        self.assertEqual(cases[3].client.full_name, "Native Client")
+        self.assertEqual(cases[1].area, 'HEALTH')
+        self.assertTrue(Client.objects.filter(phone__blind="11988880000").exists())
+
+    def test_create_matters_bulk_e_mails_sharing_digits(self):
+        """Test that e-mail contacts never dedupe by their digits."""
+        Client.objects.create(full_name="Maria", phone="maria1990@gmail.com")
+        matters = [
+            MatterData("João", "CIVIL", "a", "joao1990@hotmail.com", 80, {}),
+            MatterData("Ana", "CIVIL", "b", "ana1990@yahoo.com", 80, {}),
+        ]
+
+        results = self.provider.create_matters(matters)
+
+        clients = [LegalCase.objects.get(id=r.external_id).client.full_name for r in results]
+        self.assertEqual(clients, ["João", "Ana"])
+    
+    def test_default_create_matters_fans_out(self):
+        """Test the thread-pool fallback for providers without a batch API."""
+        class RemoteProvider(NativeProvider):
+            create_matters = LegalOpsProvider.create_matters
+            
+            def create_matter(self, matter_data):
+                if matter_data.client_name == "boom":
+                    raise RuntimeError("boom")
+                return SyncResult(success=True, external_id=matter_data.client_name)
+        
+        names = ["a", "boom", "c", "d"]
+        results = RemoteProvider().create_matters([MatterData(n, "OTHER", "", "", 0, {}) for n in names])
+        
+        self.assertEqual([r.external_id for r in results], ["a", None, "c", "d"])
+        self.assertEqual(results[1].error_message, "boom")
+    
+    def test_worker_batches_native_entries(self):
+        """Test that the sync worker uses create_matters for the native provider."""
+        leads = [
+            Lead.objects.create(full_name=f"Batch {i}", case_type="OTHER",
+                                contact_info=f"(19) 98888-000{i}", score=80, is_qualified=True)
+            for i in range(3)
+        ]
+        job = enqueue_qualified_leads(provider_name='native')
+        
+        with patch.object(NativeProvider, 'create_matter') as single:
+            SyncWorker(concurrency=1).run(once=True)
+        
+        single.assert_not_called()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.synced), ('DONE', 3))
+        for lead in leads:
+            lead.refresh_from_db()
+            self.assertTrue(LegalCase.objects.filter(id=lead.external_id, client__full_name=lead.full_name).exists())
+
+
+class PooledSessionTestCase(TestCase):
+    """Tests for pooled provider HTTP sessions."""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.responses = []
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive
+            
+            def do_GET(handler):
+                handler.rfile.read(int(handler.headers.get('Content-Length', 0)))
+                status, headers = cls.responses.pop(0) if cls.responses else (200, {})
+                body = b'{"data": []}'
+                handler.send_response(status)
+                for name, value in headers.items():
+                    handler.send_header(name, value)
+                handler.send_header('Content-Length', str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+            
+            do_POST = do_GET
+            
+            def log_message(handler, *args):
+                pass
+        
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+    
+    def setUp(self):
+        close_sessions()
+        cache.clear()
+        self.responses.clear()
+        self.addCleanup(close_sessions)
+    
+    def test_providers_share_one_session(self):
+        """Test that every ClioProvider in a process reuses the same session."""
+        first = ClioProvider(access_token='a')
+        second = ClioProvider(access_token='b')
+        self.assertIs(first.session, second.session)
+        self.assertIs(first.session, get_session('clio'))
+    
+    def test_bulk_calls_reuse_connection(self):
+        """Test that repeated calls go over a single keep-alive connection."""
+        provider = ClioProvider(api_url=self.base_url, access_token='test_token')
+        for _ in range(5):
+            provider.list_matters()
+        
+        stats = session_stats('clio')
+        self.assertEqual(stats['requests'], 5)
+        self.assertEqual(stats['connections'], 1)
+        self.assertEqual(stats['reuse_rate'], 0.8)
+    
+    def test_retries_rate_limited_post_honoring_retry_after(self):
+        """Test that a 429 is retried (even for POST) after Retry-After."""
+        self.responses.append((429, {'Retry-After': '0'}))
+        session = get_session('clio')
+        
+        response = session.post(f'{self.base_url}/matters.json', json={}, timeout=5)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(session_stats('clio')['requests'], 2)
+    
+    def test_server_error_on_post_is_not_retried(self):
+        """Test that a 500 on POST is returned as-is (the matter may exist)."""
+        self.responses.append((500, {}))
+        response = get_session('clio').post(f'{self.base_url}/matters.json', json={}, timeout=5)
+        self.assertEqual(response.status_code, 500)
+        
+        self.responses.append((502, {}))
+        response = get_session('clio').get(f'{self.base_url}/matters.json', timeout=5)
+        self.assertEqual(response.status_code, 200)
+
+
+class CircuitBreakerTestCase(TestCase):
+    """Tests for the provider circuit breaker and cached health."""
+    
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.breaker = CircuitBreaker('clio', failure_threshold=3, recovery_timeout=60)
+    
+    def test_opens_after_consecutive_failures(self):
+        """Test closed -> open after the failure threshold, then fail fast."""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()  # resets the count
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+        
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+    
+    @patch('apps.integrations.base.circuit_breaker.time.time')
+    def test_half_open_allows_a_single_probe(self, mock_time):
+        """Test that one probe goes through after the recovery timeout."""
+        mock_time.return_value = 1000
+        for _ in range(3):
+            self.breaker.record_failure()
+        
+        mock_time.return_value = 1061
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())  # other workers keep failing fast
+        
+        self.breaker.record_failure()  # failed probe
+        self.assertEqual(self.breaker.state, OPEN)
+        
+        mock_time.return_value = 1122
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+    
+    @patch('apps.integrations.clio.client.get_session')
+    def test_open_circuit_fails_sync_fast(self, mock_get_session):
+        """Test that sync_lead_to_matter never calls the provider while open."""
+        for _ in range(5):
+            CircuitBreaker('clio').record_failure()
+        lead = Lead.objects.create(full_name="Down", case_type="OTHER", contact_info="a@b.com", is_qualified=True)
+        
+        result = LegalOpsSyncService(provider_name='clio').sync_lead_to_matter(lead)
+        
+        self.assertFalse(result.success)
+        self.assertIn("circuit open", result.error_message)
+        mock_get_session.return_value.post.assert_not_called()
+    
+    def test_session_feeds_breaker(self):
+        """Test that failing HTTP calls open the circuit and later calls fail fast."""
+        close_sessions()
+        self.addCleanup(close_sessions)
+        session = get_session('clio')
+        with patch('requests.Session.request', return_value=Mock(status_code=503)) as request:
+            for _ in range(5):
+                session.get('https://test.clio.com/api/v4/users/who_am_i.json')
+            with self.assertRaises(CircuitOpenError):
+                session.get('https://test.clio.com/api/v4/users/who_am_i.json')
+        self.assertEqual(request.call_count, 5)
+        self.assertFalse(ClioProvider(access_token='t').health_check())
+    
+    @patch('apps.integrations.base.circuit_breaker.ProviderFactory.get_provider')
+    def test_health_is_cached(self, mock_get_provider):
+        """Test that health checks are cached and skipped while open."""
+        mock_get_provider.return_value.health_check.return_value = True
+        
+        self.assertTrue(provider_health('clio')['healthy'])
+        self.assertTrue(provider_health('clio')['healthy'])
+        self.assertEqual(mock_get_provider.return_value.health_check.call_count, 1)
+        
+        for _ in range(5):
+            CircuitBreaker('clio').record_failure()
+        health = provider_health('clio')
+        self.assertEqual((health['healthy'], health['circuit']), (False, OPEN))
+        self.assertEqual(mock_get_provider.return_value.health_check.call_count, 1)
+    
+    @patch('apps.integrations.base.sync_service.ProviderFactory.get_provider')
+    def test_worker_defers_entries_while_open(self, mock_get_provider):
+        """Test that an open circuit postpones outbox entries without using attempts."""
+        Lead.objects.create(full_name="Queued", case_type="OTHER", contact_info="a@b.com", is_qualified=True)
+        enqueue_qualified_leads(provider_name='clio')
+        for _ in range(5):
+            CircuitBreaker('clio').record_failure()
+        
+        SyncWorker(concurrency=1).run(once=True)
+        
+        entry = SyncOutboxEntry.objects.get()
+        self.assertEqual((entry.status, entry.attempts), ('PENDING', 0))
+        self.assertGreater(entry.next_attempt_at, timezone.now())
+        mock_get_provider.return_value.create_matter.assert_not_called()
+
+
+class SyncOutboxTestCase(TestCase):
+    """Tests for the sync outbox and worker."""
+    
+    def setUp(self):
+        self.leads = [
+            Lead.objects.create(
+                full_name=f"Outbox Lead {i}",
+                case_type="LIPEDEMA",
+                contact_info=f"(19) 99999-000{i}",
+                score=80,
+                is_qualified=True
+            )
+            for i in range(3)
+        ]
+        Lead.objects.create(full_name="Unqualified", case_type="OTHER", contact_info="x@y.com", is_qualified=False)
+        Lead.objects.create(full_name="Synced", case_type="OTHER", contact_info="z@y.com", is_qualified=True, external_id="ext-1")
+    
+    def test_enqueue_only_unsynced_qualified_leads(self):
+        """Test that enqueue skips unqualified, synced and already queued leads."""
+        job = enqueue_qualified_leads(provider_name='native')
+        
+        self.assertEqual(job.total, 3)
+        self.assertEqual(job.status, 'PENDING')
+        self.assertEqual(SyncOutboxEntry.objects.filter(job=job).count(), 3)
+        
+        second = enqueue_qualified_leads(provider_name='native')
+        self.assertEqual(second.total, 0)
+        self.assertEqual(second.status, 'DONE')
+    
+    @patch('apps.integrations.base.sync_service.ProviderFactory.get_provider')
+    def test_worker_syncs_entries(self, mock_get_provider):
+        """Test that the worker pushes queued leads and completes the job."""
+        mock_provider = Mock()
+        mock_provider.create_matter.side_effect = [
+            SyncResult(success=True, external_id=f'ext-{i}') for i in range(3)
+        ]
+        mock_get_provider.return_value = mock_provider
+        
+        job = enqueue_qualified_leads(provider_name='clio')
+        processed = SyncWorker(concurrency=1).run(once=True)
+        
+        self.assertEqual(processed, 3)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.synced, job.failed), ('DONE', 3, 0))
+        self.assertFalse(Lead.objects.filter(id__in=[l.id for l in self.leads], external_id__isnull=True).exists())
+    
+    @patch('apps.integrations.base.sync_service.ProviderFactory.get_provider')
+    def test_worker_retries_with_backoff_then_fails(self, mock_get_provider):
+        """Test exponential backoff and giving up after max attempts."""
+        mock_provider = Mock()
+        mock_provider.create_matter.return_value = SyncResult(success=False, error_message="API returned 503")
+        mock_get_provider.return_value = mock_provider
+        
+        job = enqueue_qualified_leads(provider_name='clio')
+        SyncOutboxEntry.objects.update(max_attempts=2)
+        
+        SyncWorker(concurrency=1).run(once=True)
+        entry = SyncOutboxEntry.objects.filter(job=job).first()
+        self.assertEqual((entry.status, entry.attempts), ('PENDING', 1))
+        self.assertEqual(entry.last_error, "API returned 503")
+        
+        # Not due yet: nothing is claimed
+        self.assertEqual(SyncWorker(concurrency=1).run_once(), 0)
+        
+        SyncOutboxEntry.objects.update(next_attempt_at=timezone.now())
+        SyncWorker(concurrency=1).run(once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.failed), ('DONE', 3))
+        self.assertFalse(SyncOutboxEntry.objects.exclude(status='FAILED').exists())
+
+    @patch('apps.integrations.base.sync_service.ProviderFactory.get_provider')
+    def test_stale_processing_counts_an_attempt(self, mock_get_provider):
+        """Test that an entry left PROCESSING by a dead worker uses up an attempt, then fails."""
+        mock_get_provider.return_value.create_matter.return_value = SyncResult(success=False, error_message="503")
+        job = enqueue_qualified_leads(provider_name='clio')
+        retried, exhausted, _ = SyncOutboxEntry.objects.filter(job=job).order_by('id')
+        stale = timezone.now() - timedelta(hours=1)
+        SyncOutboxEntry.objects.filter(id=retried.id).update(status='PROCESSING', locked_at=stale, max_attempts=3)
+        SyncOutboxEntry.objects.filter(id=exhausted.id).update(
+            status='PROCESSING', locked_at=stale, max_attempts=3, attempts=2
+        )
+
+        SyncWorker(concurrency=1).run_once()
+
+        retried.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual((retried.status, retried.attempts), ('PENDING', 2))
+        self.assertEqual((exhausted.status, exhausted.attempts), ('FAILED', 3))
+        self.assertIn('lock timeout', exhausted.last_error)
+        job.refresh_from_db()
+        self.assertEqual(job.failed, 1)
+
+
+class SharedCacheCheckTestCase(TestCase):
+    """Tests for the REDIS_URL system check."""
+
+    def test_per_process_cache_warns_outside_debug(self):
+        with override_settings(DEBUG=False):
+            self.assertEqual([w.id for w in shared_cache_check()], ['integrations.W001'])
+        with override_settings(DEBUG=True):
+            self.assertEqual(shared_cache_check(), [])
+
+
+class FakeRemoteProvider(LegalOpsProvider):
+    """In-memory remote provider for reconciliation tests."""
+    matters = {}
+    updates = []
+    
+    def touch(self, matter_id, **fields):
+        self.matters[matter_id] = {**self.matters.get(matter_id, {}), **fields, 'id': matter_id,
+                                   'updated_at': timezone.now().isoformat()}
+    
+    def create_matter(self, matter_data):
+        raise NotImplementedError
+    
+    def update_matter(self, external_id, updates):
+        self.updates.append((external_id, updates))
+        self.touch(external_id, **updates)
+        return SyncResult(success=True, external_id=external_id)
+    
+    def get_matter(self, external_id):
+        return self.matters.get(external_id)
+    
+    def list_matters(self, filters=None):
+        since = (filters or {}).get('updated_since')
+        return [m for m in self.matters.values() if not since or m['updated_at'] > since]
+    
+    def health_check(self):
+        return True
+
+
+class ReconciliationTestCase(TestCase):
+    """Tests for incremental two-way reconciliation."""
+    
+    def setUp(self):
+        ProviderFactory.register_provider('fake', FakeRemoteProvider)
+        FakeRemoteProvider.matters = {}
+        FakeRemoteProvider.updates = []
+        self.remote = FakeRemoteProvider()
+        self.lead = Lead.objects.create(full_name="Synced Lead", case_type="OTHER", contact_info="(19) 97777-1111",
+                                        is_qualified=True, external_id="m1")
+        self.client_obj = Client.objects.create(full_name="Lead Client", phone="19977771111")
+        self.remote.touch("m1", title="Caso Um", status="ACTIVE", client_name="Whatever")
+        self.remote.touch("m2", title="Caso Dois", status="ANALYSIS", client_name="Remote Only")
+    
+    def reconcile(self, **kwargs):
+        return Reconciler('fake').run(**kwargs)
+    
+    def test_first_run_creates_local_mirrors(self):
+        """Test that unseen matters become LegalCases linked to the lead's client."""
+        run = self.reconcile()
+        
+        self.assertEqual((run.status, run.fetched, run.created), ('DONE', 2, 2))
+        link = MatterLink.objects.get(provider='fake', external_id='m1')
+        self.assertEqual(link.lead, self.lead)
+        self.assertEqual(link.legal_case.client, self.client_obj)
+        self.assertEqual(link.legal_case.title, "Caso Um")
+        self.assertEqual(MatterLink.objects.get(external_id='m2').legal_case.client.full_name, "Remote Only")
+        self.assertIsNotNone(run.high_water_mark)
+    
+    def test_incremental_run_only_pulls_changes(self):
+        """Test that the high-water mark limits the next pull to changed matters."""
+        self.reconcile()
+        self.assertEqual(self.reconcile().fetched, 0)
+        
+        self.remote.touch("m2", title="Caso Dois (editado)")
+        run = self.reconcile()
+        
+        self.assertEqual((run.fetched, run.updated, run.created), (1, 1, 0))
+        self.assertEqual(LegalCase.objects.get(matter_links__external_id='m2').title, "Caso Dois (editado)")
+        self.assertIn("editado", LegalCase.objects.get(matter_links__external_id='m2').search_document)
+    
+    def test_local_changes_are_pushed_and_conflicts_reported(self):
+        """Test pushing local edits and flagging edits on both sides."""
+        self.reconcile()
+        case1 = LegalCase.objects.get(matter_links__external_id='m1')
+        case2 = LegalCase.objects.get(matter_links__external_id='m2')
+        
+        case1.status = 'ARCHIVED'
+        case1.save()
+        case2.title = "Local title"
+        case2.save()
+        self.remote.touch("m2", title="Remote title")
+        
+        run = self.reconcile()
+        
+        self.assertEqual(run.pushed, 1)
+        self.assertEqual(self.remote.updates, [('m1', {'title': 'Caso Um', 'status': 'ARCHIVED'})])
+        self.assertEqual(run.conflicts, [{'external_id': 'm2', 'legal_case': case2.id}])
+        case2.refresh_from_db()
+        self.assertEqual(case2.title, "Local title")
+        self.assertTrue(MatterLink.objects.get(external_id='m2').conflict)
+        
+        # The pushed change comes back unchanged on the next pull
+        self.assertEqual(self.reconcile().unchanged, 1)
+    
+    def test_local_change_is_pushed_when_remote_was_touched(self):
+        """Test that a local-only edit is pushed even if the remote row shows up in the pull."""
+        self.reconcile()
+        case1 = LegalCase.objects.get(matter_links__external_id='m1')
+        case1.status = 'ARCHIVED'
+        case1.save()
+        self.remote.touch("m1")  # newer updated_at, same content
+
+        run = self.reconcile()
+
+        self.assertEqual((run.fetched, run.pushed), (1, 1))
+        self.assertEqual(self.remote.matters['m1']['status'], 'ARCHIVED')
+        self.assertEqual(self.reconcile().pushed, 0)
+
+    def test_local_provider_is_rejected(self):
+        """Test that the native provider cannot be reconciled with itself."""
+        with self.assertRaises(ValueError):
+            Reconciler('native')
+
+
+def _raise(exc_class, message="boom"):
+    try:
+        raise exc_class(message)
+    except exc_class as e:
+        return e
+
+
+def _raise_elsewhere():
+    try:
+        raise ValueError("boom")
+    except ValueError as e:
+        return e
+
+
+class ErrorNotifierTestCase(TestCase):
+    """Tests for the background, deduplicated error notifier."""
+    
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.handler = Mock()
+        self.notifier = ErrorNotifier(self.handler)
+    
+    def metadata(self):
+        return {'error_id': 'ABC', 'error_type': 'ValueError', 'path': '/x/', 'user': 'Anonymous'}
+    
+    def test_fingerprint_groups_by_type_and_frames(self):
+        """Test that the fingerprint ignores the message but not the raise site."""
+        self.assertEqual(fingerprint(_raise(ValueError, "a")), fingerprint(_raise(ValueError, "b")))
+        self.assertNotEqual(fingerprint(_raise(ValueError)), fingerprint(_raise(KeyError)))
+        self.assertNotEqual(fingerprint(_raise(ValueError)), fingerprint(_raise_elsewhere()))
+    
+    def test_repeats_are_sent_as_one_digest(self):
+        """Test one immediate alert, then a single digest for the storm."""
+        for _ in range(43):
+            self.notifier.process(_raise(ValueError), self.metadata())
+        
+        self.assertEqual(self.handler._send_notifications.call_count, 1)
+        self.handler._send_digest.assert_not_called()
+        
+        self.notifier.flush_due(force=True)
+        
+        metadata, occurrences, window = self.handler._send_digest.call_args.args
+        self.assertEqual((occurrences, window), (42, 300))
+        self.assertIn('Traceback', metadata['traceback'])
+        
+        # A new window alerts again
+        self.notifier.process(_raise(ValueError), self.metadata())
+        self.assertEqual(self.handler._send_notifications.call_count, 2)
+    
+    def test_global_rate_limit(self):
+        """Test that distinct errors beyond the limit only show up in digests."""
+        self.notifier.max_alerts = 2
+        for error in (_raise(ValueError), _raise(KeyError), _raise(TypeError)):
+            self.notifier.process(error, self.metadata())
+        
+        self.assertEqual(self.handler._send_notifications.call_count, 2)
+        self.notifier.flush_due(force=True)
+        self.assertEqual(self.handler._send_digest.call_args.args[1], 1)
+    
+    @patch('apps.integrations.error_handler.ErrorHandler._send_notifications')
+    @patch('apps.integrations.error_handler.get_notifier')
+    def test_capture_error_only_enqueues(self, mock_get_notifier, mock_send):
+        """Test that capture_error does no sending on the request path."""
+        error = _raise(ValueError)
+        
+        error_id = ErrorHandler().capture_error(error)
+        
+        self.assertEqual(len(error_id), 8)
+        mock_send.assert_not_called()
+        submitted_error, metadata = mock_get_notifier.return_value.submit.call_args.args
+        self.assertIs(submitted_error, error)
+        self.assertEqual(metadata['error_id'], error_id)
+
+
 @pytest.mark.django_db
 class TestIntegrationAPI:
     """Tests for integration API endpoints."""
@@ -165,3 +788,28 @@ class TestIntegrationAPI:
             data = response.json()
             assert data['success'] is True
             assert data['external_id'] == 'api-test-123'
+    
+    def test_auto_sync_enqueues_and_reports_progress(self, client):
+        """Test /api/integrations/sync/auto-sync-qualified/ returns a pollable job."""
+        Lead.objects.create(
+            full_name="Queued Lead",
+            case_type="SUPER",
+            contact_info="(11) 98765-4321",
+            score=80,
+            is_qualified=True
+        )
+        
+        response = client.post('/api/integrations/sync/auto-sync-qualified/?provider=native')
+        assert response.status_code == 200
+        data = response.json()
+        assert data['total'] == 1
+        
+        status = client.get(f"/api/integrations/sync/jobs/{data['job_id']}/").json()
+        assert status['pending'] == 1
+        assert status['progress'] == 0
+
+    def test_unknown_sync_job_is_404(self, client):
+        """Test /api/integrations/sync/jobs/<id>/ answers 404 for unknown jobs."""
+        response = client.get('/api/integrations/sync/jobs/999999/')
+        assert response.status_code == 404
+        assert response.json() == {"error": "Job not found"}
@@ -0,0 +1,24 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'queue', 'status', 'priority', 'attempts', 'run_at', 'created_at', 'finished_at')
+    list_filter = ('status', 'queue', 'task')
+    search_fields = ('task', 'unique_key')
+    raw_id_fields = ('created_by',)
+    readonly_fields = ('attempts', 'locked_at', 'locked_by', 'result', 'last_error', 'created_at', 'started_at', 'finished_at')
+    actions = ['retry_jobs', 'cancel_jobs']
+
+    @admin.action(description="Reexecutar tarefas selecionadas")
+    def retry_jobs(self, request, queryset):
+        updated = queryset.filter(status__in=['FAILED', 'CANCELLED']).update(
+            status='QUEUED', attempts=0, run_at=timezone.now(), finished_at=None, last_error='',
+        )
+        self.message_user(request, f"{updated} tarefa(s) recolocada(s) na fila.")
+
+    @admin.action(description="Cancelar tarefas na fila")
+    def cancel_jobs(self, request, queryset):
+        updated = queryset.filter(status='QUEUED').update(status='CANCELLED', finished_at=timezone.now())
+        self.message_user(request, f"{updated} tarefa(s) cancelada(s).")
@@ -0,0 +1,36 @@
+"""
+Django Ninja API for polling background jobs.
+"""
+from ninja import Router
+
+from apps.jobs.models import Job
+from core.security.roles import has_role
+
+router = Router()
+
+
+def can_view_job(user, job: Job) -> bool:
+    """The user who queued the job, or a manager."""
+    if not user.is_authenticated:
+        return False
+    return user.is_superuser or job.created_by_id == user.id or has_role(user, 'Manager')
+
+
+@router.get("/{job_id}/", response={200: dict, 403: dict, 404: dict})
+def job_status(request, job_id: int):
+    """Status of a job, with its result once it succeeded."""
+    job = Job.objects.filter(id=job_id).first()
+    if job is None:
+        return 404, {"detail": "Tarefa não encontrada"}
+    if not can_view_job(request.user, job):
+        return 403, {"detail": "Acesso restrito"}
+    return {
+        "id": job.id,
+        "task": job.task,
+        "status": job.status,
+        "attempts": job.attempts,
+        "result": job.result if job.status == 'SUCCEEDED' else None,
+        "finished": job.is_finished,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
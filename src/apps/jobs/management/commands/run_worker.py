@@ -0,0 +1,36 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from apps.jobs.worker import MODES, JobWorker
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the database queue (retries with backoff, thread or process pool)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='append', dest='queues', default=None,
+                            help='Queue to serve (repeatable; default: every queue)')
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help='Jobs run at the same time (default: JOBS_CONCURRENCY)')
+        parser.add_argument('--mode', choices=MODES, default='thread',
+                            help='thread for I/O-bound tasks, process for CPU-bound ones')
+        parser.add_argument('--batch-size', type=int, default=None, help='Jobs claimed per round (default: concurrency)')
+        parser.add_argument('--poll-interval', type=float, default=2, help='Seconds to wait when no job is due')
+        parser.add_argument('--once', action='store_true', help='Exit once no jobs are due')
+
+    def handle(self, *args, **options):
+        worker = JobWorker(
+            queues=options['queues'],
+            concurrency=options['concurrency'],
+            mode=options['mode'],
+            batch_size=options['batch_size'],
+        )
+        # Let the current batch finish on shutdown (deploys, scaling down)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: worker.stop())
+
+        queues = ', '.join(worker.queues) or 'all'
+        self.stdout.write(f'Job worker started (queues={queues}, mode={worker.mode}, concurrency={worker.concurrency})')
+        processed = worker.run(once=options['once'], poll_interval=options['poll_interval'])
+        self.stdout.write(self.style.SUCCESS(f'{processed} jobs processed'))
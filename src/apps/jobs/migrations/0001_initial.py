@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:34
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(max_length=200, verbose_name='Tarefa')),
+                ('queue', models.CharField(default='default', max_length=50, verbose_name='Fila')),
+                ('args', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Argumentos')),
+                ('kwargs', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Argumentos Nomeados')),
+                ('priority', models.SmallIntegerField(default=0, help_text='Maior executa primeiro', verbose_name='Prioridade')),
+                ('status', models.CharField(choices=[('QUEUED', 'Na Fila'), ('RUNNING', 'Em Execução'), ('SUCCEEDED', 'Concluído'), ('FAILED', 'Falhou'), ('CANCELLED', 'Cancelado')], default='QUEUED', max_length=20, verbose_name='Status')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Executar a partir de')),
+                ('attempts', models.IntegerField(default=0, verbose_name='Tentativas')),
+                ('max_attempts', models.IntegerField(default=3, verbose_name='Máximo de Tentativas')),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('result', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Resultado')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último Erro')),
+                ('unique_key', models.CharField(blank=True, max_length=255, verbose_name='Chave de Unicidade')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Tarefa',
+                'verbose_name_plural': 'Tarefas',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['queue', 'status', '-priority', 'run_at'], name='job_claim_idx'), models.Index(fields=['status', 'locked_at'], name='job_stale_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['QUEUED', 'RUNNING']), models.Q(('unique_key', ''), _negated=True)), fields=('unique_key',), name='job_unique_key_in_flight')],
+            },
+        ),
+    ]
@@ -0,0 +1,81 @@
+"""
+Database-backed task queue.
+
+Jobs are written in the caller's transaction (so a job never refers to rows
+that were rolled back) and executed by `manage.py run_worker`, outside the
+HTTP request cycle. See apps.jobs.registry and apps.jobs.worker.
+"""
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    One call of a registered task.
+
+    Workers claim due jobs by priority (highest first), then run_at.
+    Failed runs are retried with exponential backoff until max_attempts.
+    """
+    STATUS_CHOICES = [
+        ('QUEUED', 'Na Fila'),
+        ('RUNNING', 'Em Execução'),
+        ('SUCCEEDED', 'Concluído'),
+        ('FAILED', 'Falhou'),
+        ('CANCELLED', 'Cancelado'),
+    ]
+
+    task = models.CharField("Tarefa", max_length=200)
+    queue = models.CharField("Fila", max_length=50, default='default')
+    args = models.JSONField("Argumentos", default=list, blank=True, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField("Argumentos Nomeados", default=dict, blank=True, encoder=DjangoJSONEncoder)
+    priority = models.SmallIntegerField("Prioridade", default=0, help_text="Maior executa primeiro")
+
+    status = models.CharField("Status", max_length=20, choices=STATUS_CHOICES, default='QUEUED')
+    run_at = models.DateTimeField("Executar a partir de", default=timezone.now)
+    attempts = models.IntegerField("Tentativas", default=0)
+    max_attempts = models.IntegerField("Máximo de Tentativas", default=3)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField("Worker", max_length=100, blank=True)
+
+    result = models.JSONField("Resultado", null=True, blank=True, encoder=DjangoJSONEncoder)
+    last_error = models.TextField("Último Erro", blank=True)
+    # Optional: while a job with this key is queued or running, enqueueing it again returns that job
+    unique_key = models.CharField("Chave de Unicidade", max_length=255, blank=True)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Tarefa"
+        verbose_name_plural = "Tarefas"
+        ordering = ['-created_at']
+        indexes = [
+            # Claim: WHERE queue/status/run_at ORDER BY priority DESC, run_at
+            models.Index(fields=['queue', 'status', '-priority', 'run_at'], name='job_claim_idx'),
+            models.Index(fields=['status', 'locked_at'], name='job_stale_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['unique_key'],
+                condition=Q(status__in=['QUEUED', 'RUNNING']) & ~Q(unique_key=''),
+                name='job_unique_key_in_flight',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Job #{self.id} {self.task} [{self.status}]"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ('SUCCEEDED', 'FAILED', 'CANCELLED')
@@ -0,0 +1,123 @@
+"""
+Task registry and enqueueing.
+
+Declare tasks in an app's tasks.py (autodiscovered by JobsConfig):
+
+    @task(queue='documents', max_attempts=2)
+    def generate_document(case_id):
+        ...
+        return {'url': ...}            # stored in Job.result (JSON)
+
+and queue them from anywhere:
+
+    job = generate_document.enqueue(case.id)
+    job = generate_document.enqueue_with(args=[case.id], priority=10, delay=60)
+
+Arguments and results must be JSON-serializable: pass ids, not model
+instances, so the worker reads fresh rows. A task may run more than once
+(retries, a worker killed mid-run), so it should be idempotent.
+"""
+import functools
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Sequence
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.jobs.models import Job
+
+_registry: Dict[str, 'Task'] = {}
+
+UNIQUE_INSERT_ATTEMPTS = 3
+
+
+class UnknownTask(LookupError):
+    """No task registered under this name (module not imported or renamed)."""
+
+
+@dataclass
+class Task:
+    name: str
+    func: Callable
+    queue: str = 'default'
+    priority: int = 0
+    max_attempts: Optional[int] = None
+
+    def __call__(self, *args, **kwargs):
+        """Run synchronously, in the current process."""
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *args, **kwargs) -> Job:
+        return self.enqueue_with(args=args, kwargs=kwargs)
+
+    def enqueue_with(self, args: Sequence = (), kwargs: Optional[dict] = None, priority: Optional[int] = None,
+                     run_at: Optional[datetime] = None, delay: Optional[float] = None, queue: Optional[str] = None,
+                     unique_key: str = '', created_by=None) -> Job:
+        """
+        Queue a call with explicit options.
+
+        Args:
+            run_at/delay: Earliest execution time (absolute, or seconds from now)
+            unique_key: While a job with this key is queued or running, return it instead
+            created_by: User who asked for it (may read the job's status/result)
+        """
+        if run_at is None:
+            run_at = timezone.now() + timedelta(seconds=delay or 0)
+        job = Job(
+            task=self.name,
+            queue=queue or self.queue,
+            args=list(args),
+            kwargs=kwargs or {},
+            priority=self.priority if priority is None else priority,
+            run_at=run_at,
+            max_attempts=self.max_attempts or getattr(settings, 'JOBS_MAX_ATTEMPTS', 3),
+            unique_key=unique_key,
+            created_by=created_by if getattr(created_by, 'is_authenticated', False) else None,
+        )
+        if not unique_key:
+            job.save()
+            return job
+        for attempt in range(1, UNIQUE_INSERT_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    job.save()
+                return job
+            except IntegrityError:
+                existing = Job.objects.filter(unique_key=unique_key, status__in=['QUEUED', 'RUNNING']).first()
+                if existing is not None:
+                    return existing
+                # The job holding the key finished in between: the key is free again
+                if attempt == UNIQUE_INSERT_ATTEMPTS:
+                    raise
+
+
+def task(name: Optional[str] = None, queue: str = 'default', priority: int = 0,
+         max_attempts: Optional[int] = None) -> Callable[[Callable], Task]:
+    """Register a function as a task (name defaults to '<module>.<function>')."""
+
+    def decorator(func: Callable) -> Task:
+        registered = Task(
+            name=name or f'{func.__module__}.{func.__name__}',
+            func=func,
+            queue=queue,
+            priority=priority,
+            max_attempts=max_attempts,
+        )
+        functools.update_wrapper(registered, func)
+        _registry[registered.name] = registered
+        return registered
+
+    return decorator
+
+
+def get_task(name: str) -> Task:
+    try:
+        return _registry[name]
+    except KeyError:
+        raise UnknownTask(name)
+
+
+def registered_tasks() -> Dict[str, Task]:
+    return dict(_registry)
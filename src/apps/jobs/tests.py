@@ -0,0 +1,237 @@
+"""
+Tests for the background job queue.
+"""
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.jobs.models import Job
+from apps.jobs.registry import get_task, task
+from apps.jobs.worker import JobWorker, backoff_delay
+
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+    return {'value': value}
+
+
+@task(name='tests.flaky', max_attempts=2)
+def flaky():
+    raise RuntimeError("provider unavailable")
+
+
+@task(name='tests.wait_for_peer')
+def wait_for_peer(barrier_id):
+    # Only completes if another job runs at the same time
+    BARRIERS[barrier_id].wait(timeout=5)
+    return threading.current_thread().name
+
+
+BARRIERS = {}
+
+
+class JobQueueTestCase(TestCase):
+    """Tests for enqueueing, claiming and retrying jobs."""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_run_by_priority_then_run_at(self):
+        """Test that higher priority jobs are claimed first."""
+        record.enqueue('low')
+        record.enqueue_with(args=['high'], priority=10)
+        record.enqueue('low-later')
+
+        processed = JobWorker(concurrency=1).run(once=True)
+
+        self.assertEqual(processed, 3)
+        self.assertEqual(calls, ['high', 'low', 'low-later'])
+        job = Job.objects.get(args=['high'])
+        self.assertEqual((job.status, job.result, job.attempts), ('SUCCEEDED', {'value': 'high'}, 1))
+        self.assertIsNotNone(job.started_at)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_delayed_job_waits_for_run_at(self):
+        """Test that a job is not claimed before its run_at."""
+        job = record.enqueue_with(args=['later'], delay=60)
+
+        self.assertEqual(JobWorker(concurrency=1).run_once(), 0)
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        self.assertEqual(JobWorker(concurrency=1).run_once(), 1)
+        self.assertEqual(calls, ['later'])
+
+    def test_queue_filter(self):
+        """Test that a worker only serves its queues."""
+        record.enqueue_with(args=['mail'], queue='notifications')
+        record.enqueue('default')
+
+        JobWorker(queues=['notifications'], concurrency=1).run(once=True)
+
+        self.assertEqual(calls, ['mail'])
+        self.assertEqual(Job.objects.get(queue='default').status, 'QUEUED')
+
+    def test_failed_job_retries_with_backoff_then_fails(self):
+        """Test exponential backoff and giving up after max attempts."""
+        job = flaky.enqueue()
+
+        JobWorker(concurrency=1).run(once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('QUEUED', 1))
+        self.assertIn("provider unavailable", job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=20))
+
+        # Not due yet: nothing is claimed
+        self.assertEqual(JobWorker(concurrency=1).run_once(), 0)
+
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        JobWorker(concurrency=1).run(once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_backoff_doubles(self):
+        with override_settings(JOBS_BACKOFF_SECONDS=10):
+            self.assertGreaterEqual(backoff_delay(3), timedelta(seconds=40))
+            self.assertLessEqual(backoff_delay(3), timedelta(seconds=44))
+
+    def test_unknown_task_fails(self):
+        """Test that a job whose task is not registered fails without retrying."""
+        job = Job.objects.create(task='tests.removed')
+
+        JobWorker(concurrency=1).run(once=True)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 1))
+        self.assertIn("Unknown task", job.last_error)
+
+    def test_unique_key_returns_job_in_flight(self):
+        """Test that a job with the same key is not queued twice while pending."""
+        first = record.enqueue_with(args=['a'], unique_key='doc:1')
+        second = record.enqueue_with(args=['a'], unique_key='doc:1')
+        self.assertEqual(first.id, second.id)
+
+        JobWorker(concurrency=1).run(once=True)
+        third = record.enqueue_with(args=['a'], unique_key='doc:1')
+        self.assertNotEqual(third.id, first.id)
+
+    def test_unique_key_retries_when_the_job_in_flight_finishes(self):
+        """Test that losing the insert race to a job that then finishes still queues one."""
+        save = Job.save
+        raced = []
+
+        def racing_save(job, *args, **kwargs):
+            if not raced:
+                raced.append(job)
+                raise IntegrityError('job_unique_key_in_flight')
+            return save(job, *args, **kwargs)
+
+        with patch.object(Job, 'save', autospec=True, side_effect=racing_save):
+            job = record.enqueue_with(args=['a'], unique_key='doc:1')
+        self.assertIsNotNone(job.pk)
+        self.assertEqual(Job.objects.get().unique_key, 'doc:1')
+
+        with patch.object(Job, 'save', autospec=True, side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                record.enqueue_with(args=['b'], unique_key='doc:2')
+
+    def test_stale_jobs_are_requeued(self):
+        """Test that jobs left RUNNING by a crashed worker are retried, or failed when out of attempts."""
+        stale_at = timezone.now() - timedelta(hours=1)
+        retry = Job.objects.create(task='tests.record', args=['retry'], status='RUNNING', attempts=1, locked_at=stale_at)
+        spent = Job.objects.create(task='tests.record', status='RUNNING', attempts=3, locked_at=stale_at)
+        running = Job.objects.create(task='tests.record', status='RUNNING', attempts=1, locked_at=timezone.now())
+
+        JobWorker(concurrency=1).run(once=True)
+
+        retry.refresh_from_db()
+        spent.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual((retry.status, retry.attempts), ('SUCCEEDED', 2))
+        self.assertEqual(spent.status, 'FAILED')
+        self.assertEqual(running.status, 'RUNNING')
+        self.assertEqual(calls, ['retry'])
+
+    def test_task_runs_synchronously_when_called(self):
+        self.assertEqual(record('now'), {'value': 'now'})
+        self.assertIs(get_task('tests.record'), record)
+        self.assertFalse(Job.objects.exists())
+
+    def test_run_worker_command(self):
+        """Test the management command drains the queue with --once."""
+        record.enqueue('cmd')
+        out = StringIO()
+
+        call_command('run_worker', '--once', '--concurrency', '1', stdout=out)
+
+        self.assertIn('1 jobs processed', out.getvalue())
+        self.assertEqual(calls, ['cmd'])
+
+
+class JobWorkerThreadsTestCase(TransactionTestCase):
+    """Tests for running a batch on the thread pool."""
+
+    def test_batch_runs_concurrently(self):
+        BARRIERS['pair'] = threading.Barrier(2)
+        wait_for_peer.enqueue('pair')
+        wait_for_peer.enqueue('pair')
+
+        processed = JobWorker(concurrency=2, mode='thread').run(once=True)
+
+        self.assertEqual(processed, 2)
+        self.assertEqual(Job.objects.filter(status='SUCCEEDED').count(), 2)
+        self.assertEqual(len(set(Job.objects.values_list('result', flat=True))), 2)
+
+
+class DocumentJobTestCase(TestCase):
+    """Tests for document generation through the job queue."""
+
+    def setUp(self):
+        from apps.clients.models import Client
+        from apps.legal_cases.models import LegalCase
+
+        self.user = User.objects.create_superuser('jobs_admin', 'jobs@example.com', 'pass')
+        self.client.force_login(self.user)
+        client = Client.objects.create(full_name="Cliente Doc", client_type='PF', cpf_cnpj='123.456.789-00')
+        self.case = LegalCase.objects.create(client=client, title="Caso Doc", area='CIVIL')
+
+    @patch('apps.legal_cases.services.document_service.DocumentAutomationService.generate_base_document')
+    def test_generate_document_is_queued_and_polled(self, mock_generate):
+        mock_generate.return_value = '/tmp/peticao_test.docx'
+
+        response = self.client.get(reverse('admin_portal:generate_document', args=[self.case.id]))
+        job = Job.objects.get(task='apps.legal_cases.tasks.generate_document')
+        self.assertRedirects(response, reverse('admin_portal:job_detail', args=[job.id]))
+        self.assertEqual((job.queue, job.created_by), ('documents', self.user))
+        mock_generate.assert_not_called()
+
+        response = self.client.get(reverse('admin_portal:job_detail', args=[job.id]), HTTP_HX_REQUEST='true')
+        self.assertContains(response, 'hx-trigger="every 2s"')
+
+        JobWorker(queues=['documents'], concurrency=1).run(once=True)
+        job.refresh_from_db()
+        self.assertEqual(job.result, {'filename': 'peticao_test.docx'})
+
+        response = self.client.get(reverse('admin_portal:job_detail', args=[job.id]), HTTP_HX_REQUEST='true')
+        self.assertNotContains(response, 'hx-trigger')
+        self.assertContains(response, reverse('admin_portal:job_download', args=[job.id]))
+
+    def test_job_status_api_is_restricted_to_owner(self):
+        job = record.enqueue_with(args=['x'], created_by=self.user)
+        other = User.objects.create_user('other_user', password='pass')
+
+        response = self.client.get(f'/api/jobs/{job.id}/')
+        self.assertEqual(response.json()['status'], 'QUEUED')
+
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(f'/api/jobs/{job.id}/').status_code, 403)
@@ -0,0 +1,217 @@
+"""
+Job worker (run by `manage.py run_worker`).
+
+Due jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED where the
+database supports it, so any number of worker processes can share a queue
+without Redis. Each claimed batch runs on a pool of threads (I/O-bound
+tasks: HTTP, SMTP, WhatsApp) or processes (CPU-bound tasks: documents,
+exports). Jobs left RUNNING by a crashed worker are requeued after
+JOBS_LOCK_TIMEOUT seconds.
+"""
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+from typing import List, Optional, Sequence
+
+from django.conf import settings
+from django.db import close_old_connections, connection, connections, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.jobs.models import Job
+from apps.jobs.registry import UnknownTask, get_task
+
+logger = logging.getLogger(__name__)
+
+MODES = ('thread', 'process')
+
+
+def backoff_delay(attempts: int, base: Optional[float] = None) -> timedelta:
+    """
+    Exponential backoff (base * 2^(n-1), capped at 1h) with 10% jitter.
+
+    Shared by every retrying worker (jobs, Legal Ops outbox, WhatsApp
+    sender); `base` defaults to JOBS_BACKOFF_SECONDS.
+    """
+    if base is None:
+        base = getattr(settings, 'JOBS_BACKOFF_SECONDS', 30)
+    seconds = min(base * (2 ** (attempts - 1)), 3600)
+    return timedelta(seconds=seconds + random.uniform(0, seconds * 0.1))
+
+
+def execute(job: Job) -> Job:
+    """Run a claimed job and record its outcome (success, retry or failure)."""
+    try:
+        func = get_task(job.task)
+    except UnknownTask:
+        _finish(job, 'FAILED', error=f"Unknown task: {job.task}")
+        return job
+
+    try:
+        result = func(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            logger.warning(f"Job {job.id} ({job.task}) failed, attempt {job.attempts}/{job.max_attempts}")
+            _finish(job, 'QUEUED', error=error, run_at=timezone.now() + backoff_delay(job.attempts))
+        else:
+            logger.error(f"Job {job.id} ({job.task}) gave up after {job.attempts} attempts")
+            _finish(job, 'FAILED', error=error)
+        return job
+
+    _finish(job, 'SUCCEEDED', result=result)
+    return job
+
+
+def _finish(job: Job, status: str, result=None, error: str = '', run_at=None) -> None:
+    job.status = status
+    job.result = result
+    job.last_error = error
+    job.locked_at = None
+    job.locked_by = ''
+    fields = ['status', 'result', 'last_error', 'locked_at', 'locked_by']
+    if run_at:
+        job.run_at = run_at
+        fields.append('run_at')
+    if status != 'QUEUED':
+        job.finished_at = timezone.now()
+        fields.append('finished_at')
+    try:
+        job.save(update_fields=fields)
+    except TypeError:
+        # Result not JSON-serializable: keep its text form rather than losing the run
+        job.result = repr(result)
+        job.save(update_fields=fields)
+
+
+def _execute_by_id(job_id: int) -> None:
+    """Process-pool entry point: child processes load the job themselves."""
+    close_old_connections()
+    try:
+        job = Job.objects.filter(id=job_id, status='RUNNING').first()
+        if job is not None:
+            execute(job)
+    finally:
+        connection.close()
+
+
+class JobWorker:
+    """
+    Claims and runs due jobs.
+
+    Args:
+        queues: Queue names to serve (default: every queue)
+        concurrency: Jobs run at the same time (default: JOBS_CONCURRENCY)
+        mode: 'thread' or 'process' pool
+        batch_size: Jobs claimed per round (default: concurrency)
+    """
+
+    def __init__(self, queues: Optional[Sequence[str]] = None, concurrency: int = None, mode: str = 'thread',
+                 batch_size: int = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown worker mode: {mode}")
+        self.queues = list(queues or [])
+        self.concurrency = concurrency or getattr(settings, 'JOBS_CONCURRENCY', 4)
+        self.mode = mode
+        self.batch_size = batch_size or self.concurrency
+        self.lock_timeout = getattr(settings, 'JOBS_LOCK_TIMEOUT', 900)
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self._pool = None
+        self._stopping = False
+
+    def stop(self) -> None:
+        """Finish the current batch, then return from run()."""
+        self._stopping = True
+
+    def run(self, once: bool = False, poll_interval: float = 2) -> int:
+        """Process jobs until stopped (or until none are due when once=True)."""
+        total = 0
+        try:
+            while not self._stopping:
+                processed = self.run_once()
+                total += processed
+                if not processed:
+                    if once:
+                        break
+                    time.sleep(poll_interval)
+        finally:
+            self.close()
+        return total
+
+    def run_once(self) -> int:
+        """Requeue stale jobs, claim one batch and run it. Returns the number of jobs run."""
+        self.requeue_stale()
+        jobs = self.claim()
+        if not jobs:
+            return 0
+        if self.concurrency <= 1:
+            for job in jobs:
+                execute(job)
+        elif self.mode == 'process':
+            list(self._get_pool().map(_execute_by_id, [job.id for job in jobs]))
+        else:
+            list(self._get_pool().map(self._execute_in_thread, jobs))
+        return len(jobs)
+
+    def claim(self) -> List[Job]:
+        now = timezone.now()
+        with transaction.atomic():
+            due = Job.objects.filter(status='QUEUED', run_at__lte=now)
+            if self.queues:
+                due = due.filter(queue__in=self.queues)
+            due = due.order_by('-priority', 'run_at', 'id')
+            if connection.features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            jobs = list(due[:self.batch_size])
+            Job.objects.filter(id__in=[job.id for job in jobs]).update(
+                status='RUNNING', locked_at=now, locked_by=self.name, attempts=F('attempts') + 1,
+                started_at=Coalesce('started_at', Value(now)),
+            )
+        for job in jobs:
+            job.status, job.locked_at, job.locked_by = 'RUNNING', now, self.name
+            job.attempts += 1
+            job.started_at = job.started_at or now
+        return jobs
+
+    def requeue_stale(self) -> int:
+        """Jobs RUNNING for longer than the lock timeout: retry them, or fail them if out of attempts."""
+        stale = Job.objects.filter(status='RUNNING', locked_at__lt=timezone.now() - timedelta(seconds=self.lock_timeout))
+        if self.queues:
+            stale = stale.filter(queue__in=self.queues)
+        failed = stale.filter(attempts__gte=F('max_attempts')).update(
+            status='FAILED', locked_at=None, locked_by='', finished_at=timezone.now(),
+            last_error='Worker stopped while running the job (lock timeout)',
+        )
+        requeued = stale.update(status='QUEUED', locked_at=None, locked_by='')
+        return failed + requeued
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.mode == 'process':
+                # Forked children must not share the parent's DB connections
+                connections.close_all()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.concurrency, mp_context=multiprocessing.get_context('fork'),
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job')
+        return self._pool
+
+    def _execute_in_thread(self, job: Job) -> Job:
+        try:
+            return execute(job)
+        finally:
+            # Worker threads open their own DB connections
+            connection.close()
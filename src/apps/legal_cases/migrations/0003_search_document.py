@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:21
+
+import core.search.fields
+from django.db import migrations
+
+from core.search.operations import search_index_operations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legal_cases', '0002_legalcase_contingency_value_legalcase_risk_level_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='legalcase',
+            name='search_document',
+            field=core.search.fields.SearchDocumentField(sources=('title', 'process_number', 'description')),
+        ),
+        *search_index_operations('legal_cases', 'LegalCase', 'legal_cases_legalcase'),
+    ]
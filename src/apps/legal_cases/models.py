@@ -1,6 +1,7 @@
 from django.db import models
 from apps.clients.models import Client
 from core.security.fields import EncryptedField
+from core.search.fields import SearchDocumentField
 
 class LegalCase(models.Model):
     """
@@ -41,6 +42,9 @@ class LegalCase(models.Model):
     
     entry_date = models.DateField("Data de Entrada", auto_now_add=True)
     last_update = models.DateTimeField("Última Atualização", auto_now=True)
+    
+    # Full-text search
+    search_document = SearchDocumentField(sources=('title', 'process_number', 'description'))
 
     def __str__(self):
         return f"{self.title} - {self.client.full_name}"
@@ -0,0 +1,17 @@
+"""
+Background tasks for legal cases (run by `manage.py run_worker`).
+"""
+import os
+
+from apps.jobs.registry import task
+from apps.legal_cases.models import LegalCase
+
+
+@task(queue='documents', max_attempts=2)
+def generate_document(case_id: int) -> dict:
+    """Render the base petition of a case; the file is served by admin_portal:job_download."""
+    from apps.legal_cases.services.document_service import DocumentAutomationService
+
+    case = LegalCase.objects.select_related('client').get(id=case_id)
+    output_path = DocumentAutomationService().generate_base_document(case)
+    return {'filename': os.path.basename(output_path)}
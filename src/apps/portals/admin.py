@@ -3,7 +3,7 @@ Django Admin configuration for Client Portal.
 """
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import CaseTimeline, CaseDocument, ClientPortalAccess
+from .models import CaseTimeline, CaseDocument, ClientPortalAccess, TimelineNotification
 
 
 @admin.register(CaseTimeline)
@@ -81,3 +81,12 @@ class ClientPortalAccessAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(TimelineNotification)
+class TimelineNotificationAdmin(admin.ModelAdmin):
+    list_display = ('legal_case', 'client', 'stage', 'created_at', 'sent_at')
+    list_filter = ('stage', 'sent_at')
+    search_fields = ('legal_case__title', 'client__full_name')
+    readonly_fields = ('client', 'legal_case', 'stage', 'created_at', 'sent_at')
+    list_select_related = ('legal_case__client', 'client')
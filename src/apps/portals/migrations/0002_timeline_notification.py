@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_search_document'),
+        ('legal_cases', '0003_search_document'),
+        ('portals', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(choices=[('INTAKE', 'Triagem Inicial'), ('ANALYSIS', 'Análise Jurídica'), ('PETITION', 'Petição Elaborada'), ('FILED', 'Protocolo Realizado'), ('DISCOVERY', 'Fase Instrutória'), ('HEARING', 'Audiência Agendada'), ('DECISION', 'Sentença Proferida'), ('APPEAL', 'Recurso Interposto'), ('CLOSED', 'Caso Encerrado')], max_length=20, verbose_name='Etapa')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviado em')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_notifications', to='clients.client')),
+                ('legal_case', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_notifications', to='legal_cases.legalcase')),
+            ],
+            options={
+                'verbose_name': 'Notificação de Andamento',
+                'verbose_name_plural': 'Notificações de Andamento',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['client', 'sent_at'], name='portal_notif_pending_idx')],
+            },
+        ),
+    ]
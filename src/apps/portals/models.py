@@ -51,6 +51,19 @@ class CaseTimeline(models.Model):
     
     def __str__(self):
         return f"Timeline: {self.legal_case}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Snapshot of what the client was last told about (see apps.portals.signals)
+        if 'current_stage' in field_names and 'milestones' in field_names:
+            instance._notified_state = (instance.current_stage, len(instance.milestones))
+        return instance
+
+    def has_client_visible_changes(self) -> bool:
+        """Stage or milestones changed since the row was loaded (True if unknown)."""
+        previous = getattr(self, '_notified_state', None)
+        return previous is None or previous != (self.current_stage, len(self.milestones))
     
     def progress_percentage(self) -> int:
         """Calculate progress as percentage."""
@@ -77,6 +90,40 @@ class CaseTimeline(models.Model):
         return [m['stage'] for m in self.milestones]
 
 
+class TimelineNotification(models.Model):
+    """
+    A timeline update waiting to be told to the client.
+
+    Rows are written in the transaction that changed the timeline and
+    consumed by the `send_timeline_digest` job, which sends every pending
+    update of a client as one WhatsApp message.
+    """
+    client = models.ForeignKey(
+        'clients.Client',
+        on_delete=models.CASCADE,
+        related_name='timeline_notifications'
+    )
+    legal_case = models.ForeignKey(
+        LegalCase,
+        on_delete=models.CASCADE,
+        related_name='timeline_notifications'
+    )
+    stage = models.CharField("Etapa", max_length=20, choices=CaseTimeline.STAGES)
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
+    sent_at = models.DateTimeField("Enviado em", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Notificação de Andamento"
+        verbose_name_plural = "Notificações de Andamento"
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['client', 'sent_at'], name='portal_notif_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.legal_case} -> {self.get_stage_display()}"
+
+
 class CaseDocument(models.Model):
     """
     Documents associated with a legal case.
@@ -1,66 +1,71 @@
 """
 Django signals for Client Portal notifications.
 
-Automatically sends WhatsApp notifications when case timeline is updated.
+Timeline saves only record what changed: each stage or milestone change is
+written as a TimelineNotification row in the transaction that made it (so
+a rollback, even of a savepoint, drops it with the change) and, once the
+transaction commits, the `send_timeline_digest` job of the client is
+scheduled (delayed by PORTAL_NOTIFY_DEBOUNCE_SECONDS). Every update a
+client gets inside that window goes out as a single WhatsApp message, sent
+by the job worker instead of the request that saved the timeline.
+
+Nothing is recorded while "Enviar WhatsApp automático em atualizações"
+(SystemSettings.client_notification_auto) is off.
 """
+from functools import partial
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.utils import timezone
 
-from apps.portals.models import CaseTimeline
-from apps.whatsapp.services.notification import WhatsAppNotificationService
+from admin_portal.models import SystemSettings
+from apps.portals.models import CaseTimeline, TimelineNotification
+
+PENDING_ATTR = '_portal_timeline_clients'
+
+
+def notifications_enabled() -> bool:
+    return SystemSettings.get_settings().client_notification_auto
+
+
+def _flush(using: str = DEFAULT_DB_ALIAS) -> None:
+    from apps.portals.tasks import schedule_timeline_digest
 
+    # Registered once per save: the first call of a commit schedules every
+    # client, the others find the set empty. Clients left over from a rolled
+    # back transaction only get an extra (empty) digest run.
+    client_ids = getattr(connections[using], PENDING_ATTR, None) or {}
+    setattr(connections[using], PENDING_ATTR, {})
+    for client_id in client_ids:
+        schedule_timeline_digest(client_id)
 
-@receiver(post_save, sender=CaseTimeline)
-def notify_client_on_timeline_update(sender, instance, created, **kwargs):
+
+@receiver(post_save, sender=CaseTimeline, dispatch_uid='portals_collect_timeline_update')
+def collect_timeline_update(sender, instance, created, using=DEFAULT_DB_ALIAS, **kwargs):
     """
-    Send WhatsApp notification when timeline is updated.
-    
-    Triggered automatically when lawyer updates case stage in Django Admin.
+    Queue a client notification for a stage or milestone change.
+
+    Triggered when the lawyer updates the case stage (Django Admin, portal
+    API); nothing is sent from here.
     """
     # Skip notification on initial creation
-    if created:
+    if created or not instance.has_client_visible_changes():
         return
-    
-    # Only notify if there's a client associated
-    if not hasattr(instance.legal_case, 'client'):
+    instance._notified_state = (instance.current_stage, len(instance.milestones))
+    if not notifications_enabled():
         return
-    
-    client = instance.legal_case.client
-    
-    # Format professional notification message
-    stage_label = dict(CaseTimeline.STAGES).get(
-        instance.current_stage,
-        instance.current_stage
-    )
-    
-    message = f"""
-*ATUALIZAÇÃO DO SEU CASO*
-
-Caso: {instance.legal_case}
-Nova Etapa: {stage_label}
-Progresso: {instance.progress_percentage()}%
 
-Acesse o portal para mais detalhes e documentos:
-https://alessandradonadon.adv.br/portal
-
-_Atualização realizada em {timezone.now().strftime('%d/%m/%Y às %H:%M')}_
-"""
-    
-    # Send WhatsApp notification
-    try:
-        service = WhatsAppNotificationService(provider='mock')
-        # In production, extract phone from encrypted client.phone
-        # For now, use decisor number as fallback
-        service.decisor_number = client.contact_info if hasattr(client, 'contact_info') else service.decisor_number
-        
-        # Log the notification
-        print(f"[SIGNAL] Enviando notificação de atualização para {client.full_name}")
-        print(message)
-        
-        # Note: Actual sending would happen here in production
-        # service.send_notification(message)
-        
-    except Exception as e:
-        # Log error but don't break the save operation
-        print(f"[SIGNAL ERROR] Falha ao enviar notificação: {e}")
+    client_id = instance.legal_case.client_id
+    TimelineNotification.objects.using(using).create(
+        client_id=client_id,
+        legal_case_id=instance.legal_case_id,
+        stage=instance.current_stage,
+    )
+    connection = connections[using]
+    pending = getattr(connection, PENDING_ATTR, None)
+    if pending is None:
+        pending = {}
+        setattr(connection, PENDING_ATTR, pending)
+    pending[client_id] = None  # ordered set
+    # Outside an atomic block this runs right away
+    transaction.on_commit(partial(_flush, using), using=using)
@@ -0,0 +1,99 @@
+"""
+Background tasks for the client portal (run by `manage.py run_worker`).
+"""
+import logging
+from functools import lru_cache
+from typing import List
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.template.loader import get_template
+from django.utils import timezone
+
+from apps.clients.models import Client
+from apps.jobs.models import Job
+from apps.jobs.registry import task
+from apps.portals.models import CaseTimeline, TimelineNotification
+from apps.portals.signals import notifications_enabled
+
+logger = logging.getLogger(__name__)
+
+DIGEST_TEMPLATE = 'portals/whatsapp/timeline_digest.txt'
+STAGE_LABELS = dict(CaseTimeline.STAGES)
+STAGE_PROGRESS = {code: CaseTimeline(current_stage=code).progress_percentage() for code in STAGE_LABELS}
+
+
+@lru_cache(maxsize=None)
+def _digest_template():
+    # Compiled once per process, also when DEBUG disables the cached template loader
+    return get_template(DIGEST_TEMPLATE)
+
+
+def render_timeline_digest(client: Client, updates: List[TimelineNotification]) -> str:
+    """One message for every pending update of a client, grouped by case (oldest first)."""
+    cases = {}
+    for update in updates:
+        case = cases.setdefault(update.legal_case_id, {'title': update.legal_case.title, 'stages': []})
+        case['stages'].append(update.stage)
+    context = {
+        'first_name': (client.full_name.split() or [''])[0],
+        'cases': [
+            {
+                'title': case['title'],
+                'passed': [STAGE_LABELS.get(code, code) for code in dict.fromkeys(case['stages'][:-1]) if code != stage],
+                'stage': STAGE_LABELS.get(stage, stage),
+                'progress': STAGE_PROGRESS.get(stage, 0),
+            }
+            for case in cases.values()
+            for stage in case['stages'][-1:]
+        ],
+        'portal_url': getattr(settings, 'PORTAL_URL', ''),
+        'updated_at': max(update.created_at for update in updates),
+    }
+    return _digest_template().render(context).strip()
+
+
+@task(queue='notifications')
+def send_timeline_digest(client_id: int) -> dict:
+    """Send the pending timeline updates of a client as one WhatsApp message."""
+    from apps.whatsapp.services.outbound import enqueue_message
+
+    with transaction.atomic():
+        pending = (
+            TimelineNotification.objects.filter(client_id=client_id, sent_at__isnull=True)
+            .select_related('legal_case')
+            .order_by('created_at', 'id')
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True, of=('self',))
+        updates = list(pending)
+        if not updates:
+            return {'updates': 0}
+
+        client = Client.objects.get(id=client_id)
+        message = None
+        if not notifications_enabled():
+            # Switched off after these were recorded: drop them unsent
+            logger.info(f"Automatic client notifications are off: {len(updates)} update(s) of client {client_id} skipped")
+        elif client.phone:
+            message = enqueue_message(client.phone, render_timeline_digest(client, updates), kind='CASE_UPDATE')
+        else:
+            logger.warning(f"Client {client_id} has no phone: {len(updates)} timeline update(s) not sent")
+        TimelineNotification.objects.filter(id__in=[update.id for update in updates]).update(sent_at=timezone.now())
+    return {'updates': len(updates), 'message_id': message.id if message else None}
+
+
+def schedule_timeline_digest(client_id: int) -> Job:
+    """
+    Queue the digest of a client, PORTAL_NOTIFY_DEBOUNCE_SECONDS from now.
+
+    While a digest is waiting, later updates join it instead of queueing another.
+    """
+    debounce = getattr(settings, 'PORTAL_NOTIFY_DEBOUNCE_SECONDS', 300)
+    job = send_timeline_digest.enqueue_with(
+        args=[client_id], delay=debounce, unique_key=f'timeline_digest:{client_id}',
+    )
+    if job.status == 'RUNNING':
+        # That run may have read the pending rows already: follow up after it
+        job = send_timeline_digest.enqueue_with(args=[client_id], delay=debounce)
+    return job
@@ -0,0 +1,127 @@
+"""
+Tests for client portal timeline notifications.
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from admin_portal.models import SystemSettings
+from apps.clients.models import Client
+from apps.jobs.models import Job
+from apps.jobs.worker import JobWorker
+from apps.legal_cases.models import LegalCase
+from apps.portals.models import CaseTimeline, TimelineNotification
+from apps.whatsapp.models import OutboundMessage
+
+
+@override_settings(PORTAL_NOTIFY_DEBOUNCE_SECONDS=0, PORTAL_URL='https://portal.test')
+class TimelineDigestTestCase(TestCase):
+    """Tests for collecting and coalescing timeline updates per client."""
+
+    def setUp(self):
+        self.lawyer = User.objects.create_user('advogada', first_name='Alessandra', password='x')
+        self.client_record = Client.objects.create(full_name="Maria Souza", cpf_cnpj="123.456.789-09", phone="19999990000")
+        self.case = LegalCase.objects.create(client=self.client_record, title="Plano de Saúde", area='HEALTH')
+        self.other_case = LegalCase.objects.create(client=self.client_record, title="Revisão Contratual", area='CIVIL')
+        self.timeline = CaseTimeline.objects.create(legal_case=self.case)
+        self.other_timeline = CaseTimeline.objects.create(legal_case=self.other_case)
+
+    def test_updates_of_a_client_are_sent_as_one_message(self):
+        """Test that several milestones in one window become one job and one message."""
+        with self.captureOnCommitCallbacks(execute=True):
+            timeline = CaseTimeline.objects.get(id=self.timeline.id)
+            timeline.add_milestone('PETITION', 'Petição pronta', self.lawyer)
+            timeline.add_milestone('FILED', 'Protocolado', self.lawyer)
+            other = CaseTimeline.objects.get(id=self.other_timeline.id)
+            other.add_milestone('ANALYSIS', 'Em análise', self.lawyer)
+
+        self.assertEqual(TimelineNotification.objects.filter(sent_at__isnull=True).count(), 3)
+        self.assertEqual(Job.objects.filter(task='apps.portals.tasks.send_timeline_digest').count(), 1)
+        self.assertFalse(OutboundMessage.objects.exists())
+
+        JobWorker(queues=['notifications'], concurrency=1).run(once=True)
+
+        message = OutboundMessage.objects.get()
+        self.assertEqual((message.kind, message.to_number), ('CASE_UPDATE', '19999990000'))
+        self.assertIn('ATUALIZAÇÃO DOS SEUS CASOS', message.body)
+        self.assertIn('Olá, Maria!', message.body)
+        self.assertIn('Etapas concluídas: Petição Elaborada', message.body)
+        self.assertIn('Nova Etapa: Protocolo Realizado', message.body)
+        self.assertIn('Caso: Revisão Contratual', message.body)
+        self.assertIn('https://portal.test', message.body)
+        self.assertFalse(TimelineNotification.objects.filter(sent_at__isnull=True).exists())
+
+    def test_unchanged_saves_and_creation_do_not_notify(self):
+        """Test that only stage or milestone changes are collected."""
+        with self.captureOnCommitCallbacks(execute=True):
+            timeline = CaseTimeline.objects.get(id=self.timeline.id)
+            timeline.save()
+            timeline.current_stage = 'ANALYSIS'
+            timeline.save()
+            timeline.save()
+
+        self.assertEqual(list(TimelineNotification.objects.values_list('stage', flat=True)), ['ANALYSIS'])
+
+    def test_rolled_back_updates_are_dropped(self):
+        """Test that a rolled back transaction notifies nobody."""
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    timeline = CaseTimeline.objects.get(id=self.timeline.id)
+                    timeline.add_milestone('PETITION', 'Petição pronta', self.lawyer)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertFalse(TimelineNotification.objects.exists())
+        self.assertFalse(Job.objects.exists())
+
+    def test_digest_waiting_absorbs_later_updates(self):
+        """Test that updates committed while a digest is queued join it."""
+        for stage in ('ANALYSIS', 'PETITION'):
+            with self.captureOnCommitCallbacks(execute=True):
+                timeline = CaseTimeline.objects.get(id=self.timeline.id)
+                timeline.add_milestone(stage, '', self.lawyer)
+
+        self.assertEqual(Job.objects.count(), 1)
+        JobWorker(queues=['notifications'], concurrency=1).run(once=True)
+        self.assertEqual(OutboundMessage.objects.count(), 1)
+        self.assertIn('Nova Etapa: Petição Elaborada', OutboundMessage.objects.get().body)
+
+    def test_rolled_back_savepoint_is_dropped(self):
+        """Test that only the updates of committed savepoints are notified."""
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        timeline = CaseTimeline.objects.get(id=self.timeline.id)
+                        timeline.add_milestone('PETITION', '', self.lawyer)
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                other = CaseTimeline.objects.get(id=self.other_timeline.id)
+                other.add_milestone('ANALYSIS', '', self.lawyer)
+
+        self.assertEqual(list(TimelineNotification.objects.values_list('stage', flat=True)), ['ANALYSIS'])
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_nothing_is_recorded_when_automatic_notifications_are_off(self):
+        SystemSettings.objects.update_or_create(id=1, defaults={'client_notification_auto': False})
+        with self.captureOnCommitCallbacks(execute=True):
+            timeline = CaseTimeline.objects.get(id=self.timeline.id)
+            timeline.add_milestone('PETITION', '', self.lawyer)
+
+        self.assertFalse(TimelineNotification.objects.exists())
+        self.assertFalse(Job.objects.exists())
+
+    def test_pending_updates_are_skipped_when_switched_off(self):
+        """Test that turning notifications off before the digest runs sends nothing."""
+        with self.captureOnCommitCallbacks(execute=True):
+            timeline = CaseTimeline.objects.get(id=self.timeline.id)
+            timeline.add_milestone('PETITION', '', self.lawyer)
+        SystemSettings.objects.update_or_create(id=1, defaults={'client_notification_auto': False})
+
+        JobWorker(queues=['notifications'], concurrency=1).run(once=True)
+
+        self.assertFalse(OutboundMessage.objects.exists())
+        self.assertFalse(TimelineNotification.objects.filter(sent_at__isnull=True).exists())
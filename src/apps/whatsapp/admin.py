@@ -0,0 +1,41 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Conversation, ConversationMessage, InboundEvent, OutboundMessage
+
+@admin.register(OutboundMessage)
+class OutboundMessageAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'provider', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'delivered_at')
+    list_filter = ('status', 'kind', 'provider')
+    search_fields = ('provider_message_id',)
+    readonly_fields = ('attempts', 'locked_at', 'provider_message_id', 'last_error', 'created_at',
+                       'sent_at', 'delivered_at', 'read_at')
+    actions = ['retry_messages']
+
+    @admin.action(description="Reenviar mensagens com falha")
+    def retry_messages(self, request, queryset):
+        updated = queryset.filter(status='FAILED').update(
+            status='QUEUED', attempts=0, next_attempt_at=timezone.now(), last_error=''
+        )
+        self.message_user(request, f"{updated} mensagem(ns) recolocada(s) na fila.")
+
+class ConversationMessageInline(admin.TabularInline):
+    model = ConversationMessage
+    extra = 0
+    fields = ('direction', 'body', 'sent_at')
+    readonly_fields = fields
+    can_delete = False
+
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'contact_name', 'lead', 'client', 'message_count', 'last_message_at')
+    search_fields = ('contact_name',)
+    raw_id_fields = ('lead', 'client')
+    readonly_fields = ('message_count', 'last_message_at', 'created_at')
+    inlines = [ConversationMessageInline]
+
+@admin.register(InboundEvent)
+class InboundEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'provider', 'event_id', 'received_at', 'processed_at')
+    list_filter = ('provider',)
+    search_fields = ('event_id',)
+    readonly_fields = ('received_at', 'processed_at', 'error')
@@ -1,4 +1,7 @@
-from ninja import Router, Schema
+from django.conf import settings
+from ninja import Router
+
+from apps.whatsapp.services.inbound import WebhookPayloadError, ingest, verify_signature
 
 router = Router()
 
@@ -7,6 +10,18 @@ def verification(request):
     return {"status": "listening"}
 
 
-class IncomingMessage(Schema):
-    from_number: str
-    message_body: str
+@router.post("/webhook", response={200: dict, 400: dict, 403: dict})
+def receive_webhook(request):
+    """
+    Provider webhook (messages and delivery callbacks).
+
+    Events are only stored here; `manage.py process_whatsapp_inbox` handles them.
+    """
+    provider = getattr(settings, 'WHATSAPP_PROVIDER', 'mock')
+    if not verify_signature(provider, request):
+        return 403, {"detail": "Assinatura inválida"}
+    try:
+        received = ingest(provider, request)
+    except WebhookPayloadError as e:
+        return 400, {"detail": str(e)}
+    return {"received": received}
@@ -4,3 +4,7 @@ class WhatsappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.whatsapp'
     verbose_name = 'Automação WhatsApp'
+
+    def ready(self):
+        """Import signals when app is ready."""
+        import apps.whatsapp.signals
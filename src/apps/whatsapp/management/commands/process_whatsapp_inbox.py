@@ -0,0 +1,24 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from apps.whatsapp.services.inbound import InboxProcessor
+
+
+class Command(BaseCommand):
+    help = 'Process received WhatsApp webhook events into conversations (batched)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Events per batch (default: WHATSAPP_INBOX_BATCH_SIZE)')
+        parser.add_argument('--poll-interval', type=float, default=1, help='Seconds to wait when no event is pending')
+        parser.add_argument('--once', action='store_true', help='Exit once no events are pending')
+
+    def handle(self, *args, **options):
+        processor = InboxProcessor(batch_size=options['batch_size'])
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: processor.stop())
+
+        self.stdout.write(f'WhatsApp inbox processor started (batch_size={processor.batch_size})')
+        processed = processor.run(once=options['once'], poll_interval=options['poll_interval'])
+        self.stdout.write(self.style.SUCCESS(f'{processed} events processed'))
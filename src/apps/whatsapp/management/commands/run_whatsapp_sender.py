@@ -0,0 +1,29 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from apps.integrations.base.http import close_sessions
+from apps.whatsapp.services.outbound import MessageSender
+
+
+class Command(BaseCommand):
+    help = 'Send queued WhatsApp messages (per-account and per-number rate limits, retries with backoff)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help='Parallel sends (default: WHATSAPP_SENDER_CONCURRENCY)')
+        parser.add_argument('--batch-size', type=int, default=50, help='Messages claimed per round')
+        parser.add_argument('--poll-interval', type=float, default=2, help='Seconds to wait when no message is due')
+        parser.add_argument('--once', action='store_true', help='Exit once no messages are due')
+
+    def handle(self, *args, **options):
+        sender = MessageSender(concurrency=options['concurrency'], batch_size=options['batch_size'])
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: sender.stop())
+
+        self.stdout.write(f'WhatsApp sender started (concurrency={sender.concurrency})')
+        try:
+            processed = sender.run(once=options['once'], poll_interval=options['poll_interval'])
+        finally:
+            close_sessions()
+        self.stdout.write(self.style.SUCCESS(f'{processed} messages processed'))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:37
+
+import core.security.fields
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(default='mock', max_length=20, verbose_name='Provedor')),
+                ('kind', models.CharField(choices=[('LEAD_ALERT', 'Alerta de Lead'), ('ERROR_ALERT', 'Alerta de Erro'), ('ERROR_DIGEST', 'Resumo de Erros'), ('CASE_UPDATE', 'Atualização de Caso'), ('TEXT', 'Mensagem')], default='TEXT', max_length=20, verbose_name='Tipo')),
+                ('to_number', core.security.fields.EncryptedField(help_text='Stored encrypted', max_length=255, verbose_name='Destinatário')),
+                ('to_number_bidx', core.security.fields.BlindIndexField(blank=True, db_index=True, editable=False, max_length=64, normalizer='phone', null=True, source='to_number')),
+                ('body', core.security.fields.EncryptedField(help_text='Stored encrypted', max_length=8192, verbose_name='Mensagem')),
+                ('status', models.CharField(choices=[('QUEUED', 'Na Fila'), ('SENDING', 'Enviando'), ('SENT', 'Enviada'), ('DELIVERED', 'Entregue'), ('READ', 'Lida'), ('FAILED', 'Falhou')], default='QUEUED', max_length=20, verbose_name='Status')),
+                ('attempts', models.IntegerField(default=0, verbose_name='Tentativas')),
+                ('max_attempts', models.IntegerField(default=5, verbose_name='Máximo de Tentativas')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próxima Tentativa')),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('provider_message_id', models.CharField(blank=True, db_index=True, max_length=255, verbose_name='ID no Provedor')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviada em')),
+                ('delivered_at', models.DateTimeField(blank=True, null=True, verbose_name='Entregue em')),
+                ('read_at', models.DateTimeField(blank=True, null=True, verbose_name='Lida em')),
+            ],
+            options={
+                'verbose_name': 'Mensagem WhatsApp',
+                'verbose_name_plural': 'Mensagens WhatsApp',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='wa_outbound_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:40
+
+import core.security.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_search_document'),
+        ('intake', '0008_search_document'),
+        ('whatsapp', '0001_outbound_message'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone', core.security.fields.EncryptedField(help_text='Stored encrypted', max_length=255, verbose_name='Telefone')),
+                ('phone_bidx', core.security.fields.BlindIndexField(blank=True, editable=False, max_length=64, normalizer='phone', null=True, source='phone', unique=True)),
+                ('contact_name', models.CharField(blank=True, max_length=255, verbose_name='Nome no WhatsApp')),
+                ('message_count', models.IntegerField(default=0, verbose_name='Mensagens')),
+                ('last_message_at', models.DateTimeField(blank=True, null=True, verbose_name='Última Mensagem')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('client', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='conversations', to='clients.client')),
+                ('lead', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='conversations', to='intake.lead')),
+            ],
+            options={
+                'verbose_name': 'Conversa WhatsApp',
+                'verbose_name_plural': 'Conversas WhatsApp',
+                'ordering': ['-last_message_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InboundEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=20, verbose_name='Provedor')),
+                ('event_id', models.CharField(blank=True, max_length=255, verbose_name='ID do Evento')),
+                ('payload', core.security.fields.EncryptedField(help_text='Stored encrypted', max_length=65535, verbose_name='Payload')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Recebido em')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Processado em')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+            ],
+            options={
+                'verbose_name': 'Evento Recebido',
+                'verbose_name_plural': 'Eventos Recebidos',
+                'indexes': [models.Index(fields=['processed_at', 'id'], name='wa_inbound_pending_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('event_id', ''), _negated=True), fields=('provider', 'event_id'), name='wa_inbound_event_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ConversationMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('direction', models.CharField(choices=[('IN', 'Recebida'), ('OUT', 'Enviada')], default='IN', max_length=3, verbose_name='Direção')),
+                ('body', core.security.fields.EncryptedField(help_text='Stored encrypted', max_length=8192, verbose_name='Mensagem')),
+                ('provider_message_id', models.CharField(blank=True, max_length=255, verbose_name='ID no Provedor')),
+                ('sent_at', models.DateTimeField(verbose_name='Enviada em')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='whatsapp.conversation')),
+            ],
+            options={
+                'verbose_name': 'Mensagem da Conversa',
+                'verbose_name_plural': 'Mensagens da Conversa',
+                'ordering': ['sent_at', 'id'],
+                'indexes': [models.Index(fields=['conversation', 'sent_at'], name='wa_conv_message_idx')],
+            },
+        ),
+    ]
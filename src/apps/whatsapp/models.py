@@ -0,0 +1,163 @@
+"""
+WhatsApp messaging.
+
+Outbound: callers only insert an OutboundMessage (see
+apps.whatsapp.services.outbound); `manage.py run_whatsapp_sender` delivers
+them with per-account and per-number throttling, retries and delivery
+tracking.
+
+Inbound: the webhook appends raw InboundEvent rows (see
+apps.whatsapp.services.inbound); `manage.py process_whatsapp_inbox` turns
+them into Conversation threads, linked to leads and clients by phone.
+"""
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+from core.security.fields import BlindIndexField, EncryptedField, EncryptedQuerySet
+
+
+class OutboundMessage(models.Model):
+    """
+    One message to send through a WhatsApp provider.
+
+    Transient failures are retried with exponential backoff until
+    max_attempts; provider status callbacks move SENT messages on to
+    DELIVERED/READ (or FAILED).
+    """
+    KIND_CHOICES = [
+        ('LEAD_ALERT', 'Alerta de Lead'),
+        ('ERROR_ALERT', 'Alerta de Erro'),
+        ('ERROR_DIGEST', 'Resumo de Erros'),
+        ('CASE_UPDATE', 'Atualização de Caso'),
+        ('TEXT', 'Mensagem'),
+    ]
+    STATUS_CHOICES = [
+        ('QUEUED', 'Na Fila'),
+        ('SENDING', 'Enviando'),
+        ('SENT', 'Enviada'),
+        ('DELIVERED', 'Entregue'),
+        ('READ', 'Lida'),
+        ('FAILED', 'Falhou'),
+    ]
+
+    provider = models.CharField("Provedor", max_length=20, default='mock')
+    kind = models.CharField("Tipo", max_length=20, choices=KIND_CHOICES, default='TEXT')
+    to_number = EncryptedField("Destinatário", max_length=255, help_text="Stored encrypted")
+    # Per-number throttling and lookups without decrypting
+    to_number_bidx = BlindIndexField(source='to_number', normalizer='phone')
+    body = EncryptedField("Mensagem", max_length=8192, help_text="Stored encrypted")
+
+    status = models.CharField("Status", max_length=20, choices=STATUS_CHOICES, default='QUEUED')
+    attempts = models.IntegerField("Tentativas", default=0)
+    max_attempts = models.IntegerField("Máximo de Tentativas", default=5)
+    next_attempt_at = models.DateTimeField("Próxima Tentativa", default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    provider_message_id = models.CharField("ID no Provedor", max_length=255, blank=True, db_index=True)
+    last_error = models.TextField("Último Erro", blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField("Enviada em", null=True, blank=True)
+    delivered_at = models.DateTimeField("Entregue em", null=True, blank=True)
+    read_at = models.DateTimeField("Lida em", null=True, blank=True)
+
+    objects = EncryptedQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Mensagem WhatsApp"
+        verbose_name_plural = "Mensagens WhatsApp"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='wa_outbound_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.id} [{self.status}]"
+
+
+class InboundEvent(models.Model):
+    """
+    Raw webhook payload, stored as received and processed later.
+
+    The (provider, event_id) constraint makes provider retries harmless:
+    a redelivered message is dropped at insert time.
+    """
+    provider = models.CharField("Provedor", max_length=20)
+    # Provider message id (or message id + status for delivery callbacks)
+    event_id = models.CharField("ID do Evento", max_length=255, blank=True)
+    payload = EncryptedField("Payload", max_length=65535, help_text="Stored encrypted")
+    received_at = models.DateTimeField("Recebido em", auto_now_add=True)
+    processed_at = models.DateTimeField("Processado em", null=True, blank=True)
+    error = models.TextField("Erro", blank=True)
+
+    objects = EncryptedQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Evento Recebido"
+        verbose_name_plural = "Eventos Recebidos"
+        indexes = [
+            models.Index(fields=['processed_at', 'id'], name='wa_inbound_pending_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['provider', 'event_id'],
+                condition=~Q(event_id=''),
+                name='wa_inbound_event_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.event_id or self.id}"
+
+
+class Conversation(models.Model):
+    """WhatsApp thread with one phone number, linked to its lead/client when known."""
+    phone = EncryptedField("Telefone", max_length=255, help_text="Stored encrypted")
+    phone_bidx = BlindIndexField(source='phone', normalizer='phone', unique=True)
+    contact_name = models.CharField("Nome no WhatsApp", max_length=255, blank=True)
+    lead = models.ForeignKey(
+        'intake.Lead', on_delete=models.SET_NULL, null=True, blank=True, related_name='conversations'
+    )
+    client = models.ForeignKey(
+        'clients.Client', on_delete=models.SET_NULL, null=True, blank=True, related_name='conversations'
+    )
+    message_count = models.IntegerField("Mensagens", default=0)
+    last_message_at = models.DateTimeField("Última Mensagem", null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = EncryptedQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Conversa WhatsApp"
+        verbose_name_plural = "Conversas WhatsApp"
+        ordering = ['-last_message_at']
+
+    def __str__(self):
+        return f"Conversa #{self.id} ({self.contact_name or 'sem nome'})"
+
+
+class ConversationMessage(models.Model):
+    DIRECTION_CHOICES = [
+        ('IN', 'Recebida'),
+        ('OUT', 'Enviada'),
+    ]
+
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
+    direction = models.CharField("Direção", max_length=3, choices=DIRECTION_CHOICES, default='IN')
+    body = EncryptedField("Mensagem", max_length=8192, help_text="Stored encrypted")
+    provider_message_id = models.CharField("ID no Provedor", max_length=255, blank=True)
+    sent_at = models.DateTimeField("Enviada em")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = EncryptedQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Mensagem da Conversa"
+        verbose_name_plural = "Mensagens da Conversa"
+        ordering = ['sent_at', 'id']
+        indexes = [
+            models.Index(fields=['conversation', 'sent_at'], name='wa_conv_message_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_direction_display()} #{self.id}"
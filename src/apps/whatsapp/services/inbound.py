@@ -0,0 +1,329 @@
+"""
+Inbound WhatsApp: webhook ingestion and inbox processing.
+
+The webhook does the least possible work: check the signature, split the
+payload into one event per message/status, and append them to InboundEvent
+with a single INSERT that ignores provider redeliveries (unique event id).
+It answers in constant time whatever the processing backlog.
+
+`InboxProcessor` (run by `manage.py process_whatsapp_inbox`) claims pending
+events in batches with SKIP LOCKED and, per batch:
+
+- groups messages by the blind index of the sender's phone (keyed HMAC of
+  the E.164 number, the same digest as Client.phone_bidx and
+  Lead.contact_info_bidx), so conversations, clients and leads are matched
+  with one indexed query each and nothing is decrypted to find them;
+- creates the missing conversations and all messages with bulk_create;
+- applies delivery callbacks to OutboundMessage in one UPDATE per status.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.clients.models import Client
+from apps.intake.models import Lead
+from apps.whatsapp.models import Conversation, ConversationMessage, InboundEvent
+from apps.whatsapp.services.outbound import update_delivery_status
+from apps.whatsapp.signals import messages_received
+from core.security.fields import blind_index
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+TWILIO_STATUSES = {'delivered': 'DELIVERED', 'read': 'READ', 'failed': 'FAILED', 'undelivered': 'FAILED'}
+EVOLUTION_STATUSES = {'DELIVERY_ACK': 'DELIVERED', 'READ': 'READ', 'PLAYED': 'READ', 'ERROR': 'FAILED'}
+
+
+class WebhookPayloadError(ValueError):
+    """The request body is not a payload of the configured provider."""
+
+
+@dataclass
+class IncomingText:
+    message_id: str
+    phone: str  # E.164
+    body: str
+    sent_at: datetime
+    contact_name: str = ''
+
+
+@dataclass
+class StatusCallback:
+    message_id: str
+    status: str  # DELIVERED, READ or FAILED
+    error: str = ''
+
+
+# ============ WEBHOOK ============
+
+def verify_signature(provider: str, request) -> bool:
+    """
+    Twilio: X-Twilio-Signature (HMAC-SHA1 of URL + sorted form fields, auth token).
+    Others: X-Hub-Signature-256 (HMAC-SHA256 of the raw body, WHATSAPP_WEBHOOK_SECRET).
+    The mock provider may post unsigned payloads in DEBUG only (local
+    development); otherwise it is checked like the others.
+    """
+    if provider == 'mock' and settings.DEBUG:
+        return True
+    if provider == 'twilio':
+        token = getattr(settings, 'TWILIO_AUTH_TOKEN', None)
+        signature = request.headers.get('X-Twilio-Signature', '')
+        if not token or not signature:
+            return False
+        url = getattr(settings, 'WHATSAPP_WEBHOOK_URL', '') or request.build_absolute_uri()
+        data = url + ''.join(f'{key}{value}' for key in sorted(request.POST) for value in request.POST.getlist(key))
+        expected = base64.b64encode(hmac.new(token.encode(), data.encode(), hashlib.sha1).digest()).decode()
+        return hmac.compare_digest(expected, signature)
+
+    secret = getattr(settings, 'WHATSAPP_WEBHOOK_SECRET', '')
+    signature = request.headers.get('X-Hub-Signature-256', '')
+    if not secret or not signature.startswith('sha256='):
+        return False
+    expected = hmac.new(secret.encode(), request.body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len('sha256='):])
+
+
+def split_events(provider: str, request) -> List[Tuple[str, dict]]:
+    """(event_id, payload) for each message or status in the request."""
+    if provider == 'twilio':
+        payload = request.POST.dict()
+        sid = payload.get('MessageSid', '')
+        if 'Body' not in payload and payload.get('MessageStatus'):
+            return [(f"{sid}:{payload['MessageStatus']}" if sid else '', payload)]
+        return [(sid, payload)]
+
+    try:
+        body = json.loads(request.body or b'null')
+    except ValueError:
+        raise WebhookPayloadError("Invalid JSON")
+    if not isinstance(body, (dict, list)):
+        raise WebhookPayloadError("Expected a JSON object")
+    events = []
+    for event in body if isinstance(body, list) else [body]:
+        data = event.get('data') if isinstance(event, dict) else None
+        for item in data if isinstance(data, list) else [data]:
+            if isinstance(item, dict):
+                payload = {'event': event.get('event', ''), 'data': item}
+                events.append((_evolution_event_id(payload), payload))
+    return events
+
+
+def ingest(provider: str, request) -> int:
+    """Store the request's events for processing. Returns how many were in it."""
+    events = split_events(provider, request)
+    InboundEvent.objects.bulk_create(
+        [InboundEvent(provider=provider, event_id=event_id[:255], payload=json.dumps(payload))
+         for event_id, payload in events],
+        ignore_conflicts=True,
+    )
+    return len(events)
+
+
+# ============ PARSING ============
+
+def normalize_whatsapp_number(value: str) -> str:
+    """
+    'whatsapp:+55...' or '55...@s.whatsapp.net' -> E.164.
+
+    WhatsApp still reports many Brazilian mobiles without the ninth digit
+    (55 19 9999-8888); it is restored so the number matches the one typed
+    in forms (55 19 99999-8888).
+    """
+    digits = ''.join(ch for ch in value.split('@')[0] if ch.isdigit())
+    if not digits:
+        return ''
+    if len(digits) == 12 and digits.startswith('55') and digits[4] in '6789':
+        digits = f'{digits[:4]}9{digits[4:]}'
+    return f'+{digits}'
+
+
+def parse_event(event: InboundEvent):
+    """IncomingText, StatusCallback or None (events we do not track)."""
+    payload = json.loads(event.payload)
+    if event.provider == 'twilio':
+        if 'Body' not in payload:
+            status = TWILIO_STATUSES.get(payload.get('MessageStatus', ''))
+            if not status:
+                return None
+            return StatusCallback(payload['MessageSid'], status, payload.get('ErrorMessage', ''))
+        return IncomingText(
+            message_id=payload.get('MessageSid', ''),
+            phone=normalize_whatsapp_number(payload['From']),
+            body=payload.get('Body', ''),
+            sent_at=event.received_at,
+            contact_name=payload.get('ProfileName', ''),
+        )
+
+    kind, data = payload.get('event', ''), payload['data']
+    if kind.replace('_', '.').lower() == 'messages.update':
+        status = EVOLUTION_STATUSES.get(str(data.get('status', '')).upper())
+        if not status:
+            return None
+        return StatusCallback(data.get('keyId') or data.get('key', {}).get('id', ''), status)
+
+    key = data.get('key', {})
+    jid = key.get('remoteJid', '')
+    if key.get('fromMe') or not jid.endswith('@s.whatsapp.net'):
+        return None  # our own messages echoed back, groups, broadcasts
+    timestamp = data.get('messageTimestamp')
+    return IncomingText(
+        message_id=key.get('id', ''),
+        phone=normalize_whatsapp_number(jid),
+        body=_evolution_text(data.get('message') or {}),
+        sent_at=datetime.fromtimestamp(int(timestamp), tz=dt_timezone.utc) if timestamp else event.received_at,
+        contact_name=data.get('pushName', ''),
+    )
+
+
+def _evolution_event_id(payload: dict) -> str:
+    data = payload['data']
+    message_id = data.get('keyId') or data.get('key', {}).get('id', '')
+    if message_id and payload['event'].replace('_', '.').lower() == 'messages.update':
+        return f"{message_id}:{data.get('status', '')}"
+    return message_id
+
+
+def _evolution_text(message: dict) -> str:
+    if message.get('conversation'):
+        return message['conversation']
+    for kind in ('extendedTextMessage', 'imageMessage', 'videoMessage', 'documentMessage'):
+        content = message.get(kind)
+        if isinstance(content, dict) and (content.get('text') or content.get('caption')):
+            return content.get('text') or content.get('caption')
+    return '[mídia]' if message else ''
+
+
+# ============ PROCESSING ============
+
+class InboxProcessor:
+    """
+    Turns pending InboundEvent rows into conversation messages.
+
+    Each batch is claimed with SELECT ... FOR UPDATE SKIP LOCKED (where
+    supported) and processed in one transaction, so several processors can
+    run side by side and a crash leaves the batch pending.
+    """
+
+    def __init__(self, batch_size: int = None):
+        self.batch_size = batch_size or getattr(settings, 'WHATSAPP_INBOX_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        self._stopping = False
+
+    def stop(self) -> None:
+        self._stopping = True
+
+    def run(self, once: bool = False, poll_interval: float = 1) -> int:
+        """Process events until stopped (or until none are pending when once=True)."""
+        total = 0
+        while not self._stopping:
+            processed = self.run_once()
+            total += processed
+            if not processed:
+                if once:
+                    break
+                time.sleep(poll_interval)
+        return total
+
+    def run_once(self) -> int:
+        """Process one batch. Returns the number of events handled."""
+        with transaction.atomic():
+            pending = InboundEvent.objects.filter(processed_at__isnull=True).order_by('id')
+            if connection.features.has_select_for_update_skip_locked:
+                pending = pending.select_for_update(skip_locked=True)
+            events = list(pending[:self.batch_size])
+            if not events:
+                return 0
+
+            texts: List[IncomingText] = []
+            statuses: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+            for event in events:
+                try:
+                    parsed = parse_event(event)
+                except (KeyError, TypeError, ValueError) as e:
+                    event.error = f"{type(e).__name__}: {e}"
+                    logger.warning(f"Inbound WhatsApp event {event.id} could not be parsed: {event.error}")
+                    continue
+                if isinstance(parsed, IncomingText) and parsed.phone:
+                    texts.append(parsed)
+                elif isinstance(parsed, StatusCallback):
+                    statuses[(parsed.status, parsed.error)].append(parsed.message_id)
+
+            created = self.store_messages(texts)
+            for (status, error), message_ids in statuses.items():
+                update_delivery_status(message_ids, status, error)
+
+            now = timezone.now()
+            for event in events:
+                event.processed_at = now
+            InboundEvent.objects.bulk_update(events, ['processed_at', 'error'])
+            transaction.on_commit(lambda: messages_received.send(sender=InboxProcessor, messages=created))
+        return len(events)
+
+    def store_messages(self, texts: List[IncomingText]) -> List[ConversationMessage]:
+        """Append the texts to their conversations (created and linked as needed)."""
+        if not texts:
+            return []
+        by_phone: Dict[str, List[IncomingText]] = defaultdict(list)
+        for text in texts:
+            by_phone[blind_index(text.phone, 'phone')].append(text)
+
+        conversations = self._conversations(by_phone)
+        rows = []
+        for digest, items in by_phone.items():
+            conversation = conversations[digest]
+            for text in items:
+                rows.append(ConversationMessage(
+                    conversation=conversation,
+                    direction='IN',
+                    body=text.body,
+                    provider_message_id=text.message_id,
+                    sent_at=text.sent_at,
+                ))
+            conversation.message_count += len(items)
+            latest = max(text.sent_at for text in items)
+            if conversation.last_message_at is None or latest > conversation.last_message_at:
+                conversation.last_message_at = latest
+            conversation.contact_name = items[-1].contact_name or conversation.contact_name
+
+        ConversationMessage.objects.bulk_create(rows, batch_size=500)
+        Conversation.objects.bulk_update(
+            list(conversations.values()),
+            ['message_count', 'last_message_at', 'contact_name', 'lead', 'client'],
+        )
+        return rows
+
+    def _conversations(self, by_phone: Dict[str, List[IncomingText]]) -> Dict[str, Conversation]:
+        """Conversation per phone digest, locked for this batch; missing ones are created and linked."""
+        digests = list(by_phone)
+        missing = set(digests) - set(Conversation.objects.filter(phone_bidx__in=digests).values_list('phone_bidx', flat=True))
+        if missing:
+            # ignore_conflicts: a concurrent batch may create the same conversation
+            Conversation.objects.bulk_create(
+                [Conversation(phone=by_phone[digest][0].phone) for digest in missing],
+                ignore_conflicts=True,
+            )
+        conversations = {
+            conversation.phone_bidx: conversation
+            for conversation in Conversation.objects.select_for_update().filter(phone_bidx__in=digests).order_by('id')
+        }
+
+        unlinked = [digest for digest, c in conversations.items() if c.lead_id is None and c.client_id is None]
+        if unlinked:
+            clients = dict(Client.objects.filter(phone_bidx__in=unlinked).order_by('id').values_list('phone_bidx', 'id'))
+            # Most recent lead wins (ordering ascending, later ids overwrite)
+            leads = dict(Lead.objects.filter(contact_info_bidx__in=unlinked).order_by('created_at', 'id').values_list('contact_info_bidx', 'id'))
+            for digest in unlinked:
+                conversations[digest].client_id = clients.get(digest)
+                conversations[digest].lead_id = leads.get(digest)
+        return conversations
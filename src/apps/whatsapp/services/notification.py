@@ -3,10 +3,17 @@ WhatsApp Notification Service
 
 Envia notificações de leads qualificados para o WhatsApp decisor.
 Suporta múltiplos provedores: Mock (testing), Twilio, Evolution API.
+
+As mensagens são enfileiradas (OutboundMessage) e enviadas pelo
+`manage.py run_whatsapp_sender`, sem esperar o provedor na requisição.
 """
 import logging
 from typing import Optional
 from django.conf import settings
+from django.db import DatabaseError
+
+from apps.whatsapp.services.outbound import enqueue_message
+from apps.whatsapp.services.providers import get_provider
 
 logger = logging.getLogger(__name__)
 
@@ -32,22 +39,14 @@ class WhatsAppNotificationService:
             lead: Instância do modelo Lead
             
         Returns:
-            bool: True se enviado com sucesso
+            bool: True se enfileirado para envio
         """
-        message = self._format_lead_message(lead)
-        
-        if self.provider == 'mock':
-            return self._send_mock(message, lead)
-        
         # Only send real notifications for Score > 60
-        if lead.score < 60:
+        if self.provider != 'mock' and lead.score < 60:
             logger.info(f"Lead {lead.id} score {lead.score} too low for WhatsApp notification")
             return False
 
-        if self.provider == 'twilio':
-            return self._send_twilio(message)
-        elif self.provider == 'evolution':
-            return self._send_evolution(message)
+        return self._dispatch(self._format_lead_message(lead), 'LEAD_ALERT')
 
     def send_error_notification(self, error_id: str, error_type: str, path: str, user: str) -> bool:
         """
@@ -64,15 +63,21 @@ Usuário: {user}
 
 _Este alerta foi gerado automaticamente pelo Portal Dra. Alessandra._
 """
-        if self.provider == 'mock':
-            return self._send_mock(message, type('MockLead', (), {'id': 'SYSTEM_ERROR'}))
-        
-        if self.provider == 'twilio':
-            return self._send_twilio(message)
-        elif self.provider == 'evolution':
-            return self._send_evolution(message)
-        
-        return False
+        return self._dispatch(message, 'ERROR_ALERT', fallback=True)
+    
+    def send_error_digest(self, error_type: str, path: str, occurrences: int, minutes: int) -> bool:
+        """
+        Envia um resumo de erros repetidos, em vez de um alerta por ocorrência.
+        """
+        message = f"""
+*RESUMO DE ERROS*
+Tipo: {error_type}
+Caminho: {path}
+{occurrences} ocorrências adicionais em {minutes} min
+
+_Este alerta foi gerado automaticamente pelo Portal Dra. Alessandra._
+"""
+        return self._dispatch(message, 'ERROR_DIGEST', fallback=True)
     
     def _format_lead_message(self, lead) -> str:
         """Formata a mensagem de notificação com linguagem profissional."""
@@ -103,84 +108,18 @@ Score de Qualificação: {lead.score}/100
         
         return message.strip()
     
-    def _send_mock(self, message: str, lead) -> bool:
-        """Mock provider para testes."""
-        logger.info(f"[MOCK WhatsApp] Enviando para {self.decisor_number}")
-        logger.info(f"[MOCK WhatsApp] Mensagem:\n{message}")
-        
-        # Simula envio bem-sucedido
-        print("\n" + "="*60)
-        print("📱 MOCK WHATSAPP NOTIFICATION")
-        print("="*60)
-        print(f"Para: {self.decisor_number}")
-        print(f"Lead ID: {lead.id}")
-        print("-"*60)
-        print(message)
-        print("="*60 + "\n")
-        
-        return True
-    
-    def _send_twilio(self, message: str) -> bool:
-        """Envia via Twilio API."""
+    def _dispatch(self, message: str, kind: str, fallback: bool = False) -> bool:
+        """
+        Enfileira a mensagem para o worker de envio.
+
+        Com fallback=True (alertas de erro), se o banco estiver indisponível
+        a mensagem é enviada diretamente, para o alerta não se perder.
+        """
         try:
-            from twilio.rest import Client
-            
-            account_sid = getattr(settings, 'TWILIO_ACCOUNT_SID', None)
-            auth_token = getattr(settings, 'TWILIO_AUTH_TOKEN', None)
-            from_number = getattr(settings, 'TWILIO_WHATSAPP_NUMBER', None)
-            
-            if not all([account_sid, auth_token, from_number]):
-                logger.error("Credenciais Twilio não configuradas")
-                return False
-            
-            client = Client(account_sid, auth_token)
-            
-            message_obj = client.messages.create(
-                from_=f'whatsapp:{from_number}',
-                body=message,
-                to=f'whatsapp:{self.decisor_number}'
-            )
-            
-            logger.info(f"WhatsApp enviado via Twilio: {message_obj.sid}")
+            enqueue_message(self.decisor_number, message.strip(), kind=kind, provider=self.provider)
             return True
-            
-        except Exception as e:
-            logger.error(f"Erro ao enviar via Twilio: {e}")
-            return False
-    
-    def _send_evolution(self, message: str) -> bool:
-        """Envia via Evolution API."""
-        try:
-            import requests
-            
-            api_url = getattr(settings, 'EVOLUTION_API_URL', None)
-            api_key = getattr(settings, 'EVOLUTION_API_KEY', None)
-            instance = getattr(settings, 'EVOLUTION_INSTANCE', None)
-            
-            if not all([api_url, api_key, instance]):
-                logger.error("Credenciais Evolution API não configuradas")
-                return False
-            
-            response = requests.post(
-                f"{api_url}/message/sendText/{instance}",
-                headers={
-                    'apikey': api_key,
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'number': self.decisor_number.replace('+', ''),
-                    'text': message
-                },
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                logger.info(f"WhatsApp enviado via Evolution API")
-                return True
-            else:
-                logger.error(f"Erro Evolution API: {response.status_code}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Erro ao enviar via Evolution: {e}")
-            return False
+        except DatabaseError:
+            if not fallback:
+                raise
+            logger.warning(f"Fila WhatsApp indisponível, enviando {kind} diretamente")
+            return get_provider(self.provider).send(self.decisor_number, message.strip()).success
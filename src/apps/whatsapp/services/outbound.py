@@ -0,0 +1,230 @@
+"""
+Outbound WhatsApp queue.
+
+`enqueue_message` only inserts an OutboundMessage, so requests never wait
+on a provider. `MessageSender` (run by `manage.py run_whatsapp_sender`)
+claims due messages and sends them with:
+
+- one shared client/session per provider (see services.providers);
+- a token bucket per provider account (WHATSAPP_RATE_LIMITS, messages/s);
+- a minimum gap between messages to the same number
+  (WHATSAPP_PER_NUMBER_INTERVAL): later ones are deferred, in order,
+  without using up an attempt;
+- exponential backoff for transient failures, up to max_attempts.
+
+Provider status callbacks are applied with `update_delivery_status`.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.integrations.base.outbox import RateLimiter
+from apps.jobs.worker import backoff_delay
+from apps.whatsapp.models import OutboundMessage
+from apps.whatsapp.services.providers import SendResult, get_provider
+
+logger = logging.getLogger(__name__)
+
+# Delivery statuses only move forward (a late 'delivered' callback never undoes 'read')
+STATUS_RANK = {'SENT': 1, 'DELIVERED': 2, 'READ': 3}
+
+
+def enqueue_message(to: str, body: str, kind: str = 'TEXT', provider: Optional[str] = None,
+                    delay: float = 0) -> OutboundMessage:
+    """Queue a message for the sender worker and return it (nothing is sent here)."""
+    return OutboundMessage.objects.create(
+        provider=provider or getattr(settings, 'WHATSAPP_PROVIDER', 'mock'),
+        kind=kind,
+        to_number=to,
+        body=body,
+        max_attempts=getattr(settings, 'WHATSAPP_MAX_ATTEMPTS', 5),
+        next_attempt_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def update_delivery_status(provider_message_ids, status: str, error: str = '') -> int:
+    """
+    Apply provider status callbacks ('DELIVERED', 'READ' or 'FAILED') to one
+    provider message id or a list of them.
+
+    Returns the number of messages updated (0 for unknown ids or stale callbacks).
+    """
+    if isinstance(provider_message_ids, str):
+        provider_message_ids = [provider_message_ids]
+    provider_message_ids = [value for value in provider_message_ids if value]
+    if not provider_message_ids:
+        return 0
+    now = timezone.now()
+    messages = OutboundMessage.objects.filter(provider_message_id__in=provider_message_ids)
+    if status == 'FAILED':
+        return messages.exclude(status='READ').update(status='FAILED', last_error=error or 'Falha na entrega')
+    if status not in ('DELIVERED', 'READ'):
+        return 0
+    behind = [name for name, rank in STATUS_RANK.items() if rank < STATUS_RANK[status]]
+    updates = {'status': status, f'{status.lower()}_at': now}
+    return messages.filter(status__in=behind).update(**updates)
+
+
+class MessageSender:
+    """
+    Processes due OutboundMessage rows.
+
+    Messages are claimed with SELECT ... FOR UPDATE SKIP LOCKED where the
+    database supports it, so several sender processes can run side by side
+    (rate limits are enforced per process). Messages stuck in SENDING are
+    reclaimed after WHATSAPP_LOCK_TIMEOUT seconds, counting the interrupted
+    attempt (failed once max_attempts is used up).
+    """
+
+    def __init__(self, concurrency: int = None, batch_size: int = 50):
+        self.concurrency = concurrency or getattr(settings, 'WHATSAPP_SENDER_CONCURRENCY', 4)
+        self.batch_size = batch_size
+        self.lock_timeout = getattr(settings, 'WHATSAPP_LOCK_TIMEOUT', 300)
+        self.number_interval = getattr(settings, 'WHATSAPP_PER_NUMBER_INTERVAL', 1)
+        self._limiters: Dict[str, Optional[RateLimiter]] = {}
+        self._last_sent: Dict[str, float] = {}  # to_number_bidx -> time.monotonic() of the last send
+        self._lock = threading.Lock()
+        self._stopping = False
+
+    def stop(self) -> None:
+        """Finish the current batch, then return from run()."""
+        self._stopping = True
+
+    def run(self, once: bool = False, poll_interval: float = 2) -> int:
+        """Send messages until stopped (or until none are due when once=True)."""
+        total = 0
+        while not self._stopping:
+            processed = self.run_once()
+            total += processed
+            if not processed:
+                if once:
+                    break
+                time.sleep(poll_interval)
+        return total
+
+    def run_once(self) -> int:
+        """Claim and send one batch. Returns the number of messages handled."""
+        messages = self.claim()
+        if not messages:
+            return 0
+        ready = self._throttle_numbers(messages)
+        if self.concurrency <= 1:
+            for message in ready:
+                self.send(message)
+        elif ready:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                list(pool.map(self._send_in_thread, ready))
+        return len(messages)
+
+    def claim(self) -> List[OutboundMessage]:
+        now = timezone.now()
+        stale = now - timedelta(seconds=self.lock_timeout)
+        with transaction.atomic():
+            # A send that never finished still used up an attempt
+            stuck = OutboundMessage.objects.filter(status='SENDING', locked_at__lt=stale)
+            stuck.filter(attempts__gte=F('max_attempts') - 1).update(
+                status='FAILED', locked_at=None, attempts=F('attempts') + 1,
+                last_error='Sender stopped while sending the message (lock timeout)',
+            )
+            stuck.update(status='QUEUED', locked_at=None, attempts=F('attempts') + 1)
+            due = OutboundMessage.objects.filter(status='QUEUED', next_attempt_at__lte=now).order_by('next_attempt_at', 'id')
+            if connection.features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            messages = list(due[:self.batch_size])
+            OutboundMessage.objects.filter(id__in=[m.id for m in messages]).update(status='SENDING', locked_at=now)
+        return messages
+
+    def send(self, message: OutboundMessage) -> SendResult:
+        limiter = self._limiter(message.provider)
+        if limiter:
+            limiter.acquire()
+        try:
+            result = get_provider(message.provider).send(message.to_number, message.body)
+        except Exception as e:
+            logger.exception(f"Error sending WhatsApp message {message.id} via {message.provider}")
+            result = SendResult(success=False, error=str(e))
+        self._finish(message, result)
+        return result
+
+    def _throttle_numbers(self, messages: List[OutboundMessage]) -> List[OutboundMessage]:
+        """
+        Keep the first due message per number; push the others back, spaced
+        by number_interval, so each number gets at most one message per gap.
+        """
+        if not self.number_interval:
+            return messages
+        ready, deferred = [], []
+        now_mono, now = time.monotonic(), timezone.now()
+        queued_per_number: Dict[str, int] = {}
+        with self._lock:
+            # Numbers not sent to within the gap no longer defer anything
+            self._last_sent = {
+                key: sent for key, sent in self._last_sent.items() if sent + self.number_interval > now_mono
+            }
+            for message in messages:
+                key = message.to_number_bidx or f'id:{message.id}'
+                wait = max(self._last_sent.get(key, float('-inf')) + self.number_interval - now_mono, 0)
+                position = queued_per_number.get(key, 0)
+                queued_per_number[key] = position + 1
+                if not wait and not position:
+                    self._last_sent[key] = now_mono
+                    ready.append(message)
+                else:
+                    message.status, message.locked_at = 'QUEUED', None
+                    message.next_attempt_at = now + timedelta(seconds=wait + position * self.number_interval)
+                    deferred.append(message)
+        if deferred:
+            OutboundMessage.objects.bulk_update(deferred, ['status', 'locked_at', 'next_attempt_at'])
+        return ready
+
+    def _send_in_thread(self, message: OutboundMessage) -> SendResult:
+        try:
+            return self.send(message)
+        finally:
+            # Worker threads open their own DB connections
+            connection.close()
+
+    def _finish(self, message: OutboundMessage, result: SendResult) -> None:
+        now = timezone.now()
+        message.attempts += 1
+        message.locked_at = None
+        fields = ['status', 'attempts', 'locked_at', 'last_error']
+
+        if result.success:
+            message.status = 'SENT'
+            message.provider_message_id = result.message_id
+            message.sent_at = now
+            message.last_error = ''
+            fields += ['provider_message_id', 'sent_at']
+        elif result.retryable and message.attempts < message.max_attempts:
+            message.status = 'QUEUED'
+            message.next_attempt_at = now + backoff_delay(
+                message.attempts, getattr(settings, 'WHATSAPP_BACKOFF_SECONDS', 30)
+            )
+            message.last_error = result.error
+            fields.append('next_attempt_at')
+            logger.warning(
+                f"WhatsApp message {message.id} failed (attempt {message.attempts}/{message.max_attempts}), "
+                f"retrying at {message.next_attempt_at:%H:%M:%S}: {result.error}"
+            )
+        else:
+            message.status = 'FAILED'
+            message.last_error = result.error
+            logger.error(f"WhatsApp message {message.id} gave up after {message.attempts} attempts: {result.error}")
+
+        message.save(update_fields=fields)
+
+    def _limiter(self, provider_name: str) -> Optional[RateLimiter]:
+        with self._lock:
+            if provider_name not in self._limiters:
+                rate = getattr(settings, 'WHATSAPP_RATE_LIMITS', {}).get(provider_name)
+                self._limiters[provider_name] = RateLimiter(rate) if rate else None
+            return self._limiters[provider_name]
@@ -0,0 +1,133 @@
+"""
+WhatsApp providers used by the outbound sender.
+
+Each provider is built once per process and reused for every message:
+Twilio keeps one REST client (and its HTTP session), Evolution API goes
+through the pooled keep-alive session of apps.integrations.base.http, which
+also retries 429/503 and feeds the circuit breaker.
+"""
+import logging
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Dict
+
+import requests
+from django.conf import settings
+
+from apps.integrations.base.circuit_breaker import CircuitOpenError
+from apps.integrations.base.http import get_session
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+_providers: Dict[str, 'WhatsAppProvider'] = {}
+_lock = threading.Lock()
+
+
+@dataclass
+class SendResult:
+    success: bool
+    message_id: str = ''
+    error: str = ''
+    retryable: bool = True  # False when resending cannot help (bad number, bad credentials)
+
+
+class WhatsAppProvider:
+    name = ''
+
+    def send(self, to: str, body: str) -> SendResult:
+        raise NotImplementedError
+
+
+class MockProvider(WhatsAppProvider):
+    """Logs the message instead of sending it (development and tests)."""
+    name = 'mock'
+
+    def send(self, to: str, body: str) -> SendResult:
+        logger.info(f"[MOCK WhatsApp] Enviando para {to}:\n{body}")
+        return SendResult(success=True, message_id=f'mock-{uuid.uuid4().hex}')
+
+
+class TwilioProvider(WhatsAppProvider):
+    name = 'twilio'
+
+    def __init__(self):
+        self.account_sid = getattr(settings, 'TWILIO_ACCOUNT_SID', None)
+        self.auth_token = getattr(settings, 'TWILIO_AUTH_TOKEN', None)
+        self.from_number = getattr(settings, 'TWILIO_WHATSAPP_NUMBER', None)
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from twilio.rest import Client
+            self._client = Client(self.account_sid, self.auth_token)
+        return self._client
+
+    def send(self, to: str, body: str) -> SendResult:
+        if not all([self.account_sid, self.auth_token, self.from_number]):
+            return SendResult(success=False, error="Credenciais Twilio não configuradas", retryable=False)
+        try:
+            message = self.client.messages.create(
+                from_=f'whatsapp:{self.from_number}',
+                body=body,
+                to=f'whatsapp:{to}',
+            )
+        except Exception as e:
+            status = getattr(e, 'status', None)
+            return SendResult(success=False, error=str(e), retryable=status is None or status in RETRYABLE_STATUSES)
+        return SendResult(success=True, message_id=message.sid)
+
+
+class EvolutionProvider(WhatsAppProvider):
+    name = 'evolution'
+
+    def __init__(self):
+        self.api_url = getattr(settings, 'EVOLUTION_API_URL', None)
+        self.api_key = getattr(settings, 'EVOLUTION_API_KEY', None)
+        self.instance = getattr(settings, 'EVOLUTION_INSTANCE', None)
+
+    def send(self, to: str, body: str) -> SendResult:
+        if not all([self.api_url, self.api_key, self.instance]):
+            return SendResult(success=False, error="Credenciais Evolution API não configuradas", retryable=False)
+        try:
+            response = get_session(self.name).post(
+                f"{self.api_url}/message/sendText/{self.instance}",
+                headers={'apikey': self.api_key},
+                json={'number': to.replace('+', ''), 'text': body},
+                timeout=10,
+            )
+        except (requests.RequestException, CircuitOpenError) as e:
+            return SendResult(success=False, error=str(e))
+        if response.status_code not in (200, 201):
+            return SendResult(
+                success=False,
+                error=f"Evolution API returned {response.status_code}",
+                retryable=response.status_code in RETRYABLE_STATUSES,
+            )
+        try:
+            message_id = response.json().get('key', {}).get('id', '')
+        except ValueError:
+            message_id = ''
+        return SendResult(success=True, message_id=message_id)
+
+
+PROVIDERS = {provider.name: provider for provider in (MockProvider, TwilioProvider, EvolutionProvider)}
+
+
+def get_provider(name: str) -> WhatsAppProvider:
+    """Shared provider instance for this process."""
+    with _lock:
+        if name not in _providers:
+            if name not in PROVIDERS:
+                raise ValueError(f"Unknown WhatsApp provider: {name}")
+            _providers[name] = PROVIDERS[name]()
+        return _providers[name]
+
+
+def reset_providers() -> None:
+    """Drop the cached providers (settings changes in tests)."""
+    with _lock:
+        _providers.clear()
@@ -0,0 +1,225 @@
+"""
+WhatsApp triage: the intake flow (apps.intake.services.flow) as a chat.
+
+A small state machine per conversation:
+
+    (new) -> NAME -> CASE_TYPE -> DETAILS -> Lead created (session dropped)
+
+State is a compact dict ({'s': state, 'd': answers}) kept in the cache
+under `wa:triage:<conversation id>`, so answering a message costs no query.
+Per inbox batch, sessions missing from the cache are read back from
+TriageSession in one query, in-progress sessions are saved there with one
+upsert (the fallback if the cache is cleared or evicted), and all replies
+are queued with one bulk_create. At DETAILS completion the answers are
+scored with ClaimScore and the Lead is created, exactly as in the wizard;
+that conversation is closed in its own transaction (lead, link, session,
+replies) so it is never triaged twice.
+
+Only conversations not yet linked to a lead or client are triaged; once a
+lead exists the thread is left to the team. Messages of one conversation
+are expected to be processed by a single inbox processor at a time.
+"""
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.intake.models import Lead, TriageSession
+from apps.intake.services.flow import Question, complete_triage, question_for
+from apps.whatsapp.models import Conversation, ConversationMessage, OutboundMessage
+
+NAME, CASE_TYPE, DETAILS = 'name', 'case_type', 'details'
+RESTART_WORDS = {'menu', 'reiniciar', 'recomecar'}
+SESSION_PREFIX = 'wa-'  # TriageSession.session_id of WhatsApp conversations
+DEFAULT_TTL = 60 * 60 * 24
+
+GREETING = (
+    "Olá! Aqui é o atendimento do escritório da Dra. Alessandra M. Donadon. "
+    "Vou fazer algumas perguntas rápidas para entender seu caso.\n\nQual é o seu nome?"
+)
+INVALID_CHOICE = "Não entendi. Responda com o número de uma das opções:"
+
+
+def cache_key(conversation_id: int) -> str:
+    return f'wa:triage:{conversation_id}'
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text.strip().lower())
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def _menu(choices: Iterable[Tuple[str, str]]) -> str:
+    return '\n'.join(f"{number}. {label}" for number, (_, label) in enumerate(choices, start=1))
+
+
+def _pick(text: str, choices: Tuple[Tuple[str, str], ...]) -> Optional[str]:
+    """Choice value for '2', 'sim', 'Sim, com certeza', 'Lipedema'..., or None."""
+    answer = _normalize(text).rstrip('.!')
+    if answer.isdigit() and 1 <= int(answer) <= len(choices):
+        return choices[int(answer) - 1][0]
+    first_word = re.split(r'\W+', answer)[0]
+    for value, label in choices:
+        if answer and (first_word == _normalize(value) or _normalize(label).startswith(answer)):
+            return value
+    return None
+
+
+def _ask(question: Question) -> str:
+    if not question.choices:
+        return question.text
+    return f"{question.text}\n{_menu(question.choices)}"
+
+
+CASE_TYPES = tuple(Lead.CASE_TYPES)
+
+
+def step(session: Optional[dict], text: str) -> Tuple[dict, str, bool]:
+    """
+    Advance a session with one message.
+
+    Returns (session, reply, completed). A None session starts the triage.
+    """
+    if session is None or _normalize(text) in RESTART_WORDS:
+        return {'s': NAME, 'd': {}}, GREETING, False
+
+    state, data = session['s'], session['d']
+    if state == NAME:
+        name = ' '.join(text.split())[:255]
+        if not name:
+            return session, "Qual é o seu nome?", False
+        data['name'] = name
+        session['s'] = CASE_TYPE
+        return session, f"Obrigada, {name}! Sobre qual assunto você precisa de ajuda?\n{_menu(CASE_TYPES)}", False
+
+    if state == CASE_TYPE:
+        case_type = _pick(text, CASE_TYPES)
+        if case_type is None:
+            return session, f"{INVALID_CHOICE}\n{_menu(CASE_TYPES)}", False
+        data['case_type'] = case_type
+        session['s'] = DETAILS
+        return session, _ask(question_for(case_type)), False
+
+    question = question_for(data['case_type'])
+    if question.choices:
+        answer = _pick(text, question.choices)
+        if answer is None:
+            return session, f"{INVALID_CHOICE}\n{_menu(question.choices)}", False
+    else:
+        answer = text.strip()
+        if not answer:
+            return session, question.text, False
+    data[question.key] = answer
+    return session, '', True
+
+
+def _final_reply(lead: Lead) -> str:
+    reply = (
+        f"Obrigada, {lead.full_name}! Seus dados foram enviados diretamente para a "
+        "Dra. Alessandra M. Donadon. Em breve entraremos em contato por aqui."
+    )
+    if lead.is_qualified:
+        reply += "\n\n*Prioridade Alta:* identificamos urgência no seu relato."
+    return reply
+
+
+class TriageEngine:
+    """Runs the triage for a batch of inbound messages."""
+
+    def __init__(self):
+        self.ttl = getattr(settings, 'WHATSAPP_TRIAGE_TTL', DEFAULT_TTL)
+        self.provider = getattr(settings, 'WHATSAPP_PROVIDER', 'mock')
+
+    def handle(self, messages: List[ConversationMessage]) -> List[Lead]:
+        """Answer the messages of conversations in triage. Returns the leads created."""
+        threads: Dict[int, List[ConversationMessage]] = OrderedDict()
+        conversations: Dict[int, Conversation] = {}
+        for message in messages:
+            conversation = message.conversation
+            if message.direction != 'IN' or conversation.lead_id or conversation.client_id:
+                continue
+            threads.setdefault(conversation.id, []).append(message)
+            conversations[conversation.id] = conversation
+        if not threads:
+            return []
+
+        sessions = self._load(list(threads))
+        replies, leads = [], []
+        for conversation_id, thread in threads.items():
+            conversation = conversations[conversation_id]
+            session = sessions.get(conversation_id)
+            thread_replies = []
+            for message in sorted(thread, key=lambda m: (m.sent_at, m.id or 0)):
+                session, reply, completed = step(session, message.body)
+                if completed:
+                    leads.append(self._complete(conversation, session, thread_replies))
+                    thread_replies, session = [], None
+                    break  # Lead created: the rest of the thread is for the team
+                if reply:
+                    thread_replies.append(self._reply(conversation, reply))
+            replies += thread_replies
+            sessions[conversation_id] = session
+
+        self._save(sessions)
+        OutboundMessage.objects.bulk_create(replies, batch_size=500)
+        return leads
+
+    def _reply(self, conversation: Conversation, body: str) -> OutboundMessage:
+        return OutboundMessage(
+            provider=self.provider,
+            kind='TEXT',
+            to_number=conversation.phone,
+            body=body,
+            max_attempts=getattr(settings, 'WHATSAPP_MAX_ATTEMPTS', 5),
+        )
+
+    def _complete(self, conversation: Conversation, session: dict, replies: List[OutboundMessage]) -> Lead:
+        """
+        Create the lead, link it and close the session in one transaction, so
+        a failure later in the batch cannot leave the session open (and the
+        next message create a second lead).
+        """
+        with transaction.atomic():
+            lead = complete_triage(dict(session['d'], channel='whatsapp'), conversation.phone, source='WhatsApp')
+            conversation.lead = lead
+            conversation.save(update_fields=['lead'])
+            TriageSession.objects.filter(session_id=f'{SESSION_PREFIX}{conversation.id}').delete()
+            OutboundMessage.objects.bulk_create(replies + [self._reply(conversation, _final_reply(lead))])
+        cache.delete(cache_key(conversation.id))
+        return lead
+
+    def _load(self, conversation_ids: List[int]) -> Dict[int, dict]:
+        """Sessions from the cache; misses are read from TriageSession in one query."""
+        cached = cache.get_many([cache_key(i) for i in conversation_ids])
+        sessions = {i: cached[cache_key(i)] for i in conversation_ids if cache_key(i) in cached}
+        missing = {f'{SESSION_PREFIX}{i}': i for i in conversation_ids if i not in sessions}
+        if missing:
+            for session_id, data in TriageSession.objects.filter(
+                session_id__in=list(missing)
+            ).values_list('session_id', 'temp_data'):
+                sessions[missing[session_id]] = {'s': data.pop('_state', NAME), 'd': data}
+        return sessions
+
+    def _save(self, sessions: Dict[int, Optional[dict]]) -> None:
+        """Store the sessions still in progress (finished ones were dropped by _complete)."""
+        active = {i: session for i, session in sessions.items() if session is not None}
+        if not active:
+            return
+        cache.set_many({cache_key(i): session for i, session in active.items()}, self.ttl)
+        TriageSession.objects.bulk_create(
+            [
+                TriageSession(
+                    session_id=f'{SESSION_PREFIX}{i}',
+                    current_step=2 if session['s'] == DETAILS else 1,
+                    temp_data={**session['d'], '_state': session['s']},
+                )
+                for i, session in active.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['session_id'],
+            update_fields=['current_step', 'temp_data', 'updated_at'],
+        )
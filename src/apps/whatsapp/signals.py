@@ -0,0 +1,29 @@
+"""
+Signals of the WhatsApp inbox.
+
+messages_received is sent (after commit) for every processed inbox batch,
+with `messages`: the new inbound ConversationMessage rows, conversation
+loaded. The triage engine answers conversations that have no lead yet.
+"""
+import logging
+
+from django.conf import settings
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+messages_received = Signal()
+
+
+def run_triage(sender, messages, **kwargs):
+    if not getattr(settings, 'WHATSAPP_TRIAGE_ENABLED', True):
+        return
+    from apps.whatsapp.services.triage import TriageEngine
+    try:
+        TriageEngine().handle(messages)
+    except Exception:
+        # Keep the inbox moving; the messages stay in their threads for the team
+        logger.exception(f"WhatsApp triage failed for a batch of {len(messages)} messages")
+
+
+messages_received.connect(run_triage, dispatch_uid='whatsapp_run_triage')
@@ -0,0 +1,469 @@
+"""
+Tests for the outbound WhatsApp queue.
+"""
+import base64
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.intake.models import Lead, TriageSession
+from apps.whatsapp.models import Conversation, ConversationMessage, InboundEvent, OutboundMessage
+from apps.whatsapp.services.inbound import InboxProcessor
+from apps.whatsapp.services.notification import WhatsAppNotificationService
+from apps.whatsapp.services.outbound import MessageSender, enqueue_message, update_delivery_status
+from apps.whatsapp.services.providers import EvolutionProvider, SendResult
+from apps.whatsapp.services.triage import TriageEngine, step
+from apps.whatsapp.signals import messages_received
+from core.security.fields import blind_index
+
+
+def fake_provider(*results):
+    provider = Mock()
+    provider.send.side_effect = list(results)
+    return provider
+
+
+@override_settings(WHATSAPP_PER_NUMBER_INTERVAL=0)
+class OutboundQueueTestCase(TestCase):
+    """Tests for enqueueing and sending messages."""
+
+    def test_enqueue_does_not_call_the_provider(self):
+        with patch('apps.whatsapp.services.outbound.get_provider') as mock_get_provider:
+            message = enqueue_message('(19) 99999-8888', 'Olá', provider='twilio')
+        mock_get_provider.assert_not_called()
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.to_number, message.body), ('QUEUED', '(19) 99999-8888', 'Olá'))
+        self.assertTrue(OutboundMessage.objects.filter(to_number__blind='+5519999998888').exists())
+
+    @patch('apps.whatsapp.services.outbound.get_provider')
+    def test_sender_records_provider_id(self, mock_get_provider):
+        mock_get_provider.return_value = fake_provider(SendResult(success=True, message_id='SM123'))
+        message = enqueue_message('+5519999998888', 'Olá', provider='twilio')
+
+        processed = MessageSender(concurrency=1).run(once=True)
+
+        self.assertEqual(processed, 1)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.provider_message_id, message.attempts), ('SENT', 'SM123', 1))
+        self.assertIsNotNone(message.sent_at)
+        mock_get_provider.return_value.send.assert_called_once_with('+5519999998888', 'Olá')
+
+    @patch('apps.whatsapp.services.outbound.get_provider')
+    def test_transient_failure_retries_with_backoff_then_fails(self, mock_get_provider):
+        mock_get_provider.return_value = fake_provider(
+            SendResult(success=False, error="503"), SendResult(success=False, error="503"),
+        )
+        message = enqueue_message('+5519999998888', 'Olá', provider='evolution')
+        OutboundMessage.objects.update(max_attempts=2)
+
+        MessageSender(concurrency=1).run(once=True)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.last_error), ('QUEUED', 1, '503'))
+        self.assertGreater(message.next_attempt_at, timezone.now())
+
+        # Not due yet: nothing is claimed
+        self.assertEqual(MessageSender(concurrency=1).run_once(), 0)
+
+        OutboundMessage.objects.update(next_attempt_at=timezone.now())
+        MessageSender(concurrency=1).run(once=True)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('FAILED', 2))
+
+    @patch('apps.whatsapp.services.outbound.get_provider')
+    def test_permanent_failure_is_not_retried(self, mock_get_provider):
+        mock_get_provider.return_value = fake_provider(SendResult(success=False, error="invalid number", retryable=False))
+        message = enqueue_message('+5519999998888', 'Olá', provider='twilio')
+
+        MessageSender(concurrency=1).run(once=True)
+
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('FAILED', 1))
+
+    @patch('apps.whatsapp.services.outbound.get_provider')
+    def test_per_number_interval_defers_in_order(self, mock_get_provider):
+        mock_get_provider.return_value = fake_provider(*[SendResult(success=True, message_id=f'm{i}') for i in range(3)])
+        first = enqueue_message('(19) 99999-8888', 'primeira')
+        second = enqueue_message('+55 19 99999-8888', 'segunda')
+        other = enqueue_message('+5511988887777', 'outro número')
+
+        with override_settings(WHATSAPP_PER_NUMBER_INTERVAL=30):
+            sender = MessageSender(concurrency=1)
+            self.assertEqual(sender.run_once(), 3)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((first.status, other.status), ('SENT', 'SENT'))
+        self.assertEqual((second.status, second.attempts), ('QUEUED', 0))
+        self.assertGreater(second.next_attempt_at, timezone.now() + timedelta(seconds=25))
+
+    @patch('apps.whatsapp.services.outbound.get_provider')
+    def test_stale_sending_counts_an_attempt(self, mock_get_provider):
+        """Test that a message left SENDING by a dead sender uses up an attempt when reclaimed."""
+        mock_get_provider.return_value = fake_provider(SendResult(success=False, error="503"))
+        retried = enqueue_message('+5519999998888', 'Olá', provider='evolution')
+        exhausted = enqueue_message('+5511988887777', 'Olá', provider='evolution')
+        stale = timezone.now() - timedelta(hours=1)
+        OutboundMessage.objects.update(status='SENDING', locked_at=stale, max_attempts=3)
+        OutboundMessage.objects.filter(id=exhausted.id).update(attempts=2)
+
+        MessageSender(concurrency=1).run_once()
+
+        retried.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual((retried.status, retried.attempts), ('QUEUED', 2))
+        self.assertEqual((exhausted.status, exhausted.attempts), ('FAILED', 3))
+        self.assertIn('lock timeout', exhausted.last_error)
+
+    @override_settings(WHATSAPP_PER_NUMBER_INTERVAL=30)
+    def test_per_number_gaps_are_pruned(self):
+        sender = MessageSender(concurrency=1)
+        sender._last_sent = {'old': -1e9, 'recent': 1e12}
+        sender._throttle_numbers([])
+        self.assertEqual(list(sender._last_sent), ['recent'])
+
+    @override_settings(WHATSAPP_RATE_LIMITS={'twilio': 2})
+    def test_account_rate_limiter_per_provider(self):
+        sender = MessageSender(concurrency=1)
+        self.assertEqual(sender._limiter('twilio').rate, 2)
+        self.assertIsNone(sender._limiter('mock'))
+        self.assertIs(sender._limiter('twilio'), sender._limiter('twilio'))
+
+    def test_delivery_status_only_moves_forward(self):
+        message = enqueue_message('+5519999998888', 'Olá')
+        OutboundMessage.objects.filter(id=message.id).update(status='SENT', provider_message_id='wamid.1')
+
+        self.assertEqual(update_delivery_status('wamid.1', 'READ'), 1)
+        self.assertEqual(update_delivery_status('wamid.1', 'DELIVERED'), 0)
+        self.assertEqual(update_delivery_status('unknown', 'DELIVERED'), 0)
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'READ')
+        self.assertIsNotNone(message.read_at)
+
+    def test_run_whatsapp_sender_command(self):
+        enqueue_message('+5519999998888', 'Olá', provider='mock')
+        out = StringIO()
+
+        call_command('run_whatsapp_sender', '--once', '--concurrency', '1', stdout=out)
+
+        self.assertIn('1 messages processed', out.getvalue())
+        self.assertEqual(OutboundMessage.objects.get().status, 'SENT')
+
+
+class NotificationQueueTestCase(TestCase):
+    """Tests for WhatsAppNotificationService going through the queue."""
+
+    def test_error_alert_is_queued(self):
+        service = WhatsAppNotificationService(provider='mock')
+        self.assertTrue(service.send_error_notification('abc', 'ValueError', '/x', 'anon'))
+        message = OutboundMessage.objects.get()
+        self.assertEqual((message.kind, message.to_number), ('ERROR_ALERT', service.decisor_number))
+        self.assertIn('ValueError', message.body)
+
+    @patch('apps.whatsapp.services.notification.get_provider')
+    @patch('apps.whatsapp.services.notification.enqueue_message', side_effect=DatabaseError)
+    def test_error_alert_is_sent_directly_without_database(self, mock_enqueue, mock_get_provider):
+        mock_get_provider.return_value = fake_provider(SendResult(success=True))
+        service = WhatsAppNotificationService(provider='mock')
+
+        self.assertTrue(service.send_error_digest('ValueError', '/x', 3, 5))
+        mock_get_provider.return_value.send.assert_called_once()
+
+
+class EvolutionProviderTestCase(TestCase):
+
+    @override_settings(EVOLUTION_API_URL='https://evo.test', EVOLUTION_API_KEY='k', EVOLUTION_INSTANCE='i')
+    @patch('apps.whatsapp.services.providers.get_session')
+    def test_uses_pooled_session_and_classifies_errors(self, mock_get_session):
+        ok, rejected = Mock(status_code=201), Mock(status_code=400)
+        ok.json.return_value = {'key': {'id': 'wamid.9'}}
+        mock_get_session.return_value.post.side_effect = [ok, rejected]
+        provider = EvolutionProvider()
+
+        self.assertEqual(provider.send('+5519999998888', 'Olá').message_id, 'wamid.9')
+        result = provider.send('+5519999998888', 'Olá')
+        self.assertFalse(result.success or result.retryable)
+        mock_get_session.assert_called_with('evolution')
+        self.assertEqual(mock_get_session.return_value.post.call_args.kwargs['json']['number'], '5519999998888')
+
+
+def evolution_message(message_id, jid='551999998888@s.whatsapp.net', text='Olá', timestamp=1767225600):
+    return {
+        'event': 'messages.upsert',
+        'data': {
+            'key': {'remoteJid': jid, 'fromMe': False, 'id': message_id},
+            'pushName': 'Maria',
+            'message': {'conversation': text},
+            'messageTimestamp': timestamp,
+        },
+    }
+
+
+class InboundWebhookTestCase(TestCase):
+    """Tests for the webhook ingest endpoint."""
+
+    url = '/api/whatsapp/webhook'
+
+    def post_json(self, payload, **headers):
+        return self.client.post(self.url, data=json.dumps(payload), content_type='application/json', **headers)
+
+    @override_settings(DEBUG=True)
+    def test_events_are_stored_once(self):
+        payload = [evolution_message('A1'), evolution_message('A2')]
+
+        response = self.post_json(payload)
+        self.assertEqual(response.json(), {'received': 2})
+        self.post_json([evolution_message('A2')])
+
+        self.assertEqual(InboundEvent.objects.count(), 2)
+        self.assertFalse(InboundEvent.objects.filter(processed_at__isnull=False).exists())
+
+    @override_settings(WHATSAPP_PROVIDER='evolution', WHATSAPP_WEBHOOK_SECRET='s3cret')
+    def test_signed_payloads_only(self):
+        body = json.dumps(evolution_message('B1')).encode()
+        signature = 'sha256=' + hmac.new(b's3cret', body, hashlib.sha256).hexdigest()
+
+        unsigned = self.client.post(self.url, data=body, content_type='application/json')
+        forged = self.client.post(self.url, data=body, content_type='application/json',
+                                  HTTP_X_HUB_SIGNATURE_256='sha256=' + '0' * 64)
+        signed = self.client.post(self.url, data=body, content_type='application/json',
+                                  HTTP_X_HUB_SIGNATURE_256=signature)
+
+        self.assertEqual((unsigned.status_code, forged.status_code, signed.status_code), (403, 403, 200))
+        self.assertEqual(InboundEvent.objects.get().event_id, 'B1')
+
+    @override_settings(WHATSAPP_PROVIDER='twilio', TWILIO_AUTH_TOKEN='token',
+                       WHATSAPP_WEBHOOK_URL='https://example.com/api/whatsapp/webhook')
+    def test_twilio_signature(self):
+        form = {'MessageSid': 'SM1', 'From': 'whatsapp:+5519999998888', 'Body': 'Oi'}
+        data = 'https://example.com/api/whatsapp/webhook' + ''.join(f'{k}{form[k]}' for k in sorted(form))
+        signature = base64.b64encode(hmac.new(b'token', data.encode(), hashlib.sha1).digest()).decode()
+
+        self.assertEqual(self.client.post(self.url, form, HTTP_X_TWILIO_SIGNATURE='bad').status_code, 403)
+        self.assertEqual(self.client.post(self.url, form, HTTP_X_TWILIO_SIGNATURE=signature).status_code, 200)
+        self.assertEqual(InboundEvent.objects.get().event_id, 'SM1')
+
+    @override_settings(DEBUG=True)
+    def test_invalid_json_is_rejected(self):
+        response = self.client.post(self.url, data='not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(DEBUG=False, WHATSAPP_PROVIDER='mock', WHATSAPP_WEBHOOK_SECRET='')
+    def test_unsigned_mock_payloads_rejected_outside_debug(self):
+        response = self.post_json([evolution_message('C1')])
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(InboundEvent.objects.exists())
+
+
+class InboxProcessorTestCase(TestCase):
+    """Tests for turning webhook events into conversations."""
+
+    def ingest(self, *payloads, provider='mock'):
+        InboundEvent.objects.bulk_create([
+            InboundEvent(provider=provider, event_id=str(index), payload=json.dumps(payload))
+            for index, payload in enumerate(payloads)
+        ])
+
+    def test_messages_are_threaded_and_linked_by_phone(self):
+        from apps.clients.models import Client
+        from apps.intake.models import Lead
+
+        lead = Lead.objects.create(full_name="Maria", case_type='CIVIL', contact_info='(19) 99999-8888')
+        client = Client.objects.create(full_name="Maria", cpf_cnpj='111.222.333-44', phone='+55 19 99999-8888')
+        self.ingest(
+            evolution_message('M1', text='Oi'),
+            evolution_message('M2', text='Preciso de ajuda', timestamp=1767225660),
+            evolution_message('M3', jid='5511988887777@s.whatsapp.net'),
+        )
+        received = []
+        messages_received.connect(lambda sender, messages, **kwargs: received.extend(messages), weak=False,
+                                  dispatch_uid='test_inbox_received')
+        self.addCleanup(messages_received.disconnect, dispatch_uid='test_inbox_received')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(InboxProcessor().run(once=True), 3)
+
+        conversation = Conversation.objects.get(phone_bidx=blind_index('+5519999998888', 'phone'))
+        self.assertEqual((conversation.lead, conversation.client), (lead, client))
+        self.assertEqual((conversation.message_count, conversation.contact_name), (2, 'Maria'))
+        self.assertEqual([m.body for m in conversation.messages.all()], ['Oi', 'Preciso de ajuda'])
+        self.assertEqual(Conversation.objects.count(), 2)
+        self.assertEqual(len(received), 3)
+        self.assertFalse(InboundEvent.objects.filter(processed_at__isnull=True).exists())
+
+    def test_later_batches_reuse_the_conversation(self):
+        self.ingest(evolution_message('M1'))
+        InboxProcessor().run(once=True)
+        InboundEvent.objects.create(provider='mock', event_id='M2', payload=json.dumps(evolution_message('M2')))
+        InboxProcessor().run(once=True)
+
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.message_count, 2)
+
+    def test_status_callbacks_update_outbound_messages(self):
+        message = enqueue_message('+5519999998888', 'Olá')
+        OutboundMessage.objects.filter(id=message.id).update(status='SENT', provider_message_id='SM9')
+        self.ingest({'MessageSid': 'SM9', 'MessageStatus': 'delivered'}, provider='twilio')
+
+        InboxProcessor().run(once=True)
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'DELIVERED')
+        self.assertFalse(Conversation.objects.exists())
+
+    def test_unreadable_event_is_kept_with_error(self):
+        self.ingest({'event': 'messages.upsert'})
+
+        InboxProcessor().run(once=True)
+
+        event = InboundEvent.objects.get()
+        self.assertIsNotNone(event.processed_at)
+        self.assertIn('KeyError', event.error)
+
+    def test_ignores_own_and_group_messages(self):
+        own = evolution_message('M1')
+        own['data']['key']['fromMe'] = True
+        self.ingest(own, evolution_message('M2', jid='1203630@g.us'))
+
+        self.assertEqual(InboxProcessor().run(once=True), 2)
+        self.assertFalse(Conversation.objects.exists())
+
+    def test_process_whatsapp_inbox_command(self):
+        self.ingest(evolution_message('M1'))
+        out = StringIO()
+
+        call_command('process_whatsapp_inbox', '--once', stdout=out)
+
+        self.assertIn('1 events processed', out.getvalue())
+        self.assertEqual(ConversationMessage.objects.count(), 1)
+
+
+class TriageStateMachineTestCase(TestCase):
+    """Tests for the triage steps (no database)."""
+
+    def test_full_flow(self):
+        session, reply, done = step(None, 'Oi')
+        self.assertIn('Qual é o seu nome?', reply)
+        session, reply, done = step(session, '  Maria   Silva ')
+        self.assertIn('1. Lipedema/Saúde', reply)
+        session, reply, done = step(session, 'superendividamento')
+        self.assertIn('Suas dívidas comprometem o sustento básico?', reply)
+        session, reply, done = step(session, '1')
+
+        self.assertTrue(done)
+        self.assertEqual(session['d'], {'name': 'Maria Silva', 'case_type': 'SUPER', 'urgencia': 'urgente'})
+
+    def test_invalid_choice_repeats_the_question(self):
+        session = {'s': 'details', 'd': {'name': 'Ana', 'case_type': 'LIPEDEMA'}}
+        session, reply, done = step(session, 'talvez')
+        self.assertFalse(done)
+        self.assertIn('1. Sim, já tenho negativa', reply)
+        session, reply, done = step(session, 'Não')
+        self.assertTrue(done)
+        self.assertEqual(session['d']['negativa'], 'nao')
+
+    def test_restart(self):
+        session, reply, done = step({'s': 'case_type', 'd': {'name': 'Ana'}}, 'Menu')
+        self.assertEqual(session, {'s': 'name', 'd': {}})
+
+
+class WhatsAppTriageTestCase(TestCase):
+    """Tests for the triage engine driven by the inbox processor."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.sequence = 0
+
+    def receive(self, *texts, jid='5519988887777@s.whatsapp.net'):
+        events = []
+        for text in texts:
+            self.sequence += 1
+            payload = evolution_message(f'T{self.sequence}', jid=jid, text=text, timestamp=1767225600 + self.sequence)
+            events.append(InboundEvent(provider='mock', event_id=f'T{self.sequence}', payload=json.dumps(payload)))
+        InboundEvent.objects.bulk_create(events)
+        with self.captureOnCommitCallbacks(execute=True):
+            InboxProcessor().run(once=True)
+
+    def replies(self):
+        return [message.body for message in OutboundMessage.objects.filter(kind='TEXT').order_by('id')]
+
+    def test_conversation_creates_a_scored_lead(self):
+        self.receive('Olá')
+        self.receive('Carla Souza')
+        self.receive('1')
+        self.assertTrue(TriageSession.objects.filter(session_id__startswith='wa-').exists())
+        self.receive('sim, é urgente')
+
+        lead = Lead.objects.get()
+        self.assertEqual((lead.full_name, lead.case_type, lead.source), ('Carla Souza', 'LIPEDEMA', 'WhatsApp'))
+        self.assertEqual(lead.contact_info, '+5519988887777')
+        self.assertEqual(lead.triage_data['negativa'], 'sim')
+        self.assertGreater(lead.score, 60)
+        self.assertTrue(lead.is_qualified)
+        self.assertEqual(Conversation.objects.get().lead, lead)
+        self.assertFalse(TriageSession.objects.exists())
+
+        replies = self.replies()
+        self.assertEqual(len(replies), 4)
+        self.assertIn('Obrigada, Carla Souza!', replies[-1])
+        # The qualified-lead alert goes to the decision maker through the same queue
+        self.assertTrue(OutboundMessage.objects.filter(kind='LEAD_ALERT').exists())
+
+        # Once the lead exists, the thread is left to the team
+        self.receive('Mais uma coisa')
+        self.assertEqual(len(self.replies()), 4)
+
+    def test_one_session_write_per_batch(self):
+        self.receive('Oi', 'João', '4')
+
+        session = TriageSession.objects.get()
+        self.assertEqual(session.temp_data, {'name': 'João', 'case_type': 'CIVIL', '_state': 'details'})
+        self.assertEqual(self.replies()[-1], 'Resuma brevemente seu caso:')
+
+    def test_session_survives_cache_loss(self):
+        self.receive('Oi', 'João')
+        cache.clear()
+        self.receive('6')
+        self.receive('Preciso revisar um contrato')
+
+        lead = Lead.objects.get()
+        self.assertEqual((lead.full_name, lead.case_type), ('João', 'OTHER'))
+        self.assertEqual(lead.triage_data['description'], 'Preciso revisar um contrato')
+
+    def test_failure_after_lead_creation_does_not_duplicate_it(self):
+        self.receive('Oi', 'João', '4')
+
+        # The batch that completes João's triage fails afterwards (e.g. writing other sessions)
+        with patch.object(TriageEngine, '_save', side_effect=DatabaseError("lost connection")):
+            self.receive('Preciso revisar um contrato')
+        self.receive('Mais uma coisa')
+
+        lead = Lead.objects.get()
+        self.assertEqual(Conversation.objects.get().lead, lead)
+        self.assertFalse(TriageSession.objects.exists())
+        self.assertIn('Obrigada, João!', self.replies()[-1])
+
+    def test_known_clients_are_not_triaged(self):
+        from apps.clients.models import Client
+
+        Client.objects.create(full_name="Cliente", cpf_cnpj='999.888.777-66', phone='(19) 98888-7777')
+        self.receive('Oi, tudo bem?')
+
+        self.assertEqual(self.replies(), [])
+        self.assertFalse(Lead.objects.exists())
+
+    @override_settings(WHATSAPP_TRIAGE_ENABLED=False)
+    def test_can_be_disabled(self):
+        self.receive('Oi')
+        self.assertEqual(self.replies(), [])
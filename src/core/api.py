@@ -44,6 +44,24 @@ def get_api():
     except Exception:
         pass
 
+    try:
+        from apps.analytics.api.router import router as analytics_router
+        _api.add_router("/analytics", analytics_router)
+    except Exception:
+        pass
+
+    try:
+        from core.search.router import router as search_router
+        _api.add_router("/search", search_router)
+    except Exception:
+        pass
+
+    try:
+        from apps.jobs.api.router import router as jobs_router
+        _api.add_router("/jobs", jobs_router)
+    except Exception:
+        pass
+
     # [MERGED] Add WhatsApp router here to avoid multiple NinjaAPI instances
     try:
         from apps.whatsapp.api import router as whatsapp_router
@@ -0,0 +1,14 @@
+"""
+Full-text search across clients, leads, cases and In Brief articles.
+
+Each searchable model keeps a `search_document` column (SearchDocumentField):
+lowercased, unaccented text built from its non-sensitive fields on save.
+On PostgreSQL it is indexed twice (see core.search.operations):
+
+- GIN on to_tsvector('portuguese', search_document), for ranked full-text
+  search with Portuguese stemming;
+- GIN trigram (pg_trgm) on search_document, for typo-tolerant names.
+
+Other databases (SQLite in local development) fall back to substring
+matching on the same column. See core.search.engine.
+"""
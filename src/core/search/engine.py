@@ -0,0 +1,165 @@
+"""
+Ranked search over the `search_document` columns.
+
+PostgreSQL: a row matches when its document matches the query as a
+Portuguese tsquery (every word, as a prefix) or, for typos, when the query
+is trigram-similar to a word of the document. Rank = ts_rank + trigram
+word similarity.
+
+Other databases: every word must appear as a substring of the document;
+rank is the number of word hits. Good enough for local development.
+"""
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.db import connection
+from django.db.models import F, FloatField, Func, Q, Value
+from django.urls import reverse
+
+from apps.clients.models import Client
+from apps.intake.models import Lead
+from apps.legal_cases.models import LegalCase
+from core.search.fields import SEARCH_CONFIG, normalize_search_text
+from in_brief.models import Article
+
+MAX_TERMS = 8
+WORD_PART = re.compile(r'[^\W_]+')
+
+
+class DocumentVector(Func):
+    """to_tsvector(config, search_document), spelled exactly as the GIN index expression."""
+    template = f"to_tsvector('{SEARCH_CONFIG}'::regconfig, %(expressions)s)"
+
+    def __init__(self, **extra):
+        from django.contrib.postgres.search import SearchVectorField
+        super().__init__(F('search_document'), output_field=SearchVectorField(), **extra)
+
+
+@dataclass(frozen=True)
+class SearchableType:
+    name: str
+    label: str
+    model: type
+    fields: tuple
+    title: Callable
+    subtitle: Callable
+    url: Callable
+    select_related: tuple = ()
+
+
+SEARCHABLE_TYPES: Dict[str, SearchableType] = {
+    entity.name: entity for entity in (
+        SearchableType(
+            name='client', label='Cliente', model=Client,
+            fields=('id', 'full_name', 'client_type', 'email'),
+            title=lambda obj: obj.full_name,
+            subtitle=lambda obj: obj.email or obj.get_client_type_display(),
+            url=lambda obj: reverse('admin_portal:client_detail', args=[obj.id]),
+        ),
+        SearchableType(
+            name='lead', label='Lead', model=Lead,
+            fields=('id', 'full_name', 'case_type', 'location'),
+            title=lambda obj: obj.full_name,
+            subtitle=lambda obj: ' · '.join(filter(None, [obj.get_case_type_display(), obj.location])),
+            url=lambda obj: reverse('admin_portal:lead_detail', args=[obj.id]),
+        ),
+        SearchableType(
+            name='case', label='Caso', model=LegalCase,
+            fields=('id', 'title', 'process_number', 'client__full_name'),
+            title=lambda obj: obj.title,
+            subtitle=lambda obj: ' · '.join(filter(None, [obj.process_number, obj.client.full_name])),
+            url=lambda obj: reverse('admin_portal:case_detail', args=[obj.id]),
+            select_related=('client',),
+        ),
+        SearchableType(
+            name='article', label='Artigo', model=Article,
+            fields=('id', 'title', 'summary', 'slug'),
+            title=lambda obj: obj.title,
+            subtitle=lambda obj: obj.summary[:120],
+            url=lambda obj: reverse('admin_portal:article_edit', args=[obj.id]),
+        ),
+    )
+}
+
+
+def query_terms(query: str) -> List[str]:
+    """
+    Normalized words of the query, split at any punctuation ('souza@gmail'
+    -> ['souza', 'gmail']) as search documents index e-mails. Alphanumeric
+    only, so they are safe in a raw tsquery.
+    """
+    return WORD_PART.findall(normalize_search_text(query))[:MAX_TERMS]
+
+
+def uses_full_text() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def filter_queryset(queryset, query: str):
+    """Rows of `queryset` matching `query`, annotated with `search_rank` (ordering untouched)."""
+    terms = query_terms(query)
+    if not terms:
+        return queryset.none()
+
+    if uses_full_text():
+        from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+        ts_query = SearchQuery(' & '.join(f'{term}:*' for term in terms), config=SEARCH_CONFIG, search_type='raw')
+        text = ' '.join(terms)
+        return queryset.alias(search_vector=DocumentVector()).filter(
+            Q(search_vector=ts_query) | Q(search_document__trigram_word_similar=text)
+        ).annotate(
+            search_rank=SearchRank(F('search_vector'), ts_query) + TrigramWordSimilarity(text, 'search_document'),
+        )
+
+    matches = Q()
+    for term in terms:
+        matches &= Q(search_document__contains=term)
+    return queryset.filter(matches).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def search(query: str, types: Optional[Iterable[str]] = None, limit: int = 20) -> List[Dict]:
+    """
+    Best matches across entity types, highest rank first.
+
+    Returns dicts with type, label, id, title, subtitle, url and rank.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+    selected = [SEARCHABLE_TYPES[name] for name in types] if types else list(SEARCHABLE_TYPES.values())
+
+    results = []
+    for entity in selected:
+        qs = entity.model._default_manager.all()
+        if entity.select_related:
+            qs = qs.select_related(*entity.select_related)
+        qs = filter_queryset(qs.only(*entity.fields, 'search_document'), query)
+        if uses_full_text():
+            hits = [(obj.search_rank, obj) for obj in qs.order_by('-search_rank', '-pk')[:limit]]
+        else:
+            hits = [(_substring_rank(obj.search_document, terms), obj) for obj in qs.order_by('-pk')[:limit * 5]]
+            hits = sorted(hits, key=lambda hit: hit[0], reverse=True)[:limit]
+        results += [
+            {
+                'type': entity.name,
+                'label': entity.label,
+                'id': obj.pk,
+                'title': entity.title(obj),
+                'subtitle': entity.subtitle(obj),
+                'url': entity.url(obj),
+                'rank': round(float(rank), 4),
+            }
+            for rank, obj in hits
+        ]
+    results.sort(key=lambda result: result['rank'], reverse=True)
+    return results[:limit]
+
+
+def _substring_rank(document: str, terms: List[str]) -> float:
+    words = document.split()
+    # Whole-word and prefix hits count more than matches inside a word
+    return float(sum(
+        3 if term in words else 2 if any(word.startswith(term) for word in words) else 1
+        for term in terms
+    ))
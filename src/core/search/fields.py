@@ -0,0 +1,106 @@
+import re
+import unicodedata
+
+from django.db import models
+from django.utils.html import strip_tags
+
+# PostgreSQL text search configuration (stemming, stop words)
+SEARCH_CONFIG = 'portuguese'
+
+# Tokens such as process numbers ("0001234-56.2024.8.26.0114") are also
+# indexed as digits only, so they match however they are typed.
+_NUMBERED_TOKEN = re.compile(r'\b\d[\d./-]*\d\b')
+# E-mail addresses are also indexed word by word ("maria.souza@gmail.com"
+# -> "maria souza gmail com"), the way core.search.engine.query_terms
+# splits the query, so any part of the address matches.
+_EMAIL_TOKEN = re.compile(r'\S+@\S+')
+_WORD_PART = re.compile(r'[^\W_]+')
+
+
+def normalize_search_text(value) -> str:
+    """Plain lowercase text without accents, markup or repeated whitespace."""
+    if not value:
+        return ''
+    text = strip_tags(str(value))
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.lower().split())
+
+
+def build_search_document(*values) -> str:
+    parts = [normalize_search_text(value) for value in values]
+    document = ' '.join(part for part in parts if part)
+    numbers = [re.sub(r'\D', '', token) for token in _NUMBERED_TOKEN.findall(document)]
+    parts = [part for token in _EMAIL_TOKEN.findall(document) for part in _WORD_PART.findall(token)]
+    words = set(document.split())
+    extra = list(dict.fromkeys(token for token in numbers + parts if token and token not in words))
+    return ' '.join([document] + extra) if extra else document
+
+
+class SearchDocumentField(models.TextField):
+    """
+    Normalized text of `sources`, used by core.search.engine.
+
+    Filled automatically on save and bulk_create, like BlindIndexField.
+    Writes that bypass Field.pre_save (QuerySet.update, bulk_update,
+    save(update_fields=...)) must include this column too, or be followed
+    by `manage.py rebuild_search_documents`.
+
+    Never list encrypted fields in `sources`: the document is plaintext.
+
+    Usage:
+        search_document = SearchDocumentField(sources=('title', 'description'))
+    """
+
+    def __init__(self, *args, sources=(), **kwargs):
+        self.sources = tuple(sources)
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('default', '')
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['sources'] = self.sources
+        for key, value in (('editable', False), ('blank', True), ('default', '')):
+            if kwargs.get(key, value) == value:
+                kwargs.pop(key, None)
+        return name, path, args, kwargs
+
+    def compute(self, instance) -> str:
+        return build_search_document(*(getattr(instance, source) for source in self.sources))
+
+    def pre_save(self, model_instance, add):
+        value = self.compute(model_instance)
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+def rebuild_search_documents(model, batch_size: int = 500) -> int:
+    """
+    Recompute `search_document` for every row of `model`.
+
+    Works with historical models too, so migrations can backfill with it.
+    Returns the number of rows whose document changed.
+    """
+    field = model._meta.get_field('search_document')
+    changed = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            model._default_manager.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .only('pk', field.attname, *field.sources)[:batch_size]
+        )
+        if not batch:
+            return changed
+        last_pk = batch[-1].pk
+        stale = []
+        for obj in batch:
+            document = field.compute(obj)
+            if document != getattr(obj, field.attname):
+                setattr(obj, field.attname, document)
+                stale.append(obj)
+        if stale:
+            model._default_manager.bulk_update(stale, [field.attname])
+            changed += len(stale)
@@ -0,0 +1,46 @@
+"""
+Migration operations for the search indexes (PostgreSQL only).
+
+The GIN indexes are created with raw SQL so the expression matches what
+core.search.engine queries exactly; on other databases they are skipped.
+"""
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from core.search.fields import SEARCH_CONFIG, rebuild_search_documents
+
+
+class PostgresOnlySQL(migrations.RunSQL):
+    """RunSQL that is a no-op outside PostgreSQL (SQLite in local development)."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def search_index_operations(app_label: str, model_name: str, table: str) -> list:
+    """Extension + full-text and trigram GIN indexes on `table`, and a backfill of existing rows."""
+
+    def backfill(apps, schema_editor):
+        rebuild_search_documents(apps.get_model(app_label, model_name))
+
+    return [
+        TrigramExtension(),
+        PostgresOnlySQL(
+            sql=[
+                f"CREATE INDEX IF NOT EXISTS {table}_search_fts ON {table} "
+                f"USING gin (to_tsvector('{SEARCH_CONFIG}'::regconfig, search_document))",
+                f"CREATE INDEX IF NOT EXISTS {table}_search_trgm ON {table} "
+                f"USING gin (search_document gin_trgm_ops)",
+            ],
+            reverse_sql=[
+                f"DROP INDEX IF EXISTS {table}_search_fts",
+                f"DROP INDEX IF EXISTS {table}_search_trgm",
+            ],
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+"""
+Django Ninja API for the unified search (GET /api/search/?q=...).
+"""
+from typing import Optional
+
+from ninja import Router
+
+from core.search.engine import SEARCHABLE_TYPES, search
+from core.security.roles import has_role
+
+router = Router()
+
+MAX_LIMIT = 50
+
+
+@router.get("/", response={200: dict, 400: dict, 403: dict})
+def unified_search(request, q: str = '', types: Optional[str] = None, limit: int = 20):
+    """
+    Ranked matches across clients, leads, cases and articles.
+    
+    Args:
+        q: Search text (accents and case are ignored)
+        types: Comma-separated subset of 'client', 'lead', 'case', 'article'
+        limit: Maximum number of results (up to 50)
+    """
+    user = request.user
+    if not (user.is_authenticated and (user.is_superuser or has_role(user, 'Manager', 'Secretary'))):
+        return 403, {"detail": "Acesso restrito"}
+    
+    selected = [name.strip() for name in types.split(',') if name.strip()] if types else None
+    unknown = [name for name in selected or [] if name not in SEARCHABLE_TYPES]
+    if unknown:
+        return 400, {"detail": f"Tipo desconhecido: {', '.join(unknown)}"}
+    
+    results = search(q, types=selected, limit=max(1, min(limit, MAX_LIMIT)))
+    return {"query": q, "count": len(results), "results": results}
@@ -0,0 +1,25 @@
+from django.db.models import Q
+
+
+class BlindIndexSearchMixin:
+    """
+    ModelAdmin mixin that lets the changelist search box match encrypted
+    fields by exact value through their BlindIndexField.
+
+    Usage:
+        class LeadAdmin(BlindIndexSearchMixin, admin.ModelAdmin):
+            search_fields = ('full_name',)
+            blind_search_fields = ('contact_info',)
+    """
+    blind_search_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        base_queryset = queryset
+        queryset, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        search_term = search_term.strip()
+        if search_term and self.blind_search_fields:
+            blind_q = Q()
+            for field_name in self.blind_search_fields:
+                blind_q |= Q(**{f"{field_name}__blind": search_term})
+            queryset = queryset | base_queryset.filter(blind_q)
+        return queryset, may_have_duplicates
@@ -1,38 +1,529 @@
+from collections import OrderedDict
+from functools import lru_cache
+from asgiref.local import Local
 from django.db import models
-from cryptography.fernet import Fernet
+from django.db.models import Lookup
+from django.db.models.expressions import Col
+from django.db.models.query_utils import DeferredAttribute
+from django.core.exceptions import FieldError, EmptyResultSet
+from django.core.signals import request_started, request_finished
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
 from django.conf import settings
 import base64
+import hashlib
+import hmac
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+
+# ============ DECRYPTION CACHE ============
+
+class DecryptionCache:
+    """
+    Bounded LRU of ciphertext -> plaintext.
+
+    Scoped to the current thread/async context and cleared at the start and
+    end of every request, so plaintext never outlives the request that read it.
+    Size comes from settings.ENCRYPTION_CACHE_SIZE (0 disables caching).
+    """
+
+    def __init__(self):
+        self._local = Local()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self) -> int:
+        return getattr(settings, 'ENCRYPTION_CACHE_SIZE', 1024)
+
+    def _store(self) -> OrderedDict:
+        store = getattr(self._local, 'store', None)
+        if store is None:
+            store = OrderedDict()
+            self._local.store = store
+        return store
+
+    def get(self, ciphertext: str):
+        store = self._store()
+        if ciphertext in store:
+            store.move_to_end(ciphertext)
+            self.hits += 1
+            return store[ciphertext]
+        self.misses += 1
+        return None
+
+    def set(self, ciphertext: str, plaintext: str) -> None:
+        if self.maxsize <= 0:
+            return
+        store = self._store()
+        store[ciphertext] = plaintext
+        store.move_to_end(ciphertext)
+        while len(store) > self.maxsize:
+            store.popitem(last=False)
+
+    def clear(self, **kwargs) -> None:
+        self._local.store = OrderedDict()
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+
+decryption_cache = DecryptionCache()
+request_started.connect(decryption_cache.clear, dispatch_uid='encryption_cache_request_started')
+request_finished.connect(decryption_cache.clear, dispatch_uid='encryption_cache_request_finished')
+
+
+# ============ KEYS ============
+
+class DecryptionError(Exception):
+    """A Fernet token that none of the configured keys can decrypt."""
+
+
+def _encryption_keys() -> tuple:
+    if not hasattr(settings, 'ENCRYPTION_KEY'):
+        # Generate a key if not present (for dev/test simplicity, though ideally should be from env)
+        settings.ENCRYPTION_KEY = Fernet.generate_key()
+    previous = getattr(settings, 'ENCRYPTION_KEYS_PREVIOUS', [])
+    return tuple(k.encode() if isinstance(k, str) else k for k in [settings.ENCRYPTION_KEY, *previous])
+
+
+@lru_cache(maxsize=4)
+def _build_fernet(keys: tuple) -> MultiFernet:
+    return MultiFernet([Fernet(key) for key in keys])
+
+
+def get_fernet() -> MultiFernet:
+    """
+    MultiFernet over settings.ENCRYPTION_KEY followed by ENCRYPTION_KEYS_PREVIOUS.
+
+    Encrypts with the current key and decrypts with any of them, so a key
+    can be rotated without downtime (see `manage.py rotate_encryption_keys`).
+    """
+    return _build_fernet(_encryption_keys())
+
+
+def get_primary_fernet() -> Fernet:
+    """Fernet for the current key only (used to detect already-rotated tokens)."""
+    return Fernet(_encryption_keys()[0])
+
+
+def key_fingerprint() -> str:
+    """Short, non-reversible identifier of the current key (for checkpoints/logs)."""
+    return hashlib.sha256(_encryption_keys()[0]).hexdigest()[:16]
+
+
+def is_token(value: str) -> bool:
+    """Fernet tokens start with version byte 0x80 ('gAAAAA' once base64-encoded)."""
+    return value.startswith('gAAAAA')
+
+
+def decrypt_value(ciphertext: str, fernet: MultiFernet = None) -> str:
+    """
+    Decrypt a single token, going through the request cache.
+
+    Values that are not Fernet tokens (rows written before encryption) are
+    returned as-is. Raises DecryptionError if no configured key matches.
+    """
+    plaintext = decryption_cache.get(ciphertext)
+    if plaintext is not None:
+        return plaintext
+    if not is_token(ciphertext):
+        return ciphertext
+    try:
+        plaintext = (fernet or get_fernet()).decrypt(ciphertext.encode()).decode()
+    except InvalidToken:
+        raise DecryptionError(
+            "Encrypted value does not match ENCRYPTION_KEY or ENCRYPTION_KEYS_PREVIOUS"
+        )
+    decryption_cache.set(ciphertext, plaintext)
+    return plaintext
+
+
+def decrypt_many(values) -> list:
+    """
+    Bulk decrypt for list pages and exports.
+
+    Accepts raw tokens, EncryptedValue markers (e.g. from values_list) or None,
+    and returns plaintexts in the same order. Repeated tokens are decrypted once.
+    Undecryptable tokens are logged and returned unchanged.
+    """
+    fernet = get_fernet()
+    resolved = {}
+    result = []
+    for value in values:
+        if value is None:
+            result.append(None)
+            continue
+        ciphertext = value.ciphertext if isinstance(value, EncryptedValue) else value
+        if ciphertext not in resolved:
+            try:
+                resolved[ciphertext] = decrypt_value(ciphertext, fernet)
+            except DecryptionError:
+                logger.error("Could not decrypt value; check ENCRYPTION_KEYS_PREVIOUS")
+                resolved[ciphertext] = ciphertext
+        result.append(resolved[ciphertext])
+    return result
+
+
+class EncryptedValue:
+    """
+    Ciphertext read from the DB that has not been decrypted yet.
+
+    Model instances never expose it: EncryptedAttribute decrypts on first
+    attribute access, and EncryptedQuerySet does the same for values() and
+    values_list() rows. It only surfaces when another model's values()
+    follows a relation into an encrypted column (export does this and runs
+    the rows through decrypt_many).
+    """
+    __slots__ = ('ciphertext',)
+
+    def __init__(self, ciphertext: str):
+        self.ciphertext = ciphertext
+
+    def decrypt(self) -> str:
+        return decrypt_value(self.ciphertext)
+
+    def __str__(self):
+        return self.decrypt()
+
+    def __eq__(self, other):
+        if isinstance(other, EncryptedValue):
+            return self.ciphertext == other.ciphertext
+        return self.decrypt() == other
+
+    def __hash__(self):
+        return hash(self.ciphertext)
+
+    def __repr__(self):
+        return '<EncryptedValue>'
+
+
+class EncryptedAttribute(DeferredAttribute):
+    """Decrypts the stored EncryptedValue on first access and keeps the plaintext."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, EncryptedValue):
+            try:
+                plaintext = value.decrypt()
+            except DecryptionError:
+                # Keep the marker so a later save() writes the original token back
+                # instead of encrypting the ciphertext a second time.
+                logger.error(
+                    f"Could not decrypt {self.field.model.__name__}.{self.field.name} "
+                    f"(pk={instance.pk}); check ENCRYPTION_KEYS_PREVIOUS"
+                )
+                return value.ciphertext
+            instance.__dict__[self.field.attname] = plaintext
+            return plaintext
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+def _plaintext(value):
+    if not isinstance(value, EncryptedValue):
+        return value
+    try:
+        return value.decrypt()
+    except DecryptionError:
+        logger.error("Could not decrypt value; check ENCRYPTION_KEYS_PREVIOUS")
+        return value.ciphertext
+
+
+@lru_cache(maxsize=None)
+def _decrypting(iterable_class):
+    """`iterable_class` with the EncryptedValue markers of its rows decrypted."""
+
+    class DecryptingIterable(iterable_class):
+        def __iter__(self):
+            for row in super().__iter__():
+                if isinstance(row, dict):
+                    yield {key: _plaintext(value) for key, value in row.items()}
+                elif hasattr(row, '_make'):  # values_list(named=True)
+                    yield row._make(map(_plaintext, row))
+                elif isinstance(row, tuple):
+                    yield tuple(map(_plaintext, row))
+                else:  # values_list(flat=True)
+                    yield _plaintext(row)
+
+    DecryptingIterable.__name__ = f'Decrypting{iterable_class.__name__}'
+    return DecryptingIterable
+
+
+class EncryptedQuerySet(models.QuerySet):
+    """
+    QuerySet for models with EncryptedFields (`objects = EncryptedQuerySet.as_manager()`).
+
+    values() and values_list() return the plaintext, as with model instances.
+    """
+
+    def values(self, *fields, **expressions):
+        clone = super().values(*fields, **expressions)
+        clone._iterable_class = _decrypting(clone._iterable_class)
+        return clone
+
+    def values_list(self, *fields, flat=False, named=False):
+        clone = super().values_list(*fields, flat=flat, named=named)
+        clone._iterable_class = _decrypting(clone._iterable_class)
+        return clone
+
 
 class EncryptedField(models.CharField):
     """
     Saves encrypted data to the DB and decrypts it when reading.
-    Requires settings.ENCRYPTION_KEY (32 url-safe base64-encoded bytes).
+    Requires settings.ENCRYPTION_KEY (32 url-safe base64-encoded bytes);
+    settings.ENCRYPTION_KEYS_PREVIOUS keeps older keys readable during rotation.
+
+    Decryption is lazy: rows load with the ciphertext and only fields that
+    are actually read get decrypted (once per request, via decryption_cache).
+    Untouched values are written back as the original token on save.
+    Models using it declare `objects = EncryptedQuerySet.as_manager()` so
+    values()/values_list() return plaintext too.
+
+    Fernet tokens are randomized, so the column itself cannot be searched
+    or made unique. Declare a BlindIndexField next to it and query with
+    the `blind` lookup instead (e.g. `Client.objects.filter(phone__blind=...)`).
     """
+    descriptor_class = EncryptedAttribute
 
-    def __init__(self, *args, **kwargs):
-        if not hasattr(settings, 'ENCRYPTION_KEY'):
-            # Generate a key if not present (for dev/test simplicity, though ideally should be from env)
-            settings.ENCRYPTION_KEY = Fernet.generate_key()
-        self.fernet = Fernet(settings.ENCRYPTION_KEY)
-        super().__init__(*args, **kwargs)
+    @property
+    def fernet(self) -> MultiFernet:
+        return get_fernet()
 
     def from_db_value(self, value, expression, connection):
         if value is None:
             return value
-        try:
-            return self.fernet.decrypt(value.encode()).decode()
-        except Exception:
-            # If decryption fails (e.g. key changed), return raw or handle error
-            return value
+        return EncryptedValue(value)
 
     def to_python(self, value):
         if value is None:
             return value
+        if isinstance(value, EncryptedValue):
+            return value.decrypt()
         # If it's already decrypted (normal string usage)
         return value
 
+    def pre_save(self, model_instance, add):
+        value = model_instance.__dict__.get(self.attname)
+        if isinstance(value, EncryptedValue):
+            # Never read, so unchanged: skip the decrypt/re-encrypt round trip
+            return value
+        return super().pre_save(model_instance, add)
+
     def get_prep_value(self, value):
         if value is None:
             return value
+        if isinstance(value, EncryptedValue):
+            return value.ciphertext
         # Encrypt before saving
         return self.fernet.encrypt(value.encode()).decode()
+
+    @property
+    def blind_index_field(self):
+        """The BlindIndexField declared for this column on the same model, if any."""
+        for field in self.model._meta.concrete_fields:
+            if isinstance(field, BlindIndexField) and field.source == self.name:
+                return field
+        return None
+
+
+# ============ BLIND INDEX ============
+
+def normalize_exact(value: str) -> str:
+    """Trim surrounding whitespace only."""
+    return value.strip()
+
+
+def normalize_document(value: str) -> str:
+    """
+    CPF/CNPJ as digits only.
+
+    All-zero documents ('000.000.000-00') are placeholders used when a lead
+    is converted without documentation, so they are not indexed.
+    """
+    digits = re.sub(r'\D', '', value)
+    if not digits.strip('0'):
+        return ''
+    return digits
+
+
+def normalize_phone(value: str, default_country_code: str = '55') -> str:
+    """
+    Phone number in E.164 format (+5519999998888).
+
+    Brazilian numbers written with only DDD + number get the default
+    country code; longer numbers are assumed to already carry one.
+    Anything with letters or '@' is not a phone ('maria1990@gmail.com'
+    must not index as '+1990') and is not indexed.
+    """
+    if re.search(r'[^\d\s()+\-./]', value):
+        return ''
+    digits = re.sub(r'\D', '', value)
+    if not digits:
+        return ''
+    if value.strip().startswith('+'):
+        return f'+{digits}'
+    if len(digits) in (10, 11):
+        return f'+{default_country_code}{digits}'
+    return f'+{digits}'
+
+
+def normalize_contact(value: str) -> str:
+    """E-mail (lowercased) or phone (E.164), for free-form 'WhatsApp/Email' inputs."""
+    value = value.strip()
+    if '@' in value:
+        return value.lower()
+    return normalize_phone(value)
+
+
+NORMALIZERS = {
+    'exact': normalize_exact,
+    'document': normalize_document,
+    'phone': normalize_phone,
+    'contact': normalize_contact,
+}
+
+
+def blind_index(value, normalizer: str = 'exact'):
+    """
+    Keyed HMAC-SHA256 of the normalized value (hex digest).
+
+    Uses settings.BLIND_INDEX_KEY. Returns None for empty values so that
+    unique companion columns accept any number of blanks.
+    """
+    if value is None:
+        return None
+    normalized = NORMALIZERS[normalizer](str(value))
+    if not normalized:
+        return None
+    key = settings.BLIND_INDEX_KEY
+    if isinstance(key, str):
+        key = key.encode()
+    return hmac.new(key, normalized.encode(), hashlib.sha256).hexdigest()
+
+
+class BlindIndexField(models.CharField):
+    """
+    Searchable companion column for an EncryptedField.
+
+    Stores blind_index(<source value>) and is filled automatically on save
+    and bulk_create. Writes that bypass Field.pre_save (QuerySet.update,
+    bulk_update, save(update_fields=...)) must include this column too.
+
+    Usage:
+        phone = EncryptedField("Telefone", max_length=255)
+        phone_bidx = BlindIndexField(source='phone', normalizer='phone')
+    """
+
+    def __init__(self, *args, source=None, normalizer='exact', **kwargs):
+        if normalizer not in NORMALIZERS:
+            raise ValueError(f"Unknown blind index normalizer: {normalizer}")
+        self.source = source
+        self.normalizer = normalizer
+        kwargs.setdefault('max_length', 64)
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('null', True)
+        kwargs.setdefault('blank', True)
+        if not kwargs.get('unique'):
+            kwargs.setdefault('db_index', True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        kwargs['normalizer'] = self.normalizer
+        return name, path, args, kwargs
+
+    def compute(self, value):
+        return blind_index(value, self.normalizer)
+
+    def pre_save(self, model_instance, add):
+        current = model_instance.__dict__.get(self.attname)
+        raw = model_instance.__dict__.get(self.source)
+        if isinstance(raw, EncryptedValue):
+            if current is not None:
+                # Source never read since loading, so the digest is still valid
+                return current
+            try:
+                value = self.compute(raw.decrypt())
+            except DecryptionError:
+                value = None
+            setattr(model_instance, self.attname, value)
+            return value
+        value = self.compute(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+def rebuild_blind_indexes(model, *field_names: str, batch_size: int = 500) -> int:
+    """
+    Recompute the given BlindIndexFields of `model` from the decrypted sources.
+
+    Needed after a normalizer change: a plain save() keeps stored digests of
+    unread sources. Works with historical models too, so migrations can
+    reindex with it. Rows that cannot be decrypted keep their digest.
+    Returns the number of rows whose digests changed.
+    """
+    fields = [model._meta.get_field(name) for name in field_names]
+    changed = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            model._default_manager.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .only('pk', *(f.source for f in fields), *(f.attname for f in fields))[:batch_size]
+        )
+        if not batch:
+            return changed
+        last_pk = batch[-1].pk
+        stale = []
+        for obj in batch:
+            dirty = False
+            for field in fields:
+                raw = obj.__dict__.get(field.source)
+                try:
+                    value = raw.decrypt() if isinstance(raw, EncryptedValue) else raw
+                except DecryptionError:
+                    logger.error(f"Could not decrypt {model.__name__}.{field.source} (pk={obj.pk}); digest kept")
+                    continue
+                digest = field.compute(value)
+                if digest != getattr(obj, field.attname):
+                    setattr(obj, field.attname, digest)
+                    dirty = True
+            if dirty:
+                stale.append(obj)
+        if stale:
+            model._default_manager.bulk_update(stale, [f.attname for f in fields])
+            changed += len(stale)
+
+
+@EncryptedField.register_lookup
+class BlindIndexLookup(Lookup):
+    """
+    `field__blind=value` -> equality on the companion BlindIndexField.
+
+    Runs as an indexed lookup instead of decrypting every row.
+    """
+    lookup_name = 'blind'
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        index_field = self.lhs.output_field.blind_index_field
+        if index_field is None:
+            raise FieldError(
+                f"'{self.lhs.output_field.name}' has no BlindIndexField; "
+                f"the 'blind' lookup is unavailable."
+            )
+        lhs_sql, lhs_params = compiler.compile(Col(self.lhs.alias, index_field))
+        digest = index_field.compute(self.rhs)
+        if digest is None:
+            # Blank values are never indexed, so nothing can match.
+            raise EmptyResultSet
+        return f"{lhs_sql} = %s", [*lhs_params, digest]
@@ -0,0 +1,96 @@
+"""
+Cached role (group membership) resolution.
+
+A user's group names are loaded at most once per cache lifetime and kept on
+the user object (per request) and in the cache backend. The cache entry is
+deleted on every `User.groups` change, so the next request reloads it.
+Nothing is stored in the session: reading roles never writes it.
+
+That deletion only reaches other processes through a shared cache (Redis,
+see REDIS_URL). With a per-process backend (LocMemCache, the default) each
+worker keeps its own entry, so entries live LOCAL_CACHE_TIMEOUT seconds
+only: a revoked role is dropped everywhere within that delay.
+
+RoleMiddleware exposes the result as `request.roles`.
+"""
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+
+CACHE_TIMEOUT = 60 * 60 * 24  # shared cache: invalidated on every change
+LOCAL_CACHE_TIMEOUT = 30  # per-process cache: other workers never see the invalidation
+
+
+def cache_timeout() -> int:
+    return LOCAL_CACHE_TIMEOUT if isinstance(caches['default'], LocMemCache) else CACHE_TIMEOUT
+
+
+def _cache_key(user_id) -> str:
+    return f'roles:{user_id}'
+
+
+def get_roles(user) -> frozenset:
+    """Group names of `user` (empty for anonymous users), without a query once cached."""
+    if not getattr(user, 'is_authenticated', False):
+        return frozenset()
+    roles = getattr(user, '_roles', None)
+    if roles is not None:
+        return roles
+
+    names = cache.get(_cache_key(user.pk))
+    if names is None:
+        names = sorted(user.groups.values_list('name', flat=True))
+        cache.set(_cache_key(user.pk), names, timeout=cache_timeout())
+    user._roles = frozenset(names)
+    return user._roles
+
+
+def has_role(user, *names: str) -> bool:
+    """True if the user belongs to any of the given groups."""
+    return not get_roles(user).isdisjoint(names)
+
+
+def invalidate_roles(*user_ids) -> None:
+    cache.delete_many([_cache_key(pk) for pk in user_ids])
+
+
+def _groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # pk_set is not provided for clear(): remember who is in the group
+        instance._roles_clear_users = list(instance.user_set.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_roles(instance.pk)
+        instance.__dict__.pop('_roles', None)
+    elif action == 'post_clear':
+        invalidate_roles(*getattr(instance, '_roles_clear_users', []))
+    else:
+        invalidate_roles(*(pk_set or []))
+
+
+def _group_renamed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_roles(*instance.user_set.values_list('pk', flat=True))
+
+
+def _group_deleted(sender, instance, **kwargs):
+    invalidate_roles(*instance.user_set.values_list('pk', flat=True))
+
+
+m2m_changed.connect(_groups_changed, sender=User.groups.through, dispatch_uid='roles_groups_changed')
+post_save.connect(_group_renamed, sender=Group, dispatch_uid='roles_group_renamed')
+pre_delete.connect(_group_deleted, sender=Group, dispatch_uid='roles_group_deleted')
+
+
+class RoleMiddleware:
+    """Sets `request.roles` (frozenset of group names). Place after AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.roles = get_roles(request.user)
+        return self.get_response(request)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import warnings
 import dj_database_url
 from pathlib import Path
 from cryptography.fernet import Fernet
@@ -49,6 +50,7 @@ INSTALLED_APPS = [
     "crispy_forms",
     "crispy_tailwind",
     "django.contrib.humanize",
+    "django.contrib.postgres", # Full-text/trigram lookups (core.search)
     "django.contrib.sites", # Required by allauth
 
     # Allauth
@@ -65,6 +67,8 @@ INSTALLED_APPS = [
     'apps.portals',
     'admin_portal',
     'apps.observatory',
+    'apps.analytics',
+    'apps.jobs',
 ]
 
 MIDDLEWARE = [
@@ -74,6 +78,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.security.roles.RoleMiddleware",  # request.roles (cached group names)
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
@@ -172,13 +177,117 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # [NEW] Encryption Configuration
 # CRITICAL: Use persistent key from env to avoid breaking existing encrypted data
-ENCRYPTION_KEY = os.getenv('ENCRYPTION_KEY', Fernet.generate_key().decode())
+ENCRYPTION_KEY = os.getenv('ENCRYPTION_KEY')
+if not ENCRYPTION_KEY:
+    # Ephemeral key for local dev/tests only: anything encrypted with it is unreadable after a restart
+    warnings.warn("ENCRYPTION_KEY not set; using an ephemeral key (never do this in production)", RuntimeWarning)
+    ENCRYPTION_KEY = Fernet.generate_key().decode()
+# Key rotation: comma-separated former keys, still accepted for decryption.
+# Set the new key as ENCRYPTION_KEY, move the old one here, then run
+# `python manage.py rotate_encryption_keys` and drop it once finished.
+ENCRYPTION_KEYS_PREVIOUS = [key.strip() for key in os.getenv('ENCRYPTION_KEYS_PREVIOUS', '').split(',') if key.strip()]
+# Per-request LRU of decrypted values (entries). 0 disables the cache.
+ENCRYPTION_CACHE_SIZE = int(os.getenv('ENCRYPTION_CACHE_SIZE', 1024))
+
+# [NEW] Cache
+# Set REDIS_URL in production: the integration circuit breakers and the role
+# cache (and its invalidation) only work across gunicorn workers with a shared
+# cache. Without it each process keeps its own memory cache, which is only
+# fine for development and single-process runs (outside DEBUG, `manage.py
+# check`/`migrate` warn about it: integrations.W001).
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# [NEW] Dashboard metrics cache (dropped on writes, see apps.analytics.signals)
+DASHBOARD_METRICS_TTL = 60
+
+# [NEW] Admin kanban boards (cards per column page, see admin_portal.kanban)
+ADMIN_KANBAN_PAGE_SIZE = 25
+FINANCE_LEDGER_PAGE_SIZE = 50  # rows per ledger page (keyset on due_date, id)
+
+# [NEW] Cash-flow projection (see apps.finance.services.projection)
+CASHFLOW_OPENING_BALANCE = os.getenv('CASHFLOW_OPENING_BALANCE', '0')  # cash on hand today (R$)
+CASHFLOW_SUCCESS_FEE_RATE = 0.2  # share of LegalCase.contingency_value billed on success
+CASHFLOW_CASE_DURATION_DAYS = 365  # expected time from entry to success fee
+CASHFLOW_SUCCESS_PROBABILITY = {'LOW': 0.7, 'MEDIUM': 0.4, 'HIGH': 0.1}  # by risk_level
+
+# [NEW] Finance bulk operations (see apps.finance.services.recurring / statements)
+FINANCE_RECURRING_HORIZON_DAYS = 90  # recurring expenses are materialized this far ahead
+FINANCE_IMPORT_BATCH_SIZE = 500  # statement transactions reconciled per query
+FINANCE_IMPORT_DATE_TOLERANCE_DAYS = 3  # max distance between posting date and due date
+
+# [NEW] Data export (see apps.analytics.export)
+EXPORT_CHUNK_SIZE = 2000  # rows fetched, decrypted and written per chunk
+
+# [NEW] Background jobs (DB queue processed by `manage.py run_worker`, see apps.jobs)
+JOBS_CONCURRENCY = int(os.getenv('JOBS_CONCURRENCY', 4))
+JOBS_MAX_ATTEMPTS = 3
+JOBS_BACKOFF_SECONDS = 30  # doubles on every failed attempt (max 1h)
+JOBS_LOCK_TIMEOUT = 900  # requeue jobs left RUNNING by a crashed worker
+
+# [NEW] Outbound WhatsApp (queue processed by `manage.py run_whatsapp_sender`, see apps.whatsapp.services.outbound)
+WHATSAPP_PROVIDER = os.getenv('WHATSAPP_PROVIDER', 'mock')  # 'mock', 'twilio' or 'evolution'
+WHATSAPP_SENDER_CONCURRENCY = int(os.getenv('WHATSAPP_SENDER_CONCURRENCY', 4))
+WHATSAPP_MAX_ATTEMPTS = 5
+WHATSAPP_BACKOFF_SECONDS = 30  # doubles on every failed attempt (max 1h)
+WHATSAPP_LOCK_TIMEOUT = 300  # reclaim messages left SENDING by a crashed worker
+WHATSAPP_PER_NUMBER_INTERVAL = 1  # min seconds between two messages to the same number
+WHATSAPP_RATE_LIMITS = {  # messages/second per provider account, per worker process
+    'twilio': 1,
+    'evolution': 5,
+}
+
+# [NEW] Inbound WhatsApp (webhook events processed by `manage.py process_whatsapp_inbox`, see apps.whatsapp.services.inbound)
+WHATSAPP_WEBHOOK_SECRET = os.getenv('WHATSAPP_WEBHOOK_SECRET', '')  # X-Hub-Signature-256 key (non-Twilio providers)
+WHATSAPP_WEBHOOK_URL = os.getenv('WHATSAPP_WEBHOOK_URL', '')  # public URL Twilio signs, if it differs behind the proxy
+WHATSAPP_INBOX_BATCH_SIZE = 500  # webhook events turned into messages per transaction
+WHATSAPP_TRIAGE_ENABLED = True  # unknown numbers go through the intake triage (see apps.whatsapp.services.triage)
+WHATSAPP_TRIAGE_TTL = 60 * 60 * 24  # seconds a triage session stays in the cache
+
+# [NEW] Client portal notifications (see apps.portals.signals / tasks)
+PORTAL_URL = os.getenv('PORTAL_URL', 'https://alessandradonadon.adv.br/portal')
+PORTAL_NOTIFY_DEBOUNCE_SECONDS = 300  # timeline updates of a client within this window go out as one message
+
+# [NEW] Blind Index (searchable encrypted fields)
+# HMAC key for BlindIndexField companion columns. Must be stable: changing it
+# requires recomputing every *_bidx column (see core.security.fields).
+BLIND_INDEX_KEY = os.getenv('BLIND_INDEX_KEY', SECRET_KEY)
 
 # [NEW] Legal Ops Integration (Baterias do Django - Pivado do Clio/Jestor)
 LEGAL_OPS_PROVIDER = 'native'  # Pivado: agora o CRM é nativo
 # Clio/Jestor mantidos apenas como referência caso volte atrás
 # CLIO_ACCESS_TOKEN = os.getenv('CLIO_ACCESS_TOKEN')
 
+# [NEW] Legal Ops Sync Worker (outbox processed by `manage.py run_sync_worker`)
+LEGAL_OPS_SYNC_CONCURRENCY = int(os.getenv('LEGAL_OPS_SYNC_CONCURRENCY', 4))
+LEGAL_OPS_SYNC_MAX_ATTEMPTS = 5
+LEGAL_OPS_SYNC_BACKOFF_SECONDS = 30  # doubles on every failed attempt (max 1h)
+LEGAL_OPS_SYNC_LOCK_TIMEOUT = 600  # reclaim entries left PROCESSING by a crashed worker
+LEGAL_OPS_RATE_LIMITS = {  # requests/second per provider, per worker process
+    'clio': 5,
+}
+
+# [NEW] Legal Ops HTTP (pooled keep-alive sessions, see apps.integrations.base.http)
+LEGAL_OPS_HTTP_POOL_SIZE = int(os.getenv('LEGAL_OPS_HTTP_POOL_SIZE', 10))  # >= LEGAL_OPS_SYNC_CONCURRENCY
+LEGAL_OPS_HTTP_MAX_RETRIES = 3  # on 429/5xx, honoring Retry-After
+LEGAL_OPS_HTTP_BACKOFF_FACTOR = 0.5
+
+# [NEW] Legal Ops Circuit Breaker (state kept in the cache, see apps.integrations.base.circuit_breaker)
+LEGAL_OPS_BREAKER_FAILURE_THRESHOLD = 5  # consecutive failures before failing fast
+LEGAL_OPS_BREAKER_RECOVERY_SECONDS = 60  # open period before a single probe call
+LEGAL_OPS_HEALTH_TTL = 30  # seconds a health-check result is reused
+
 # [NEW] Login Configuration
 LOGIN_URL = '/admin/login/'
 LOGIN_REDIRECT_URL = '/role-redirect/'
@@ -211,6 +320,11 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD') # App Password
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# [NEW] Error Notifications (sent off the request path, see apps.integrations.error_notifier)
+ERROR_NOTIFICATION_WINDOW = 300  # seconds; repeats of an error are sent as one digest per window
+ERROR_NOTIFICATION_MAX_PER_WINDOW = 20  # immediate alerts per process per window
+ERROR_NOTIFICATION_QUEUE_SIZE = 1000  # errors beyond this are dropped (and logged)
+
 # [NEW] Google Authentication (django-allauth)
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
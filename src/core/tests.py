@@ -0,0 +1,402 @@
+"""
+Tests for core security (encryption, blind indexes and cached roles) and search.
+"""
+import json
+import time
+from importlib import import_module
+from io import StringIO
+from unittest.mock import patch
+
+from cryptography.fernet import Fernet
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from apps.clients.models import Client
+from apps.intake.models import Lead
+from apps.legal_cases.models import LegalCase
+from apps.whatsapp.models import Conversation, ConversationMessage, InboundEvent, OutboundMessage
+from in_brief.models import Article
+from admin_portal.models import EncryptionRotationCheckpoint
+from admin_portal.views import is_manager
+from core.search.engine import filter_queryset, search
+from core.search.fields import build_search_document, normalize_search_text
+from core.security.roles import LOCAL_CACHE_TIMEOUT, RoleMiddleware, get_roles
+from core.security.fields import (
+    EncryptedValue,
+    blind_index,
+    decrypt_many,
+    decryption_cache,
+    normalize_contact,
+    normalize_document,
+    normalize_phone,
+)
+
+
+def raw_column(table, column, pk):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {column} FROM {table} WHERE id = %s", [pk])
+        return cursor.fetchone()[0]
+
+
+def set_raw_column(table, column, pk, value):
+    with connection.cursor() as cursor:
+        cursor.execute(f"UPDATE {table} SET {column} = %s WHERE id = %s", [value, pk])
+
+
+class NormalizerTestCase(TestCase):
+    """Tests for blind index normalizers."""
+
+    def test_normalize_document_digits_only(self):
+        self.assertEqual(normalize_document("123.456.789-09"), "12345678909")
+        self.assertEqual(normalize_document("12.345.678/0001-95"), "12345678000195")
+
+    def test_placeholder_document_not_indexed(self):
+        self.assertEqual(normalize_document("000.000.000-00"), "")
+        self.assertIsNone(blind_index("000.000.000-00", 'document'))
+
+    def test_normalize_phone_e164(self):
+        self.assertEqual(normalize_phone("(19) 99999-8888"), "+5519999998888")
+        self.assertEqual(normalize_phone("+55 19 99999-8888"), "+5519999998888")
+        self.assertEqual(normalize_phone("5519999998888"), "+5519999998888")
+
+    def test_e_mail_is_not_a_phone(self):
+        self.assertEqual(normalize_phone("maria1990@gmail.com"), "")
+        self.assertEqual(normalize_phone("ramal 19"), "")
+        self.assertIsNone(blind_index("maria1990@gmail.com", 'phone'))
+
+    def test_normalize_contact(self):
+        self.assertEqual(normalize_contact(" Maria@Example.com "), "maria@example.com")
+        self.assertEqual(normalize_contact("19 99999-8888"), "+5519999998888")
+
+
+class BlindIndexFieldTestCase(TestCase):
+    """Tests for BlindIndexField and the `blind` lookup."""
+
+    def test_index_populated_on_save(self):
+        client = Client.objects.create(
+            full_name="Ana Costa", cpf_cnpj="123.456.789-09", phone="(19) 99999-8888"
+        )
+        self.assertEqual(client.cpf_cnpj_bidx, blind_index("12345678909", 'document'))
+        self.assertEqual(client.phone_bidx, blind_index("+5519999998888", 'phone'))
+
+        self.assertNotIn("99999", raw_column("clients_client", "phone", client.id))
+
+    def test_blind_lookup_matches_normalized_input(self):
+        client = Client.objects.create(
+            full_name="Ana Costa", cpf_cnpj="123.456.789-09", phone="(19) 99999-8888"
+        )
+        Client.objects.create(full_name="Outro", cpf_cnpj="987.654.321-00", phone="(11) 91111-2222")
+
+        self.assertEqual(list(Client.objects.filter(phone__blind="+55 19 99999 8888")), [client])
+        self.assertEqual(list(Client.objects.filter(cpf_cnpj__blind="12345678909")), [client])
+        self.assertFalse(Client.objects.filter(phone__blind="").exists())
+
+    def test_e_mails_sharing_digits_do_not_match(self):
+        Client.objects.create(full_name="Maria", cpf_cnpj="123.456.789-09", phone="maria1990@gmail.com")
+
+        self.assertFalse(Client.objects.filter(phone__blind="joao1990@hotmail.com").exists())
+
+    def test_reindex_migrations_fix_stale_digests(self):
+        """Test that the normalizer migrations rewrite digests of rows never read since."""
+        client = Client.objects.create(full_name="Maria", cpf_cnpj="123.456.789-09", phone="maria1990@gmail.com")
+        lead = Lead.objects.create(full_name="Lead", case_type="OTHER", contact_info="ramal 1990")
+        stale = blind_index("+1990", 'exact')
+        Client.objects.filter(id=client.id).update(phone_bidx=stale)
+        Lead.objects.filter(id=lead.id).update(contact_info_bidx=stale)
+
+        import_module('apps.clients.migrations.0005_reindex_phone').reindex_phones(django_apps, None)
+        import_module('apps.intake.migrations.0009_reindex_contact').reindex_contacts(django_apps, None)
+
+        self.assertIsNone(Client.objects.get(id=client.id).phone_bidx)
+        self.assertIsNone(Lead.objects.get(id=lead.id).contact_info_bidx)
+
+    def test_blind_lookup_on_lead_contact(self):
+        lead = Lead.objects.create(full_name="Lead", case_type="OTHER", contact_info="Lead@Example.com")
+        self.assertEqual(Lead.objects.get(contact_info__blind="lead@example.com"), lead)
+
+    def test_cpf_uniqueness_enforced(self):
+        Client.objects.create(full_name="A", cpf_cnpj="123.456.789-09", phone="1")
+        with self.assertRaises(IntegrityError):
+            Client.objects.create(full_name="B", cpf_cnpj="12345678909", phone="2")
+
+    def test_placeholder_cpf_allowed_multiple_times(self):
+        Client.objects.create(full_name="A", cpf_cnpj="000.000.000-00", phone="1")
+        Client.objects.create(full_name="B", cpf_cnpj="000.000.000-00", phone="2")
+        self.assertEqual(Client.objects.count(), 2)
+
+
+class LazyDecryptionTestCase(TestCase):
+    """Tests for lazy decryption and the per-request cache."""
+
+    def setUp(self):
+        self.lead = Lead.objects.create(full_name="Lead", case_type="OTHER", contact_info="(19) 99999-8888")
+        decryption_cache.clear()
+        decryption_cache.reset_stats()
+
+    def test_loading_rows_does_not_decrypt(self):
+        leads = list(Lead.objects.all())
+        self.assertEqual([lead.full_name for lead in leads], ["Lead"])
+        self.assertEqual(decryption_cache.misses, 0)
+
+    def test_first_access_decrypts_once(self):
+        lead = Lead.objects.get(id=self.lead.id)
+        self.assertEqual(lead.contact_info, "(19) 99999-8888")
+        self.assertEqual(lead.contact_info, "(19) 99999-8888")
+        self.assertEqual(decryption_cache.misses, 1)
+
+        # Same ciphertext loaded again in the same request hits the cache
+        self.assertEqual(Lead.objects.get(id=self.lead.id).contact_info, "(19) 99999-8888")
+        self.assertEqual(decryption_cache.misses, 1)
+        self.assertEqual(decryption_cache.hits, 1)
+
+    def test_untouched_value_keeps_ciphertext_on_save(self):
+        token = raw_column("intake_lead", "contact_info", self.lead.id)
+        lead = Lead.objects.get(id=self.lead.id)
+        lead.score = 90
+        lead.save()
+        self.assertEqual(raw_column("intake_lead", "contact_info", self.lead.id), token)
+        self.assertEqual(decryption_cache.misses, 0)
+
+    def test_changed_value_is_reencrypted(self):
+        lead = Lead.objects.get(id=self.lead.id)
+        lead.contact_info = "novo@example.com"
+        lead.save()
+        self.assertEqual(Lead.objects.get(contact_info__blind="novo@example.com"), self.lead)
+
+    def test_values_return_plaintext(self):
+        self.assertEqual(list(Lead.objects.values_list("contact_info", flat=True)), ["(19) 99999-8888"])
+        self.assertEqual(list(Lead.objects.values("contact_info")), [{"contact_info": "(19) 99999-8888"}])
+        row = Lead.objects.values_list("full_name", "contact_info", named=True).get()
+        self.assertEqual((row.full_name, row.contact_info), ("Lead", "(19) 99999-8888"))
+        self.assertIs(type(row.contact_info), str)
+        self.assertEqual(
+            json.dumps(list(Lead.objects.values_list("id", "contact_info"))),
+            json.dumps([[self.lead.id, "(19) 99999-8888"]]),
+        )
+
+    def test_decrypt_many(self):
+        tokens = [EncryptedValue(raw_column("intake_lead", "contact_info", self.lead.id))]
+        self.assertEqual(
+            decrypt_many(tokens + [tokens[0].ciphertext, None]),
+            ["(19) 99999-8888", "(19) 99999-8888", None],
+        )
+        self.assertEqual(decryption_cache.misses, 1)
+
+    @override_settings(ENCRYPTION_CACHE_SIZE=2)
+    def test_cache_is_bounded(self):
+        for i in range(5):
+            decryption_cache.set(f"token-{i}", str(i))
+        self.assertIsNone(decryption_cache.get("token-0"))
+        self.assertEqual(decryption_cache.get("token-4"), "4")
+
+
+class KeyRotationTestCase(TestCase):
+    """Tests for MultiFernet decryption and rotate_encryption_keys."""
+
+    def setUp(self):
+        self.old_key = settings.ENCRYPTION_KEY
+        self.new_key = Fernet.generate_key().decode()
+        self.lead = Lead.objects.create(full_name="Lead", case_type="OTHER", contact_info="(19) 99999-8888")
+        self.client_obj = Client.objects.create(full_name="Ana", cpf_cnpj="123.456.789-09", phone="(19) 98888-7777")
+        decryption_cache.clear()
+
+    def rotate(self, *args):
+        out = StringIO()
+        call_command("rotate_encryption_keys", *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_previous_keys_still_decrypt(self):
+        with override_settings(ENCRYPTION_KEY=self.new_key, ENCRYPTION_KEYS_PREVIOUS=[self.old_key]):
+            self.assertEqual(Lead.objects.get(id=self.lead.id).contact_info, "(19) 99999-8888")
+
+    def test_rotation_reencrypts_with_current_key(self):
+        message = OutboundMessage.objects.create(to_number="(19) 98888-7777", body="Olá, Ana")
+        event = InboundEvent.objects.create(provider="mock", payload='{"from": "19988887777"}')
+        conversation = Conversation.objects.create(phone="(19) 98888-7777")
+        reply = ConversationMessage.objects.create(conversation=conversation, body="Oi", sent_at=timezone.now())
+        with override_settings(ENCRYPTION_KEY=self.new_key, ENCRYPTION_KEYS_PREVIOUS=[self.old_key]):
+            self.rotate("--batch-size", "1")
+
+        token = raw_column("intake_lead", "contact_info", self.lead.id)
+        self.assertEqual(Fernet(self.new_key).decrypt(token.encode()).decode(), "(19) 99999-8888")
+        token = raw_column("clients_client", "cpf_cnpj", self.client_obj.id)
+        self.assertEqual(Fernet(self.new_key).decrypt(token.encode()).decode(), "123.456.789-09")
+        token = raw_column("whatsapp_outboundmessage", "body", message.id)
+        self.assertEqual(Fernet(self.new_key).decrypt(token.encode()).decode(), "Olá, Ana")
+        for table, column, pk, plaintext in (
+            ("whatsapp_inboundevent", "payload", event.id, '{"from": "19988887777"}'),
+            ("whatsapp_conversation", "phone", conversation.id, "(19) 98888-7777"),
+            ("whatsapp_conversationmessage", "body", reply.id, "Oi"),
+        ):
+            token = raw_column(table, column, pk)
+            self.assertEqual(Fernet(self.new_key).decrypt(token.encode()).decode(), plaintext)
+
+        with override_settings(ENCRYPTION_KEY=self.new_key):
+            decryption_cache.clear()
+            self.assertEqual(Client.objects.get(phone__blind="19988887777"), self.client_obj)
+            self.assertTrue(EncryptionRotationCheckpoint.objects.get(model_label="intake.Lead").completed)
+            self.assertIn("already rotated", self.rotate())
+
+    def test_legacy_plaintext_is_encrypted(self):
+        set_raw_column("intake_lead", "contact_info", self.lead.id, "legacy@example.com")
+        self.assertEqual(Lead.objects.get(id=self.lead.id).contact_info, "legacy@example.com")
+
+        self.rotate("--model", "intake.Lead")
+        token = raw_column("intake_lead", "contact_info", self.lead.id)
+        self.assertNotEqual(token, "legacy@example.com")
+        self.assertEqual(Lead.objects.get(id=self.lead.id).contact_info, "legacy@example.com")
+
+    def test_unreadable_token_is_never_reencrypted(self):
+        foreign = Fernet(Fernet.generate_key()).encrypt(b"lost").decode()
+        set_raw_column("intake_lead", "contact_info", self.lead.id, foreign)
+
+        lead = Lead.objects.get(id=self.lead.id)
+        self.assertEqual(lead.contact_info, foreign)
+        lead.score = 10
+        lead.save()
+        self.assertEqual(raw_column("intake_lead", "contact_info", self.lead.id), foreign)
+
+        self.rotate("--model", "intake.Lead")
+        self.assertEqual(raw_column("intake_lead", "contact_info", self.lead.id), foreign)
+        self.assertEqual(EncryptionRotationCheckpoint.objects.get(model_label="intake.Lead").unreadable, 1)
+
+
+class RoleCacheTestCase(TestCase):
+    """Tests for cached group membership (request.roles)."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.manager_group = Group.objects.create(name='Manager')
+        self.support_group = Group.objects.create(name='Technical_Support')
+        self.user = User.objects.create_user('ana', password='x')
+        self.user.groups.add(self.manager_group)
+
+    def fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_roles_are_loaded_once(self):
+        user = self.fresh_user()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_roles(user), {'Manager'})
+
+        # Next requests: cache hit, no group query
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_roles(user), {'Manager'})
+            self.assertTrue(is_manager(user))
+
+    def test_group_changes_invalidate_cache(self):
+        get_roles(self.fresh_user())
+
+        self.user.groups.add(self.support_group)
+        self.assertEqual(get_roles(self.fresh_user()), {'Manager', 'Technical_Support'})
+
+        self.support_group.user_set.remove(self.user)  # reverse side
+        self.assertEqual(get_roles(self.fresh_user()), {'Manager'})
+
+        self.manager_group.user_set.clear()
+        self.assertEqual(get_roles(self.fresh_user()), frozenset())
+
+    def test_per_process_cache_expires_quickly(self):
+        """A change made by another worker (no local invalidation) is seen within LOCAL_CACHE_TIMEOUT."""
+        self.assertEqual(get_roles(self.fresh_user()), {'Manager'})
+        User.groups.through.objects.filter(user=self.user).delete()  # bypasses m2m_changed
+
+        self.assertEqual(get_roles(self.fresh_user()), {'Manager'})
+        later = time.time() + LOCAL_CACHE_TIMEOUT + 1
+        with patch('django.core.cache.backends.locmem.time.time', return_value=later):
+            self.assertEqual(get_roles(self.fresh_user()), frozenset())
+
+    def test_middleware_sets_request_roles(self):
+        request = RequestFactory().get('/')
+        request.user = self.fresh_user()
+        request.session = SessionStore()
+
+        RoleMiddleware(lambda r: None)(request)
+
+        self.assertEqual(request.roles, {'Manager'})
+        self.assertFalse(request.session.modified)
+
+
+class SearchTestCase(TestCase):
+    """Tests for the search documents and the unified search."""
+    
+    def setUp(self):
+        self.owner = Client.objects.create(
+            full_name="José Conceição", cpf_cnpj="123.456.789-09", phone="19999998888", email="jose@exemplo.com"
+        )
+        LegalCase.objects.create(
+            client=self.owner, title="Revisão de contrato bancário", area='CIVIL',
+            process_number="0001234-56.2024.8.26.0114", description="Juros abusivos",
+        )
+        Lead.objects.create(full_name="Maria José", contact_info="maria@x.com", case_type='SUPER', location="Campinas")
+        user = User.objects.create_user('autor')
+        Article.objects.create(
+            title="Lipedema e planos de saúde", slug="lipedema", author=user,
+            content="<p>Cobertura de <strong>cirurgia</strong></p>",
+        )
+    
+    def test_normalization(self):
+        self.assertEqual(normalize_search_text("  <b>Ação</b>  de   COBRANÇA "), "acao de cobranca")
+        self.assertEqual(
+            build_search_document("Proc. 0001234-56.2024", None),
+            "proc. 0001234-56.2024 0001234562024",
+        )
+    
+    def test_document_is_maintained_without_pii(self):
+        self.owner.refresh_from_db()
+        self.assertEqual(self.owner.search_document, "jose conceicao jose@exemplo.com exemplo com")
+        self.assertNotIn("9999", self.owner.search_document)
+        
+        self.owner.full_name = "José Santos"
+        self.owner.save()
+        self.assertIn("santos", Client.objects.get(pk=self.owner.pk).search_document)
+        
+        Lead.objects.bulk_create([Lead(full_name="Ângela", contact_info="a@x.com", case_type='OTHER')])
+        self.assertEqual(Lead.objects.get(full_name="Ângela").search_document, "angela organico")
+    
+    def test_search_across_types(self):
+        results = search("jose")
+        self.assertEqual({(r['type'], r['title']) for r in results}, {('client', 'José Conceição'), ('lead', 'Maria José')})
+        
+        self.assertEqual([r['type'] for r in search("CIRURGIA")], ['article'])
+        self.assertEqual([r['title'] for r in search("00012345620248260114")], ["Revisão de contrato bancário"])
+        self.assertEqual([r['title'] for r in search("contrato revisão")], ["Revisão de contrato bancário"])
+        self.assertEqual(search("jose", types=['lead'])[0]['url'], f"/portal-admin/leads/{Lead.objects.get().pk}/")
+        self.assertEqual(search("   "), [])
+        self.assertEqual(search("inexistente"), [])
+    
+    def test_search_by_e_mail(self):
+        for query in ("jose@exemplo.com", "JOSE@EXEMPLO", "exemplo.com", "jose exemplo"):
+            self.assertEqual(filter_queryset(Client.objects.all(), query).get(), self.owner, query)
+        self.assertFalse(filter_queryset(Client.objects.all(), "jose@outro.com").exists())
+
+    def test_filter_queryset_keeps_other_filters(self):
+        qs = filter_queryset(Client.objects.filter(status='ARCHIVED'), "jose")
+        self.assertFalse(qs.exists())
+        self.assertEqual(filter_queryset(Client.objects.all(), "Conceicao").get(), self.owner)
+    
+    def test_rebuild_command(self):
+        Client.objects.filter(pk=self.owner.pk).update(search_document='')
+        out = StringIO()
+        call_command('rebuild_search_documents', '--type', 'client', stdout=out)
+        self.assertIn('clients.Client: 1 documents updated', out.getvalue())
+        self.assertEqual(search("conceicao")[0]['id'], self.owner.pk)
+    
+    def test_api(self):
+        url = '/api/search/'
+        self.assertEqual(self.client.get(url, {'q': 'jose'}).status_code, 403)
+        
+        self.client.force_login(User.objects.create_superuser('boss', 'boss@x.com', 'x'))
+        response = self.client.get(url, {'q': 'jose', 'types': 'client,case'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['title'] for r in response.json()['results']], ['José Conceição'])
+        self.assertEqual(self.client.get(url, {'q': 'jose', 'types': 'nope'}).status_code, 400)
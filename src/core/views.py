@@ -2,6 +2,7 @@ from django.shortcuts import render, redirect
 from django.http import JsonResponse
 from django.db import connection
 from django.contrib.auth.decorators import login_required
+from core.security.roles import get_roles
 
 def privacy_policy(request):
     """LGPD Privacy Policy page."""
@@ -10,11 +11,12 @@ def privacy_policy(request):
 @login_required
 def role_based_redirect(request):
     user = request.user
-    if user.is_superuser or user.groups.filter(name='Manager').exists():
+    roles = get_roles(user)
+    if user.is_superuser or 'Manager' in roles:
         return redirect('admin_portal:dashboard')
-    elif user.groups.filter(name='Secretary').exists():
+    elif 'Secretary' in roles:
         return redirect('admin_portal:leads_kanban')
-    elif user.groups.filter(name='Client').exists():
+    elif 'Client' in roles:
         return redirect('/portal/')
     else:
         return redirect('admin_portal:dashboard')
@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from ckeditor_uploader.fields import RichTextUploadingField
+from core.search.fields import SearchDocumentField
 
 class Category(models.Model):
     name = models.CharField(max_length=100, verbose_name="Nome")
@@ -25,6 +26,7 @@ class Article(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
     is_published = models.BooleanField(default=False, verbose_name="Está publicado?")
     published_at = models.DateTimeField(null=True, blank=True, verbose_name="Data de Publicação")
+    search_document = SearchDocumentField(sources=('title', 'summary', 'content'))
 
     class Meta:
         verbose_name = "Artigo"
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:21
+
+import core.search.fields
+from django.db import migrations
+
+from core.search.operations import search_index_operations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('in_brief', '0005_alter_article_options_alter_category_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='search_document',
+            field=core.search.fields.SearchDocumentField(sources=('title', 'summary', 'content')),
+        ),
+        *search_index_operations('in_brief', 'Article', 'in_brief_article'),
+    ]